@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Index approché (IndexIVF) contre recherche exacte : rappel et débit.
+
+Les vecteurs des films sont ceux d'un modèle enregistré (--modele, les
+requêtes sont alors des vecteurs d'utilisateurs du modèle), ou des vecteurs
+synthétiques : --films vecteurs regroupés autour de 1000 directions, de
+normes log-normales (les films populaires ont de grands facteurs), et des
+requêtes tirées de la même façon.
+
+Pour chaque nombre de sondes, le rappel@10 (part des 10 meilleurs films
+exacts retrouvés) et le nombre de requêtes par seconde sont comparés à la
+recherche exacte (produit avec tous les films puis argpartition).
+
+Utilisation :
+    python benchmarks/banc_index_approche.py --films 1000000
+    python benchmarks/banc_index_approche.py --modele donnees/modele_factorisation.npz --sondes 4,16,64
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+NOMBRE = 10
+
+
+def vecteurs_synthetiques(nombre, dimensions, rng, directions):
+    """Vecteurs regroupés autour de directions communes, normes log-normales."""
+    groupes = directions[rng.integers(len(directions), size=nombre)]
+    vecteurs = groupes + rng.normal(0, 0.5, (nombre, dimensions))
+    vecteurs /= np.linalg.norm(vecteurs, axis=1, keepdims=True)
+    return (vecteurs * rng.lognormal(0, 0.5, (nombre, 1))).astype(np.float32)
+
+
+def mesurer_requetes(rechercher, requetes):
+    """Résultats de `rechercher` pour chaque requête et débit (requêtes/s)."""
+    debut = time.perf_counter()
+    resultats = [rechercher(requete) for requete in requetes]
+    return resultats, len(requetes) / (time.perf_counter() - debut)
+
+
+def main(argv=None):
+    """Point d'entrée : construit l'index, mesure rappel et débit, affiche le bilan."""
+    parser = argparse.ArgumentParser(description="Index approché contre recherche exacte")
+    parser.add_argument('--modele', help="Modèle de factorisation enregistré (sinon vecteurs synthétiques)")
+    parser.add_argument('--films', type=int, default=1_000_000)
+    parser.add_argument('--dimensions', type=int, default=16)
+    parser.add_argument('--requetes', type=int, default=1_000)
+    parser.add_argument('--listes', type=int, help="Listes de l'index (défaut : 4 √films)")
+    parser.add_argument('--sondes', default="1,2,4,8,16,32,64,128", help="Nombres de sondes, séparés par des virgules")
+    parser.add_argument('--graine', type=int, default=2025)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    from python.recommandation.index_approche import IndexIVF
+
+    rng = np.random.default_rng(args.graine)
+    if args.modele:
+        from python.recommandation.factorisation import ModeleFactorisation
+        modele = ModeleFactorisation.charger(args.modele)
+        if modele is None:
+            parser.error(f"modèle introuvable : {args.modele}")
+        films = modele.facteurs_films.astype(np.float32)
+        choisis = rng.choice(len(modele.facteurs_utilisateurs), min(args.requetes, len(modele.facteurs_utilisateurs)),
+                             replace=False)
+        requetes = modele.facteurs_utilisateurs[choisis].astype(np.float32)
+    else:
+        directions = rng.normal(0, 1, (1000, args.dimensions))
+        films = vecteurs_synthetiques(args.films, args.dimensions, rng, directions)
+        requetes = vecteurs_synthetiques(args.requetes, args.dimensions, rng, directions)
+    print(f"{len(films)} films de dimension {films.shape[1]}, {len(requetes)} requêtes")
+
+    def exacte(requete):
+        scores = films @ requete
+        return np.argpartition(-scores, NOMBRE - 1)[:NOMBRE].copy()
+    references, debit_exact = mesurer_requetes(exacte, requetes)
+    references = [set(reference.tolist()) for reference in references]
+
+    index = IndexIVF(args.listes, graine=args.graine)
+    debut = time.perf_counter()
+    index.construire(np.arange(len(films)), films)
+    construction = time.perf_counter() - debut
+    print(f"Construction : {index.nb_listes} listes en {construction:.2f} s ; "
+          f"recherche exacte : {debit_exact:.0f} requêtes/s")
+
+    resultats = {'films': len(films), 'dimensions': int(films.shape[1]), 'listes': index.nb_listes,
+                 'construction_s': construction, 'exacte_requetes_par_seconde': debit_exact, 'sondes': []}
+    print(f"{'sondes':>8}{'rappel@10':>11}{'requêtes/s':>12}{'accélération':>14}")
+    for sondes in sorted({min(int(s), index.nb_listes) for s in args.sondes.split(',')}):
+        trouves, debit = mesurer_requetes(lambda requete: index.rechercher(requete, NOMBRE, sondes)[0], requetes)
+        rappel = float(np.mean([len(reference.intersection(t.tolist())) / NOMBRE
+                                for reference, t in zip(references, trouves)]))
+        resultats['sondes'].append({'sondes': sondes, 'rappel@10': rappel, 'requetes_par_seconde': debit})
+        print(f"{sondes:>8}{rappel:>11.3f}{debit:>12.0f}{debit / debit_exact:>13.1f}x")
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Banc d'essai de l'interface graphique, sans interaction.
+
+L'application est démarrée sur une racine Tk retirée de l'écran (withdraw),
+connectée en tant que root (administrateur) sans passer par la fenêtre de
+connexion, puis chaque rafraîchissement coûteux est appelé directement sur
+un jeu de données généré :
+
+    filtrer_films, trier_films, mettre_a_jour_liste_ventes,
+    afficher_statistiques (via rafraichir_stats), mettre_a_jour_recommandations,
+    _calculer_recommandations et FenetreDetailsFilm.charger_commentaires
+
+mettre_a_jour_recommandations n'affiche que la liste déjà calculée ; le
+calcul lui-même (fait en arrière-plan par l'application) est mesuré par
+_calculer_recommandations, avec puis sans l'index de contenu et le
+voisinage déjà construits.
+
+Pour chaque scénario sont relevés le temps réel (traitement des tâches Tk en
+attente compris), le nombre d'éléments Tk (lignes des Treeview, widgets) et
+la mémoire résidente (courante et maximale).
+
+Sans affichage (variable DISPLAY absente), un serveur Xvfb est lancé s'il est
+installé.
+
+Utilisation :
+    python benchmarks/banc_interface.py --taille 100k --sortie resultats_interface.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+TAILLES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+
+
+def demarrer_xvfb():
+    """Lance Xvfb sur un affichage libre si aucun affichage n'est disponible.
+
+    Returns:
+        subprocess.Popen: Le processus Xvfb (None si un affichage existe déjà)
+    """
+    if os.environ.get('DISPLAY'):
+        return None
+    if shutil.which('Xvfb') is None:
+        raise RuntimeError("Aucun affichage (DISPLAY) et Xvfb n'est pas installé")
+    for numero in range(99, 120):
+        if os.path.exists(f"/tmp/.X11-unix/X{numero}"):
+            continue
+        processus = subprocess.Popen(['Xvfb', f':{numero}', '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Attendre que le serveur accepte les connexions
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{numero}"):
+                os.environ['DISPLAY'] = f':{numero}'
+                return processus
+            if processus.poll() is not None:
+                break
+            time.sleep(0.1)
+        processus.kill()
+    raise RuntimeError("Impossible de démarrer Xvfb")
+
+
+def preparer_donnees(dossier, taille, graine):
+    """Génère le jeu de données dans dossier/donnees s'il n'existe pas encore."""
+    from python.import_export.generateur import generer
+
+    donnees = Path(dossier) / 'donnees'
+    if not (donnees / 'films.csv').exists():
+        generer(str(donnees), nb_films=taille, nb_utilisateurs=max(10, taille // 10),
+                nb_ventes=taille, notes_par_utilisateur=10, nb_commentaires=taille, graine=graine)
+    return Path(dossier)
+
+
+def memoire_residente():
+    """Mémoire résidente courante du processus, en Mio."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        return None
+
+
+def memoire_maximale():
+    """Pic de mémoire résidente du processus, en Mio (Linux : ru_maxrss en Kio)."""
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 2**20 if sys.platform == 'darwin' else pic / 2**10
+
+
+def compter_widgets(widget):
+    """Nombre de widgets Tk sous `widget` (inclus)."""
+    return 1 + sum(compter_widgets(enfant) for enfant in widget.winfo_children())
+
+
+class Banc:
+    """Exécute et mesure les scénarios sur une application déjà connectée."""
+
+    def __init__(self, racine, application, repetitions):
+        self.racine = racine
+        self.application = application
+        self.repetitions = repetitions
+        self.resultats = []
+
+    def elements(self):
+        """Nombre d'éléments affichés dans chaque Treeview et nombre total de widgets."""
+        app = self.application
+        compteurs = {'widgets': compter_widgets(self.racine)}
+        for nom in ('tree_films', 'tree_ventes', 'tree_recommandations', 'tree_top_ventes'):
+            arbre = getattr(app, nom, None)
+            if arbre is not None:
+                compteurs[nom] = len(arbre.get_children())
+        return compteurs
+
+    def mesurer(self, nom, action, preparation=None, elements=None):
+        """Mesure `action` plusieurs fois et conserve la synthèse.
+
+        Args:
+            nom (str): Nom du scénario
+            action (callable): Opération mesurée
+            preparation (callable, optional): Exécutée avant chaque mesure,
+                hors chronomètre
+            elements (callable, optional): Compteurs d'éléments propres au
+                scénario (par défaut self.elements)
+        """
+        durees = []
+        memoire_avant = memoire_residente()
+        for _ in range(self.repetitions):
+            if preparation is not None:
+                preparation()
+                self.racine.update_idletasks()
+            debut = time.perf_counter()
+            action()
+            # Inclure la mise en page et le dessin provoqués par l'action
+            self.racine.update_idletasks()
+            durees.append(time.perf_counter() - debut)
+        resultat = {
+            'scenario': nom,
+            'repetitions': len(durees),
+            'min_s': min(durees),
+            'mediane_s': statistics.median(durees),
+            'max_s': max(durees),
+            'elements_tk': (elements or self.elements)(),
+            'rss_avant_mio': memoire_avant,
+            'rss_apres_mio': memoire_residente(),
+            'rss_pic_mio': memoire_maximale(),
+        }
+        self.resultats.append(resultat)
+        print(f"{nom:<40} médiane {resultat['mediane_s'] * 1000:>10.1f} ms  "
+              f"pic RSS {resultat['rss_pic_mio']:>8.1f} Mio  {resultat['elements_tk']}")
+        return resultat
+
+
+def executer(taille, dossier, repetitions, graine):
+    """Démarre l'application sur le jeu de données et exécute tous les scénarios."""
+    import tkinter as tk
+
+    os.chdir(preparer_donnees(dossier, taille, graine))
+
+    from python.interface.gui import ApplicationPrincipale, FenetreDetailsFilm
+
+    class ApplicationBanc(ApplicationPrincipale):
+        """Application sans fenêtre de connexion (connexion faite par le banc)."""
+
+        def afficher_connexion(self):
+            pass
+
+    class FenetreDetailsBanc(FenetreDetailsFilm):
+        """Fenêtre de détails non modale : le banc garde la main."""
+
+        def grab_set(self):
+            pass
+
+    racine = tk.Tk()
+    racine.withdraw()
+    debut = time.perf_counter()
+    app = ApplicationBanc(master=racine)
+    duree_demarrage = time.perf_counter() - debut
+
+    banc = Banc(racine, app, repetitions)
+    banc.resultats.append({'scenario': 'demarrage', 'repetitions': 1, 'min_s': duree_demarrage,
+                           'mediane_s': duree_demarrage, 'max_s': duree_demarrage,
+                           'rss_apres_mio': memoire_residente(), 'rss_pic_mio': memoire_maximale()})
+
+    # Connexion (construit tous les onglets et remplit les listes une première fois)
+    def connexion():
+        for widget in app.winfo_children():
+            widget.destroy()
+        app.connexion_reussie('root')
+    banc.mesurer('connexion_reussie', connexion)
+
+    def filtre(titre='', genre='Tous', note='Toutes', periode='Toutes'):
+        def appliquer():
+            app.entry_titre.delete(0, tk.END)
+            app.entry_titre.insert(0, titre)
+            app.combo_genre.set(genre)
+            app.combo_note.set(note)
+            app.combo_annee.set(periode)
+            app.tri_actuel = {'colonne': None, 'ordre': 'asc'}
+        return appliquer
+
+    for nom, parametres in (('filtrer_films[tous]', {}),
+                            ('filtrer_films[titre "film 1"]', {'titre': 'film 1'}),
+                            ('filtrer_films[genre Drame, note >= 7]', {'genre': 'Drame', 'note': 'Très bons (≥ 7)'})):
+        banc.mesurer(nom, app.filtrer_films, preparation=filtre(**parametres))
+
+    filtre()()
+    app.filtrer_films()
+    for colonne in ('Titre', 'Note', "Date d'ajout"):
+        banc.mesurer(f'trier_films[{colonne}]', lambda colonne=colonne: app.trier_films(colonne))
+
+    banc.mesurer('mettre_a_jour_liste_ventes', app.mettre_a_jour_liste_ventes)
+    banc.mesurer('afficher_statistiques', app.rafraichir_stats)
+    banc.mesurer('mettre_a_jour_recommandations', app.mettre_a_jour_recommandations)
+
+    notes_root = app.gestion_utilisateurs.obtenir_notes_utilisateur('root')
+    recommandations = []
+
+    def calculer_recommandations():
+        recommandations[:] = app._calculer_recommandations('root', notes_root)
+
+    def perimer_structures():
+        # Comme après un rechargement du catalogue : index et voisinage à reconstruire
+        with app._verrou_index:
+            app._index = None
+            app._voisinage = (None, None)
+            app._generation_catalogue += 1
+            app._generation_notes += 1
+
+    banc.mesurer('_calculer_recommandations[a construire]', calculer_recommandations,
+                 preparation=perimer_structures, elements=lambda: {'recommandations': len(recommandations)})
+    banc.mesurer('_calculer_recommandations[construits]', calculer_recommandations,
+                 elements=lambda: {'recommandations': len(recommandations)})
+
+    # Film le plus commenté
+    from python.commentaires.gestion_commentaires import GestionCommentaires
+    nombres = {}
+    for commentaire in GestionCommentaires().commentaires['comments']:
+        nombres[commentaire['film_id']] = nombres.get(commentaire['film_id'], 0) + 1
+    film_id = max(nombres, key=nombres.get)
+    film = next(f for f in app.catalogue.films if f['id'] == film_id)
+
+    fenetres = []
+
+    def ouvrir_details():
+        fenetres.append(FenetreDetailsBanc(app, film, app.gestion_utilisateurs, 'root'))
+
+    def fermer_details():
+        while fenetres:
+            fenetres.pop().destroy()
+
+    banc.mesurer('FenetreDetailsFilm (ouverture)', ouvrir_details, preparation=fermer_details)
+    fenetre = fenetres[-1]
+    banc.mesurer('FenetreDetailsFilm.charger_commentaires', fenetre.charger_commentaires,
+                 elements=lambda: {'commentaires': nombres[film_id],
+                                   'widgets': compter_widgets(fenetre.frame_tous_commentaires)})
+    fermer_details()
+    racine.destroy()
+    return banc.resultats
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'interface graphique CinéFlix")
+    parser.add_argument('--taille', default='1k',
+                        help="1k, 100k, 1M ou un nombre de lignes par collection")
+    parser.add_argument('--dossier', help="Dossier du jeu de données (défaut : benchmarks/.donnees_interface/<taille>)")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--graine', type=int, default=2025)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    taille = TAILLES.get(args.taille) or int(args.taille)
+    dossier = Path(args.dossier or RACINE / 'benchmarks' / '.donnees_interface' / str(taille)).resolve()
+    sortie = Path(args.sortie).resolve() if args.sortie else None
+
+    try:
+        xvfb = demarrer_xvfb()
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    dossier.mkdir(parents=True, exist_ok=True)
+    try:
+        resultats = executer(taille, dossier, args.repetitions, args.graine)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    if sortie:
+        with open(sortie, 'w', encoding='utf-8') as f:
+            json.dump({'taille': taille, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'scenarios': resultats}, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
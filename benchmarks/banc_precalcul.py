@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lot de nuit des recommandations : passage à l'échelle sur 1 à N cœurs.
+
+Un jeu de données est généré (une fois, dans benchmarks/.donnees_precalcul)
+et un modèle de factorisation appris dessus ; le lot (precalculer_tous) est
+ensuite exécuté avec chaque taille de pool demandée. Pour chacune sont
+affichés la durée, le débit (utilisateurs/s), l'accélération par rapport à
+un processus et l'efficacité (accélération / processus).
+
+L'accélération ne peut pas dépasser le nombre de cœurs de la machine
+(affiché en tête) : au-delà, les processus se partagent les mêmes cœurs.
+
+Utilisation :
+    python benchmarks/banc_precalcul.py --utilisateurs 100000 --films 10000
+    python benchmarks/banc_precalcul.py --processus 1,2,4,8 --sortie benchmarks/resultats/precalcul.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+
+def preparer_donnees(dossier, nb_utilisateurs, nb_films, graine):
+    """Génère le jeu de données dans dossier/donnees et apprend le modèle s'ils n'existent pas encore."""
+    from python.import_export.generateur import generer
+
+    donnees = Path(dossier) / 'donnees'
+    if not (donnees / 'films.csv').exists():
+        generer(str(donnees), nb_films=nb_films, nb_utilisateurs=nb_utilisateurs, nb_ventes=1000,
+                notes_par_utilisateur=10, graine=graine)
+    os.chdir(dossier)
+    if not (donnees / 'modele_factorisation.npz').exists():
+        from python.recommandation.factorisation import main as entrainer
+        entrainer(['--index', 'non'])
+    return Path(dossier)
+
+
+def main(argv=None):
+    """Point d'entrée : exécute le lot pour chaque taille de pool et affiche le bilan."""
+    parser = argparse.ArgumentParser(description="Passage à l'échelle du lot de recommandations")
+    parser.add_argument('--utilisateurs', type=int, default=100_000)
+    parser.add_argument('--films', type=int, default=10_000)
+    parser.add_argument('--processus', help="Tailles de pool, séparées par des virgules (défaut : 1, 2, 4... cœurs)")
+    parser.add_argument('--dossier', help="Dossier du jeu de données (défaut : benchmarks/.donnees_precalcul/<taille>)")
+    parser.add_argument('--graine', type=int, default=2025)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    coeurs = os.cpu_count() or 1
+    if args.processus:
+        # Un processus toujours mesuré : c'est la référence de l'accélération
+        tailles = sorted({1} | {int(n) for n in args.processus.split(',')})
+    else:
+        tailles = sorted({min(2 ** n, coeurs) for n in range(coeurs.bit_length() + 1)})
+    dossier = Path(args.dossier or RACINE / 'benchmarks' / '.donnees_precalcul'
+                   / f"{args.utilisateurs}x{args.films}").resolve()
+    sortie = Path(args.sortie).resolve() if args.sortie else None
+    dossier.mkdir(parents=True, exist_ok=True)
+    preparer_donnees(dossier, args.utilisateurs, args.films, args.graine)
+
+    from python.catalogue.gestion import GestionCatalogue
+    from python.recommandation.factorisation import ModeleFactorisation
+    from python.recommandation.precalcul import precalculer_tous
+    from python.utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+
+    catalogue = GestionCatalogue()
+    gestion = GestionUtilisateurs()
+    modele = ModeleFactorisation.charger()
+    utilisateurs = gestion.utilisateurs.keys() | gestion.notes.keys()
+    print(f"{len(utilisateurs)} utilisateurs, {len(catalogue.films)} films, {coeurs} cœurs")
+
+    resultats = {'utilisateurs': len(utilisateurs), 'films': len(catalogue.films), 'coeurs': coeurs, 'pools': []}
+    reference = None
+    print(f"{'processus':>10}{'durée (s)':>11}{'utilisateurs/s':>16}{'accélération':>14}{'efficacité':>12}")
+    for processus in tailles:
+        debut = time.perf_counter()
+        precalculer_tous(catalogue.films, gestion.notes, utilisateurs, modele, processus)
+        duree = time.perf_counter() - debut
+        reference = reference or duree
+        acceleration = reference / duree
+        resultats['pools'].append({'processus': processus, 'duree_s': duree,
+                                   'utilisateurs_par_seconde': len(utilisateurs) / duree,
+                                   'acceleration': acceleration})
+        print(f"{processus:>10}{duree:>11.2f}{len(utilisateurs) / duree:>16.0f}{acceleration:>13.2f}x"
+              f"{acceleration / processus:>12.2f}")
+    if sortie:
+        with open(sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Voisinage des utilisateurs depuis Python : extension C contre NumPy.
+
+Des notes aléatoires (format CSR) sont générées, puis, pour chaque mesure,
+sont chronométrés sur les mêmes utilisateurs :
+- similarites : un utilisateur contre tous les autres ;
+- recommander : voisins et vote sur les films.
+Les deux versions doivent donner les mêmes résultats au bit près : le banc
+s'arrête sinon.
+
+Enfin, les mêmes calculs sont lancés dans un thread pendant que le thread
+principal compte. Le C relâche le GIL pendant tout l'appel : sur une
+machine à plusieurs cœurs, le thread principal garde sa vitesse, alors
+qu'avec NumPy il attend le GIL entre les opérations élémentaires. Sur un
+seul cœur, les deux threads se partagent le processeur dans les deux cas.
+
+Utilisation (après python construire_similarite.py) :
+    python benchmarks/banc_similarite.py
+    python benchmarks/banc_similarite.py --utilisateurs 1000000 --films 100000 --sortie benchmarks/resultats/similarite.json
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+
+def generer(nb_utilisateurs, nb_films, notes_par_utilisateur, graine):
+    """Notes aléatoires au format CSR (films croissants et distincts par utilisateur)."""
+    generateur = np.random.default_rng(graine)
+    tailles = generateur.poisson(notes_par_utilisateur, nb_utilisateurs).clip(1, nb_films)
+    debuts = np.zeros(nb_utilisateurs + 1, dtype=np.int64)
+    np.cumsum(tailles, out=debuts[1:])
+    lignes = np.repeat(np.arange(nb_utilisateurs), tailles)
+    # Films populaires plus souvent notés (loi de puissance), doublons retirés
+    films = (nb_films * generateur.random(len(lignes)) ** 2).astype(np.int64)
+    cles = np.unique(lignes * nb_films + films)
+    lignes, films = cles // nb_films, cles % nb_films
+    np.cumsum(np.bincount(lignes, minlength=nb_utilisateurs), out=debuts[1:])
+    notes = generateur.integers(1, 6, len(films)).astype(np.float32)
+    return debuts, films.astype(np.int32), notes
+
+
+def octets(sortie):
+    """Contenu binaire d'un tableau ou d'un tuple de tableaux (comparaison au bit près)."""
+    return b''.join(np.ascontiguousarray(t).tobytes() for t in (sortie if isinstance(sortie, tuple) else (sortie,)))
+
+
+def chronometrer(fonction, arguments):
+    """Durée moyenne (ms) d'un appel, et le dernier résultat."""
+    debut = time.perf_counter()
+    for argument in arguments:
+        resultat = fonction(argument)
+    return (time.perf_counter() - debut) * 1000 / len(arguments), resultat
+
+
+def increments_par_ms(matrice, utilisateur):
+    """Incréments par ms du thread principal pendant un calcul lancé dans un thread."""
+    fini = threading.Event()
+
+    def calculer():
+        for _ in range(20):
+            matrice.similarites(utilisateur, 'cosinus')
+        fini.set()
+
+    thread = threading.Thread(target=calculer)
+    compteur = 0
+    debut = time.perf_counter()
+    thread.start()
+    while not fini.is_set():
+        compteur += 1
+    thread.join()
+    return compteur / ((time.perf_counter() - debut) * 1000)
+
+
+def main(argv=None):
+    """Point d'entrée : chronomètre les deux versions pour chaque mesure et affiche le bilan."""
+    from python.recommandation.similarite import MESURES, NATIF, MatriceNotes
+
+    parser = argparse.ArgumentParser(description="Voisinage des utilisateurs : C contre NumPy")
+    parser.add_argument('--utilisateurs', type=int, default=100_000)
+    parser.add_argument('--films', type=int, default=10_000)
+    parser.add_argument('--notes', type=int, default=20, help="Notes par utilisateur (moyenne)")
+    parser.add_argument('--requetes', type=int, default=20, help="Utilisateurs chronométrés par mesure")
+    parser.add_argument('--graine', type=int, default=2025)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    if not NATIF:
+        print("Extension C absente : lancer d'abord python construire_similarite.py")
+        return 1
+    debuts, films, notes = generer(args.utilisateurs, args.films, args.notes, args.graine)
+    print(f"{args.utilisateurs} utilisateurs, {args.films} films, {len(films)} notes")
+    versions = {'C': MatriceNotes(debuts, films, notes, args.films, natif=True),
+                'NumPy': MatriceNotes(debuts, films, notes, args.films, natif=False)}
+    requetes = np.random.default_rng(args.graine + 1).integers(0, args.utilisateurs, args.requetes).tolist()
+
+    resultats = []
+    print(f"{'mesure':<10}{'opération':<14}{'C (ms)':>10}{'NumPy (ms)':>12}{'rapport':>10}")
+    for mesure in MESURES:
+        operations = {'similarites': lambda m, u: m.similarites(u, mesure),
+                      'recommander': lambda m, u: m.recommander(u, 10, mesure=mesure)}
+        for nom, operation in operations.items():
+            durees, sorties = {}, {}
+            for version, matrice in versions.items():
+                durees[version], sorties[version] = chronometrer(lambda u: operation(matrice, u), requetes)
+            if octets(sorties['C']) != octets(sorties['NumPy']):
+                print(f"Résultats différents pour {mesure} / {nom}")
+                return 1
+            rapport = durees['NumPy'] / durees['C']
+            print(f"{mesure:<10}{nom:<14}{durees['C']:>10.2f}{durees['NumPy']:>12.2f}{rapport:>9.1f}x")
+            resultats.append({'mesure': mesure, 'operation': nom, 'c_ms': durees['C'],
+                              'numpy_ms': durees['NumPy'], 'rapport': rapport})
+
+    increments = {version: increments_par_ms(matrice, requetes[0]) for version, matrice in versions.items()}
+    print("Thread principal pendant un calcul en arrière-plan : "
+          + ", ".join(f"{version} {n:.0f} incréments/ms" for version, n in increments.items()))
+    if args.sortie:
+        Path(args.sortie).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump({'utilisateurs': args.utilisateurs, 'films': args.films, 'notes': int(len(films)),
+                       'resultats': resultats, 'increments_par_ms': increments}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
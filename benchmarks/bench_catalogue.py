@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bancs d'essai du catalogue (chargement, recherche, filtres).
+"""
+
+import pytest
+
+from python.catalogue.gestion import GestionCatalogue
+
+
+@pytest.mark.parametrize('instantane', [False, True], ids=['csv', 'instantane'])
+def bench_charger_catalogue(benchmark, donnees, instantane):
+    if instantane:
+        GestionCatalogue(utiliser_instantane=True)  # Écrit l'instantané s'il manque
+    catalogue = benchmark(GestionCatalogue, utiliser_instantane=instantane)
+    assert catalogue.films
+
+
+def bench_rechercher_films(benchmark, donnees):
+    catalogue = GestionCatalogue()
+    resultats = benchmark(catalogue.rechercher_films, "acteur 12")
+    assert resultats
+
+
+def bench_rechercher_films_en_cache(benchmark, donnees, cache_actif):
+    catalogue = GestionCatalogue()
+    catalogue.rechercher_films("acteur 12")
+    resultats = benchmark(catalogue.rechercher_films, "acteur 12")
+    assert resultats and catalogue.cache.succes
+
+
+def bench_filtrer_par_genre(benchmark, donnees):
+    catalogue = GestionCatalogue()
+    resultats = benchmark(catalogue.filtrer_par_genre, "Drame")
+    assert resultats
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bancs d'essai des commentaires.
+"""
+
+from python.commentaires.gestion_commentaires import GestionCommentaires
+
+
+def bench_obtenir_commentaires_film(benchmark, donnees):
+    gestion = GestionCommentaires()
+    film_id = gestion.commentaires['comments'][0]['film_id']
+    commentaires = benchmark(gestion.obtenir_commentaires_film, film_id)
+    assert commentaires
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bancs d'essai du calcul des recommandations.
+"""
+
+from python.catalogue.gestion import GestionCatalogue
+from python.commentaires.gestion_commentaires import GestionCommentaires
+from python.recommandation.contenu import IndexContenu, recommander_par_contenu
+from python.recommandation.factorisation import ModeleFactorisation, extraire_notes
+from python.recommandation.recommandations import recommander_par_genre
+from python.utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+
+
+def bench_recommander_par_genre(benchmark, donnees):
+    catalogue = GestionCatalogue()
+    gestion = GestionUtilisateurs()
+    titres = {str(film['id']): film['titre'] for film in catalogue.films}
+    # L'utilisateur ayant le plus de notes, notes indexées par titre comme dans l'interface
+    notes = max(gestion.notes.values(), key=len)
+    notes_utilisateur = {titres[film_id]: note['note'] for film_id, note in notes.items()}
+    recommandations = benchmark(recommander_par_genre, catalogue.films, notes_utilisateur, 10)
+    assert len(recommandations) == 10
+
+
+def _triplets():
+    catalogue = GestionCatalogue()
+    return extraire_notes(GestionUtilisateurs().notes, GestionCommentaires().commentaires['comments'],
+                          catalogue.films)
+
+
+def _entrainer(triplets, iterations=10):
+    modele = ModeleFactorisation()
+    modele.entrainer(triplets, iterations)
+    return modele
+
+
+def bench_entrainer_factorisation(benchmark, donnees):
+    triplets = _triplets()
+    # Apprentissage complet depuis un modèle vide : peu de tours
+    modele = benchmark.pedantic(_entrainer, args=(triplets,), rounds=3, iterations=1)
+    assert len(modele.films) > 0
+
+
+def bench_recommander_par_facteurs(benchmark, donnees):
+    triplets = _triplets()
+    modele = _entrainer(triplets, iterations=3)
+    recommandations = benchmark(modele.recommander, triplets[0][0], 10)
+    assert len(recommandations) == 10
+
+
+def _indexer(films):
+    index = IndexContenu(films)
+    index.calculer_voisins()
+    return index
+
+
+def bench_index_contenu(benchmark, donnees):
+    films = GestionCatalogue().films
+    # Vecteurs TF-IDF et voisins de tout le catalogue
+    index = benchmark.pedantic(_indexer, args=(films,), rounds=3, iterations=1)
+    assert len(index.voisins(films[0]['id'], 10)) == 10
+
+
+def bench_recommander_par_contenu(benchmark, donnees):
+    index = _indexer(GestionCatalogue().films)
+    notes = max(GestionUtilisateurs().notes.values(), key=len)
+    notes_utilisateur = {int(film_id): note['note'] for film_id, note in notes.items()}
+    recommandations = benchmark(recommander_par_contenu, index, notes_utilisateur, 10)
+    assert len(recommandations) == 10
+
+
+def bench_recommander_index_approche(benchmark, donnees):
+    triplets = _triplets()
+    modele = _entrainer(triplets, iterations=3)
+    modele.indexer()
+    recommandations = benchmark(modele.recommander, triplets[0][0], 10)
+    assert len(recommandations) == 10
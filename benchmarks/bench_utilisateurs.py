@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bancs d'essai des notes des utilisateurs.
+"""
+
+from python.catalogue.gestion import GestionCatalogue
+from python.utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+
+
+def _utilisateur_avec_notes(gestion):
+    return next(nom for nom, notes in gestion.notes.items() if notes)
+
+
+def bench_noter_film(benchmark, donnees_modifiables):
+    gestion = GestionUtilisateurs()
+    gestion.set_gestion_catalogue(GestionCatalogue())
+    utilisateur = _utilisateur_avec_notes(gestion)
+    # Chaque note réécrit les fichiers JSON et films.csv : peu de tours
+    succes, _ = benchmark.pedantic(gestion.noter_film, args=(utilisateur, 1, 4),
+                                   rounds=5, iterations=1)
+    assert succes
+
+
+def bench_calculer_moyenne_notes_film(benchmark, donnees):
+    gestion = GestionUtilisateurs()
+    film_id = int(next(iter(gestion.notes[_utilisateur_avec_notes(gestion)])))
+    moyenne = benchmark(gestion.calculer_moyenne_notes_film, film_id)
+    assert moyenne > 0
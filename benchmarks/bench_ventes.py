@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bancs d'essai des ventes (rapport, période, enregistrement).
+"""
+
+from datetime import datetime
+
+import pytest
+
+from python.ventes.gestion_ventes import GestionVentes
+
+FORMATS = ['csv', 'blocs']
+
+
+@pytest.mark.parametrize('format_ventes', FORMATS)
+def bench_obtenir_rapport_ventes(benchmark, donnees, format_ventes):
+    # Sans cache : chaque tour calcule le rapport
+    ventes = GestionVentes(format_ventes=format_ventes)
+    rapport = benchmark(ventes.obtenir_rapport_ventes)
+    assert rapport['nombre_ventes']
+
+
+def bench_obtenir_rapport_ventes_en_cache(benchmark, donnees, cache_actif):
+    ventes = GestionVentes()
+    ventes.obtenir_rapport_ventes()
+    rapport = benchmark(ventes.obtenir_rapport_ventes)
+    assert rapport['nombre_ventes'] and ventes.cache.succes
+
+
+@pytest.mark.parametrize('format_ventes', FORMATS)
+def bench_filtrer_par_periode(benchmark, donnees, format_ventes):
+    ventes = GestionVentes(format_ventes=format_ventes)
+    resultat = benchmark(ventes.filtrer_par_periode, datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59))
+    assert resultat
+
+
+def bench_enregistrer_vente(benchmark, donnees_modifiables):
+    ventes = GestionVentes()
+    ventes.ventes  # Historique chargé avant la mesure
+    vente = benchmark.pedantic(ventes.enregistrer_vente, args=(1, "Film 1", 2, 9.99),
+                               rounds=20, iterations=1)
+    assert vente['film_id'] == 1
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test de charge local du service HTTP/JSON (main.py --serve).
+
+Sans --url, un service est démarré dans un sous-processus sur un jeu de
+données généré (dossier temporaire). N clients asyncio, chacun sur une
+connexion persistante, envoient pendant D secondes un mélange de requêtes :
+
+    recherche        GET  /films?terme=...
+    statistiques     GET  /catalogue/statistiques
+    commentaires     GET  /films/<id>/commentaires
+    rapport          GET  /ventes/rapport?debut=&fin=
+    recommandations  GET  /recommandations/<utilisateur>
+    vente            POST /ventes
+    note             POST /notes
+
+Le débit global et, par type de requête, le nombre d'appels, les erreurs et
+les latences (p50, p95, p99) sont affichés et peuvent être écrits en JSON.
+
+Utilisation :
+    python benchmarks/charge_service.py --clients 50 --duree 10
+    python benchmarks/charge_service.py --url http://127.0.0.1:8765 --clients 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+# Type de requête -> poids dans le mélange
+MELANGE = {
+    'recherche': 30,
+    'statistiques': 10,
+    'commentaires': 15,
+    'rapport': 10,
+    'recommandations': 10,
+    'vente': 15,
+    'note': 10,
+}
+
+LANCEMENT_SERVICE = (
+    "import asyncio, sys\n"
+    "sys.path.insert(0, {racine!r})\n"
+    "from python.service.serveur import servir\n"
+    "asyncio.run(servir('127.0.0.1', 0, pret=lambda port: print(port, flush=True)))\n"
+)
+
+
+def requete_aleatoire(rng, nb_films, nb_utilisateurs):
+    """Tire une requête du mélange : (type, méthode, chemin, corps)."""
+    genre = rng.choices(list(MELANGE), weights=list(MELANGE.values()))[0]
+    film_id = rng.randint(1, nb_films)
+    utilisateur = f"utilisateur{rng.randint(1, nb_utilisateurs):0{len(str(nb_utilisateurs))}d}"
+    if genre == 'recherche':
+        return genre, 'GET', f"/films?terme={quote(f'film {rng.randint(1, 50)}')}", None
+    if genre == 'statistiques':
+        return genre, 'GET', "/catalogue/statistiques", None
+    if genre == 'commentaires':
+        return genre, 'GET', f"/films/{film_id}/commentaires", None
+    if genre == 'rapport':
+        mois = rng.randint(1, 12)
+        return genre, 'GET', f"/ventes/rapport?debut=2025-{mois:02d}-01&fin=2025-{mois:02d}-28", None
+    if genre == 'recommandations':
+        return genre, 'GET', f"/recommandations/{utilisateur}", None
+    if genre == 'vente':
+        return genre, 'POST', "/ventes", {'film_id': film_id, 'titre_film': f"Film {film_id}",
+                                          'quantite': rng.randint(1, 4), 'prix_unitaire': 9.99}
+    return genre, 'POST', "/notes", {'utilisateur': utilisateur, 'film_id': film_id, 'note': rng.randint(1, 5)}
+
+
+async def envoyer(lecteur, ecrivain, hote, methode, chemin, corps):
+    """Envoie une requête sur la connexion et lit la réponse ; retourne le statut."""
+    donnees = json.dumps(corps).encode('utf-8') if corps is not None else b''
+    ecrivain.write(f"{methode} {chemin} HTTP/1.1\r\nHost: {hote}\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(donnees)}\r\n\r\n".encode('latin-1') + donnees)
+    await ecrivain.drain()
+    statut = int((await lecteur.readline()).split()[1])
+    longueur = 0
+    while True:
+        ligne = await lecteur.readline()
+        if ligne in (b'\r\n', b''):
+            break
+        nom, _, valeur = ligne.decode('latin-1').partition(':')
+        if nom.lower() == 'content-length':
+            longueur = int(valeur)
+    await lecteur.readexactly(longueur)
+    return statut
+
+
+async def client(numero, hote, port, fin, mesures, nb_films, nb_utilisateurs, graine):
+    """Envoie des requêtes jusqu'à l'instant `fin` sur une connexion persistante."""
+    rng = random.Random(graine + numero)
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    try:
+        while time.perf_counter() < fin:
+            genre, methode, chemin, corps = requete_aleatoire(rng, nb_films, nb_utilisateurs)
+            debut = time.perf_counter()
+            try:
+                statut = await envoyer(lecteur, ecrivain, hote, methode, chemin, corps)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                mesures[genre]['erreurs'] += 1
+                lecteur, ecrivain = await asyncio.open_connection(hote, port)
+                continue
+            mesures[genre]['latences'].append(time.perf_counter() - debut)
+            if statut >= 400:
+                mesures[genre]['erreurs'] += 1
+    finally:
+        ecrivain.close()
+
+
+def quantile(valeurs, q):
+    """Quantile d'une liste triée (plus proche rang)."""
+    if not valeurs:
+        return 0.0
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+
+async def charger(hote, port, nb_clients, duree, nb_films, nb_utilisateurs, graine):
+    """Lance les clients et retourne (durée effective, mesures par type de requête)."""
+    mesures = {genre: {'latences': [], 'erreurs': 0} for genre in MELANGE}
+    debut = time.perf_counter()
+    await asyncio.gather(*(client(n, hote, port, debut + duree, mesures, nb_films, nb_utilisateurs, graine)
+                           for n in range(nb_clients)))
+    return time.perf_counter() - debut, mesures
+
+
+def demarrer_service(dossier):
+    """Démarre un service sur le jeu de données de `dossier` ; retourne (processus, port)."""
+    processus = subprocess.Popen([sys.executable, '-c', LANCEMENT_SERVICE.format(racine=str(RACINE))],
+                                 cwd=dossier, stdout=subprocess.PIPE, text=True)
+    ligne = processus.stdout.readline()
+    if not ligne:
+        raise RuntimeError("Le service n'a pas démarré")
+    return processus, int(ligne)
+
+
+def main(argv=None):
+    """Point d'entrée : démarre (ou rejoint) le service, lance la charge et affiche le bilan."""
+    parser = argparse.ArgumentParser(description="Test de charge du service CinéFlix")
+    parser.add_argument('--url', help="Service déjà démarré (sinon un service est lancé sur des données générées)")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--duree', type=float, default=10, help="Secondes de charge")
+    parser.add_argument('--films', type=int, default=10_000)
+    parser.add_argument('--utilisateurs', type=int, default=1_000)
+    parser.add_argument('--ventes', type=int, default=100_000)
+    parser.add_argument('--graine', type=int, default=2025)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    processus = dossier = None
+    try:
+        if args.url:
+            adresse = urlsplit(args.url)
+            hote, port = adresse.hostname, adresse.port
+        else:
+            from python.import_export.generateur import generer
+            dossier = tempfile.mkdtemp(prefix="cineflix_charge_")
+            generer(str(Path(dossier) / 'donnees'), nb_films=args.films, nb_utilisateurs=args.utilisateurs,
+                    nb_ventes=args.ventes, nb_commentaires=args.films, graine=args.graine)
+            debut = time.perf_counter()
+            processus, port = demarrer_service(dossier)
+            hote = '127.0.0.1'
+            print(f"Service démarré en {time.perf_counter() - debut:.2f} s (port {port})")
+
+        duree, mesures = asyncio.run(charger(hote, port, args.clients, args.duree, args.films,
+                                             args.utilisateurs, args.graine))
+    finally:
+        if processus is not None:
+            processus.terminate()
+            processus.wait()
+        if dossier is not None:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    total = sum(len(m['latences']) for m in mesures.values())
+    resultats = {'clients': args.clients, 'duree_s': duree, 'requetes': total,
+                 'requetes_par_seconde': total / duree, 'par_type': {}}
+    print(f"{args.clients} clients, {duree:.1f} s : {total} requêtes, {total / duree:.0f} req/s")
+    print(f"{'type':<16}{'appels':>8}{'erreurs':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for genre, mesure in mesures.items():
+        latences = sorted(mesure['latences'])
+        ligne = {'appels': len(latences), 'erreurs': mesure['erreurs'],
+                 'p50_ms': 1000 * quantile(latences, 0.5), 'p95_ms': 1000 * quantile(latences, 0.95),
+                 'p99_ms': 1000 * quantile(latences, 0.99)}
+        resultats['par_type'][genre] = ligne
+        print(f"{genre:<16}{ligne['appels']:>8}{ligne['erreurs']:>9}{ligne['p50_ms']:>9.1f}"
+              f"{ligne['p95_ms']:>9.1f}{ligne['p99_ms']:>9.1f}")
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, indent=2)
+    return 1 if any(m['erreurs'] for m in mesures.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
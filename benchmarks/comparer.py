@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Comparaison de deux résultats de bancs d'essai (fichiers JSON de pytest-benchmark).
+
+Utilisation :
+    python -m pytest benchmarks --benchmark-json=benchmarks/resultats/reference.json
+    ... modifications ...
+    python -m pytest benchmarks --benchmark-json=benchmarks/resultats/courant.json
+    python benchmarks/comparer.py benchmarks/resultats/reference.json benchmarks/resultats/courant.json --seuil 10
+
+Le code de retour vaut 1 si au moins une mesure est plus lente que la
+référence au-delà du seuil (en pourcentage).
+"""
+
+import argparse
+import json
+import sys
+
+STATISTIQUES = ('min', 'median', 'mean', 'max')
+
+
+def charger_resultats(chemin, statistique='median'):
+    """Lit un fichier JSON de pytest-benchmark.
+
+    Returns:
+        dict: {nom complet du banc: durée en secondes}
+    """
+    with open(chemin, 'r', encoding='utf-8') as f:
+        donnees = json.load(f)
+    return {banc['fullname']: banc['stats'][statistique] for banc in donnees['benchmarks']}
+
+
+def comparer(reference, courant, seuil):
+    """Compare deux séries de mesures.
+
+    Args:
+        reference (dict): {nom: durée} de référence
+        courant (dict): {nom: durée} à évaluer
+        seuil (float): Ralentissement toléré, en pourcentage
+
+    Returns:
+        list: Tuples (nom, durée de référence, durée courante, écart en %,
+            régression) pour les bancs présents dans les deux séries
+    """
+    lignes = []
+    for nom in sorted(reference.keys() & courant.keys()):
+        avant, apres = reference[nom], courant[nom]
+        ecart = (apres - avant) / avant * 100 if avant > 0 else 0.0
+        lignes.append((nom, avant, apres, ecart, ecart > seuil))
+    return lignes
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Compare deux résultats de bancs d'essai")
+    parser.add_argument('reference', help="JSON de référence")
+    parser.add_argument('courant', help="JSON à comparer")
+    parser.add_argument('--seuil', type=float, default=10.0,
+                        help="Ralentissement toléré en pourcentage (défaut : 10)")
+    parser.add_argument('--statistique', choices=STATISTIQUES, default='median')
+    args = parser.parse_args(argv)
+
+    reference = charger_resultats(args.reference, args.statistique)
+    courant = charger_resultats(args.courant, args.statistique)
+    lignes = comparer(reference, courant, args.seuil)
+
+    largeur = max((len(nom) for nom, *_ in lignes), default=10)
+    print(f"{'banc':<{largeur}}  {'référence':>12}  {'courant':>12}  {'écart':>8}")
+    for nom, avant, apres, ecart, regression in lignes:
+        marque = "  RÉGRESSION" if regression else ""
+        print(f"{nom:<{largeur}}  {avant * 1000:>10.3f}ms  {apres * 1000:>10.3f}ms  {ecart:>+7.1f}%{marque}")
+
+    for nom in sorted(reference.keys() - courant.keys()):
+        print(f"absent du résultat courant : {nom}")
+    for nom in sorted(courant.keys() - reference.keys()):
+        print(f"nouveau banc : {nom}")
+
+    regressions = sum(1 for *_, regression in lignes if regression)
+    print(f"\n{regressions} régression(s) au-delà de {args.seuil:g} % ({args.statistique})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
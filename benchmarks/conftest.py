@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Jeux de données partagés par les bancs d'essai.
+
+Chaque taille (1k, 100k, 1M lignes par collection) est générée une seule fois
+avec generer_donnees (graine fixe) puis gardée dans le cache de pytest
+(.pytest_cache) : les exécutions suivantes la réutilisent.
+
+La variable d'environnement CINEFLIX_BENCH_TAILLES choisit les tailles
+mesurées (défaut : "1k,100k" ; "1k,100k,1M" pour la série complète).
+
+Le cache des résultats (delai_cache) est désactivé : les bancs mesurent le
+calcul lui-même. Ceux qui mesurent un succès du cache demandent la fixture
+cache_actif.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+from python.configuration import parametres  # noqa: E402
+from python.import_export.generateur import generer  # noqa: E402
+
+TAILLES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+GRAINE = 2025
+
+
+def _tailles_demandees():
+    noms = [nom.strip() for nom in os.environ.get('CINEFLIX_BENCH_TAILLES', '1k,100k').split(',')]
+    inconnues = [nom for nom in noms if nom not in TAILLES]
+    if inconnues:
+        raise pytest.UsageError(f"Tailles inconnues : {', '.join(inconnues)} (choix : {', '.join(TAILLES)})")
+    return noms
+
+
+def _parametres(taille):
+    """Paramètres du générateur pour une taille : environ `taille` lignes par collection."""
+    return {
+        'nb_films': taille,
+        'nb_utilisateurs': max(10, taille // 10),
+        'nb_ventes': taille,
+        'notes_par_utilisateur': 10,
+        'nb_commentaires': taille,
+        'graine': GRAINE,
+    }
+
+
+@pytest.fixture(scope='session', params=_tailles_demandees())
+def jeu_donnees(request):
+    """Dossier contenant donnees/ pour la taille demandée (généré au premier usage)."""
+    nom = request.param
+    parametres = _parametres(TAILLES[nom])
+    racine = request.config.cache.mkdir(f"donnees_bench_{nom}")
+    temoin = racine / 'parametres.txt'
+    if not temoin.exists() or temoin.read_text(encoding='utf-8') != repr(parametres):
+        shutil.rmtree(racine / 'donnees', ignore_errors=True)
+        generer(str(racine / 'donnees'), **parametres)
+        temoin.write_text(repr(parametres), encoding='utf-8')
+    return racine
+
+
+@pytest.fixture(autouse=True)
+def cache_desactive(monkeypatch):
+    """Gestionnaires créés sans cache des résultats (delai_cache à 0)."""
+    monkeypatch.setitem(parametres.VALEURS_PAR_DEFAUT, 'delai_cache', 0)
+
+
+@pytest.fixture
+def cache_actif(cache_desactive, monkeypatch):
+    """Gestionnaires créés avec le cache des résultats, pour mesurer les succès."""
+    monkeypatch.setitem(parametres.VALEURS_PAR_DEFAUT, 'delai_cache', 3600)
+
+
+@pytest.fixture
+def donnees(jeu_donnees, monkeypatch):
+    """Se place dans le jeu de données partagé (opérations en lecture seule)."""
+    monkeypatch.chdir(jeu_donnees)
+    return jeu_donnees
+
+
+@pytest.fixture
+def donnees_modifiables(jeu_donnees, tmp_path, monkeypatch):
+    """Copie du jeu de données pour les opérations qui écrivent dans les fichiers."""
+    shutil.copytree(jeu_donnees / 'donnees', tmp_path / 'donnees')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
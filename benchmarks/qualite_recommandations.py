@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Qualité et coût des moteurs de recommandation (recall@10).
+
+Pour chaque utilisateur ayant au moins --min-notes notes, une note >= 4 est
+mise de côté ; les moteurs apprennent sur les autres notes puis proposent
+10 films. Le recall@10 est la part des films mis de côté retrouvés dans ces
+10 propositions. Le temps d'apprentissage et le temps moyen d'une
+recommandation sont affichés pour chaque moteur :
+
+    popularite      films les plus notés
+    genre           recommander_par_genre (moteur historique de l'interface)
+    factorisation   ModeleFactorisation (ALS)
+    contenu         recommander_par_contenu (voisins TF-IDF des films notés)
+
+Dans les données de generer_donnees.py, le choix des films notés ne dépend
+que de leur popularité : la popularité y est imbattable. Avec --gouts F,
+chaque utilisateur préfère deux genres et choisit ses films avec un poids
+multiplié par 1 + F dans ces genres (même nombre de notes par utilisateur).
+Réalisateurs et acteurs y sont tirés au hasard : le moteur par contenu n'a
+rien à y trouver, il ne sert qu'aux films et utilisateurs sans historique.
+
+Utilisation :
+    python benchmarks/qualite_recommandations.py --films 10000 --utilisateurs 10000
+    python benchmarks/qualite_recommandations.py --gouts 10
+    python benchmarks/qualite_recommandations.py --donnees chemin/vers/dossier_contenant_donnees
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+NOMBRE = 10
+
+
+def notes_avec_gouts(films, triplets, force, graine):
+    """Retire les films notés de `triplets` selon des goûts par genre (voir --gouts)."""
+    rng = np.random.default_rng(graine)
+    ids = np.array([film['id'] for film in films])
+    genres = sorted({film['genre'] for film in films})
+    genre_films = np.array([genres.index(film['genre']) for film in films])
+    note_films = np.array([film.get('note', 5.0) for film in films])
+    # Popularité observée (lissée) de chaque film
+    rang = {film_id: n for n, film_id in enumerate(ids.tolist())}
+    popularite = np.ones(len(films))
+    np.add.at(popularite, [rang[t[1]] for t in triplets if t[1] in rang], 1)
+
+    nombres = Counter(t[0] for t in triplets)
+    utilisateurs = sorted(nombres)
+    preferes = [tuple(sorted(rng.choice(len(genres), size=2, replace=False))) for _ in utilisateurs]
+    par_gout = defaultdict(list)
+    for utilisateur, gout in zip(utilisateurs, preferes):
+        par_gout[gout].append(utilisateur)
+
+    resultat = []
+    for gout, membres in par_gout.items():
+        poids = popularite * np.where(np.isin(genre_films, gout), 1 + force, 1)
+        poids /= poids.sum()
+        for utilisateur in membres:
+            choisis = rng.choice(len(films), size=min(nombres[utilisateur], len(films)), replace=False, p=poids)
+            notes = np.clip(np.rint(note_films[choisis] / 2 + 0.5 + rng.normal(0, 0.8, len(choisis))), 1, 5)
+            resultat.extend(zip([utilisateur] * len(choisis), ids[choisis].tolist(), notes.tolist()))
+    return resultat
+
+
+def separer(triplets, min_notes, graine):
+    """Met de côté une note >= 4 par utilisateur : (apprentissage, {utilisateur: film_id})."""
+    rng = np.random.default_rng(graine)
+    par_utilisateur = defaultdict(list)
+    for triplet in triplets:
+        par_utilisateur[triplet[0]].append(triplet)
+    apprentissage, test = [], {}
+    for utilisateur, notes in par_utilisateur.items():
+        bonnes = [n for n, t in enumerate(notes) if t[2] >= 4]
+        if len(notes) >= min_notes and bonnes:
+            choisie = bonnes[rng.integers(len(bonnes))]
+            test[utilisateur] = notes[choisie][1]
+            notes = notes[:choisie] + notes[choisie + 1:]
+        apprentissage.extend(notes)
+    return apprentissage, test
+
+
+def evaluer(nom, recommander, test, notes_apprentissage):
+    """recall@10 et temps moyen d'une recommandation pour la fonction `recommander`."""
+    trouves = 0
+    debut = time.perf_counter()
+    for utilisateur, film_id in test.items():
+        if film_id in recommander(utilisateur, notes_apprentissage.get(utilisateur, {})):
+            trouves += 1
+    duree = (time.perf_counter() - debut) / max(1, len(test))
+    return {'moteur': nom, 'recall@10': trouves / max(1, len(test)), 'ms_par_utilisateur': 1000 * duree}
+
+
+def main(argv=None):
+    """Point d'entrée : prépare les données, apprend, évalue et affiche le bilan."""
+    parser = argparse.ArgumentParser(description="recall@10 des moteurs de recommandation")
+    parser.add_argument('--donnees', help="Dossier contenant donnees/ (sinon un jeu est généré)")
+    parser.add_argument('--films', type=int, default=5_000)
+    parser.add_argument('--utilisateurs', type=int, default=5_000)
+    parser.add_argument('--notes-par-utilisateur', type=float, default=20)
+    parser.add_argument('--gouts', type=float, default=0, help="Force des goûts par genre (0 : données telles quelles)")
+    parser.add_argument('--min-notes', type=int, default=5)
+    parser.add_argument('--evaluation', type=int, default=1_000, help="Utilisateurs évalués au plus")
+    parser.add_argument('--dimensions', type=int, default=16)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--graine', type=int, default=2025)
+    parser.add_argument('--sortie', help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    from python.recommandation.contenu import IndexContenu, recommander_par_contenu
+    from python.recommandation.factorisation import ModeleFactorisation, extraire_notes
+    from python.recommandation.recommandations import recommander_par_genre
+
+    dossier = None
+    try:
+        if args.donnees:
+            racine = Path(args.donnees)
+        else:
+            from python.import_export.generateur import generer
+            dossier = racine = Path(tempfile.mkdtemp(prefix="cineflix_qualite_"))
+            generer(str(racine / 'donnees'), nb_films=args.films, nb_utilisateurs=args.utilisateurs,
+                    nb_ventes=0, notes_par_utilisateur=args.notes_par_utilisateur,
+                    nb_commentaires=0, graine=args.graine)
+        from python.catalogue.gestion import GestionCatalogue
+        catalogue = GestionCatalogue(fichier_catalogue=str(racine / 'donnees' / 'films.csv'), utiliser_instantane=False)
+        films = catalogue.films
+        with open(racine / 'donnees' / 'notes_utilisateurs.json', encoding='utf-8') as f:
+            notes_utilisateurs = json.load(f)
+        with open(racine / 'donnees' / 'commentaires.json', encoding='utf-8') as f:
+            commentaires = json.load(f)['comments']
+    finally:
+        if dossier is not None:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    triplets = extraire_notes(notes_utilisateurs, commentaires, films)
+    if args.gouts:
+        triplets = notes_avec_gouts(films, triplets, args.gouts, args.graine)
+    apprentissage, test = separer(triplets, args.min_notes, args.graine)
+    test = dict(list(test.items())[:args.evaluation])
+    notes_apprentissage = defaultdict(dict)
+    for utilisateur, film_id, note in apprentissage:
+        notes_apprentissage[utilisateur][film_id] = note
+    print(f"{len(films)} films, {len(notes_utilisateurs)} utilisateurs, {len(triplets)} notes ; "
+          f"{len(test)} utilisateurs évalués")
+
+    resultats = []
+    par_id = {film['id']: film for film in films}
+
+    # Popularité : nombre de notes de chaque film
+    debut = time.perf_counter()
+    populaires = [film_id for film_id, _ in Counter(t[1] for t in apprentissage).most_common()]
+    duree = time.perf_counter() - debut
+
+    def par_popularite(utilisateur, notes):
+        return [film_id for film_id in populaires[:NOMBRE + len(notes)] if film_id not in notes][:NOMBRE]
+    resultats.append({**evaluer('popularite', par_popularite, test, notes_apprentissage), 'apprentissage_s': duree})
+
+    def par_genre(utilisateur, notes):
+        notes_titres = {par_id[film_id]['titre']: note for film_id, note in notes.items() if film_id in par_id}
+        return [film['id'] for film, _ in recommander_par_genre(films, notes_titres, NOMBRE)]
+    resultats.append({**evaluer('genre', par_genre, test, notes_apprentissage), 'apprentissage_s': 0.0})
+
+    modele = ModeleFactorisation(dimensions=args.dimensions, graine=args.graine)
+    debut = time.perf_counter()
+    modele.entrainer(apprentissage, iterations=args.iterations)
+    duree = time.perf_counter() - debut
+
+    def par_facteurs(utilisateur, notes):
+        return [film_id for film_id, _ in modele.recommander(utilisateur, NOMBRE)]
+    resultats.append({**evaluer('factorisation', par_facteurs, test, notes_apprentissage),
+                      'apprentissage_s': duree})
+
+    debut = time.perf_counter()
+    index = IndexContenu(films)
+    index.calculer_voisins()
+    duree = time.perf_counter() - debut
+
+    def par_contenu(utilisateur, notes):
+        return [film['id'] for film, _ in recommander_par_contenu(index, notes, NOMBRE)]
+    resultats.append({**evaluer('contenu', par_contenu, test, notes_apprentissage), 'apprentissage_s': duree})
+
+    print(f"{'moteur':<16}{'recall@10':>10}{'apprentissage s':>17}{'ms/utilisateur':>16}")
+    for resultat in resultats:
+        print(f"{resultat['moteur']:<16}{resultat['recall@10']:>10.3f}{resultat['apprentissage_s']:>17.2f}"
+              f"{resultat['ms_par_utilisateur']:>16.2f}")
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
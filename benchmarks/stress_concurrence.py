@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test de charge de l'écriture concurrente dans donnees/.
+
+N processus partagent le même dossier de données et enchaînent chacun M
+opérations d'écriture (une vente, une note et un commentaire par
+opération), comme le feraient plusieurs instances de l'application. À la
+fin, le contenu des fichiers est vérifié :
+
+    - toutes les ventes sont présentes, avec des identifiants uniques ;
+    - chaque processus retrouve ses M notes et ses M commentaires ;
+    - les identifiants des commentaires sont uniques ;
+    - films.csv et les fichiers JSON se relisent sans erreur.
+
+Le débit (opérations par seconde, tous processus confondus) est affiché.
+
+Utilisation :
+    python benchmarks/stress_concurrence.py --processus 8 --operations 50
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+MOT_DE_PASSE = "Stress!2025a"
+
+
+def travailleur(numero, dossier, operations, depart, resultats):
+    """Enchaîne `operations` ventes, notes et commentaires depuis un processus."""
+    os.chdir(dossier)
+    from python.catalogue.gestion import GestionCatalogue
+    from python.commentaires.gestion_commentaires import GestionCommentaires
+    from python.utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+    from python.ventes.gestion_ventes import GestionVentes
+
+    catalogue = GestionCatalogue()
+    ventes = GestionVentes(format_ventes="csv")
+    utilisateurs = GestionUtilisateurs()
+    utilisateurs.set_gestion_catalogue(catalogue)
+    commentaires = GestionCommentaires()
+    nom = f"stress{numero:03d}"
+    succes, message = utilisateurs.creer_utilisateur(nom, MOT_DE_PASSE, f"{nom}@cineflix.com")
+    if not succes:
+        raise RuntimeError(message)
+    films = list(catalogue.films)[:operations]
+
+    depart.wait(timeout=120)
+    debut = time.perf_counter()
+    for i in range(operations):
+        film = films[i % len(films)]
+        ventes.enregistrer_vente(film['id'], film['titre'], 1 + i % 3, 9.99)
+        utilisateurs.noter_film(nom, film['id'], 1 + (numero + i) % 5)
+        commentaires.ajouter_commentaire(film['id'], nom, 1 + i % 5, f"Commentaire {i} de {nom}")
+    resultats.put((numero, time.perf_counter() - debut))
+
+
+def verifier(dossier, nb_processus, operations, ventes_initiales, commentaires_initiaux):
+    """Vérifie qu'aucune écriture n'a été perdue ; retourne la liste des erreurs."""
+    os.chdir(dossier)
+    from python.catalogue.gestion import GestionCatalogue
+    from python.ventes.gestion_ventes import GestionVentes
+
+    erreurs = []
+    ventes = GestionVentes(format_ventes="csv").ventes
+    attendues = ventes_initiales + nb_processus * operations
+    if len(ventes) != attendues:
+        erreurs.append(f"{len(ventes)} ventes au lieu de {attendues}")
+    doublons = [i for i, n in Counter(v['id'] for v in ventes).items() if n > 1]
+    if doublons:
+        erreurs.append(f"{len(doublons)} identifiants de vente en double")
+
+    with open('donnees/notes_utilisateurs.json', encoding='utf-8') as f:
+        notes = json.load(f)
+    with open('donnees/commentaires.json', encoding='utf-8') as f:
+        commentaires = json.load(f)['comments']
+    if len(commentaires) != commentaires_initiaux + nb_processus * operations:
+        erreurs.append(f"{len(commentaires)} commentaires au lieu de "
+                       f"{commentaires_initiaux + nb_processus * operations}")
+    if len({c['id'] for c in commentaires}) != len(commentaires):
+        erreurs.append("identifiants de commentaire en double")
+    par_auteur = Counter(c['utilisateur'] for c in commentaires)
+    # Relu depuis le CSV : films.csv doit rester lisible après les mises à jour de notes
+    nb_films = min(operations, len(GestionCatalogue(utiliser_instantane=False).films))
+    for numero in range(nb_processus):
+        nom = f"stress{numero:03d}"
+        if len(notes.get(nom, {})) != nb_films:
+            erreurs.append(f"{nom} : {len(notes.get(nom, {}))} notes au lieu de {nb_films}")
+        if par_auteur[nom] != operations:
+            erreurs.append(f"{nom} : {par_auteur[nom]} commentaires au lieu de {operations}")
+    return erreurs
+
+
+def main(argv=None):
+    """Point d'entrée : génère les données, lance les processus et vérifie le résultat."""
+    parser = argparse.ArgumentParser(description="Test de charge des écritures concurrentes dans donnees/")
+    parser.add_argument('--processus', type=int, default=8)
+    parser.add_argument('--operations', type=int, default=50, help="Opérations par processus")
+    parser.add_argument('--films', type=int, default=500)
+    parser.add_argument('--ventes', type=int, default=5000, help="Ventes initiales")
+    parser.add_argument('--graine', type=int, default=2025)
+    args = parser.parse_args(argv)
+
+    from python.import_export.generateur import generer
+
+    dossier = Path(tempfile.mkdtemp(prefix="cineflix_stress_"))
+    try:
+        generer(str(dossier / 'donnees'), nb_films=args.films, nb_utilisateurs=100, nb_ventes=args.ventes,
+                nb_commentaires=200, graine=args.graine)
+        with open(dossier / 'donnees' / 'commentaires.json', encoding='utf-8') as f:
+            commentaires_initiaux = len(json.load(f)['comments'])
+
+        contexte = multiprocessing.get_context('spawn')
+        depart = contexte.Barrier(args.processus)
+        resultats = contexte.Queue()
+        processus = [contexte.Process(target=travailleur, args=(n, str(dossier), args.operations, depart, resultats))
+                     for n in range(args.processus)]
+        debut = time.perf_counter()
+        for p in processus:
+            p.start()
+        for p in processus:
+            p.join()
+        total = time.perf_counter() - debut
+        if any(p.exitcode != 0 for p in processus):
+            print("Un processus a échoué", file=sys.stderr)
+            return 1
+        durees = [resultats.get() for _ in processus]
+
+        operations = args.processus * args.operations
+        plus_long = max(duree for _, duree in durees)
+        print(f"{args.processus} processus x {args.operations} opérations "
+              f"(vente + note + commentaire) : {plus_long:.2f} s, {operations / plus_long:.1f} op/s "
+              f"({3 * operations / plus_long:.1f} écritures/s) ; {total:.2f} s démarrage compris")
+
+        erreurs = verifier(dossier, args.processus, args.operations, args.ventes, commentaires_initiaux)
+        for erreur in erreurs:
+            print(f"ERREUR : {erreur}", file=sys.stderr)
+        if not erreurs:
+            print("Aucune écriture perdue")
+        return 1 if erreurs else 0
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+/**
+ * @file bench_similarite.c
+ * @brief Micro-benchmark des noyaux de similarité
+ *
+ * Génère des notes aléatoires (films choisis selon une popularité de Zipf),
+ * compare un utilisateur à tous les autres avec chaque méthode et vérifie
+ * qu'elles donnent les mêmes similarités :
+ *
+ *   - naïve : l'ancienne double boucle sur des structures Film (titre de 100 octets inclus) ;
+ *   - fusion : jaccard_tries sur les listes triées d'indices ;
+ *   - lot : similarites_utilisateur (bitset de l'utilisateur, une passe sur toutes les notes) ;
+ *   - popcount : jaccard_bitsets_lot sur une matrice de bitsets (un bitset par utilisateur).
+ *
+ * Utilisation : ./bench_similarite [utilisateurs] [films] [notes_par_utilisateur] [requetes]
+ */
+
+#define _POSIX_C_SOURCE 199309L
+
+#include "similarite.h"
+#include <math.h>
+#include <string.h>
+#include <time.h>
+
+typedef struct {
+    int id;
+    char titre[100];
+    float note;
+} Film;
+
+static double maintenant(void) {
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec * 1e-9;
+}
+
+// Générateur xorshift64* : mêmes données d'une exécution à l'autre
+static uint64_t etat = 0x9E3779B97F4A7C15ULL;
+static double aleatoire(void) {
+    etat ^= etat >> 12;
+    etat ^= etat << 25;
+    etat ^= etat >> 27;
+    return (double)((etat * 2685821657736338717ULL) >> 11) / 9007199254740992.0;
+}
+
+static int comparer_entiers(const void* a, const void* b) {
+    int32_t x = *(const int32_t*)a, y = *(const int32_t*)b;
+    return (x > y) - (x < y);
+}
+
+// Ancienne implémentation, gardée comme référence
+static float jaccard_naif(const Film* a, int na, const Film* b, int nb) {
+    int intersection = 0;
+    for (int i = 0; i < na; i++) {
+        for (int j = 0; j < nb; j++) {
+            if (a[i].id == b[j].id) {
+                intersection++;
+                break;
+            }
+        }
+    }
+    int union_films = na + nb - intersection;
+    return union_films ? (float)intersection / union_films : 0.0f;
+}
+
+static void afficher(const char* nom, double duree, int32_t requetes, int32_t nb_utilisateurs, double reference) {
+    double par_requete = duree / requetes;
+    printf("%-22s %12.1f %12.2f %10.1fx\n", nom, par_requete * 1e6, par_requete / nb_utilisateurs * 1e9,
+           reference / par_requete);
+}
+
+int main(int argc, char** argv) {
+    int32_t nb_utilisateurs = argc > 1 ? atoi(argv[1]) : 100000;
+    int32_t nb_films = argc > 2 ? atoi(argv[2]) : 10000;
+    int32_t notes_par_utilisateur = argc > 3 ? atoi(argv[3]) : 20;
+    int32_t requetes = argc > 4 ? atoi(argv[4]) : 20;
+
+    // Popularité de Zipf (exposant 1,1) : fonction de répartition cumulée
+    double* repartition = malloc(sizeof(double) * nb_films);
+    double total = 0.0;
+    for (int32_t f = 0; f < nb_films; f++) total += 1.0 / pow(f + 1, 1.1);
+    double cumul = 0.0;
+    for (int32_t f = 0; f < nb_films; f++) {
+        cumul += 1.0 / pow(f + 1, 1.1) / total;
+        repartition[f] = cumul;
+    }
+
+    int64_t* debuts = malloc(sizeof(int64_t) * ((size_t)nb_utilisateurs + 1));
+    int32_t* films = malloc(sizeof(int32_t) * (size_t)nb_utilisateurs * (2 * notes_par_utilisateur + 1));
+    float* notes = malloc(sizeof(float) * (size_t)nb_utilisateurs * (2 * notes_par_utilisateur + 1));
+    debuts[0] = 0;
+    for (int32_t u = 0; u < nb_utilisateurs; u++) {
+        int32_t n = 1 + (int32_t)(aleatoire() * 2 * notes_par_utilisateur);
+        int32_t* liste = films + debuts[u];
+        for (int32_t k = 0; k < n; k++) {
+            double x = aleatoire();
+            int32_t bas = 0, haut = nb_films - 1;
+            while (bas < haut) {
+                int32_t milieu = (bas + haut) / 2;
+                if (repartition[milieu] < x) bas = milieu + 1;
+                else haut = milieu;
+            }
+            liste[k] = bas;
+        }
+        qsort(liste, n, sizeof(int32_t), comparer_entiers);
+        int32_t uniques = 0;
+        for (int32_t k = 0; k < n; k++) {
+            if (uniques == 0 || liste[k] != liste[uniques - 1]) liste[uniques++] = liste[k];
+        }
+        for (int32_t k = 0; k < uniques; k++) notes[debuts[u] + k] = 1.0f + (float)(int)(aleatoire() * 5);
+        debuts[u + 1] = debuts[u] + uniques;
+    }
+    MatriceNotes matrice = {nb_utilisateurs, nb_films, debuts, films, notes};
+    printf("%d utilisateurs, %d films, %lld notes, %d requêtes\n", nb_utilisateurs, nb_films,
+           (long long)debuts[nb_utilisateurs], requetes);
+
+    // Mêmes listes en structures Film (ancienne représentation)
+    Film* films_naifs = calloc((size_t)debuts[nb_utilisateurs], sizeof(Film));
+    for (int64_t k = 0; k < debuts[nb_utilisateurs]; k++) {
+        films_naifs[k].id = films[k];
+        films_naifs[k].note = notes[k];
+        snprintf(films_naifs[k].titre, sizeof(films_naifs[k].titre), "Film %d", films[k]);
+    }
+    // Un bitset par utilisateur
+    int32_t nb_mots = bitset_nb_mots(nb_films);
+    uint64_t* bitsets = calloc((size_t)nb_utilisateurs * nb_mots, sizeof(uint64_t));
+    int64_t* tailles = malloc(sizeof(int64_t) * nb_utilisateurs);
+    for (int32_t u = 0; u < nb_utilisateurs; u++) {
+        bitset_remplir(bitsets + (int64_t)u * nb_mots, films + debuts[u], debuts[u + 1] - debuts[u]);
+        tailles[u] = debuts[u + 1] - debuts[u];
+    }
+
+    float* sortie = malloc(sizeof(float) * nb_utilisateurs);
+    float* reference = malloc(sizeof(float) * nb_utilisateurs);
+    double ecart = 0.0;
+    double durees[7] = {0};
+    for (int32_t r = 0; r < requetes; r++) {
+        int32_t q = (int32_t)(aleatoire() * nb_utilisateurs);
+        int64_t a = debuts[q], na = debuts[q + 1] - debuts[q];
+        double debut = maintenant();
+        for (int32_t u = 0; u < nb_utilisateurs; u++) {
+            reference[u] = jaccard_naif(films_naifs + a, (int)na, films_naifs + debuts[u], (int)(debuts[u + 1] - debuts[u]));
+        }
+        durees[0] += maintenant() - debut;
+
+        debut = maintenant();
+        for (int32_t u = 0; u < nb_utilisateurs; u++) {
+            sortie[u] = jaccard_tries(films + a, na, films + debuts[u], debuts[u + 1] - debuts[u]);
+        }
+        durees[1] += maintenant() - debut;
+        for (int32_t u = 0; u < nb_utilisateurs; u++) ecart = fmax(ecart, fabs(sortie[u] - reference[u]));
+
+        debut = maintenant();
+        similarites_utilisateur(&matrice, q, SIMILARITE_JACCARD, sortie);
+        durees[2] += maintenant() - debut;
+        for (int32_t u = 0; u < nb_utilisateurs; u++) ecart = fmax(ecart, fabs(sortie[u] - reference[u]));
+
+        debut = maintenant();
+        jaccard_bitsets_lot(bitsets + (int64_t)q * nb_mots, tailles[q], bitsets, tailles, nb_utilisateurs, nb_mots, sortie);
+        durees[3] += maintenant() - debut;
+        for (int32_t u = 0; u < nb_utilisateurs; u++) ecart = fmax(ecart, fabs(sortie[u] - reference[u]));
+
+        // Cosinus et Pearson : lot contre paires triées
+        for (int32_t u = 0; u < nb_utilisateurs; u++) {
+            reference[u] = cosinus_notes(films + a, notes + a, na, films + debuts[u], notes + debuts[u], debuts[u + 1] - debuts[u]);
+        }
+        debut = maintenant();
+        similarites_utilisateur(&matrice, q, SIMILARITE_COSINUS, sortie);
+        durees[4] += maintenant() - debut;
+        for (int32_t u = 0; u < nb_utilisateurs; u++) ecart = fmax(ecart, fabs(sortie[u] - reference[u]));
+
+        for (int32_t u = 0; u < nb_utilisateurs; u++) {
+            reference[u] = pearson_notes(films + a, notes + a, na, films + debuts[u], notes + debuts[u], debuts[u + 1] - debuts[u]);
+        }
+        debut = maintenant();
+        similarites_utilisateur(&matrice, q, SIMILARITE_PEARSON, sortie);
+        durees[5] += maintenant() - debut;
+        for (int32_t u = 0; u < nb_utilisateurs; u++) ecart = fmax(ecart, fabs(sortie[u] - reference[u]));
+
+        int32_t films_recommandes[10];
+        float scores[10];
+        debut = maintenant();
+        recommander_films(&matrice, q, SIMILARITE_COSINUS, 50, 10, films_recommandes, scores);
+        durees[6] += maintenant() - debut;
+    }
+
+    printf("%-22s %12s %12s %11s\n", "méthode", "µs/requête", "ns/paire", "vs naïve");
+    afficher("jaccard naïf (Film)", durees[0], requetes, nb_utilisateurs, durees[0] / requetes);
+    afficher("jaccard fusion", durees[1], requetes, nb_utilisateurs, durees[0] / requetes);
+    afficher("jaccard lot (bitset)", durees[2], requetes, nb_utilisateurs, durees[0] / requetes);
+    afficher("jaccard popcount", durees[3], requetes, nb_utilisateurs, durees[0] / requetes);
+    afficher("cosinus lot", durees[4], requetes, nb_utilisateurs, durees[0] / requetes);
+    afficher("pearson lot", durees[5], requetes, nb_utilisateurs, durees[0] / requetes);
+    afficher("recommander (50 vois.)", durees[6], requetes, nb_utilisateurs, durees[0] / requetes);
+    printf("Écart maximal entre méthodes : %g\n", ecart);
+
+    free(reference);
+    free(sortie);
+    free(tailles);
+    free(bitsets);
+    free(films_naifs);
+    free(notes);
+    free(films);
+    free(debuts);
+    free(repartition);
+    return ecart < 1e-6 ? 0 : 1;
+}
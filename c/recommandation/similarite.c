@@ -1,76 +1,362 @@
 /**
  * @file similarite.c
  * @brief Implémentation des fonctions de calcul de similarité
+ *
+ * Les boucles de comptage sont écrites pour être vectorisées par le
+ * compilateur : popcount sur quatre mots à la fois (instruction POPCNT, ou
+ * VPOPCNTQ avec AVX-512, sous -march=native), test de bits sans branchement.
  */
 
 #include "similarite.h"
+#include <math.h>
 #include <string.h>
 
-float calculer_similarite_jaccard(Utilisateur* user1, Utilisateur* user2) {
-    int intersection = 0;
-    int union_films = 0;
-    
-    // Calcul de l'intersection
-    for (int i = 0; i < user1->nb_films_vus; i++) {
-        for (int j = 0; j < user2->nb_films_vus; j++) {
-            if (user1->films_vus[i].id == user2->films_vus[j].id) {
-                intersection++;
-                break;
-            }
+// Au-delà de ce rapport de tailles, l'intersection cherche les éléments de
+// la liste courte dans la longue au lieu de fusionner les deux
+#define RAPPORT_RECHERCHE 16
+
+// --- Matrice ---
+
+MatriceNotes* matrice_creer(int32_t nb_utilisateurs, int32_t nb_films, const int64_t* debuts,
+                            const int32_t* films, const float* notes) {
+    if (nb_utilisateurs < 0 || nb_films < 0 || debuts == NULL || debuts[0] != 0) return NULL;
+    for (int32_t u = 0; u < nb_utilisateurs; u++) {
+        if (debuts[u + 1] < debuts[u]) return NULL;
+        for (int64_t k = debuts[u]; k < debuts[u + 1]; k++) {
+            if (films[k] < 0 || films[k] >= nb_films || (k > debuts[u] && films[k] <= films[k - 1])) return NULL;
         }
     }
-    
-    // Calcul de l'union
-    union_films = user1->nb_films_vus + user2->nb_films_vus - intersection;
-    
-    // Calcul de la similarité de Jaccard
+    MatriceNotes* matrice = malloc(sizeof(MatriceNotes));
+    if (matrice == NULL) return NULL;
+    matrice->nb_utilisateurs = nb_utilisateurs;
+    matrice->nb_films = nb_films;
+    matrice->debuts = debuts;
+    matrice->films = films;
+    matrice->notes = notes;
+    return matrice;
+}
+
+void matrice_liberer(MatriceNotes* matrice) {
+    free(matrice);
+}
+
+// --- Bitsets ---
+
+int32_t bitset_nb_mots(int32_t nb_films) {
+    return (nb_films + 63) / 64;
+}
+
+void bitset_remplir(uint64_t* mots, const int32_t* films, int64_t nb_films_vus) {
+    for (int64_t i = 0; i < nb_films_vus; i++) {
+        mots[films[i] >> 6] |= (uint64_t)1 << (films[i] & 63);
+    }
+}
+
+static inline int32_t bitset_contient(const uint64_t* mots, int32_t film) {
+    return (int32_t)((mots[film >> 6] >> (film & 63)) & 1);
+}
+
+int64_t bitset_intersection(const uint64_t* a, const uint64_t* b, int32_t nb_mots) {
+    // Quatre accumulateurs indépendants : pas de dépendance entre itérations
+    int64_t c0 = 0, c1 = 0, c2 = 0, c3 = 0;
+    int32_t i = 0;
+    for (; i + 4 <= nb_mots; i += 4) {
+        c0 += __builtin_popcountll(a[i] & b[i]);
+        c1 += __builtin_popcountll(a[i + 1] & b[i + 1]);
+        c2 += __builtin_popcountll(a[i + 2] & b[i + 2]);
+        c3 += __builtin_popcountll(a[i + 3] & b[i + 3]);
+    }
+    for (; i < nb_mots; i++) {
+        c0 += __builtin_popcountll(a[i] & b[i]);
+    }
+    return c0 + c1 + c2 + c3;
+}
+
+static inline float jaccard(int64_t intersection, int64_t na, int64_t nb) {
+    int64_t union_films = na + nb - intersection;
     if (union_films == 0) return 0.0f;
-    return (float)intersection / union_films;
-}
-
-Film* recommander_films(Utilisateur* user, Utilisateur** users, int nb_users, int* nb_recommandations) {
-    // Tableau pour stocker les films recommandés
-    Film* recommandations = NULL;
-    *nb_recommandations = 0;
-    
-    // Trouver l'utilisateur le plus similaire
-    float max_similarite = 0.0f;
-    Utilisateur* user_similaire = NULL;
-    
-    for (int i = 0; i < nb_users; i++) {
-        if (users[i]->id == user->id) continue;
-        
-        float similarite = calculer_similarite_jaccard(user, users[i]);
-        if (similarite > max_similarite) {
-            max_similarite = similarite;
-            user_similaire = users[i];
+    return (float)intersection / (float)union_films;
+}
+
+float jaccard_bitsets(const uint64_t* a, int64_t taille_a, const uint64_t* b, int64_t taille_b, int32_t nb_mots) {
+    return jaccard(bitset_intersection(a, b, nb_mots), taille_a, taille_b);
+}
+
+void jaccard_bitsets_lot(const uint64_t* requete, int64_t taille_requete, const uint64_t* lignes,
+                         const int64_t* tailles, int32_t nb_lignes, int32_t nb_mots, float* sortie) {
+    for (int32_t u = 0; u < nb_lignes; u++) {
+        sortie[u] = jaccard_bitsets(requete, taille_requete, lignes + (int64_t)u * nb_mots, tailles[u], nb_mots);
+    }
+}
+
+// --- Listes triées ---
+
+// Première position de a[debut .. n) où a[position] >= valeur (recherche exponentielle puis dichotomique)
+static int64_t position_suivante(const int32_t* a, int64_t debut, int64_t n, int32_t valeur) {
+    int64_t pas = 1, fin = debut;
+    while (fin < n && a[fin] < valeur) {
+        debut = fin + 1;
+        fin += pas;
+        pas *= 2;
+    }
+    if (fin > n) fin = n;
+    while (debut < fin) {
+        int64_t milieu = debut + (fin - debut) / 2;
+        if (a[milieu] < valeur) debut = milieu + 1;
+        else fin = milieu;
+    }
+    return debut;
+}
+
+int64_t intersection_triee(const int32_t* a, int64_t na, const int32_t* b, int64_t nb) {
+    if (na > nb) {
+        const int32_t* t = a; a = b; b = t;
+        int64_t n = na; na = nb; nb = n;
+    }
+    int64_t intersection = 0;
+    if (na * RAPPORT_RECHERCHE < nb) {
+        int64_t j = 0;
+        for (int64_t i = 0; i < na && j < nb; i++) {
+            j = position_suivante(b, j, nb, a[i]);
+            if (j < nb && b[j] == a[i]) intersection++;
         }
+        return intersection;
+    }
+    int64_t i = 0, j = 0;
+    while (i < na && j < nb) {
+        // Avances sans branchement imprévisible : les deux comparaisons sont calculées
+        int32_t x = a[i], y = b[j];
+        intersection += x == y;
+        i += x <= y;
+        j += y <= x;
     }
-    
-    // Si on trouve un utilisateur similaire, on recommande ses films
-    if (user_similaire != NULL && max_similarite > 0.0f) {
-        // Allouer de la mémoire pour les recommandations
-        recommandations = malloc(sizeof(Film) * user_similaire->nb_films_vus);
-        
-        // Ajouter les films non vus par l'utilisateur
-        for (int i = 0; i < user_similaire->nb_films_vus; i++) {
-            int film_deja_vu = 0;
-            
-            // Vérifier si l'utilisateur a déjà vu ce film
-            for (int j = 0; j < user->nb_films_vus; j++) {
-                if (user_similaire->films_vus[i].id == user->films_vus[j].id) {
-                    film_deja_vu = 1;
-                    break;
-                }
+    return intersection;
+}
+
+float jaccard_tries(const int32_t* a, int64_t na, const int32_t* b, int64_t nb) {
+    return jaccard(intersection_triee(a, na, b, nb), na, nb);
+}
+
+// Sommes des notes communes (ordre des films) : produits, sommes et carrés
+typedef struct {
+    int64_t n;
+    double sx, sy, sxx, syy, sxy;
+} Sommes;
+
+static inline void ajouter(Sommes* s, double x, double y) {
+    s->n++;
+    s->sx += x;
+    s->sy += y;
+    s->sxx += x * x;
+    s->syy += y * y;
+    s->sxy += x * y;
+}
+
+static Sommes sommes_communes(const int32_t* films_a, const float* notes_a, int64_t na,
+                              const int32_t* films_b, const float* notes_b, int64_t nb) {
+    Sommes s = {0};
+    int64_t i = 0, j = 0;
+    while (i < na && j < nb) {
+        if (films_a[i] < films_b[j]) i++;
+        else if (films_b[j] < films_a[i]) j++;
+        else {
+            ajouter(&s, notes_a ? notes_a[i] : 1.0, notes_b ? notes_b[j] : 1.0);
+            i++;
+            j++;
+        }
+    }
+    return s;
+}
+
+static double norme(const float* notes, int64_t n) {
+    if (notes == NULL) return sqrt((double)n);
+    double somme = 0.0;
+    for (int64_t i = 0; i < n; i++) somme += (double)notes[i] * notes[i];
+    return sqrt(somme);
+}
+
+static inline float cosinus(double produit, double norme_a, double norme_b) {
+    if (norme_a == 0.0 || norme_b == 0.0) return 0.0f;
+    return (float)(produit / (norme_a * norme_b));
+}
+
+static inline float pearson(const Sommes* s) {
+    if (s->n < 2) return 0.0f;
+    double n = (double)s->n;
+    double variances = (n * s->sxx - s->sx * s->sx) * (n * s->syy - s->sy * s->sy);
+    if (variances <= 0.0) return 0.0f;
+    return (float)((n * s->sxy - s->sx * s->sy) / sqrt(variances));
+}
+
+float cosinus_notes(const int32_t* films_a, const float* notes_a, int64_t na,
+                    const int32_t* films_b, const float* notes_b, int64_t nb) {
+    Sommes s = sommes_communes(films_a, notes_a, na, films_b, notes_b, nb);
+    return cosinus(s.sxy, norme(notes_a, na), norme(notes_b, nb));
+}
+
+float pearson_notes(const int32_t* films_a, const float* notes_a, int64_t na,
+                    const int32_t* films_b, const float* notes_b, int64_t nb) {
+    Sommes s = sommes_communes(films_a, notes_a, na, films_b, notes_b, nb);
+    return pearson(&s);
+}
+
+// --- Traitements par lot ---
+
+int similarites_utilisateur(const MatriceNotes* matrice, int32_t utilisateur, MesureSimilarite mesure,
+                            float* sortie) {
+    if (utilisateur < 0 || utilisateur >= matrice->nb_utilisateurs) return -1;
+    if (mesure != SIMILARITE_JACCARD && mesure != SIMILARITE_COSINUS && mesure != SIMILARITE_PEARSON) return -1;
+
+    const int64_t* debuts = matrice->debuts;
+    const int32_t* films = matrice->films;
+    const float* notes = matrice->notes;
+    const int32_t* films_requete = films + debuts[utilisateur];
+    int64_t na = debuts[utilisateur + 1] - debuts[utilisateur];
+
+    uint64_t* vus = calloc((size_t)bitset_nb_mots(matrice->nb_films) + 1, sizeof(uint64_t));
+    if (vus == NULL) return -1;
+    bitset_remplir(vus, films_requete, na);
+
+    if (mesure == SIMILARITE_JACCARD) {
+        for (int32_t u = 0; u < matrice->nb_utilisateurs; u++) {
+            int64_t intersection = 0;
+            for (int64_t k = debuts[u]; k < debuts[u + 1]; k++) {
+                intersection += bitset_contient(vus, films[k]);
+            }
+            sortie[u] = jaccard(intersection, na, debuts[u + 1] - debuts[u]);
+        }
+        free(vus);
+        return 0;
+    }
+
+    // Notes de l'utilisateur en vecteur dense : une lecture par film commun
+    float* requete = calloc((size_t)matrice->nb_films + 1, sizeof(float));
+    if (requete == NULL) {
+        free(vus);
+        return -1;
+    }
+    for (int64_t k = 0; k < na; k++) {
+        requete[films_requete[k]] = notes ? notes[debuts[utilisateur] + k] : 1.0f;
+    }
+    double norme_requete = norme(notes ? notes + debuts[utilisateur] : NULL, na);
+    for (int32_t u = 0; u < matrice->nb_utilisateurs; u++) {
+        if (mesure == SIMILARITE_COSINUS) {
+            // Produit scalaire et norme en une passe (requete vaut 0 hors des films de l'utilisateur)
+            double produit = 0.0, carres = 0.0;
+            for (int64_t k = debuts[u]; k < debuts[u + 1]; k++) {
+                double y = notes ? notes[k] : 1.0;
+                produit += (double)requete[films[k]] * y;
+                carres += y * y;
             }
-            
-            // Si le film n'a pas été vu, l'ajouter aux recommandations
-            if (!film_deja_vu) {
-                recommandations[*nb_recommandations] = user_similaire->films_vus[i];
-                (*nb_recommandations)++;
+            sortie[u] = cosinus(produit, norme_requete, sqrt(carres));
+            continue;
+        }
+        Sommes s = {0};
+        for (int64_t k = debuts[u]; k < debuts[u + 1]; k++) {
+            if (bitset_contient(vus, films[k])) {
+                ajouter(&s, requete[films[k]], notes ? notes[k] : 1.0);
             }
         }
+        sortie[u] = pearson(&s);
     }
-    
-    return recommandations;
+    free(requete);
+    free(vus);
+    return 0;
+}
+
+// Vrai si (valeur a, indice a) passe après (valeur b, indice b) : plus petite, ou égale d'indice plus grand
+static inline int apres(double valeur_a, int32_t a, double valeur_b, int32_t b) {
+    return valeur_a < valeur_b || (valeur_a == valeur_b && a > b);
+}
+
+/*
+ * Indices des k plus grandes valeurs strictement positives (valeurs[i], ou
+ * valeurs_f[i] si valeurs est NULL), par valeur décroissante puis indice
+ * croissant. Tas min de taille k : O(n log k).
+ */
+static int32_t meilleurs(const double* valeurs, const float* valeurs_f, int32_t n, int32_t k, int32_t* indices) {
+    int32_t taille = 0;
+    if (k <= 0) return 0;
+#define VALEUR(i) (valeurs ? valeurs[i] : (double)valeurs_f[i])
+    for (int32_t i = 0; i < n; i++) {
+        double v = VALEUR(i);
+        if (!(v > 0.0)) continue;
+        if (taille == k) {
+            if (!apres(VALEUR(indices[0]), indices[0], v, i)) continue;
+            indices[0] = i;
+        } else {
+            indices[taille++] = i;
+            // Remontée du nouvel élément
+            int32_t position = taille - 1;
+            while (position > 0) {
+                int32_t parent = (position - 1) / 2;
+                if (!apres(VALEUR(indices[position]), indices[position], VALEUR(indices[parent]), indices[parent])) break;
+                int32_t t = indices[parent]; indices[parent] = indices[position]; indices[position] = t;
+                position = parent;
+            }
+            continue;
+        }
+        // Descente de la racine remplacée
+        int32_t position = 0;
+        for (;;) {
+            int32_t gauche = 2 * position + 1, droite = gauche + 1, pire = position;
+            if (gauche < taille && apres(VALEUR(indices[gauche]), indices[gauche], VALEUR(indices[pire]), indices[pire])) pire = gauche;
+            if (droite < taille && apres(VALEUR(indices[droite]), indices[droite], VALEUR(indices[pire]), indices[pire])) pire = droite;
+            if (pire == position) break;
+            int32_t t = indices[pire]; indices[pire] = indices[position]; indices[position] = t;
+            position = pire;
+        }
+    }
+    // Tri final par insertion (k petit) : meilleur d'abord
+    for (int32_t i = 1; i < taille; i++) {
+        int32_t courant = indices[i], j = i - 1;
+        while (j >= 0 && apres(VALEUR(indices[j]), indices[j], VALEUR(courant), courant)) {
+            indices[j + 1] = indices[j];
+            j--;
+        }
+        indices[j + 1] = courant;
+    }
+#undef VALEUR
+    return taille;
+}
+
+int recommander_films(const MatriceNotes* matrice, int32_t utilisateur, MesureSimilarite mesure,
+                      int32_t nb_voisins, int32_t nombre, int32_t* films_sortie, float* scores_sortie) {
+    int resultat = -1;
+    float* similarites = malloc(sizeof(float) * ((size_t)matrice->nb_utilisateurs + 1));
+    int32_t* voisins = malloc(sizeof(int32_t) * ((size_t)(nb_voisins > 0 ? nb_voisins : 0) + 1));
+    int32_t* choisis = malloc(sizeof(int32_t) * ((size_t)(nombre > 0 ? nombre : 0) + 1));
+    double* scores = calloc((size_t)matrice->nb_films + 1, sizeof(double));
+    uint64_t* vus = calloc((size_t)bitset_nb_mots(matrice->nb_films) + 1, sizeof(uint64_t));
+    if (similarites == NULL || voisins == NULL || choisis == NULL || scores == NULL || vus == NULL) goto fin;
+    if (similarites_utilisateur(matrice, utilisateur, mesure, similarites) != 0) goto fin;
+
+    // L'utilisateur n'est pas son propre voisin
+    similarites[utilisateur] = 0.0f;
+    int32_t nb = meilleurs(NULL, similarites, matrice->nb_utilisateurs, nb_voisins, voisins);
+
+    const int64_t* debuts = matrice->debuts;
+    bitset_remplir(vus, matrice->films + debuts[utilisateur], debuts[utilisateur + 1] - debuts[utilisateur]);
+    for (int32_t v = 0; v < nb; v++) {
+        int32_t voisin = voisins[v];
+        for (int64_t k = debuts[voisin]; k < debuts[voisin + 1]; k++) {
+            int32_t film = matrice->films[k];
+            if (!bitset_contient(vus, film)) {
+                scores[film] += (double)similarites[voisin] * (matrice->notes ? matrice->notes[k] : 1.0f);
+            }
+        }
+    }
+    resultat = meilleurs(scores, NULL, matrice->nb_films, nombre, choisis);
+    for (int32_t i = 0; i < resultat; i++) {
+        films_sortie[i] = choisis[i];
+        scores_sortie[i] = (float)scores[choisis[i]];
+    }
+
+fin:
+    free(vus);
+    free(scores);
+    free(choisis);
+    free(voisins);
+    free(similarites);
+    return resultat;
 }
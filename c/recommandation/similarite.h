@@ -1,30 +1,112 @@
 /**
  * @file similarite.h
  * @brief Définition des structures et fonctions pour le calcul de similarité
+ *
+ * Les notes sont rangées en matrice creuse par utilisateur (format CSR) :
+ * pour l'utilisateur u, les indices de films films[debuts[u] .. debuts[u+1])
+ * triés par ordre croissant, et les notes correspondantes. Les films sont
+ * désignés par leur indice 0 .. nb_films - 1 (position dans le catalogue ou
+ * le modèle), pas par une structure : une liste de films vus tient dans
+ * quelques lignes de cache.
+ *
+ * Toutes les fonctions sont sans état global : elles peuvent être appelées
+ * depuis plusieurs threads en même temps (la mémoire de travail est allouée
+ * et libérée par appel).
+ *
+ * Propriété de la mémoire : les tableaux de notes et les tampons de sortie
+ * appartiennent toujours à l'appelant, qui les garde valides pendant les
+ * appels. La seule allocation qui survit à un appel est la MatriceNotes
+ * retournée par matrice_creer, à rendre avec matrice_liberer (les tableaux
+ * qu'elle désigne ne sont ni copiés ni libérés).
  */
 
 #ifndef SIMILARITE_H
 #define SIMILARITE_H
 
+#include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
 
-// Structure pour représenter un film
+// Notes de tous les utilisateurs (format CSR, tableaux non copiés)
 typedef struct {
-    int id;
-    char titre[100];
-    float note;
-} Film;
+    int32_t nb_utilisateurs;
+    int32_t nb_films;
+    const int64_t* debuts;  // nb_utilisateurs + 1 valeurs
+    const int32_t* films;   // Indices des films, croissants pour chaque utilisateur
+    const float* notes;     // Notes alignées sur films ; NULL : toutes à 1 (films vus)
+} MatriceNotes;
 
-// Structure pour représenter un utilisateur
-typedef struct {
-    int id;
-    Film* films_vus;
-    int nb_films_vus;
-} Utilisateur;
-
-// Fonctions principales
-float calculer_similarite_jaccard(Utilisateur* user1, Utilisateur* user2);
-Film* recommander_films(Utilisateur* user, Utilisateur** users, int nb_users, int* nb_recommandations);
+typedef enum {
+    SIMILARITE_JACCARD = 0,  // |A ∩ B| / |A ∪ B| sur les films vus
+    SIMILARITE_COSINUS = 1,  // Cosinus des vecteurs de notes
+    SIMILARITE_PEARSON = 2   // Corrélation des notes sur les films notés par les deux
+} MesureSimilarite;
+
+// Matrice validée (debuts croissants, films croissants et dans [0, nb_films)
+// pour chaque utilisateur) ; NULL si les tableaux sont invalides ou si la
+// mémoire manque. Les tableaux ne sont pas copiés.
+MatriceNotes* matrice_creer(int32_t nb_utilisateurs, int32_t nb_films, const int64_t* debuts,
+                            const int32_t* films, const float* notes);
+void matrice_liberer(MatriceNotes* matrice);
+
+// --- Ensembles de films en bitsets (un bit par film, mots de 64 bits) ---
+
+// Nombre de mots de 64 bits pour nb_films films
+int32_t bitset_nb_mots(int32_t nb_films);
+// Met à 1 les bits des films (mots doit être mis à zéro par l'appelant)
+void bitset_remplir(uint64_t* mots, const int32_t* films, int64_t nb_films_vus);
+// Nombre de bits à 1 de a ET b
+int64_t bitset_intersection(const uint64_t* a, const uint64_t* b, int32_t nb_mots);
+// Jaccard de deux bitsets de tailles (nombres de bits à 1) connues
+float jaccard_bitsets(const uint64_t* a, int64_t taille_a, const uint64_t* b, int64_t taille_b, int32_t nb_mots);
+
+// --- Similarités de deux listes triées ---
+
+// Taille de l'intersection de deux listes croissantes (fusion, ou recherche
+// exponentielle quand une liste est beaucoup plus courte)
+int64_t intersection_triee(const int32_t* a, int64_t na, const int32_t* b, int64_t nb);
+float jaccard_tries(const int32_t* a, int64_t na, const int32_t* b, int64_t nb);
+float cosinus_notes(const int32_t* films_a, const float* notes_a, int64_t na,
+                    const int32_t* films_b, const float* notes_b, int64_t nb);
+float pearson_notes(const int32_t* films_a, const float* notes_a, int64_t na,
+                    const int32_t* films_b, const float* notes_b, int64_t nb);
+
+// --- Traitements par lot ---
+
+/**
+ * Similarité d'un utilisateur avec tous les utilisateurs de la matrice.
+ *
+ * Les films de l'utilisateur sont marqués une fois dans un bitset (et ses
+ * notes dans un vecteur dense) ; chaque autre liste est ensuite parcourue
+ * une seule fois. Coût : nombre total de notes, sans comparaison de paires.
+ *
+ * @param sortie Tampon de nb_utilisateurs valeurs fourni par l'appelant
+ *               (similarité de l'utilisateur avec lui-même comprise)
+ * @return 0, ou -1 (utilisateur ou mesure invalide, mémoire insuffisante)
+ */
+int similarites_utilisateur(const MatriceNotes* matrice, int32_t utilisateur, MesureSimilarite mesure,
+                            float* sortie);
+
+/**
+ * Jaccard d'un bitset avec chacune des lignes d'une matrice de bitsets
+ * (nb_lignes x nb_mots), par popcount : adapté aux ensembles denses.
+ *
+ * @param tailles Nombre de bits à 1 de chaque ligne
+ * @param sortie  Tampon de nb_lignes valeurs fourni par l'appelant
+ */
+void jaccard_bitsets_lot(const uint64_t* requete, int64_t taille_requete, const uint64_t* lignes,
+                         const int64_t* tailles, int32_t nb_lignes, int32_t nb_mots, float* sortie);
+
+/**
+ * Recommandations par voisinage : les nb_voisins utilisateurs les plus
+ * similaires votent pour les films qu'ils ont notés (similarité x note) et
+ * que l'utilisateur n'a pas vus.
+ *
+ * @param films_sortie  Tampon de nombre indices de films fourni par l'appelant
+ * @param scores_sortie Tampon de nombre scores fourni par l'appelant
+ * @return Nombre de recommandations écrites (au plus nombre), ou -1
+ */
+int recommander_films(const MatriceNotes* matrice, int32_t utilisateur, MesureSimilarite mesure,
+                      int32_t nb_voisins, int32_t nombre, int32_t* films_sortie, float* scores_sortie);
 
 #endif // SIMILARITE_H
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Point d'entrée de l'apprentissage du modèle de recommandation (factorisation ALS).
+
+Exemples :
+    python entrainer_recommandations.py
+    python entrainer_recommandations.py --incremental
+"""
+
+import sys
+
+from python.recommandation.factorisation import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Point d'entrée du générateur de données synthétiques CinéFlix.
+
+Exemples :
+    python generer_donnees.py donnees_test
+    python generer_donnees.py donnees_charge --films 100000 --utilisateurs 1000000 --ventes 10000000 --format-ventes blocs
+"""
+
+import sys
+
+from python.import_export.generateur import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Point d'entrée de l'import/export en masse des données CinéFlix.
+
+Exemples :
+    python import_masse.py import films gros_catalogue.csv
+    python import_masse.py import ventes ventes.jsonl --donnees donnees
+    python import_masse.py export notes notes.csv
+"""
+
+import sys
+
+from python.import_export.gestion_import import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,13 +8,20 @@ Ce module est responsable de :
 1. L'initialisation de l'environnement de l'application
 2. La configuration du système de journalisation
 3. La vérification et création des dossiers nécessaires
-4. Le lancement de l'interface graphique
+4. Le lancement de l'interface graphique, ou du service HTTP/JSON local
+
+Utilisation :
+    python main.py                                   interface graphique (données locales)
+    python main.py --serve [--hote H] [--port P]     service HTTP/JSON partagé
+    python main.py --client http://127.0.0.1:8765    interface graphique cliente du service
 
 Auteurs: Moss'Ab Mirande-Ney et Arnaud Goddard
 Date: Janvier 2025
 """
 
 # Imports standards pour la gestion des fichiers et du système
+import argparse
+import asyncio
 import os
 import sys
 import json
@@ -25,6 +32,10 @@ import tkinter as tk
 
 # Import de l'interface graphique
 from python.interface.gui import ApplicationPrincipale
+from python.cache.cache_resultats import statistiques_caches
+from python.configuration.journalisation import arreter_journaux, configurer_journaux as installer_journaux
+from python.configuration.parametres import charger_configuration
+from python.instrumentation.metriques import arreter_metriques, demarrer_metriques
 
 # Configuration des chemins de base
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -37,20 +48,14 @@ def configurer_journaux():
     
     Cette fonction :
     - Crée le dossier 'logs' s'il n'existe pas
-    - Configure le format des logs (horodatage, niveau, message)
-    - Met en place la sortie vers un fichier et la console
+    - Applique les niveaux (global et par module) de config/config.json
+    - Écrit les logs en JSON dans logs/app.log (avec rotation) et sur la
+      console depuis un thread dédié : la boucle Tk n'attend jamais le disque
+
+    Returns:
+        QueueListener: Le thread d'écriture des logs (voir arreter_journaux)
     """
-    log_dir = Path(current_dir) / 'logs'
-    log_dir.mkdir(exist_ok=True)
-    
-    logging.basicConfig(
-        level=logging.INFO,  # Niveau de détail des logs
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_dir / 'app.log'),  # Sortie fichier
-            logging.StreamHandler()  # Sortie console
-        ]
-    )
+    return installer_journaux(Path(current_dir) / 'logs')
 
 def verifier_configuration():
     """
@@ -72,23 +77,62 @@ def verifier_configuration():
             json.dump({
                 "theme": "dark",        # Thème par défaut
                 "langue": "fr",         # Langue par défaut
-                "max_recommandations": 5  # Nombre max de recommandations
+                "max_recommandations": 5,  # Nombre max de recommandations
+                "format_ventes": "csv"     # Stockage des ventes ("csv" ou "blocs")
             }, f, indent=4)
 
+def lire_arguments(argv=None):
+    """Analyse la ligne de commande (mode graphique, service ou client)."""
+    parser = argparse.ArgumentParser(description="CinéFlix - Système de recommandation de films")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--serve', action='store_true',
+                      help="Servir les données en HTTP/JSON au lieu d'ouvrir l'interface")
+    mode.add_argument('--client', metavar='URL', help="Ouvrir l'interface sur un service déjà démarré")
+    parser.add_argument('--hote', help="Adresse d'écoute du service (défaut : hote_service de config.json)")
+    parser.add_argument('--port', type=int, help="Port du service (défaut : port_service de config.json)")
+    return parser.parse_args(argv)
+
+def servir(config, arguments):
+    """Lance le service HTTP/JSON jusqu'à l'interruption (Ctrl+C)."""
+    from python.service.serveur import servir as servir_requetes
+
+    hote = arguments.hote or config["hote_service"]
+    port = arguments.port if arguments.port is not None else config["port_service"]
+    try:
+        asyncio.run(servir_requetes(hote, port))
+    except KeyboardInterrupt:
+        logging.getLogger(__name__).info("Service arrêté")
+
 def main():
     """
     Fonction principale de l'application.
     
     Cette fonction :
-    1. Configure l'environnement (logs, config)
-    2. Initialise la fenêtre principale
+    1. Configure l'environnement (logs, config, métriques)
+    2. Initialise la fenêtre principale, ou démarre le service (--serve)
     3. Lance l'interface graphique
     4. Gère les erreurs potentielles
     """
+    arguments = lire_arguments()
+    metriques = []
+    journaux = None
+    service = None
     try:
         # Étape 1 : Configuration de l'environnement
-        configurer_journaux()
+        journaux = configurer_journaux()
         verifier_configuration()
+        config = charger_configuration()
+        metriques = demarrer_metriques(Path(current_dir) / 'logs',
+                                       config["intervalle_metriques"],
+                                       config["port_metriques"],
+                                       {'caches': statistiques_caches})
+        
+        if arguments.serve:
+            servir(config, arguments)
+            return
+        if arguments.client:
+            from python.service.client import ClientService
+            service = ClientService(arguments.client)
         
         # Étape 2 : Création de la fenêtre principale
         root = tk.Tk()
@@ -97,13 +141,19 @@ def main():
         root.minsize(800, 600)     # Taille minimale
         
         # Étape 3 : Lancement de l'application
-        app = ApplicationPrincipale(root)
+        app = ApplicationPrincipale(root, service=service)
         root.mainloop()
         
     except Exception as e:
         # Gestion des erreurs avec journalisation
         logging.error(f'Erreur: {str(e)}', exc_info=True)
         sys.exit(1)
+    finally:
+        # Dernier export des mesures et écriture des derniers logs avant de quitter
+        if service is not None:
+            service.fermer()
+        arreter_metriques(metriques)
+        arreter_journaux(journaux)
 
 # Point d'entrée du programme
 if __name__ == "__main__":
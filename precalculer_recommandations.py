@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Point d'entrée du lot de nuit des recommandations : calcule la liste de
+chaque utilisateur avec un pool de processus et l'enregistre dans donnees/.
+
+Exemples :
+    python precalculer_recommandations.py
+    python precalculer_recommandations.py --processus 8
+"""
+
+import sys
+
+from python.recommandation.precalcul import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de cache des résultats coûteux des gestionnaires (statistiques,
+rapports de ventes, recherches, recommandations, moyennes des notes).
+
+Chaque entrée expire après "delai_cache" secondes (config/config.json) et,
+au-delà de la taille maximale, la moins récemment utilisée est évincée.
+Les gestionnaires invalident eux-mêmes les entrées touchées par leurs
+écritures (invalider, invalider_si) ; les compteurs de succès et d'échecs
+servent à régler le délai et la taille. Un résultat dont le calcul a
+croisé une invalidation n'est pas conservé : il a pu lire les données
+d'avant l'écriture.
+
+Les valeurs renvoyées sont partagées entre les appels : elles ne doivent
+pas être modifiées par l'appelant.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from ..configuration.parametres import obtenir_parametre
+
+TAILLE_MAX = 256
+
+# Caches créés, pour statistiques_caches()
+_CACHES = weakref.WeakSet()
+
+
+class CacheResultats:
+    """Cache à durée de vie limitée avec éviction LRU.
+
+    Args:
+        nom (str): Nom du cache (statistiques)
+        delai (float, optional): Durée de vie des entrées en secondes ; par
+            défaut la valeur "delai_cache" de config/config.json. 0 désactive
+            le cache.
+        taille_max (int): Nombre maximal d'entrées
+    """
+
+    def __init__(self, nom, delai=None, taille_max=TAILLE_MAX):
+        if delai is None:
+            delai = obtenir_parametre("delai_cache", 3600)
+        self.nom = nom
+        self.delai = delai
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()  # clé -> (expiration, valeur)
+        self._verrou = threading.Lock()
+        # Incrémentée à chaque invalidation (voir obtenir)
+        self._generation = 0
+        self.succes = 0
+        self.echecs = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _CACHES.add(self)
+
+    def obtenir(self, cle, calcul):
+        """Retourne la valeur en cache pour `cle`, ou la calcule et la conserve.
+
+        Args:
+            cle: Clé hachable identifiant le résultat
+            calcul (callable): Fonction sans argument produisant le résultat
+        """
+        maintenant = time.monotonic()
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                if entree[0] > maintenant:
+                    self._entrees.move_to_end(cle)
+                    self.succes += 1
+                    return entree[1]
+                del self._entrees[cle]
+                self.expirations += 1
+            self.echecs += 1
+            generation = self._generation
+
+        # Calcul hors verrou : les autres clés restent accessibles
+        valeur = calcul()
+        if self.delai > 0:
+            with self._verrou:
+                if self._generation != generation:
+                    # Invalidation pendant le calcul : la valeur est peut-être déjà fausse
+                    return valeur
+                self._entrees[cle] = (maintenant + self.delai, valeur)
+                self._entrees.move_to_end(cle)
+                while len(self._entrees) > self.taille_max:
+                    self._entrees.popitem(last=False)
+                    self.evictions += 1
+        return valeur
+
+    def invalider(self, cle):
+        """Retire l'entrée `cle` si elle est présente."""
+        with self._verrou:
+            self._generation += 1
+            if self._entrees.pop(cle, None) is not None:
+                self.invalidations += 1
+
+    def invalider_si(self, condition):
+        """Retire les entrées dont la clé vérifie `condition(cle)`."""
+        with self._verrou:
+            self._generation += 1
+            cles = [cle for cle in self._entrees if condition(cle)]
+            for cle in cles:
+                del self._entrees[cle]
+            self.invalidations += len(cles)
+
+    def vider(self):
+        """Retire toutes les entrées (rechargement complet des données)."""
+        with self._verrou:
+            self._generation += 1
+            self.invalidations += len(self._entrees)
+            self._entrees.clear()
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def statistiques(self):
+        """Compteurs du cache : succès, échecs, taux de succès, expirations, évictions..."""
+        demandes = self.succes + self.echecs
+        return {
+            'succes': self.succes,
+            'echecs': self.echecs,
+            'taux_succes': self.succes / demandes if demandes else 0.0,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'entrees': len(self._entrees),
+            'delai': self.delai,
+            'taille_max': self.taille_max,
+        }
+
+
+def statistiques_caches():
+    """Compteurs cumulés par nom de cache, pour tous les caches vivants."""
+    resultat = {}
+    for cache in list(_CACHES):
+        stats = cache.statistiques()
+        cumul = resultat.setdefault(cache.nom, dict.fromkeys(
+            ('succes', 'echecs', 'expirations', 'evictions', 'invalidations', 'entrees'), 0))
+        for cle in cumul:
+            cumul[cle] += stats[cle]
+    for cumul in resultat.values():
+        demandes = cumul['succes'] + cumul['echecs']
+        cumul['taux_succes'] = cumul['succes'] / demandes if demandes else 0.0
+    return resultat
@@ -6,18 +6,104 @@ Module de gestion du catalogue de films.
 """
 
 import csv
+import logging
 import os
 from datetime import datetime
 
+from ..cache.cache_resultats import CacheResultats
+from ..concurrence.fichiers import differable, ecriture_atomique, modification, signature_fichier, verrou_fichier
+from ..dates.horodatage import horodatage
+from ..evenements.bus import BUS, CATALOGUE_RECHARGE, FILM_AJOUTE, NOTE_FILM_MODIFIEE
+from ..instrumentation.metriques import compter_octets, mesurer, taille_fichier
+from .instantane import InstantaneCatalogue, ListeFilmsInstantane, ecrire_instantane
+
+journal = logging.getLogger(__name__)
+
+CHAMPS_FILM = ['id', 'titre', 'realisateur', 'annee', 'genre', 'note', 'acteurs', 'date_ajout']
+
+
+def valider_film(film_data):
+    """Vérifie et normalise les données d'un film avant son ajout.
+
+    Args:
+        film_data (dict): Dictionnaire contenant les données du film
+            (titre, realisateur, annee, genre, note, acteurs)
+
+    Returns:
+        dict: Les données normalisées (sans 'id' ni 'date_ajout')
+
+    Raises:
+        ValueError: Si un champ requis est absent ou mal formé
+    """
+    # Vérifier les données requises
+    required_fields = ['titre', 'realisateur', 'annee', 'genre', 'note', 'acteurs']
+    for field in required_fields:
+        if field not in film_data:
+            raise ValueError(f"Le champ '{field}' est requis")
+
+    # Les acteurs peuvent arriver sous forme de liste ou de chaîne "a|b|c"
+    acteurs = film_data['acteurs']
+    if isinstance(acteurs, str):
+        acteurs = [a.strip() for a in acteurs.split('|') if a.strip()]
+
+    return {
+        'titre': film_data['titre'],
+        'realisateur': film_data['realisateur'],
+        'annee': int(film_data['annee']),
+        'genre': film_data['genre'],
+        'note': float(film_data['note']),
+        'acteurs': acteurs
+    }
+
+
+def horodatage_ajout(film):
+    """Retourne l'horodatage de la date d'ajout d'un film.
+
+    Il est calculé au chargement du catalogue ; un film construit ailleurs
+    (sans 'horodatage_ajout') est converti à la volée.
+    """
+    instant = film.get('horodatage_ajout')
+    if instant is None:
+        instant = film['horodatage_ajout'] = horodatage(film['date_ajout'])
+    return instant
+
+
+def film_correspond(film, terme):
+    """Indique si le titre, le réalisateur ou un acteur du film contient `terme` (en minuscules)."""
+    return (terme in film['titre'].lower() or
+            terme in film['realisateur'].lower() or
+            any(terme in acteur.lower() for acteur in film['acteurs']))
+
+
 class GestionCatalogue:
     """Classe gérant les opérations sur le catalogue de films."""
     
-    def __init__(self, fichier_catalogue="donnees/films.csv"):
-        """Initialisation avec le chemin du fichier catalogue."""
+    def __init__(self, fichier_catalogue="donnees/films.csv", utiliser_instantane=True, bus=None):
+        """Initialisation avec le chemin du fichier catalogue.
+
+        Args:
+            fichier_catalogue (str): Chemin du fichier CSV du catalogue
+            utiliser_instantane (bool): Démarrer depuis l'instantané binaire
+                (films.instantane) quand films.csv n'a pas changé
+            bus (BusEvenements, optional): Bus où publier les modifications
+                (bus partagé par défaut)
+        """
+        self.bus = bus or BUS
         self.fichier_catalogue = fichier_catalogue
+        self.fichier_verrou = fichier_catalogue
+        # Signature de films.csv au dernier chargement (voir synchroniser)
+        self._signature = None
+        self.fichier_instantane = os.path.splitext(fichier_catalogue)[0] + ".instantane"
+        self.utiliser_instantane = utiliser_instantane
         self.films = []
+        # Statistiques et recherches, invalidées par les écritures du catalogue
+        self.cache = CacheResultats("catalogue")
+        # Incrémentée à chaque modification : sert de clé aux caches dérivés
+        # du catalogue (recommandations...)
+        self.version = 0
         self.charger_catalogue()
 
+    @modification
     def ajouter_film(self, film_data):
         """Ajoute un nouveau film au catalogue.
         
@@ -25,39 +111,105 @@ class GestionCatalogue:
             film_data (dict): Dictionnaire contenant les données du film
                 (titre, realisateur, annee, genre, note, acteurs)
         """
-        # Vérifier les données requises
-        required_fields = ['titre', 'realisateur', 'annee', 'genre', 'note', 'acteurs']
-        for field in required_fields:
-            if field not in film_data:
-                raise ValueError(f"Le champ '{field}' est requis")
+        # Vérifier et normaliser les données
+        donnees = valider_film(film_data)
 
         # Générer un nouvel ID
         nouveau_id = max([film['id'] for film in self.films], default=0) + 1
         
         # Créer le film avec l'ID et la date d'ajout
-        film = {
-            'id': nouveau_id,
-            'titre': film_data['titre'],
-            'realisateur': film_data['realisateur'],
-            'annee': int(film_data['annee']),
-            'genre': film_data['genre'],
-            'note': float(film_data['note']),
-            'acteurs': film_data['acteurs'],
-            'date_ajout': datetime.now().isoformat()  # Ajouter la date au format ISO
-        }
+        film = {'id': nouveau_id, **donnees}
+        film['date_ajout'] = datetime.now().isoformat()  # Ajouter la date au format ISO
+        film['horodatage_ajout'] = horodatage(film['date_ajout'])
         
         # Ajouter et sauvegarder
         self.films.append(film)
+        self._invalider_film(film)
         self._sauvegarder_catalogue()
+        self.bus.publier(FILM_AJOUTE, film=film)
         return film
 
+    def _invalider_film(self, film):
+        """Retire du cache les résultats que la modification de `film` rend faux."""
+        self.version += 1
+        self.cache.invalider(('statistiques',))
+        self.cache.invalider_si(lambda cle: cle[0] == 'recherche' and film_correspond(film, cle[1]))
+
+    @mesurer("catalogue.charger")
     def charger_catalogue(self):
-        """Charge le catalogue depuis le fichier CSV."""
+        """Charge le catalogue depuis l'instantané binaire s'il est à jour, sinon depuis le CSV."""
+        self.cache.vider()
+        self.version += 1
+        if self._charger():
+            self.bus.publier(CATALOGUE_RECHARGE)
+
+    def synchroniser(self):
+        """Recharge le catalogue si un autre processus a modifié films.csv.
+
+        Un simple stat suffit quand rien n'a changé. Sinon les films ajoutés
+        et les notes modifiées sont publiés un à un (FILM_AJOUTE,
+        NOTE_FILM_MODIFIEE) ; toute autre différence (film retiré, dates
+        réinitialisées...) publie CATALOGUE_RECHARGE.
+
+        Returns:
+            bool: True si le fichier avait changé
+        """
+        if signature_fichier(self.fichier_catalogue) == self._signature:
+            return False
+        anciens = {film['id']: dict(film) for film in self.films}
+        self.version += 1
+        if not self._charger():
+            return True
+
+        ajoutes, notes = [], []
+        recharge = len(self.films) < len(anciens)
+        for film in self.films:
+            ancien = anciens.get(film['id'])
+            if ancien is None:
+                ajoutes.append(film)
+            elif ancien != dict(film):
+                if {**ancien, 'note': film['note']} == dict(film):
+                    notes.append(film)
+                else:
+                    recharge = True
+        journal.info(f"{self.fichier_catalogue} modifié par un autre processus : "
+                     f"{len(ajoutes)} ajout(s), {len(notes)} note(s) modifiée(s)")
+        if recharge:
+            self.cache.vider()
+            self.bus.publier(CATALOGUE_RECHARGE)
+            return True
+        for film in ajoutes + notes:
+            self._invalider_film(film)
+        for film in ajoutes:
+            self.bus.publier(FILM_AJOUTE, film=film)
+        for film in notes:
+            self.bus.publier(NOTE_FILM_MODIFIEE, film=film)
+        return True
+
+    def _charger(self):
+        """Lit le catalogue sous verrou partagé, sans publier d'événement.
+
+        Returns:
+            bool: False si films.csv n'existe pas encore
+        """
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            self._signature = signature_fichier(self.fichier_catalogue)
+            return self._lire_catalogue()
+
+    def _lire_catalogue(self):
+        """Remplit self.films depuis l'instantané s'il est à jour, sinon depuis le CSV."""
+        if self.utiliser_instantane:
+            instantane = InstantaneCatalogue.ouvrir(self.fichier_instantane, self.fichier_catalogue)
+            if instantane is not None:
+                self.films = ListeFilmsInstantane(instantane)
+                return True
+
         try:
             with open(self.fichier_catalogue, 'r', encoding='utf-8', newline='') as f:
                 reader = csv.DictReader(f)
                 self.films = []
                 for row in reader:
+                    date_ajout = row.get('date_ajout') or datetime.now().isoformat()  # Valeur par défaut pour les films existants
                     film = {
                         'id': int(row['id']),
                         'titre': row['titre'],
@@ -66,22 +218,38 @@ class GestionCatalogue:
                         'genre': row['genre'],
                         'note': float(row['note']),
                         'acteurs': row['acteurs'].split('|'),
-                        'date_ajout': row.get('date_ajout', datetime.now().isoformat())  # Valeur par défaut pour les films existants
+                        'date_ajout': date_ajout,
+                        # Date convertie une fois pour toutes (tris et filtres sur des entiers)
+                        'horodatage_ajout': horodatage(date_ajout)
                     }
                     self.films.append(film)
         except FileNotFoundError:
-            print(f"Le fichier {self.fichier_catalogue} n'existe pas encore.")
+            journal.warning(f"Le fichier {self.fichier_catalogue} n'existe pas encore.")
+            return False
 
+        if self.utiliser_instantane:
+            ecrire_instantane(self.fichier_instantane, self.films, self.fichier_catalogue)
+        return True
+
+    @differable
+    @mesurer("catalogue.sauvegarder")
     def _sauvegarder_catalogue(self):
         """Sauvegarde le catalogue dans le fichier CSV."""
-        with open(self.fichier_catalogue, 'w', encoding='utf-8', newline='') as f:
-            fieldnames = ['id', 'titre', 'realisateur', 'annee', 'genre', 'note', 'acteurs', 'date_ajout']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+        with ecriture_atomique(self.fichier_catalogue, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CHAMPS_FILM, extrasaction='ignore')
             writer.writeheader()
             for film in self.films:
                 film_data = film.copy()
                 film_data['acteurs'] = '|'.join(film_data['acteurs'])
                 writer.writerow(film_data)
+            octets = f.tell()
+        self._signature = signature_fichier(self.fichier_catalogue)
+
+        # Garder l'instantané synchronisé pour le prochain démarrage
+        if self.utiliser_instantane:
+            ecrire_instantane(self.fichier_instantane, self.films, self.fichier_catalogue)
+            octets += taille_fichier(self.fichier_instantane)
+        compter_octets("catalogue.sauvegarder", octets)
 
     def filtrer_par_genre(self, genre):
         """Filtre les films par genre."""
@@ -97,35 +265,50 @@ class GestionCatalogue:
 
     def trier_par_date_ajout(self, descendant=True):
         """Trie les films par date d'ajout."""
-        return sorted(self.films, key=lambda x: x['date_ajout'], reverse=descendant)
+        return sorted(self.films, key=horodatage_ajout, reverse=descendant)
 
+    @mesurer("catalogue.filtrer_par_periode")
     def filtrer_par_periode(self, debut, fin=None):
         """Filtre les films par période d'ajout.
         
+        Les dates d'ajout mélangent heures locales sans fuseau et dates avec
+        décalage ("+01:00") : la comparaison se fait sur les horodatages UTC.
+
         Args:
-            debut (str): Date de début au format ISO
-            fin (str, optional): Date de fin au format ISO. Si non spécifié, utilise la date actuelle.
+            debut (str ou datetime): Date de début (ISO)
+            fin (str ou datetime, optional): Date de fin (ISO). Si non spécifié, utilise la date actuelle.
         """
-        if fin is None:
-            fin = datetime.now().isoformat()
+        debut = horodatage(debut, arrondi_superieur=True)
+        fin = horodatage(fin if fin is not None else datetime.now())
         
         return [f for f in self.films 
-                if debut <= f['date_ajout'] <= fin]
+                if debut <= horodatage_ajout(f) <= fin]
 
+    @modification
     def reinitialiser_dates_ajout(self):
         """Réinitialise toutes les dates d'ajout à la date actuelle."""
         date_actuelle = datetime.now().isoformat()
+        instant = horodatage(date_actuelle)
         for film in self.films:
             film['date_ajout'] = date_actuelle
+            film['horodatage_ajout'] = instant
+        self.version += 1
+        self.cache.vider()
         self._sauvegarder_catalogue()
+        self.bus.publier(CATALOGUE_RECHARGE)
 
     def mettre_a_jour_horloge(self):
         """Met à jour l'horloge interne avec l'heure système actuelle."""
         self.derniere_synchro = datetime.now().isoformat()
         return self.derniere_synchro
 
+    @mesurer("catalogue.statistiques")
     def obtenir_statistiques(self):
-        """Génère des statistiques sur le catalogue."""
+        """Génère des statistiques sur le catalogue (conservées en cache jusqu'à la prochaine modification)."""
+        return self.cache.obtenir(('statistiques',), self._calculer_statistiques)
+
+    def _calculer_statistiques(self):
+        """Calcule les statistiques du catalogue en une passe."""
         stats = {
             'total_films': len(self.films),
             'films_par_genre': {},
@@ -157,19 +340,19 @@ class GestionCatalogue:
                 return film
         return None
 
+    @mesurer("catalogue.rechercher")
     def rechercher_films(self, terme_recherche):
-        """Recherche des films par titre, réalisateur ou acteurs."""
+        """Recherche des films par titre, réalisateur ou acteurs.
+
+        Le résultat est gardé en cache par terme ; l'ajout ou la modification
+        d'un film n'invalide que les recherches auxquelles il correspond.
+        L'appelant reçoit une copie de la liste en cache.
+        """
         terme_recherche = terme_recherche.lower()
-        resultats = []
-        
-        for film in self.films:
-            if (terme_recherche in film['titre'].lower() or
-                terme_recherche in film['realisateur'].lower() or
-                any(terme_recherche in acteur.lower() for acteur in film['acteurs'])):
-                resultats.append(film)
-                
-        return resultats
+        return list(self.cache.obtenir(('recherche', terme_recherche),
+                                       lambda: [film for film in self.films if film_correspond(film, terme_recherche)]))
 
+    @modification
     def mettre_a_jour_note_film(self, film_id, nouvelle_note):
         """Met à jour la note d'un film.
         
@@ -187,6 +370,8 @@ class GestionCatalogue:
                     film['note'] = round(nouvelle_note, 1)
                 else:
                     film['note'] = round(nouvelle_note * 2, 1)
+                self._invalider_film(film)
                 self._sauvegarder_catalogue()
+                self.bus.publier(NOTE_FILM_MODIFIEE, film=film)
                 return True
         return False
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de l'instantané binaire du catalogue.
+
+Après un chargement de films.csv, le catalogue est recopié dans un fichier
+binaire (films.instantane) : colonnes numériques à largeur fixe (id, année,
+note, horodatage d'ajout) suivies d'un tas de chaînes UTF-8 et de ses décalages. Au démarrage
+suivant, si films.csv n'a pas changé (même taille et même date de
+modification, ou à défaut même empreinte), l'instantané est projeté en
+mémoire (mmap) à la place du CSV et chaque film n'est décodé qu'au moment
+où il est lu, en un dictionnaire ordinaire identique à celui lu depuis le CSV.
+
+Disposition du fichier :
+
+    en-tête  : FORMAT_EN_TETE (magic, version, nombre de films, taille,
+               date de modification et empreinte de films.csv)
+    colonnes : id int32[n] | annee int32[n] | note float64[n]
+               | horodatage_ajout int64[n]
+    décalages: uint32[n * NB_CHAINES + 1] (NB_CHAINES chaînes par film)
+    tas      : chaînes UTF-8 concaténées
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import MutableSequence
+
+from ..concurrence.fichiers import ecriture_atomique
+from ..dates.horodatage import horodatage
+
+journal = logging.getLogger(__name__)
+
+MAGIC = b'CFCI'
+VERSION = 2
+# magic, version, réservé, nombre de films, taille CSV, mtime CSV (ns), empreinte CSV
+FORMAT_EN_TETE = struct.Struct('<4sHHIQQ16s')
+
+CHAMPS_CHAINES = ['titre', 'realisateur', 'genre', 'acteurs', 'date_ajout']
+NB_CHAINES = len(CHAMPS_CHAINES)
+
+
+def empreinte_fichier(chemin):
+    """Calcule l'empreinte (BLAKE2b, 16 octets) d'un fichier."""
+    empreinte = hashlib.blake2b(digest_size=16)
+    with open(chemin, 'rb') as f:
+        for morceau in iter(lambda: f.read(1 << 20), b''):
+            empreinte.update(morceau)
+    return empreinte.digest()
+
+
+def ecrire_instantane(chemin, films, fichier_source):
+    """Écrit l'instantané binaire d'une liste de films.
+
+    Le fichier est écrit sous un nom temporaire puis renommé, pour qu'un
+    lecteur ne voie jamais un instantané incomplet.
+
+    Args:
+        chemin (str): Chemin de l'instantané à écrire
+        films (list): Les films du catalogue
+        fichier_source (str): Le films.csv dont l'instantané est la copie
+
+    Returns:
+        bool: True si l'instantané a été écrit
+    """
+    try:
+        stat = os.stat(fichier_source)
+        empreinte = empreinte_fichier(fichier_source)
+
+        ids = array('i')
+        annees = array('i')
+        notes = array('d')
+        ajouts = array('q')
+        decalages = array('I', [0])
+        tas = bytearray()
+        for film in films:
+            ids.append(film['id'])
+            annees.append(film['annee'])
+            notes.append(film['note'])
+            ajout = film.get('horodatage_ajout')
+            ajouts.append(ajout if ajout is not None else horodatage(film['date_ajout']))
+            for champ in CHAMPS_CHAINES:
+                valeur = film[champ]
+                if champ == 'acteurs':
+                    valeur = '|'.join(valeur)
+                tas += valeur.encode('utf-8')
+                decalages.append(len(tas))
+
+        with ecriture_atomique(chemin, 'wb') as f:
+            f.write(FORMAT_EN_TETE.pack(MAGIC, VERSION, 0, len(ids), stat.st_size,
+                                        stat.st_mtime_ns, empreinte))
+            f.write(ids.tobytes())
+            f.write(annees.tobytes())
+            f.write(notes.tobytes())
+            f.write(ajouts.tobytes())
+            f.write(decalages.tobytes())
+            f.write(tas)
+        return True
+    except (OSError, OverflowError, KeyError, TypeError, ValueError) as e:
+        # Un instantané manquant ne fait que ralentir le prochain démarrage
+        journal.error(f"Impossible d'écrire l'instantané du catalogue: {e}")
+        return False
+
+
+class InstantaneCatalogue:
+    """Instantané du catalogue projeté en mémoire (lecture seule)."""
+
+    def __init__(self, mm, nombre):
+        self._mm = mm
+        self.nombre = nombre
+        vue = memoryview(mm)
+        position = FORMAT_EN_TETE.size
+        self.ids = vue[position:position + 4 * nombre].cast('i')
+        position += 4 * nombre
+        self.annees = vue[position:position + 4 * nombre].cast('i')
+        position += 4 * nombre
+        self.notes = vue[position:position + 8 * nombre].cast('d')
+        position += 8 * nombre
+        self.ajouts = vue[position:position + 8 * nombre].cast('q')
+        position += 8 * nombre
+        taille_decalages = 4 * (nombre * NB_CHAINES + 1)
+        self.decalages = vue[position:position + taille_decalages].cast('I')
+        self.debut_tas = position + taille_decalages
+
+    @classmethod
+    def ouvrir(cls, chemin, fichier_source):
+        """Ouvre l'instantané s'il correspond toujours au fichier source.
+
+        Returns:
+            InstantaneCatalogue: L'instantané, ou None s'il est absent ou périmé
+        """
+        try:
+            stat = os.stat(fichier_source)
+            with open(chemin, 'rb') as f:
+                en_tete = f.read(FORMAT_EN_TETE.size)
+                if len(en_tete) < FORMAT_EN_TETE.size:
+                    return None
+                magic, version, _, nombre, taille, mtime_ns, empreinte = FORMAT_EN_TETE.unpack(en_tete)
+                if magic != MAGIC or version != VERSION or taille != stat.st_size:
+                    return None
+                # Date de modification différente (copie, restauration...) :
+                # on vérifie le contenu avant de rejeter l'instantané
+                if mtime_ns != stat.st_mtime_ns and empreinte != empreinte_fichier(fichier_source):
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(mm, nombre)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def film(self, index):
+        """Décode un film en dictionnaire, comme s'il était lu depuis films.csv."""
+        k = index * NB_CHAINES
+        bornes = [self.debut_tas + d for d in self.decalages[k:k + NB_CHAINES + 1]]
+        mm = self._mm
+        titre, realisateur, genre, acteurs, date_ajout = [
+            str(mm[bornes[i]:bornes[i + 1]], 'utf-8') for i in range(NB_CHAINES)]
+        return {
+            'id': self.ids[index],
+            'titre': titre,
+            'realisateur': realisateur,
+            'annee': self.annees[index],
+            'genre': genre,
+            'note': self.notes[index],
+            'acteurs': acteurs.split('|'),
+            'date_ajout': date_ajout,
+            'horodatage_ajout': self.ajouts[index],
+        }
+
+
+class ListeFilmsInstantane(MutableSequence):
+    """Liste des films adossée à un instantané.
+
+    Les films ne sont décodés (en dict) qu'au moment où on y accède ; la
+    liste accepte les ajouts, insertions et suppressions comme une liste
+    ordinaire. Pour json.dumps, la convertir d'abord avec list().
+    """
+
+    def __init__(self, instantane):
+        self.instantane = instantane
+        # Un entier désigne une ligne de l'instantané pas encore consultée
+        self._films = list(range(instantane.nombre))
+
+    def _film(self, position):
+        film = self._films[position]
+        if isinstance(film, int):
+            film = self.instantane.film(film)
+            self._films[position] = film
+        return film
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._film(i) for i in range(*position.indices(len(self._films)))]
+        return self._film(position)
+
+    def __setitem__(self, position, film):
+        self._films[position] = film
+
+    def __delitem__(self, position):
+        del self._films[position]
+
+    def __len__(self):
+        return len(self._films)
+
+    def insert(self, position, film):
+        self._films.insert(position, film)
+
+    def __iter__(self):
+        for position in range(len(self._films)):
+            yield self._film(position)
+
+    def __repr__(self):
+        return f"<ListeFilmsInstantane: {len(self._films)} films>"
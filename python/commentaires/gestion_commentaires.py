@@ -6,33 +6,116 @@ Module de gestion des commentaires.
 """
 
 import json
+import logging
 from datetime import datetime
 from pathlib import Path
 
+from ..cache.cache_resultats import CacheResultats
+from ..concurrence.fichiers import differable, ecriture_atomique, modification, signature_fichier, verrou_fichier
+from ..dates.horodatage import horodatage
+from ..evenements.bus import BUS, COMMENTAIRES_MODIFIES
+from ..instrumentation.metriques import compter_octets, mesurer
+
+journal = logging.getLogger(__name__)
+
+
+def _par_film(commentaires):
+    """Commentaires regroupés par film : {film_id: [(id, note, texte, date), ...] triés}."""
+    par_film = {}
+    for c in commentaires:
+        par_film.setdefault(c["film_id"], []).append((c["id"], c["note"], c["commentaire"], c["date"]))
+    for liste in par_film.values():
+        liste.sort()
+    return par_film
+
+
 class GestionCommentaires:
     """Classe gérant les commentaires des films."""
     
-    def __init__(self):
-        """Initialise le gestionnaire de commentaires."""
+    def __init__(self, bus=None):
+        """Initialise le gestionnaire de commentaires.
+
+        Args:
+            bus (BusEvenements, optional): Bus où publier les modifications
+                (bus partagé par défaut)
+        """
         self.base_path = Path("donnees")
+        self.bus = bus or BUS
         self.fichier = self.base_path / "commentaires.json"
+        self.fichier_verrou = self.fichier
+        self._signature = None
+        # Commentaires à la date illisible, écartés au chargement mais gardés dans le fichier
+        self._illisibles = []
+        # Moyennes des notes par film, invalidées à chaque écriture sur le film
+        self.cache = CacheResultats("commentaires")
+        # Créer le fichier s'il n'existe pas (un autre processus a pu le faire entre-temps)
+        with verrou_fichier(self.fichier_verrou):
+            if not self.fichier.exists():
+                self.commentaires = {"comments": []}
+                self._sauvegarder()
         self._charger_donnees()
 
+    @mesurer("commentaires.charger")
     def _charger_donnees(self):
         """Charge les commentaires depuis le fichier JSON."""
-        try:
-            with open(self.fichier, 'r', encoding='utf-8') as f:
-                self.commentaires = json.load(f)
-        except FileNotFoundError:
-            self.commentaires = {"comments": []}
-            self._sauvegarder()
+        self.cache.vider()
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            self._signature = signature_fichier(self.fichier)
+            try:
+                with open(self.fichier, 'r', encoding='utf-8') as f:
+                    self.commentaires = json.load(f)
+            except FileNotFoundError:
+                self.commentaires = {"comments": []}
+        # Dates converties une seule fois (affichage et tris sans reparser).
+        # Un commentaire à la date illisible est écarté sans bloquer les
+        # autres ; il est conservé tel quel dans le fichier (voir _sauvegarder)
+        valides, self._illisibles = [], []
+        for comment in self.commentaires["comments"]:
+            try:
+                comment["horodatage"] = horodatage(comment["date"])
+            except (ValueError, TypeError, KeyError) as e:
+                journal.warning(f"Commentaire {comment.get('id')} ignoré : {e}")
+                self._illisibles.append(comment)
+            else:
+                valides.append(comment)
+        self.commentaires["comments"] = valides
+
+    def synchroniser(self):
+        """Recharge les commentaires si un autre processus a modifié le fichier.
+
+        COMMENTAIRES_MODIFIES est publié pour chaque film dont les
+        commentaires ont changé.
 
+        Returns:
+            bool: True si le fichier avait changé
+        """
+        if signature_fichier(self.fichier) == self._signature:
+            return False
+        anciens = _par_film(self.commentaires["comments"])
+        self._charger_donnees()
+        nouveaux = _par_film(self.commentaires["comments"])
+        for film_id in anciens.keys() | nouveaux.keys():
+            if anciens.get(film_id) != nouveaux.get(film_id):
+                self.bus.publier(COMMENTAIRES_MODIFIES, film_id=film_id)
+        return True
+
+    @differable
+    @mesurer("commentaires.sauvegarder")
     def _sauvegarder(self):
         """Sauvegarde les commentaires dans le fichier JSON."""
         self.base_path.mkdir(exist_ok=True)
-        with open(self.fichier, 'w', encoding='utf-8') as f:
-            json.dump(self.commentaires, f, indent=4, ensure_ascii=False)
+        # L'horodatage est recalculé au chargement : il n'est pas enregistré
+        donnees = dict(self.commentaires)
+        donnees["comments"] = [
+            {cle: valeur for cle, valeur in c.items() if cle != "horodatage"}
+            for c in self.commentaires["comments"]
+        ] + self._illisibles
+        with ecriture_atomique(self.fichier, 'w', encoding='utf-8') as f:
+            json.dump(donnees, f, indent=4, ensure_ascii=False)
+            compter_octets("commentaires.sauvegarder", f.tell())
+        self._signature = signature_fichier(self.fichier)
 
+    @modification
     def ajouter_commentaire(self, film_id, utilisateur, note, commentaire):
         """Ajoute un commentaire pour un film.
         
@@ -43,50 +126,71 @@ class GestionCommentaires:
             commentaire (str): Texte du commentaire
         """
         # Générer un nouvel ID
-        nouvel_id = max([c['id'] for c in self.commentaires['comments']], default=0) + 1
+        nouvel_id = max([c['id'] for c in self.commentaires['comments']]
+                        + [c.get('id', 0) for c in self._illisibles], default=0) + 1
         
         # Créer le nouveau commentaire
+        instant = datetime.now()
         nouveau_commentaire = {
             "id": nouvel_id,
             "film_id": film_id,
             "utilisateur": utilisateur,
             "note": note,
             "commentaire": commentaire,
-            "date": datetime.now().isoformat()
+            "date": instant.isoformat(),
+            "horodatage": horodatage(instant)
         }
         
         # Ajouter le commentaire
         self.commentaires['comments'].append(nouveau_commentaire)
+        self.cache.invalider(('moyenne', film_id))
         
         # Sauvegarder les commentaires
         self._sauvegarder()
+        self.bus.publier(COMMENTAIRES_MODIFIES, film_id=film_id)
         
         return True, "Commentaire ajouté avec succès"
 
+    @mesurer("commentaires.film")
     def obtenir_commentaires_film(self, film_id):
         """Récupère tous les commentaires pour un film donné."""
         return [c for c in self.commentaires['comments'] if c['film_id'] == film_id]
 
+    @modification
     def supprimer_commentaire(self, comment_id):
         """Supprime un commentaire par son ID."""
+        films_ids = {c["film_id"] for c in self.commentaires["comments"] if c["id"] == comment_id}
+        for film_id in films_ids:
+            self.cache.invalider(('moyenne', film_id))
         self.commentaires["comments"] = [
             c for c in self.commentaires["comments"] if c["id"] != comment_id
         ]
         self._sauvegarder()
+        for film_id in films_ids:
+            self.bus.publier(COMMENTAIRES_MODIFIES, film_id=film_id)
 
+    @modification
     def modifier_commentaire(self, commentaire_id, nouveau_texte, nouvelle_note):
         """Modifie un commentaire existant."""
         for comment in self.commentaires["comments"]:
             if comment["id"] == commentaire_id:
                 comment["commentaire"] = nouveau_texte
                 comment["note"] = nouvelle_note
-                comment["date"] = datetime.now().isoformat()
+                instant = datetime.now()
+                comment["date"] = instant.isoformat()
+                comment["horodatage"] = horodatage(instant)
+                self.cache.invalider(('moyenne', comment["film_id"]))
                 self._sauvegarder()
+                self.bus.publier(COMMENTAIRES_MODIFIES, film_id=comment["film_id"])
                 return True
         return False
 
     def calculer_moyenne_notes(self, film_id):
-        """Calcule la moyenne des notes pour un film."""
+        """Calcule la moyenne des notes pour un film (gardée en cache jusqu'au prochain changement sur ce film)."""
+        return self.cache.obtenir(('moyenne', film_id), lambda: self._calculer_moyenne_notes(film_id))
+
+    def _calculer_moyenne_notes(self, film_id):
+        """Moyenne des notes des commentaires d'un film."""
         commentaires = self.obtenir_commentaires_film(film_id)
         if not commentaires:
             return 0
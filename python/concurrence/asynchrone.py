@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de l'API asynchrone des gestionnaires.
+
+Les méthodes des gestionnaires sont synchrones et lisent ou écrivent les
+fichiers de donnees/ ; appelées depuis une boucle asyncio, elles la
+bloqueraient. GestionnaireAsynchrone en donne une version à attendre :
+
+    catalogue = GestionnaireAsynchrone(GestionCatalogue(), 'catalogue')
+    ventes = GestionnaireAsynchrone(GestionVentes(), 'ventes')
+    film = await catalogue.ajouter_film({...})
+    vente = await ventes.enregistrer_vente(film['id'], film['titre'], 2, 9.99)
+
+Chaque gestionnaire a sa FileCollection : un thread dédié où ses
+opérations s'exécutent une à une, dans l'ordre d'arrivée. Deux collections
+différentes avancent en parallèle, sans verrou global.
+
+Les appels arrivés pendant le même tour de boucle forment un lot :
+- les enregistrements complets des modifications du lot (méthodes marquées
+  differable) sont regroupés en une seule écriture, sous le verrou exclusif
+  du fichier (voir sauvegardes_groupees) ;
+- les appels d'une méthode marquée par_lot (enregistrer_vente) sont
+  regroupés en un seul appel de la méthode de lot (enregistrer_ventes :
+  un seul ajout au fichier). Chaque élément est vérifié avant d'entrer
+  dans le lot : un appel invalide échoue seul, et si l'appel groupé
+  échoue quand même, ses éléments sont repris un par un ;
+- les opérations du lot s'exécutent dans l'ordre d'arrivée : un groupe
+  part avant l'opération qui le suit ;
+- FileCollection.lire partage une lecture identique déjà en cours.
+"""
+
+import asyncio
+import contextlib
+import functools
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from ..instrumentation.metriques import mesurer
+from .fichiers import sauvegardes_groupees
+
+journal = logging.getLogger(__name__)
+
+
+def par_lot(nom_lot, valider=None):
+    """Indique qu'un appel de la méthode équivaut à un appel de `nom_lot` sur une seule ligne.
+
+    La ligne est le dictionnaire des arguments nommés de la méthode ;
+    `nom_lot(lignes)` retourne un résultat par ligne. En asynchrone, les
+    appels simultanés sont regroupés en un seul appel de `nom_lot`.
+
+    Args:
+        nom_lot (str): Nom de la méthode de lot
+        valider (callable, optional): Vérifie une ligne (lève ValueError si
+            elle est invalide) avant qu'elle rejoigne le lot
+    """
+    def decorateur(methode):
+        methode.lot = nom_lot
+        methode.valider = valider
+        return methode
+    return decorateur
+
+
+class FileCollection:
+    """Exécute les opérations d'une collection une à une, par lots, dans un thread dédié.
+
+    Args:
+        nom (str): Nom de la collection (nom du thread et des mesures)
+        gestionnaire (optional): Gestionnaire de la collection ; les
+            enregistrements des modifications d'un même lot sont alors
+            regroupés
+    """
+
+    def __init__(self, nom, gestionnaire=None):
+        self.nom = nom
+        self.gestionnaire = gestionnaire
+        self._executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"collection-{nom}")
+        self._attente = []
+        self._programme = False
+        self._lectures = {}
+
+    async def executer(self, fonction, *args, **kwargs):
+        """Exécute `fonction(*args, **kwargs)` dans le thread de la collection."""
+        return await self._ajouter(('appel', fonction, (args, kwargs)))
+
+    async def grouper(self, fonction_lot, element, valider=None):
+        """Ajoute `element` au lot de `fonction_lot`.
+
+        Les éléments d'un même lot sont passés ensemble à
+        `fonction_lot(elements)`, qui retourne un résultat par élément.
+        `valider(element)` est appelé d'abord : un élément invalide lève
+        son erreur ici, sans faire échouer les autres éléments du lot.
+        """
+        if valider is not None:
+            valider(element)
+        return await self._ajouter(('groupe', fonction_lot, element))
+
+    async def lire(self, cle, fonction, *args):
+        """Comme executer, mais une lecture déjà en cours pour `cle` est partagée."""
+        futur = self._lectures.get(cle)
+        if futur is None:
+            futur = self._lectures[cle] = asyncio.ensure_future(self.executer(fonction, *args))
+            futur.add_done_callback(lambda _: self._lectures.pop(cle, None))
+        return await asyncio.shield(futur)
+
+    def _ajouter(self, operation):
+        boucle = asyncio.get_running_loop()
+        futur = boucle.create_future()
+        self._attente.append((operation, futur))
+        if not self._programme:
+            # Le lot part au prochain tour de boucle, avec tout ce qui sera arrivé d'ici là
+            self._programme = True
+            boucle.call_soon(self._lancer, boucle)
+        return futur
+
+    def _lancer(self, boucle):
+        lot, self._attente = self._attente, []
+        self._programme = False
+        self._executeur.submit(self._executer_lot, boucle, lot)
+
+    def _executer_lot(self, boucle, lot):
+        resultats = []
+        ecriture = self.gestionnaire is not None and any(
+            genre == 'groupe' or getattr(fonction, 'modification', False)
+            for (genre, fonction, _), _ in lot)
+        try:
+            with mesurer(f"collection.lot_{self.nom}"), \
+                    (sauvegardes_groupees(self.gestionnaire) if ecriture else contextlib.nullcontext()):
+                self._calculer(lot, resultats)
+        except Exception as e:
+            # Enregistrement groupé en échec : aucune opération du lot n'est confirmée
+            journal.error(f"Échec du lot de la collection {self.nom}: {e}", exc_info=True)
+            resultats = [(futur, False, e) for _, futur in lot]
+        for futur, succes, valeur in resultats:
+            boucle.call_soon_threadsafe(_terminer, futur, succes, valeur)
+
+    @staticmethod
+    def _calculer(lot, resultats):
+        # Ordre d'arrivée respecté : les éléments consécutifs d'un même
+        # groupe sont réunis, le groupe part avant l'opération suivante
+        fonction_lot, elements = None, []
+        for operation, futur in lot:
+            genre, fonction, donnees = operation
+            if genre == 'groupe' and fonction == fonction_lot:
+                elements.append((donnees, futur))
+                continue
+            FileCollection._calculer_groupe(fonction_lot, elements, resultats)
+            fonction_lot, elements = None, []
+            if genre == 'groupe':
+                fonction_lot, elements = fonction, [(donnees, futur)]
+                continue
+            args, kwargs = donnees
+            try:
+                resultats.append((futur, True, fonction(*args, **kwargs)))
+            except Exception as e:
+                resultats.append((futur, False, e))
+        FileCollection._calculer_groupe(fonction_lot, elements, resultats)
+
+    @staticmethod
+    def _calculer_groupe(fonction_lot, elements, resultats):
+        if not elements:
+            return
+        try:
+            valeurs = fonction_lot([element for element, _ in elements])
+            resultats.extend((futur, True, valeur) for (_, futur), valeur in zip(elements, valeurs))
+            return
+        except Exception as e:
+            if len(elements) == 1:
+                resultats.append((elements[0][1], False, e))
+                return
+            journal.warning(f"Échec de l'appel groupé {fonction_lot.__name__} ({len(elements)} éléments), "
+                            f"repris élément par élément : {e}")
+        # Un élément fautif ne doit pas faire échouer les autres
+        for element, futur in elements:
+            try:
+                resultats.append((futur, True, fonction_lot([element])[0]))
+            except Exception as e:
+                resultats.append((futur, False, e))
+
+    def fermer(self):
+        """Attend la fin des opérations en cours et arrête le thread."""
+        self._executeur.shutdown(wait=True)
+
+
+def _terminer(futur, succes, valeur):
+    if futur.cancelled():
+        return
+    if succes:
+        futur.set_result(valeur)
+    else:
+        futur.set_exception(valeur)
+
+
+class GestionnaireAsynchrone:
+    """Version asynchrone d'un gestionnaire : chaque méthode devient une coroutine.
+
+    `await asynchrone.methode(...)` exécute `gestionnaire.methode(...)` dans
+    le thread de la collection. Les attributs de données (films, ventes...)
+    ne sont pas exposés : ils changent pendant les écritures, les lire se
+    fait avec `await asynchrone.executer(lambda: ...)`.
+
+    Args:
+        gestionnaire: Gestionnaire synchrone (GestionCatalogue, GestionVentes...)
+        nom (str): Nom de la collection
+    """
+
+    def __init__(self, gestionnaire, nom):
+        self.gestionnaire = gestionnaire
+        self.file = FileCollection(nom, gestionnaire)
+
+    async def executer(self, fonction, *args, **kwargs):
+        """Exécute `fonction(*args, **kwargs)` dans le thread de la collection."""
+        return await self.file.executer(fonction, *args, **kwargs)
+
+    def __getattr__(self, nom):
+        methode = getattr(self.gestionnaire, nom)
+        if not callable(methode):
+            raise AttributeError(f"{nom} n'est pas une méthode de {type(self.gestionnaire).__name__} : "
+                                 f"le lire avec executer()")
+
+        nom_lot = getattr(methode, 'lot', None)
+        if nom_lot is not None:
+            signature = inspect.signature(methode)
+            fonction_lot = getattr(self.gestionnaire, nom_lot)
+
+            valider = getattr(methode, 'valider', None)
+
+            async def appel(*args, **kwargs):
+                ligne = signature.bind(*args, **kwargs)
+                ligne.apply_defaults()
+                return await self.file.grouper(fonction_lot, dict(ligne.arguments), valider)
+        else:
+            async def appel(*args, **kwargs):
+                return await self.file.executer(methode, *args, **kwargs)
+
+        functools.update_wrapper(appel, methode)
+        setattr(self, nom, appel)
+        return appel
+
+    def fermer(self):
+        """Attend la fin des opérations en cours et arrête le thread de la collection."""
+        self.file.fermer()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de partage du dossier donnees/ entre plusieurs processus.
+
+Trois outils :
+- verrou_fichier : verrou consultatif (fcntl.flock) posé sur un fichier
+  compagnon "<fichier>.verrou", partagé pour les lectures et exclusif pour
+  les lecture-modification-écriture. Il est réentrant dans un même thread,
+  mais un verrou partagé n'est jamais promu en exclusif (voir ci-dessous).
+- signature_fichier : (inode, taille, mtime) d'un fichier, pour savoir si un
+  autre processus l'a modifié depuis le dernier chargement.
+- ecriture_atomique : écrit dans un fichier temporaire puis le renomme ;
+  un lecteur voit toujours l'ancienne ou la nouvelle version, jamais un
+  fichier à moitié écrit.
+
+Les gestionnaires exposent un attribut fichier_verrou et une méthode
+synchroniser() (intégrer les modifications des autres processus) ; le
+décorateur modification enchaîne verrou exclusif, synchronisation puis
+écriture. Dans un bloc sauvegardes_groupees, les enregistrements complets
+(méthodes marquées differable) de plusieurs modifications successives
+sont regroupés en un seul, à la sortie du bloc.
+"""
+
+import functools
+import os
+import stat
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou exclusif seulement
+    fcntl = None
+    import msvcrt
+
+Signature = namedtuple('Signature', ['inode', 'taille', 'mtime_ns'])
+
+# Verrous tenus par le thread courant : {chemin du verrou: [descripteur, exclusif, profondeur]}
+_tenus = threading.local()
+
+# Enregistrements reportés par le thread courant : {id(gestionnaire): {nom: méthode}}
+_reportes = threading.local()
+
+
+def signature_fichier(chemin):
+    """Signature (inode, taille, mtime) du fichier, None s'il n'existe pas."""
+    try:
+        infos = os.stat(chemin)
+    except OSError:
+        return None
+    return Signature(infos.st_ino, infos.st_size, infos.st_mtime_ns)
+
+
+def _verrouiller(descripteur, exclusif):
+    if fcntl is not None:
+        fcntl.flock(descripteur, fcntl.LOCK_EX if exclusif else fcntl.LOCK_SH)
+    else:
+        os.lseek(descripteur, 0, os.SEEK_SET)
+        msvcrt.locking(descripteur, msvcrt.LK_LOCK, 1)
+
+
+def _deverrouiller(descripteur):
+    if fcntl is not None:
+        fcntl.flock(descripteur, fcntl.LOCK_UN)
+    else:
+        os.lseek(descripteur, 0, os.SEEK_SET)
+        msvcrt.locking(descripteur, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def verrou_fichier(chemin, exclusif=True):
+    """Pose un verrou consultatif sur `chemin` pendant le bloc with.
+
+    Le verrou porte sur "<chemin>.verrou", qui n'est jamais remplacé (le
+    fichier de données l'est, par ecriture_atomique). Un verrou déjà tenu
+    par le thread est réutilisé.
+
+    Demander le verrou exclusif en tenant le verrou partagé est refusé :
+    flock relâche le verrou partagé avant de poser l'exclusif, un autre
+    processus pourrait écrire entre les deux et l'écriture qui suit
+    écraserait ses données (lues avant). Le verrou exclusif se prend dès
+    le début de la lecture-modification-écriture (décorateur modification).
+
+    Args:
+        chemin (str ou Path): Fichier de données protégé
+        exclusif (bool): Verrou exclusif (écriture) ou partagé (lecture)
+
+    Raises:
+        RuntimeError: Verrou exclusif demandé alors que le thread tient le
+            verrou partagé
+    """
+    cle = os.path.abspath(f"{chemin}.verrou")
+    tenus = getattr(_tenus, 'verrous', None)
+    if tenus is None:
+        tenus = _tenus.verrous = {}
+
+    entree = tenus.get(cle)
+    if entree is not None:
+        if exclusif and not entree[1]:
+            raise RuntimeError(f"Verrou exclusif demandé sur {chemin} sous un verrou partagé : "
+                               f"prendre le verrou exclusif dès le début")
+        entree[2] += 1
+        try:
+            yield
+        finally:
+            entree[2] -= 1
+        return
+
+    os.makedirs(os.path.dirname(cle), exist_ok=True)
+    descripteur = os.open(cle, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        _verrouiller(descripteur, exclusif or fcntl is None)
+        tenus[cle] = [descripteur, exclusif, 1]
+        try:
+            yield
+        finally:
+            del tenus[cle]
+            _deverrouiller(descripteur)
+    finally:
+        os.close(descripteur)
+
+
+@contextmanager
+def ecriture_atomique(chemin, mode='w', **options):
+    """Ouvre un fichier temporaire qui remplace `chemin` à la sortie du bloc with.
+
+    En cas d'exception, le fichier d'origine est conservé intact.
+
+    Args:
+        chemin (str ou Path): Fichier à remplacer
+        mode (str): 'w' (texte) ou 'wb' (binaire)
+        **options: Passées à open() (encoding, newline...)
+    """
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, prefix=os.path.basename(chemin) + '.', suffix='.tmp')
+    try:
+        # Garder les droits du fichier remplacé (mkstemp crée en 0600)
+        try:
+            os.chmod(temporaire, stat.S_IMODE(os.stat(chemin).st_mode))
+        except FileNotFoundError:
+            os.chmod(temporaire, 0o644)
+        with open(descripteur, mode, **options) as f:
+            yield f
+        os.replace(temporaire, chemin)
+    except BaseException:
+        try:
+            os.remove(temporaire)
+        except OSError:
+            pass
+        raise
+
+
+def modification(methode):
+    """Exécute une méthode d'écriture d'un gestionnaire sous verrou exclusif.
+
+    Les modifications des autres processus sont d'abord intégrées
+    (self.synchroniser()), puis la méthode modifie l'état à jour et
+    l'enregistre avant que le verrou (self.fichier_verrou) ne soit relâché :
+    aucune écriture concurrente n'est perdue.
+    """
+    @functools.wraps(methode)
+    def enveloppe(self, *args, **kwargs):
+        with verrou_fichier(self.fichier_verrou):
+            self.synchroniser()
+            return methode(self, *args, **kwargs)
+    enveloppe.modification = True
+    return enveloppe
+
+
+def differable(methode):
+    """Marque la méthode d'enregistrement complet d'un gestionnaire.
+
+    Dans un bloc sauvegardes_groupees, un appel sans argument est reporté à
+    la sortie du bloc, où la méthode n'est exécutée qu'une fois. Un appel
+    avec arguments est exécuté tout de suite et remplace l'appel reporté
+    (il enregistre le même état, et davantage).
+    """
+    @functools.wraps(methode)
+    def enveloppe(self, *args, **kwargs):
+        reportes = getattr(_reportes, 'gestionnaires', {}).get(id(self))
+        if reportes is not None:
+            if not args and not kwargs:
+                reportes[methode.__name__] = methode
+                return None
+            reportes.pop(methode.__name__, None)
+        return methode(self, *args, **kwargs)
+    return enveloppe
+
+
+@contextmanager
+def sauvegardes_groupees(gestionnaire):
+    """Regroupe les enregistrements des modifications faites pendant le bloc with.
+
+    Le verrou exclusif du gestionnaire est tenu pendant tout le bloc : un
+    autre processus ne peut pas écrire entre une modification en mémoire et
+    son enregistrement reporté.
+
+    Args:
+        gestionnaire: Gestionnaire (attribut fichier_verrou, méthode synchroniser)
+    """
+    tous = getattr(_reportes, 'gestionnaires', None)
+    if tous is None:
+        tous = _reportes.gestionnaires = {}
+    if id(gestionnaire) in tous:
+        yield
+        return
+
+    with verrou_fichier(gestionnaire.fichier_verrou):
+        gestionnaire.synchroniser()
+        reportes = tous[id(gestionnaire)] = {}
+        try:
+            yield
+        finally:
+            del tous[id(gestionnaire)]
+            for methode in reportes.values():
+                methode(gestionnaire)
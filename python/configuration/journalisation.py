@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de configuration de la journalisation.
+
+Les modules de l'application écrivent dans une file (QueueHandler) : l'appel
+à logging ne fait que déposer l'enregistrement, et un thread d'arrière-plan
+(QueueListener) l'écrit dans logs/app.log (JSON, une ligne par message, avec
+rotation par taille) et sur la console. L'interface Tk n'attend donc jamais
+le disque.
+
+Paramètres lus dans config/config.json :
+    niveau_journaux      Niveau global ("INFO" par défaut)
+    niveaux_modules      Niveaux par module, ex. {"python.ventes": "DEBUG"}
+    format_journaux      "json" (défaut) ou "texte" pour logs/app.log
+    taille_max_journal   Taille (octets) au-delà de laquelle app.log est archivé
+    archives_journal     Nombre d'archives conservées (app.log.1, app.log.2...)
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime
+from pathlib import Path
+
+from .parametres import charger_configuration
+
+FICHIER_JOURNAL = "app.log"
+FORMAT_TEXTE = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+
+class FormateurJSON(logging.Formatter):
+    """Formate chaque enregistrement en une ligne JSON."""
+
+    def format(self, record):
+        ligne = {
+            'date': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'niveau': record.levelname,
+            'module': record.name,
+            'message': record.getMessage(),
+            'fichier': f"{record.filename}:{record.lineno}",
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            ligne['exception'] = record.exc_text
+        return json.dumps(ligne, ensure_ascii=False)
+
+
+class GestionnaireFile(logging.handlers.QueueHandler):
+    """Dépose les enregistrements dans la file sans les formater.
+
+    Le message est figé (arguments appliqués) et la trace d'une exception
+    convertie en texte, pour que chaque sortie du QueueListener applique son
+    propre format.
+    """
+
+    def prepare(self, record):
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        copie = logging.makeLogRecord(record.__dict__)
+        copie.msg = message
+        copie.args = None
+        copie.exc_info = None
+        return copie
+
+
+def configurer_journaux(dossier_logs="logs", config=None):
+    """Installe la journalisation asynchrone sur le logger racine.
+
+    Args:
+        dossier_logs (str ou Path): Dossier de app.log (créé au besoin)
+        config (dict, optional): Configuration (lue dans config.json par défaut)
+
+    Returns:
+        logging.handlers.QueueListener: Le thread d'écriture, à passer à
+            arreter_journaux avant de quitter
+    """
+    if config is None:
+        config = charger_configuration()
+    dossier_logs = Path(dossier_logs)
+    dossier_logs.mkdir(parents=True, exist_ok=True)
+
+    fichier = logging.handlers.RotatingFileHandler(
+        dossier_logs / FICHIER_JOURNAL,
+        maxBytes=config["taille_max_journal"],
+        backupCount=config["archives_journal"],
+        encoding='utf-8'
+    )
+    if config["format_journaux"] == "json":
+        fichier.setFormatter(FormateurJSON())
+    else:
+        fichier.setFormatter(logging.Formatter(FORMAT_TEXTE))
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(FORMAT_TEXTE))
+
+    file_attente = queue.SimpleQueue()
+    ecouteur = logging.handlers.QueueListener(file_attente, fichier, console, respect_handler_level=True)
+
+    racine = logging.getLogger()
+    for gestionnaire in list(racine.handlers):
+        racine.removeHandler(gestionnaire)
+        gestionnaire.close()
+    racine.addHandler(GestionnaireFile(file_attente))
+    racine.setLevel(config["niveau_journaux"].upper())
+    for module, niveau in config["niveaux_modules"].items():
+        logging.getLogger(module).setLevel(niveau.upper())
+
+    ecouteur.start()
+    return ecouteur
+
+
+def arreter_journaux(ecouteur):
+    """Écrit les messages encore en file puis arrête le thread d'écriture."""
+    if ecouteur is not None:
+        ecouteur.stop()
+        for gestionnaire in ecouteur.handlers:
+            gestionnaire.close()
+
+
+def tracer_lignes(journal, lignes, message):
+    """Journalise chaque élément de `lignes` au niveau DEBUG au fil du parcours.
+
+    À n'appeler que si journal.isEnabledFor(logging.DEBUG) : sinon les
+    lignes sont parcourues directement, sans aucun coût de trace.
+
+    Yields:
+        Les éléments de `lignes`, inchangés
+    """
+    for ligne in lignes:
+        journal.debug("%s : %s", message, ligne)
+        yield ligne
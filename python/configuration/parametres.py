@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de lecture de la configuration de l'application (config/config.json).
+"""
+
+import json
+import logging
+from pathlib import Path
+
+FICHIER_CONFIG = Path("config") / "config.json"
+
+journal = logging.getLogger(__name__)
+
+# Valeurs utilisées quand une clé est absente du fichier de configuration
+VALEURS_PAR_DEFAUT = {
+    "theme": "dark",
+    "langue": "fr",
+    "max_recommandations": 5,
+    "delai_cache": 3600,
+    "format_ventes": "csv",
+    "intervalle_metriques": 60,  # Secondes entre deux exports de logs/metrics.jsonl
+    "port_metriques": None,      # Port local du point d'accès Prometheus (/metrics), désactivé si null
+    "niveau_journaux": "INFO",
+    "niveaux_modules": {},       # Niveaux par module, ex. {"python.ventes": "DEBUG"}
+    "format_journaux": "json",   # Format de logs/app.log : "json" ou "texte"
+    "taille_max_journal": 5 * 1024 * 1024,
+    "archives_journal": 5,
+    "hote_service": "127.0.0.1", # Adresse d'écoute de main.py --serve
+    "port_service": 8765
+}
+
+
+def charger_configuration(fichier=FICHIER_CONFIG):
+    """Charge la configuration en complétant les clés manquantes.
+
+    Args:
+        fichier (Path, optional): Chemin du fichier de configuration
+
+    Returns:
+        dict: La configuration (valeurs par défaut si le fichier est absent ou illisible)
+    """
+    config = dict(VALEURS_PAR_DEFAUT)
+    try:
+        with open(fichier, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, OSError) as e:
+        journal.error(f"Erreur lors de la lecture de la configuration: {e}")
+    return config
+
+
+def obtenir_parametre(cle, defaut=None, fichier=FICHIER_CONFIG):
+    """Retourne la valeur d'un paramètre de configuration."""
+    return charger_configuration(fichier).get(cle, defaut)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de normalisation des dates en horodatages.
+
+Toutes les dates manipulées par les gestionnaires (ventes, catalogue,
+commentaires) sont converties une seule fois, au chargement, en horodatages
+UTC (secondes entières depuis l'epoch). Les filtres par période et les tris
+comparent ensuite des entiers au lieu de chaînes ou d'objets datetime.
+
+Formats reconnus :
+
+- "AAAA-MM-JJ HH:MM:SS" (ventes.csv) et "AAAA-MM-JJTHH:MM:SS", éventuellement
+  suivis de microsecondes et d'un décalage ("+01:00", "-0500", "Z") ;
+- "AAAA-MM-JJ" (minuit) ;
+- tout autre format accepté par datetime.fromisoformat (chemin lent).
+
+Une date sans décalage est l'heure locale de la machine, comme celles écrites
+par datetime.now(). Le chemin rapide ne convertit réellement qu'une fois par
+heure distincte (mémorisée) : pour chaque date il ne reste qu'à ajouter les
+minutes et les secondes.
+"""
+
+import calendar
+import math
+import time
+from datetime import date, datetime
+
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+# 'AAAA-MM-JJ?HH' -> horodatage du début de l'heure (locale ou UTC)
+_HEURES_LOCALES = {}
+_HEURES_UTC = {}
+
+
+def _debut_heure(prefixe, utc):
+    """Retourne l'horodatage du début de l'heure 'AAAA-MM-JJ?HH' (mémorisé)."""
+    memo = _HEURES_UTC if utc else _HEURES_LOCALES
+    debut = memo.get(prefixe)
+    if debut is None:
+        if prefixe[4] != '-' or prefixe[7] != '-' or prefixe[10] not in ' T':
+            raise ValueError(f"Date invalide : {prefixe}")
+        # datetime() vérifie les bornes (mois 13, 30 février...)
+        valeurs = datetime(int(prefixe[:4]), int(prefixe[5:7]), int(prefixe[8:10]),
+                           int(prefixe[11:13])).timetuple()[:6] + (0, 0, -1)
+        debut = calendar.timegm(valeurs) if utc else int(time.mktime(valeurs))
+        memo[prefixe] = debut
+    return debut
+
+
+def horodatage_fixe(chaine):
+    """Chemin le plus rapide pour une date "AAAA-MM-JJ HH:MM:SS" déjà validée.
+
+    Utilisé à la lecture des fichiers de ventes, dont les dates ont été
+    vérifiées à l'écriture : seule l'heure est mémorisée, minutes et
+    secondes sont ajoutées sans autre contrôle.
+    """
+    debut = _HEURES_LOCALES.get(chaine[:13])
+    if debut is None:
+        debut = _debut_heure(chaine[:13], utc=False)
+    return debut + int(chaine[14:16]) * 60 + int(chaine[17:19])
+
+
+def _decalage(suffixe):
+    """Convertit un suffixe '+HH:MM', '-HHMM' ou 'Z' en secondes (None si invalide)."""
+    if suffixe == 'Z':
+        return 0
+    if len(suffixe) in (5, 6) and suffixe[0] in '+-' and (len(suffixe) == 5 or suffixe[3] == ':'):
+        heures, minutes = suffixe[1:3], suffixe[-2:]
+        if heures.isdigit() and minutes.isdigit():
+            secondes = int(heures) * 3600 + int(minutes) * 60
+            return secondes if suffixe[0] == '+' else -secondes
+    return None
+
+
+def _depuis_chaine(chaine, arrondi_superieur=False):
+    """Convertit une date texte en horodatage UTC (secondes)."""
+    if len(chaine) == 10:
+        return _debut_heure(chaine + 'T00', utc=False)
+    if len(chaine) >= 19 and chaine[13] == ':' and chaine[16] == ':':
+        minutes, secondes = chaine[14:16], chaine[17:19]
+        if minutes.isdigit() and secondes.isdigit() and minutes < '60' and secondes < '60':
+            suffixe = chaine[19:]
+            reste = int(minutes) * 60 + int(secondes)
+            if suffixe.startswith('.'):
+                # Précision à la seconde : fraction tronquée, ou arrondie à la seconde suivante
+                i = 1
+                while i < len(suffixe) and suffixe[i].isdigit():
+                    i += 1
+                if arrondi_superieur and suffixe[1:i].strip('0'):
+                    reste += 1
+                suffixe = suffixe[i:]
+            if not suffixe:
+                return _debut_heure(chaine[:13], utc=False) + reste
+            decalage = _decalage(suffixe)
+            if decalage is not None:
+                return _debut_heure(chaine[:13], utc=True) + reste - decalage
+
+    # Chemin lent : formats ISO moins courants
+    return _depuis_datetime(datetime.fromisoformat(chaine), arrondi_superieur)
+
+
+def _depuis_datetime(valeur, arrondi_superieur):
+    secondes = valeur.timestamp()
+    return math.ceil(secondes) if arrondi_superieur else math.floor(secondes)
+
+
+def horodatage(valeur, arrondi_superieur=False):
+    """Convertit une date en horodatage UTC (secondes entières).
+
+    Args:
+        valeur (str, datetime, date, int ou None): La date à convertir ;
+            un entier est supposé être déjà un horodatage
+        arrondi_superieur (bool): Arrondir les fractions de seconde à la
+            seconde suivante (utile pour une borne de début incluse)
+
+    Returns:
+        int: L'horodatage, ou None si valeur est None
+
+    Raises:
+        ValueError: Si la chaîne n'est pas une date reconnue
+    """
+    if valeur is None:
+        return None
+    if isinstance(valeur, str):
+        try:
+            return _depuis_chaine(valeur, arrondi_superieur)
+        except (ValueError, IndexError):
+            raise ValueError(f"Date invalide : {valeur!r}") from None
+    if isinstance(valeur, datetime):
+        return _depuis_datetime(valeur, arrondi_superieur)
+    if isinstance(valeur, date):
+        return int(time.mktime(valeur.timetuple()))
+    if isinstance(valeur, (int, float)):
+        return math.ceil(valeur) if arrondi_superieur else math.floor(valeur)
+    raise TypeError(f"Date non reconnue : {valeur!r}")
+
+
+def vers_datetime(secondes):
+    """Convertit un horodatage en datetime local (sans fuseau)."""
+    return datetime.fromtimestamp(secondes)
+
+
+def formater(secondes, format_date=FORMAT_DATE):
+    """Formate un horodatage en heure locale."""
+    return time.strftime(format_date, time.localtime(secondes))
+
+
+def maintenant():
+    """Retourne l'horodatage de l'instant présent."""
+    return int(time.time())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de notification des changements (publication / abonnement).
+
+Les gestionnaires publient un événement après chaque écriture (film ajouté,
+note modifiée, vente enregistrée...) ; les vues s'y abonnent pour ne mettre
+à jour que ce qui a changé, au lieu de tout reconstruire périodiquement.
+
+Par défaut tous les gestionnaires publient sur le bus partagé BUS : deux
+instances d'un même gestionnaire (par exemple la GestionCommentaires d'une
+fenêtre de détails) préviennent donc les mêmes abonnés.
+"""
+
+import logging
+import threading
+from collections import namedtuple
+
+journal = logging.getLogger(__name__)
+
+# Types d'événements et données associées
+FILM_AJOUTE = "film_ajoute"                  # film
+NOTE_FILM_MODIFIEE = "note_film_modifiee"    # film (note globale sur 10 recalculée)
+CATALOGUE_RECHARGE = "catalogue_recharge"    # (aucune : tout le catalogue a pu changer)
+NOTE_UTILISATEUR = "note_utilisateur"        # utilisateur, film_id, note
+VENTE_ENREGISTREE = "vente_enregistree"      # vente
+VENTE_ANNULEE = "vente_annulee"              # vente
+VENTES_RECHARGEES = "ventes_rechargees"      # (aucune : tout l'historique a pu changer)
+COMMENTAIRES_MODIFIES = "commentaires_modifies"  # film_id
+UTILISATEURS_MODIFIES = "utilisateurs_modifies"  # utilisateur (créé, supprimé ou promu)
+# Propre à un processus (non relayé par le service HTTP) : liste recalculée en arrière-plan
+RECOMMANDATIONS_CALCULEES = "recommandations_calculees"  # utilisateur
+
+TYPES_EVENEMENTS = (FILM_AJOUTE, NOTE_FILM_MODIFIEE, CATALOGUE_RECHARGE, NOTE_UTILISATEUR, VENTE_ENREGISTREE,
+                    VENTE_ANNULEE, VENTES_RECHARGEES, COMMENTAIRES_MODIFIES, UTILISATEURS_MODIFIES)
+
+Evenement = namedtuple('Evenement', ['type', 'donnees'])
+
+
+class BusEvenements:
+    """Distribue les événements publiés aux fonctions abonnées à leur type.
+
+    La distribution est synchrone, dans le thread de l'appel à publier ;
+    l'exception d'un abonné est journalisée sans interrompre les autres ni
+    l'écriture qui a publié l'événement.
+    """
+
+    def __init__(self):
+        self._abonnes = {}
+        self._verrou = threading.Lock()
+
+    def abonner(self, type_evenement, rappel):
+        """Abonne `rappel(evenement)` aux événements de ce type.
+
+        Returns:
+            callable: Fonction sans argument qui annule l'abonnement
+        """
+        with self._verrou:
+            # Copie à l'écriture : publier parcourt la liste sans verrou
+            self._abonnes[type_evenement] = self._abonnes.get(type_evenement, []) + [rappel]
+        return lambda: self.desabonner(type_evenement, rappel)
+
+    def desabonner(self, type_evenement, rappel):
+        """Annule un abonnement (sans effet s'il n'existe pas)."""
+        with self._verrou:
+            abonnes = [a for a in self._abonnes.get(type_evenement, []) if a != rappel]
+            if abonnes:
+                self._abonnes[type_evenement] = abonnes
+            else:
+                self._abonnes.pop(type_evenement, None)
+
+    def publier(self, type_evenement, **donnees):
+        """Publie un événement auprès des abonnés de son type."""
+        abonnes = self._abonnes.get(type_evenement)
+        if not abonnes:
+            return
+        evenement = Evenement(type_evenement, donnees)
+        for rappel in abonnes:
+            try:
+                rappel(evenement)
+            except Exception as e:
+                journal.error(f"Erreur d'un abonné à {type_evenement}: {e}", exc_info=True)
+
+
+# Bus partagé par défaut par les gestionnaires et l'interface
+BUS = BusEvenements()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de génération de jeux de données synthétiques (tests de charge).
+
+Films, utilisateurs, notes, commentaires et ventes sont tirés avec NumPy par
+tableaux entiers, à partir d'une graine : deux générations avec les mêmes
+paramètres produisent des fichiers identiques. Chaque collection a son propre
+générateur aléatoire (SeedSequence.spawn), de sorte que changer le nombre de
+ventes ne modifie pas les films ou les notes.
+
+Distributions :
+- popularité des films en loi de Zipf (exposant réglable) : elle pondère à
+  la fois les ventes et les films notés ;
+- heures de vente selon un profil journalier (PROFIL_HORAIRE) et jours selon
+  un profil hebdomadaire (PROFIL_HEBDOMADAIRE) ;
+- notes autour de la qualité du film (sa note sur 10), avec un biais propre
+  à chaque utilisateur.
+
+Les fichiers produits ont les formats de l'application (films.csv,
+utilisateurs.json, notes_utilisateurs.json, commentaires.json et l'historique
+des ventes au format "csv" ou "blocs") et sont écrits au fil de l'eau, sans
+construire de gros dictionnaires en mémoire.
+
+Utilisation :
+    python generer_donnees.py donnees_charge --films 100000 --utilisateurs 1000000 --ventes 10000000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from ..catalogue.gestion import CHAMPS_FILM
+from ..ventes.stockage_ventes import creer_stockage
+from .gestion_import import RapportImport
+
+GENRES = ['Action', 'Animation', 'Aventure', 'Comédie', 'Crime', 'Documentaire',
+          'Drame', 'Fantastique', 'Horreur', 'Romance', 'Science-Fiction', 'Thriller']
+
+# Poids relatifs des ventes par heure (0 h à 23 h) : pics à midi et en soirée
+PROFIL_HORAIRE = [0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.3, 0.6, 0.9, 1.0, 1.1, 1.4,
+                  1.8, 1.6, 1.2, 1.1, 1.2, 1.5, 2.0, 2.6, 2.9, 2.6, 1.6, 0.7]
+# Poids relatifs des ventes par jour de la semaine (lundi à dimanche)
+PROFIL_HEBDOMADAIRE = [0.8, 0.8, 0.9, 0.9, 1.2, 1.6, 1.4]
+
+TEXTES_COMMENTAIRES = [
+    "Un chef-d'œuvre, à voir absolument.",
+    "Très bon film, quelques longueurs.",
+    "Correct sans plus.",
+    "Je me suis ennuyé du début à la fin.",
+    "Des acteurs excellents et une belle mise en scène.",
+    "Le scénario est prévisible mais l'ensemble reste agréable.",
+    "Une déception par rapport aux critiques.",
+    "À revoir en famille.",
+]
+
+MOT_DE_PASSE = "MotDePasse2025!"
+
+# Nombre de ventes converties en dictionnaires à la fois
+TAILLE_LOT = 100_000
+
+
+def _popularite(rng, nombre, exposant):
+    """Probabilités de Zipf attribuées aux films dans un ordre aléatoire."""
+    poids = 1.0 / np.arange(1, nombre + 1, dtype=np.float64) ** exposant
+    poids /= poids.sum()
+    return poids[rng.permutation(nombre)]
+
+
+def _dates_iso(secondes, separateur='T'):
+    """Formate un tableau de secondes (heure locale, sans fuseau) en chaînes ISO.
+
+    La conversion est faite par NumPy (datetime64) puis le séparateur entre
+    la date et l'heure est remplacé directement dans les octets.
+    """
+    brut = secondes.astype('datetime64[s]').astype('S19')
+    if separateur != 'T':
+        octets = brut.view(np.uint8).reshape(-1, 19)
+        octets[:, 10] = ord(separateur)
+    return brut.astype('U19').tolist()
+
+
+def _secondes_aleatoires(rng, nombre, debut, fin):
+    """Tire des instants selon les profils hebdomadaire et horaire, triés."""
+    jours = np.arange(np.datetime64(debut, 'D'), np.datetime64(fin, 'D') + 1)
+    jours_semaine = (jours.astype(np.int64) + 3) % 7  # 1970-01-01 était un jeudi
+    poids_jours = np.asarray(PROFIL_HEBDOMADAIRE)[jours_semaine]
+    poids_heures = np.asarray(PROFIL_HORAIRE)
+
+    jour = rng.choice(len(jours), size=nombre, p=poids_jours / poids_jours.sum())
+    heure = rng.choice(24, size=nombre, p=poids_heures / poids_heures.sum())
+    secondes = (jours[jour].astype('datetime64[s]').astype(np.int64)
+                + heure * 3600 + rng.integers(0, 3600, size=nombre))
+    secondes.sort()
+    return secondes
+
+
+def generer_films(dossier, rng, nombre, debut, fin):
+    """Écrit films.csv et retourne (notes des films, rapport)."""
+    rapport = RapportImport('films')
+    annees = rng.integers(1950, int(fin[:4]) + 1, size=nombre)
+    genres = rng.integers(0, len(GENRES), size=nombre)
+    notes = np.clip(np.round(rng.normal(6.5, 1.5, size=nombre), 1), 1.0, 10.0)
+    nb_realisateurs = max(10, nombre // 5)
+    nb_acteurs = max(30, nombre // 2)
+    realisateurs = rng.integers(1, nb_realisateurs + 1, size=nombre)
+    acteurs = rng.integers(1, nb_acteurs + 1, size=(nombre, 3))
+    dates_ajout = _dates_iso(_secondes_aleatoires(rng, nombre, debut, fin))
+
+    with open(os.path.join(dossier, 'films.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CHAMPS_FILM)
+        for i, (annee, genre, note, realisateur, trio, date_ajout) in enumerate(
+                zip(annees.tolist(), genres.tolist(), notes.tolist(), realisateurs.tolist(),
+                    acteurs.tolist(), dates_ajout), start=1):
+            writer.writerow([i, f"Film {i}", f"Réalisateur {realisateur}", annee, GENRES[genre],
+                             note, '|'.join(f"Acteur {a}" for a in trio), date_ajout])
+    rapport.lignes_lues = rapport.lignes_ecrites = nombre
+    return notes, rapport.terminer()
+
+
+def generer_utilisateurs(dossier, rng, nombre, debut, fin):
+    """Écrit utilisateurs.json (un utilisateur par ligne) et retourne leurs noms."""
+    rapport = RapportImport('utilisateurs')
+    largeur = len(str(nombre))
+    noms = [f"utilisateur{i:0{largeur}d}" for i in range(1, nombre + 1)]
+    dates = _dates_iso(_secondes_aleatoires(rng, nombre, debut, fin))
+    mot_de_passe = json.dumps(MOT_DE_PASSE)
+
+    with open(os.path.join(dossier, 'utilisateurs.json'), 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for i, (nom, date_creation) in enumerate(zip(noms, dates)):
+            separateur = ',\n' if i < nombre - 1 else '\n'
+            f.write(f'"{nom}": {{"email": "{nom}@cineflix.com", "password": {mot_de_passe}, '
+                    f'"role": "user", "date_creation": "{date_creation}", '
+                    f'"derniere_connexion": null}}{separateur}')
+        f.write('}\n')
+    rapport.lignes_lues = rapport.lignes_ecrites = nombre
+    return noms, rapport.terminer()
+
+
+def generer_notes(dossier, rng, noms, notes_films, popularite, notes_par_utilisateur, debut, fin):
+    """Écrit notes_utilisateurs.json et retourne (utilisateurs, films, notes, rapport).
+
+    Chaque utilisateur note en moyenne `notes_par_utilisateur` films distincts,
+    choisis selon la popularité ; les clés de films sont les IDs (comme
+    noter_film).
+    """
+    rapport = RapportImport('notes')
+    nb_utilisateurs, nb_films = len(noms), len(notes_films)
+    nombres = np.minimum(rng.poisson(notes_par_utilisateur, size=nb_utilisateurs), nb_films)
+    utilisateurs = np.repeat(np.arange(nb_utilisateurs, dtype=np.int64), nombres)
+    films = rng.choice(nb_films, size=len(utilisateurs), p=popularite)
+    # Un utilisateur ne note qu'une fois chaque film (tri par utilisateur puis film)
+    cles = np.unique(utilisateurs * nb_films + films)
+    utilisateurs, films = cles // nb_films, cles % nb_films
+
+    biais = rng.normal(0.0, 0.5, size=nb_utilisateurs)
+    valeurs = np.clip(np.rint(notes_films[films] / 2 + biais[utilisateurs]
+                              + rng.normal(0.0, 0.8, size=len(films))), 1, 5).astype(np.int64)
+    dates = _dates_iso(_secondes_aleatoires(rng, len(films), debut, fin))
+    rng.shuffle(dates)
+
+    debuts = np.searchsorted(utilisateurs, np.arange(nb_utilisateurs + 1))
+    films_liste, valeurs_liste = (films + 1).tolist(), valeurs.tolist()
+    with open(os.path.join(dossier, 'notes_utilisateurs.json'), 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for u, nom in enumerate(noms):
+            entrees = ', '.join(
+                f'"{films_liste[k]}": {{"note": {valeurs_liste[k]}, "date": "{dates[k]}"}}'
+                for k in range(debuts[u], debuts[u + 1])
+            )
+            separateur = ',\n' if u < nb_utilisateurs - 1 else '\n'
+            f.write(f'"{nom}": {{{entrees}}}{separateur}')
+        f.write('}\n')
+    rapport.lignes_lues = rapport.lignes_ecrites = len(films)
+    return utilisateurs, films, valeurs, rapport.terminer()
+
+
+def generer_commentaires(dossier, rng, noms, utilisateurs, films, valeurs, nombre, debut, fin):
+    """Écrit commentaires.json : une partie des notes est accompagnée d'un texte."""
+    rapport = RapportImport('commentaires')
+    nombre = min(nombre, len(films))
+    choisis = np.sort(rng.choice(len(films), size=nombre, replace=False))
+    textes = rng.integers(0, len(TEXTES_COMMENTAIRES), size=nombre)
+    dates = _dates_iso(_secondes_aleatoires(rng, nombre, debut, fin))
+
+    with open(os.path.join(dossier, 'commentaires.json'), 'w', encoding='utf-8') as f:
+        f.write('{"comments": [\n')
+        for i, (k, texte, date_commentaire) in enumerate(zip(choisis.tolist(), textes.tolist(), dates)):
+            commentaire = {
+                "id": i + 1,
+                "film_id": int(films[k]) + 1,
+                "utilisateur": noms[utilisateurs[k]],
+                "note": int(valeurs[k]),
+                "commentaire": TEXTES_COMMENTAIRES[texte],
+                "date": date_commentaire
+            }
+            separateur = ',\n' if i < nombre - 1 else '\n'
+            f.write(json.dumps(commentaire, ensure_ascii=False) + separateur)
+        f.write(']}\n')
+    rapport.lignes_lues = rapport.lignes_ecrites = nombre
+    return rapport.terminer()
+
+
+def generer_ventes(dossier, rng, nb_films, popularite, nombre, debut, fin, format_ventes):
+    """Écrit l'historique des ventes dans le stockage demandé ("csv" ou "blocs")."""
+    rapport = RapportImport('ventes')
+    secondes = _secondes_aleatoires(rng, nombre, debut, fin)
+    films = rng.choice(nb_films, size=nombre, p=popularite) + 1
+    quantites = rng.geometric(0.6, size=nombre)  # 1, 2, 3... de moins en moins probables
+    prix = np.round(rng.uniform(8.99, 14.99, size=nombre), 2)
+    totaux = np.round(quantites * prix, 2)
+
+    def lignes():
+        for debut_lot in range(0, nombre, TAILLE_LOT):
+            lot = slice(debut_lot, debut_lot + TAILLE_LOT)
+            colonnes = zip(range(debut_lot + 1, debut_lot + TAILLE_LOT + 1),
+                           _dates_iso(secondes[lot], ' '), films[lot].tolist(),
+                           quantites[lot].tolist(), prix[lot].tolist(), totaux[lot].tolist())
+            for id_vente, date_vente, film_id, quantite, prix_unitaire, total in colonnes:
+                yield {
+                    'id': id_vente,
+                    'date': date_vente,
+                    'film_id': film_id,
+                    'titre_film': f"Film {film_id}",
+                    'quantite': quantite,
+                    'prix_unitaire': prix_unitaire,
+                    'total': total
+                }
+                rapport.lignes_ecrites += 1
+
+    creer_stockage(os.path.join(dossier, 'ventes.csv'), format_ventes).ecrire(lignes())
+    rapport.lignes_lues = rapport.lignes_ecrites
+    return rapport.terminer()
+
+
+def generer(dossier, nb_films=1000, nb_utilisateurs=10_000, nb_ventes=100_000,
+            notes_par_utilisateur=10, nb_commentaires=None, graine=42, exposant_zipf=1.1,
+            debut='2024-01-01', fin='2025-12-31', format_ventes='csv'):
+    """Génère un jeu de données complet dans `dossier`.
+
+    Args:
+        dossier (str): Dossier de destination (créé si besoin)
+        nb_films (int): Nombre de films
+        nb_utilisateurs (int): Nombre d'utilisateurs
+        nb_ventes (int): Nombre de ventes
+        notes_par_utilisateur (float): Nombre moyen de films notés par utilisateur
+        nb_commentaires (int, optional): Nombre de commentaires (par défaut
+            un pour dix utilisateurs)
+        graine (int): Graine aléatoire
+        exposant_zipf (float): Exposant de la loi de popularité des films
+        debut (str): Premier jour des ventes ('AAAA-MM-JJ')
+        fin (str): Dernier jour des ventes ('AAAA-MM-JJ')
+        format_ventes (str): "csv" ou "blocs"
+
+    Returns:
+        list: Les rapports (RapportImport) de chaque collection
+    """
+    if nb_films <= 0:
+        raise ValueError("Il faut au moins un film")
+    if nb_commentaires is None:
+        nb_commentaires = nb_utilisateurs // 10
+    os.makedirs(dossier, exist_ok=True)
+
+    graines = np.random.SeedSequence(graine).spawn(5)
+    rng_films, rng_utilisateurs, rng_notes, rng_commentaires, rng_ventes = (
+        np.random.default_rng(g) for g in graines)
+
+    notes_films, rapport_films = generer_films(dossier, rng_films, nb_films, debut, fin)
+    popularite = _popularite(rng_films, nb_films, exposant_zipf)
+    noms, rapport_utilisateurs = generer_utilisateurs(dossier, rng_utilisateurs, nb_utilisateurs,
+                                                      debut, fin)
+    utilisateurs, films, valeurs, rapport_notes = generer_notes(
+        dossier, rng_notes, noms, notes_films, popularite, notes_par_utilisateur, debut, fin)
+    rapport_commentaires = generer_commentaires(dossier, rng_commentaires, noms, utilisateurs,
+                                                films, valeurs, nb_commentaires, debut, fin)
+    rapport_ventes = generer_ventes(dossier, rng_ventes, nb_films, popularite, nb_ventes,
+                                    debut, fin, format_ventes)
+    return [rapport_films, rapport_utilisateurs, rapport_notes, rapport_commentaires, rapport_ventes]
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques CinéFlix")
+    parser.add_argument('dossier', help="Dossier de destination")
+    parser.add_argument('--films', type=int, default=1000)
+    parser.add_argument('--utilisateurs', type=int, default=10_000)
+    parser.add_argument('--ventes', type=int, default=100_000)
+    parser.add_argument('--notes-par-utilisateur', type=float, default=10)
+    parser.add_argument('--commentaires', type=int, help="Défaut : un pour dix utilisateurs")
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--zipf', type=float, default=1.1, help="Exposant de popularité des films")
+    parser.add_argument('--debut', default='2024-01-01', help="Premier jour de ventes (AAAA-MM-JJ)")
+    parser.add_argument('--fin', default='2025-12-31', help="Dernier jour de ventes (AAAA-MM-JJ)")
+    parser.add_argument('--format-ventes', choices=['csv', 'blocs'], default='csv')
+    parser.add_argument('--ecraser', action='store_true',
+                        help="Autoriser l'écriture dans un dossier qui contient déjà des données")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.dossier) and os.listdir(args.dossier) and not args.ecraser:
+        print(f"Le dossier {args.dossier} n'est pas vide (utiliser --ecraser)", file=sys.stderr)
+        return 1
+
+    rapports = generer(args.dossier, args.films, args.utilisateurs, args.ventes,
+                       args.notes_par_utilisateur, args.commentaires, args.graine, args.zipf,
+                       args.debut, args.fin, args.format_ventes)
+    for rapport in rapports:
+        print(rapport.resume())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
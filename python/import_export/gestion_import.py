@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module d'import/export en masse du catalogue, des ventes et des notes.
+
+Les fichiers d'entrée (CSV ou JSON Lines) sont lus ligne par ligne : seule la
+ligne courante est gardée en mémoire. Chaque ligne est validée avec les mêmes
+règles que les gestionnaires (ajouter_film, enregistrer_vente, noter_film),
+les identifiants sont attribués en bloc et le fichier cible n'est ouvert
+qu'une seule fois en écriture. Le fichier cible est modifié sous le même
+verrou exclusif que celui des gestionnaires (verrou_fichier) : un import
+peut tourner pendant que l'application est ouverte.
+
+Utilisation :
+    python import_masse.py import films nouveaux_films.csv
+    python import_masse.py import ventes ventes.jsonl
+    python import_masse.py import notes notes.csv
+    python import_masse.py export ventes sauvegarde.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ..catalogue.gestion import CHAMPS_FILM, valider_film
+from ..concurrence.fichiers import ecriture_atomique, verrou_fichier
+from ..dates.horodatage import horodatage
+from ..configuration.parametres import obtenir_parametre
+from ..ventes.gestion_ventes import valider_vente
+from ..ventes.stockage_ventes import CHAMPS_VENTE, StockageVentesCSV, creer_stockage
+from ..utilisateurs.gestion_utilisateurs import valider_note
+
+# Nombre maximal d'erreurs détaillées affichées à la fin d'un import
+MAX_ERREURS_AFFICHEES = 20
+
+FICHIERS = {
+    'films': 'films.csv',
+    'ventes': 'ventes.csv',
+    'notes': 'notes_utilisateurs.json'
+}
+
+
+class RapportImport:
+    """Compteurs d'un import ou d'un export (lignes, erreurs, débit)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.lignes_lues = 0
+        self.lignes_ecrites = 0
+        self.erreurs = []
+        self.nombre_erreurs = 0
+        self.debut = time.perf_counter()
+        self.duree = 0.0
+
+    def ajouter_erreur(self, numero_ligne, message):
+        """Enregistre une ligne rejetée (seules les premières sont conservées)."""
+        self.nombre_erreurs += 1
+        if len(self.erreurs) < MAX_ERREURS_AFFICHEES:
+            self.erreurs.append((numero_ligne, message))
+
+    def terminer(self):
+        """Fige la durée de l'opération."""
+        self.duree = time.perf_counter() - self.debut
+        return self
+
+    @property
+    def debit(self):
+        """Nombre de lignes traitées par seconde."""
+        return self.lignes_lues / self.duree if self.duree > 0 else 0.0
+
+    def resume(self):
+        """Retourne le résumé lisible de l'opération."""
+        lignes = [
+            f"{self.collection}: {self.lignes_lues} lignes lues, "
+            f"{self.lignes_ecrites} écrites, {self.nombre_erreurs} erreurs "
+            f"en {self.duree:.2f} s ({self.debit:,.0f} lignes/s)"
+        ]
+        for numero, message in self.erreurs:
+            lignes.append(f"  ligne {numero}: {message}")
+        if self.nombre_erreurs > len(self.erreurs):
+            lignes.append(f"  ... {self.nombre_erreurs - len(self.erreurs)} autres erreurs")
+        return "\n".join(lignes)
+
+
+def detecter_format(chemin, format_force=None):
+    """Détermine le format ('csv' ou 'jsonl') d'après l'extension du fichier."""
+    if format_force:
+        return format_force
+    extension = Path(chemin).suffix.lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return 'csv'
+
+
+def lire_lignes(chemin, format_fichier):
+    """Parcourt un fichier CSV ou JSON Lines ligne par ligne.
+
+    Yields:
+        tuple: (numéro de ligne, dictionnaire) ; le dictionnaire vaut None
+            si la ligne JSON est illisible
+    """
+    with open(chemin, 'r', encoding='utf-8', newline='') as f:
+        if format_fichier == 'jsonl':
+            for numero, ligne in enumerate(f, start=1):
+                ligne = ligne.strip()
+                if not ligne:
+                    continue
+                try:
+                    yield numero, json.loads(ligne)
+                except json.JSONDecodeError:
+                    yield numero, None
+        else:
+            reader = csv.DictReader(f)
+            # La ligne 1 est l'en-tête
+            for numero, row in enumerate(reader, start=2):
+                yield numero, row
+
+
+def _max_id(chemin, rapport):
+    """Lit uniquement la colonne 'id' d'un CSV pour trouver le plus grand ID.
+
+    Les lignes du fichier cible dont l'ID n'est pas numérique sont ignorées
+    et signalées dans le rapport, comme les lignes rejetées de la source.
+    """
+    max_id = 0
+    try:
+        with open(chemin, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            entete = next(reader, None)
+            if not entete:
+                return 0
+            index = entete.index('id')
+            # La ligne 1 est l'en-tête
+            for numero, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                try:
+                    max_id = max(max_id, int(row[index]))
+                except (ValueError, IndexError):
+                    valeur = row[index] if index < len(row) else None
+                    rapport.ajouter_erreur(
+                        numero, f"{os.path.basename(chemin)} : ID non numérique {valeur!r}, ligne ignorée")
+    except FileNotFoundError:
+        pass
+    return max_id
+
+
+def _ouvrir_csv_en_ajout(chemin, champs):
+    """Ouvre un CSV en ajout et écrit l'en-tête si le fichier est vide."""
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    vide = not os.path.exists(chemin) or os.path.getsize(chemin) == 0
+    f = open(chemin, 'a', encoding='utf-8', newline='')
+    writer = csv.DictWriter(f, fieldnames=champs)
+    if vide:
+        writer.writeheader()
+    return f, writer
+
+
+def importer_films(source, dossier_donnees="donnees", format_fichier=None):
+    """Importe des films en masse dans films.csv.
+
+    Args:
+        source (str): Fichier CSV ou JSON Lines à importer
+        dossier_donnees (str): Dossier contenant films.csv
+        format_fichier (str, optional): 'csv' ou 'jsonl' (sinon déduit)
+
+    Returns:
+        RapportImport: Le rapport de l'import
+    """
+    rapport = RapportImport('films')
+    cible = os.path.join(dossier_donnees, FICHIERS['films'])
+    date_ajout = datetime.now().isoformat()
+
+    # Même verrou que GestionCatalogue (fichier_verrou = films.csv)
+    with verrou_fichier(cible):
+        prochain_id = _max_id(cible, rapport) + 1
+        f, writer = _ouvrir_csv_en_ajout(cible, CHAMPS_FILM)
+        with f:
+            for numero, row in lire_lignes(source, detecter_format(source, format_fichier)):
+                rapport.lignes_lues += 1
+                try:
+                    if row is None:
+                        raise ValueError("JSON invalide")
+                    film = valider_film(row)
+                    if row.get('date_ajout'):
+                        # Relue par horodatage au chargement du catalogue
+                        horodatage(row['date_ajout'])
+                except (ValueError, TypeError) as e:
+                    rapport.ajouter_erreur(numero, str(e))
+                    continue
+                film['id'] = prochain_id
+                film['acteurs'] = '|'.join(film['acteurs'])
+                film['date_ajout'] = row.get('date_ajout') or date_ajout
+                writer.writerow(film)
+                prochain_id += 1
+                rapport.lignes_ecrites += 1
+    return rapport.terminer()
+
+
+def _titres_films(dossier_donnees):
+    """Associe chaque ID de film à son titre (pour compléter les ventes)."""
+    titres = {}
+    try:
+        for _, row in lire_lignes(os.path.join(dossier_donnees, FICHIERS['films']), 'csv'):
+            titres[int(row['id'])] = row['titre']
+    except FileNotFoundError:
+        pass
+    return titres
+
+
+def _stockage_ventes(dossier_donnees, format_ventes=None):
+    """Stockage des ventes du dossier, au format configuré (comme GestionVentes)."""
+    if format_ventes is None:
+        format_ventes = obtenir_parametre("format_ventes", "csv")
+    return creer_stockage(os.path.join(dossier_donnees, FICHIERS['ventes']), format_ventes)
+
+
+def importer_ventes(source, dossier_donnees="donnees", format_fichier=None, format_ventes=None):
+    """Importe des ventes en masse à la suite de l'historique.
+
+    Les ventes sont ajoutées par le stockage configuré (ventes.csv ou
+    ventes.blocs), en un seul ajout. Le titre du film est complété depuis
+    le catalogue s'il est absent.
+
+    Args:
+        format_ventes (str, optional): "csv" ou "blocs" ; par défaut celui de config/config.json
+
+    Returns:
+        RapportImport: Le rapport de l'import
+    """
+    rapport = RapportImport('ventes')
+    stockage = _stockage_ventes(dossier_donnees, format_ventes)
+    titres = None
+
+    def ventes_valides(prochain_id):
+        nonlocal titres
+        for numero, row in lire_lignes(source, detecter_format(source, format_fichier)):
+            rapport.lignes_lues += 1
+            try:
+                if row is None:
+                    raise ValueError("JSON invalide")
+                if not row.get('titre_film') and row.get('film_id') not in (None, ''):
+                    if titres is None:
+                        titres = _titres_films(dossier_donnees)
+                    row['titre_film'] = titres.get(int(row['film_id']))
+                vente = valider_vente(row)
+            except (ValueError, TypeError) as e:
+                rapport.ajouter_erreur(numero, str(e))
+                continue
+            vente['id'] = prochain_id
+            prochain_id += 1
+            rapport.lignes_ecrites += 1
+            yield vente
+
+    # Même verrou que GestionVentes (fichier_verrou = chemin du stockage)
+    with verrou_fichier(stockage.chemin):
+        if isinstance(stockage, StockageVentesCSV):
+            dernier_id = _max_id(stockage.chemin, rapport)
+        else:
+            dernier_id = max((vente['id'] for vente in stockage.lire()), default=0) if stockage.existe() else 0
+        stockage.ajouter(ventes_valides(dernier_id + 1))
+    return rapport.terminer()
+
+
+def importer_notes(source, dossier_donnees="donnees", format_fichier=None):
+    """Importe des notes (utilisateur, film, note, date) dans notes_utilisateurs.json.
+
+    La colonne 'film' contient la clé utilisée par le fichier de notes (titre
+    ou ID) ; une colonne 'film_id' est aussi acceptée. Le fichier JSON est
+    réécrit une seule fois à la fin.
+
+    Returns:
+        RapportImport: Le rapport de l'import
+    """
+    rapport = RapportImport('notes')
+    cible = Path(dossier_donnees) / FICHIERS['notes']
+    date_defaut = datetime.now().isoformat()
+
+    # Verrou de GestionUtilisateurs, commun à utilisateurs.json et aux notes
+    with verrou_fichier(Path(dossier_donnees) / 'utilisateurs.json'):
+        try:
+            with open(cible, 'r', encoding='utf-8') as f:
+                notes = json.load(f)
+        except FileNotFoundError:
+            notes = {}
+
+        for numero, row in lire_lignes(source, detecter_format(source, format_fichier)):
+            rapport.lignes_lues += 1
+            try:
+                if row is None:
+                    raise ValueError("JSON invalide")
+                utilisateur = row.get('utilisateur')
+                film = row.get('film') or row.get('film_id')
+                if not utilisateur or film in (None, ''):
+                    raise ValueError("Les champs 'utilisateur' et 'film' sont requis")
+                note = valider_note(row.get('note'))
+                if row.get('date'):
+                    horodatage(row['date'])
+            except (ValueError, TypeError) as e:
+                rapport.ajouter_erreur(numero, str(e))
+                continue
+            notes.setdefault(utilisateur, {})[str(film)] = {
+                'note': note,
+                'date': row.get('date') or date_defaut
+            }
+            rapport.lignes_ecrites += 1
+
+        with ecriture_atomique(cible, 'w', encoding='utf-8') as f:
+            json.dump(notes, f, indent=4, ensure_ascii=False)
+    return rapport.terminer()
+
+
+def exporter(collection, destination, dossier_donnees="donnees", format_fichier=None, format_ventes=None):
+    """Exporte une collection vers un fichier CSV ou JSON Lines.
+
+    Les ventes sont lues dans le stockage configuré (voir importer_ventes).
+
+    Returns:
+        RapportImport: Le rapport de l'export
+    """
+    rapport = RapportImport(collection)
+    source = os.path.join(dossier_donnees, FICHIERS[collection])
+    format_sortie = detecter_format(destination, format_fichier)
+
+    if collection == 'notes':
+        with open(source, 'r', encoding='utf-8') as f:
+            notes = json.load(f)
+        lignes = (
+            (0, {'utilisateur': utilisateur, 'film': film, 'note': data.get('note'), 'date': data.get('date')})
+            for utilisateur, notes_utilisateur in notes.items()
+            for film, data in notes_utilisateur.items()
+        )
+        champs = ['utilisateur', 'film', 'note', 'date']
+    elif collection == 'ventes':
+        lignes = ((0, {champ: vente[champ] for champ in CHAMPS_VENTE})
+                  for vente in _stockage_ventes(dossier_donnees, format_ventes).lire())
+        champs = CHAMPS_VENTE
+    else:
+        lignes = lire_lignes(source, 'csv')
+        champs = CHAMPS_FILM
+
+    with open(destination, 'w', encoding='utf-8', newline='') as f:
+        writer = None
+        if format_sortie == 'csv':
+            writer = csv.DictWriter(f, fieldnames=champs, extrasaction='ignore')
+            writer.writeheader()
+        for _, row in lignes:
+            rapport.lignes_lues += 1
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            rapport.lignes_ecrites += 1
+    return rapport.terminer()
+
+
+IMPORTEURS = {
+    'films': importer_films,
+    'ventes': importer_ventes,
+    'notes': importer_notes
+}
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Import/export en masse des données CinéFlix")
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('collection', choices=sorted(FICHIERS))
+    parser.add_argument('fichier', help="Fichier source (import) ou destination (export)")
+    parser.add_argument('--donnees', default="donnees", help="Dossier des données (défaut : donnees)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Force le format du fichier")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == 'import':
+            rapport = IMPORTEURS[args.collection](args.fichier, args.donnees, args.format)
+        else:
+            rapport = exporter(args.collection, args.fichier, args.donnees, args.format)
+    except FileNotFoundError as e:
+        print(f"Fichier introuvable : {e.filename}", file=sys.stderr)
+        return 1
+
+    print(rapport.resume())
+    return 1 if rapport.nombre_erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
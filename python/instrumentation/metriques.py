@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de mesure des opérations coûteuses (chargements, sauvegardes,
+requêtes, rafraîchissements de l'interface).
+
+Chaque opération porte un nom ("catalogue.sauvegarder", "interface.filtrer_films"...)
+sous lequel sont cumulés le nombre d'appels, le nombre d'erreurs, un
+histogramme des durées et les octets écrits :
+
+    @mesurer("catalogue.charger")
+    def charger_catalogue(self): ...
+
+    with mesurer("ventes.rapport"):
+        ...
+
+    compter_octets("catalogue.sauvegarder", f.tell())
+
+Les mesures sont exportées périodiquement dans logs/metrics.jsonl (une ligne
+JSON par export) et peuvent être servies au format texte Prometheus sur
+http://127.0.0.1:<port>/metrics.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Bornes supérieures des classes de l'histogramme des durées (secondes)
+BORNES_DUREE = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FICHIER_EXPORT = "metrics.jsonl"
+PREFIXE_PROMETHEUS = "cineflix"
+
+journal = logging.getLogger(__name__)
+
+
+class _Operation:
+    """Compteurs d'une opération."""
+
+    __slots__ = ('appels', 'erreurs', 'duree_totale', 'duree_max', 'octets', 'classes')
+
+    def __init__(self):
+        self.appels = 0
+        self.erreurs = 0
+        self.duree_totale = 0.0
+        self.duree_max = 0.0
+        self.octets = 0
+        # Une classe par borne plus une pour les durées au-delà de la dernière
+        self.classes = [0] * (len(BORNES_DUREE) + 1)
+
+    def quantile(self, q):
+        """Estimation d'un quantile des durées (borne supérieure de sa classe)."""
+        rang = q * self.appels
+        cumul = 0
+        for borne, nombre in zip(BORNES_DUREE, self.classes):
+            cumul += nombre
+            if cumul >= rang:
+                return min(borne, self.duree_max)
+        return self.duree_max
+
+    def resume(self):
+        return {
+            'appels': self.appels,
+            'erreurs': self.erreurs,
+            'duree_totale_s': self.duree_totale,
+            'duree_max_s': self.duree_max,
+            'p50_s': self.quantile(0.5),
+            'p95_s': self.quantile(0.95),
+            'p99_s': self.quantile(0.99),
+            'octets_ecrits': self.octets,
+            'histogramme': dict(zip([str(b) for b in BORNES_DUREE] + ['+Inf'], self.classes)),
+        }
+
+
+class Registre:
+    """Ensemble des mesures du processus (utilisable depuis plusieurs threads)."""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._operations = {}
+
+    def _operation(self, nom):
+        operation = self._operations.get(nom)
+        if operation is None:
+            operation = self._operations[nom] = _Operation()
+        return operation
+
+    def enregistrer(self, nom, duree, erreur=False):
+        """Ajoute un appel de `duree` secondes à l'opération `nom`."""
+        classe = bisect.bisect_left(BORNES_DUREE, duree)
+        with self._verrou:
+            operation = self._operation(nom)
+            operation.appels += 1
+            operation.duree_totale += duree
+            if duree > operation.duree_max:
+                operation.duree_max = duree
+            operation.classes[classe] += 1
+            if erreur:
+                operation.erreurs += 1
+
+    def compter_octets(self, nom, octets):
+        """Ajoute `octets` aux octets écrits par l'opération `nom`."""
+        with self._verrou:
+            self._operation(nom).octets += octets
+
+    def resume(self):
+        """Copie des mesures : {nom: {appels, erreurs, durées, quantiles, octets, histogramme}}."""
+        with self._verrou:
+            return {nom: operation.resume() for nom, operation in sorted(self._operations.items())}
+
+    def reinitialiser(self):
+        """Efface toutes les mesures."""
+        with self._verrou:
+            self._operations.clear()
+
+    def format_prometheus(self):
+        """Mesures au format texte d'exposition Prometheus."""
+        with self._verrou:
+            operations = sorted((nom, operation.appels, operation.erreurs, operation.duree_totale,
+                                 operation.octets, list(operation.classes))
+                                for nom, operation in self._operations.items())
+        duree = f"{PREFIXE_PROMETHEUS}_operation_duree_secondes"
+        lignes = [f"# HELP {duree} Durée des opérations.", f"# TYPE {duree} histogram"]
+        for nom, appels, _, total, _, classes in operations:
+            cumul = 0
+            for borne, nombre in zip(BORNES_DUREE, classes):
+                cumul += nombre
+                lignes.append(f'{duree}_bucket{{operation="{nom}",le="{borne}"}} {cumul}')
+            lignes.append(f'{duree}_bucket{{operation="{nom}",le="+Inf"}} {appels}')
+            lignes.append(f'{duree}_sum{{operation="{nom}"}} {total}')
+            lignes.append(f'{duree}_count{{operation="{nom}"}} {appels}')
+        for suffixe, aide, position in (('erreurs_total', "Appels terminés par une exception.", 2),
+                                        ('octets_ecrits_total', "Octets écrits sur disque.", 4)):
+            metrique = f"{PREFIXE_PROMETHEUS}_operation_{suffixe}"
+            lignes.append(f"# HELP {metrique} {aide}")
+            lignes.append(f"# TYPE {metrique} counter")
+            for valeurs in operations:
+                lignes.append(f'{metrique}{{operation="{valeurs[0]}"}} {valeurs[position]}')
+        return "\n".join(lignes) + "\n"
+
+
+# Registre utilisé par défaut par mesurer() et compter_octets()
+REGISTRE = Registre()
+
+
+class mesurer:
+    """Mesure une opération, en décorateur ou en gestionnaire de contexte.
+
+    Args:
+        nom (str): Nom de l'opération ("module.action")
+        registre (Registre, optional): Registre destinataire (REGISTRE par défaut)
+    """
+
+    def __init__(self, nom, registre=None):
+        self.nom = nom
+        self.registre = registre or REGISTRE
+        self._debut = None
+
+    def __call__(self, fonction):
+        nom, registre = self.nom, self.registre
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            erreur = True
+            try:
+                resultat = fonction(*args, **kwargs)
+                erreur = False
+                return resultat
+            finally:
+                registre.enregistrer(nom, time.perf_counter() - debut, erreur)
+        return enveloppe
+
+    def __enter__(self):
+        self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, type_exception, exception, trace):
+        self.registre.enregistrer(self.nom, time.perf_counter() - self._debut, type_exception is not None)
+        return False
+
+
+def compter_octets(nom, octets, registre=None):
+    """Ajoute des octets écrits à l'opération `nom` du registre par défaut."""
+    (registre or REGISTRE).compter_octets(nom, octets)
+
+
+def taille_fichier(chemin):
+    """Taille d'un fichier en octets (0 s'il n'existe pas)."""
+    try:
+        return os.path.getsize(chemin)
+    except OSError:
+        return 0
+
+
+class ExportateurMetriques:
+    """Écrit périodiquement le résumé du registre dans un fichier JSON Lines.
+
+    Args:
+        chemin (str ou Path): Fichier de destination (créé au besoin)
+        intervalle (float): Secondes entre deux exports
+        registre (Registre, optional): Registre exporté (REGISTRE par défaut)
+        sources (dict, optional): Mesures supplémentaires {clé: fonction
+            sans argument} ajoutées à chaque ligne (ex. statistiques des caches)
+    """
+
+    def __init__(self, chemin, intervalle=60, registre=None, sources=None):
+        self.chemin = Path(chemin)
+        self.intervalle = intervalle
+        self.registre = registre or REGISTRE
+        self.sources = sources or {}
+        self._arret = threading.Event()
+        self._thread = None
+
+    def exporter(self):
+        """Ajoute une ligne avec l'état courant des mesures."""
+        ligne = {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'operations': self.registre.resume(),
+        }
+        for cle, source in self.sources.items():
+            ligne[cle] = source()
+        try:
+            self.chemin.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.chemin, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+        except OSError as e:
+            journal.error(f"Impossible d'exporter les métriques: {e}")
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            self.exporter()
+
+    def demarrer(self):
+        """Lance l'export périodique dans un thread d'arrière-plan."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._boucle, name="export-metriques", daemon=True)
+            self._thread.start()
+        return self
+
+    def arreter(self):
+        """Arrête l'export périodique après un dernier export."""
+        if self._thread is not None:
+            self._arret.set()
+            self._thread.join()
+            self._thread = None
+        self.exporter()
+
+
+class ServeurMetriques:
+    """Sert les mesures au format Prometheus sur http://<hote>:<port>/metrics.
+
+    Args:
+        port (int): Port d'écoute (0 : port libre choisi par le système)
+        hote (str): Adresse d'écoute (boucle locale par défaut)
+        registre (Registre, optional): Registre servi (REGISTRE par défaut)
+    """
+
+    def __init__(self, port, hote="127.0.0.1", registre=None):
+        registre = registre or REGISTRE
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                corps = registre.format_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.serveur = ThreadingHTTPServer((hote, port), Gestionnaire)
+        self.serveur.daemon_threads = True
+        self.port = self.serveur.server_address[1]
+        self._thread = None
+
+    def demarrer(self):
+        """Lance le serveur dans un thread d'arrière-plan."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serveur.serve_forever, name="serveur-metriques",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def arreter(self):
+        """Arrête le serveur."""
+        if self._thread is not None:
+            self.serveur.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.serveur.server_close()
+
+
+def demarrer_metriques(dossier_logs="logs", intervalle=60, port=None, sources=None):
+    """Démarre l'export périodique et, si un port est donné, le serveur Prometheus.
+
+    Args:
+        dossier_logs (str ou Path): Dossier du fichier metrics.jsonl
+        intervalle (float): Secondes entre deux exports
+        port (int, optional): Port du point d'accès /metrics (désactivé si None)
+        sources (dict, optional): Mesures supplémentaires exportées (voir ExportateurMetriques)
+
+    Returns:
+        list: Les services démarrés (à arrêter avec arreter_metriques)
+    """
+    services = [ExportateurMetriques(Path(dossier_logs) / FICHIER_EXPORT, intervalle, sources=sources).demarrer()]
+    if port is not None:
+        try:
+            services.append(ServeurMetriques(port).demarrer())
+        except OSError as e:
+            journal.error(f"Impossible de démarrer le serveur de métriques sur le port {port}: {e}")
+    return services
+
+
+def arreter_metriques(services):
+    """Arrête les services démarrés par demarrer_metriques."""
+    for service in services:
+        service.arreter()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de relais des événements des gestionnaires vers l'interface Tk.
+
+Les événements reçus ne sont pas traités immédiatement : ils sont mis en
+attente et distribués en une fois, ce qui regroupe les rafales. Dix ventes
+enregistrées d'affilée ne provoquent ainsi qu'une mise à jour de la liste,
+avec les dix ventes.
+
+Le bus peut publier depuis n'importe quel thread (synchronisation, calculs
+de recommandations), alors que Tk ne doit être appelé que depuis le thread
+qui a créé les widgets. Les événements passent donc par une file
+(queue.SimpleQueue) que le thread Tk relève :
+- reçus dans le thread Tk, la distribution est programmée quand Tk est
+  inactif (after_idle), au plus une fois par image ;
+- reçus d'un autre thread, ils sont seulement déposés dans la file, relevée
+  toutes les INTERVALLE_RELEVE ms par une boucle after.
+"""
+
+import logging
+import queue
+import threading
+import tkinter as tk
+
+from ..evenements.bus import BUS
+
+journal = logging.getLogger(__name__)
+
+# Intervalle (ms) de relève des événements publiés hors du thread Tk
+INTERVALLE_RELEVE = 50
+
+
+class AbonnementsTk:
+    """Abonnements d'un widget aux événements du bus, regroupés par image Tk.
+
+    À créer dans le thread Tk.
+
+    Args:
+        widget (tk.Misc): Widget propriétaire (la distribution s'arrête
+            quand il est détruit)
+        bus (BusEvenements, optional): Bus écouté (bus partagé par défaut)
+    """
+
+    def __init__(self, widget, bus=None):
+        self.widget = widget
+        self.bus = bus or BUS
+        self._gestionnaires = {}
+        self._desabonnements = []
+        self._file = queue.SimpleQueue()
+        self._thread_tk = threading.get_ident()
+        self._programmation = None
+        self._releve = self.widget.after(INTERVALLE_RELEVE, self._relever)
+
+    def abonner(self, type_evenement, gestionnaire):
+        """Appelle `gestionnaire(evenements)` avec la liste des événements de ce type reçus depuis la dernière image."""
+        if type_evenement not in self._gestionnaires:
+            self._gestionnaires[type_evenement] = []
+            self._desabonnements.append(self.bus.abonner(type_evenement, self._recevoir))
+        self._gestionnaires[type_evenement].append(gestionnaire)
+
+    def _recevoir(self, evenement):
+        """Met l'événement en attente ; Tk n'est appelé que depuis son propre thread."""
+        self._file.put(evenement)
+        if threading.get_ident() != self._thread_tk or self._programmation is not None:
+            return
+        try:
+            self._programmation = self.widget.after_idle(self._distribuer)
+        except tk.TclError:
+            # Widget détruit : plus personne à prévenir
+            pass
+
+    def _relever(self):
+        """Boucle after du thread Tk : distribue les événements arrivés d'autres threads."""
+        self._releve = None
+        if self._programmation is None:
+            self._distribuer()
+        try:
+            self._releve = self.widget.after(INTERVALLE_RELEVE, self._relever)
+        except tk.TclError:
+            pass
+
+    def _distribuer(self):
+        self._programmation = None
+        evenements = []
+        try:
+            while True:
+                evenements.append(self._file.get_nowait())
+        except queue.Empty:
+            pass
+        if not evenements or not self.widget.winfo_exists():
+            return
+
+        # Regroupement par type, dans l'ordre d'arrivée du premier événement de chaque type
+        par_type = {}
+        for evenement in evenements:
+            par_type.setdefault(evenement.type, []).append(evenement)
+        for type_evenement, groupe in par_type.items():
+            for gestionnaire in self._gestionnaires.get(type_evenement, []):
+                try:
+                    gestionnaire(groupe)
+                except Exception as e:
+                    journal.error(f"Erreur lors de la mise à jour après {type_evenement}: {e}", exc_info=True)
+
+    def fermer(self):
+        """Annule tous les abonnements, la relève et la distribution en attente (thread Tk)."""
+        for desabonner in self._desabonnements:
+            desabonner()
+        self._desabonnements.clear()
+        self._gestionnaires.clear()
+        for programmation in (self._programmation, self._releve):
+            if programmation is not None:
+                try:
+                    self.widget.after_cancel(programmation)
+                except tk.TclError:
+                    pass
+        self._programmation = self._releve = None
+        self._file = queue.SimpleQueue()
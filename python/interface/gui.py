@@ -9,11 +9,23 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 import logging
+import threading
 
 from ..catalogue.gestion import GestionCatalogue
 from ..ventes.gestion_ventes import GestionVentes
+from ..ventes.top_ventes import TopVentes
 from ..utilisateurs.gestion_utilisateurs import GestionUtilisateurs
 from ..commentaires.gestion_commentaires import GestionCommentaires
+from ..dates.horodatage import formater
+from ..evenements.bus import (BUS, CATALOGUE_RECHARGE, COMMENTAIRES_MODIFIES, FILM_AJOUTE, NOTE_FILM_MODIFIEE,
+                              NOTE_UTILISATEUR, RECOMMANDATIONS_CALCULEES, UTILISATEURS_MODIFIES, VENTE_ANNULEE,
+                              VENTE_ENREGISTREE, VENTES_RECHARGEES)
+from .abonnements import AbonnementsTk
+from ..instrumentation.metriques import mesurer
+from ..recommandation.contenu import IndexContenu
+from ..recommandation.factorisation import ModeleFactorisation
+from ..recommandation.precalcul import RecommandationsPrecalculees, liste_recommandations
+from ..recommandation.similarite import VoisinageUtilisateurs
 
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
@@ -27,6 +39,13 @@ import uuid
 import json
 from pathlib import Path
 
+journal = logging.getLogger(__name__)
+
+# Intervalle (ms) de vérification des fichiers de données modifiés par d'autres processus
+INTERVALLE_SYNCHRONISATION = 2000
+# Intervalle (ms) d'application des événements reçus du service en mode client
+INTERVALLE_SYNCHRONISATION_CLIENT = 200
+
 class FenetreConnexion(tk.Toplevel):
     """Fenêtre de connexion/inscription."""
     
@@ -249,12 +268,15 @@ class FenetreConnexion(tk.Toplevel):
 class FenetreDetailsFilm(tk.Toplevel):
     """Fenêtre popup pour afficher les détails d'un film."""
     
-    def __init__(self, master, film, gestion_utilisateurs, utilisateur_connecte):
+    def __init__(self, master, film, gestion_utilisateurs, utilisateur_connecte, gestion_commentaires=None,
+                 index_contenu=None):
         super().__init__(master)
         self.film = film
         self.gestion_utilisateurs = gestion_utilisateurs
         self.utilisateur_connecte = utilisateur_connecte
-        self.gestion_commentaires = GestionCommentaires()
+        # Commentaires du service en mode client, sinon lus dans donnees/
+        self.gestion_commentaires = gestion_commentaires or GestionCommentaires()
+        self.index_contenu = index_contenu
         
         # Configuration de la fenêtre
         self.title(f"{film['titre']} - Détails")
@@ -303,6 +325,18 @@ class FenetreDetailsFilm(tk.Toplevel):
         ttk.Label(info_frame, text=f"Année: {film['annee']}",
                  font=('Segoe UI', 10)).pack(anchor='w')
         
+        # Films proches par le genre, le réalisateur et les acteurs
+        if self.index_contenu is not None:
+            similaires = self.index_contenu.voisins(film['id'], 5)
+            if similaires:
+                ttk.Label(info_frame, text="Films similaires",
+                         font=('Segoe UI', 12, 'bold')).pack(anchor='w', pady=(10, 0))
+            for similaire, _ in similaires:
+                lien = ttk.Label(info_frame, text=f"{similaire['titre']} ({similaire['annee']})",
+                                 font=('Segoe UI', 10, 'underline'), cursor='hand2')
+                lien.pack(anchor='w')
+                lien.bind('<Button-1>', lambda e, f=similaire: self.ouvrir_film_similaire(f))
+        
         # Frame droite pour la note et les commentaires
         frame_droite = ttk.Frame(main_frame)
         frame_droite.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(10, 0))
@@ -389,13 +423,43 @@ class FenetreDetailsFilm(tk.Toplevel):
         self.frame_tous_commentaires.bind("<Configure>", self.on_frame_configure)
         self.canvas_commentaires.bind("<Configure>", self.on_canvas_configure)
         
-        # Charger les commentaires existants
+        # Charger les commentaires existants, puis les recharger à chaque
+        # modification des commentaires de ce film (d'ici ou d'ailleurs)
         self.charger_commentaires()
+        self.abonnements = AbonnementsTk(self)
+        self.abonnements.abonner(COMMENTAIRES_MODIFIES, self._commentaires_modifies)
+        self.synchronisation = self.after(INTERVALLE_SYNCHRONISATION, self._synchroniser_commentaires)
+        self.bind('<Destroy>', self._fermeture)
         
         # Centrer la fenêtre par rapport au parent
         self.transient(master)
         self.grab_set()
     
+    def _commentaires_modifies(self, evenements):
+        """Recharge les commentaires si l'un des événements concerne ce film."""
+        if any(e.donnees['film_id'] == self.film['id'] for e in evenements):
+            self.charger_commentaires()
+
+    def _synchroniser_commentaires(self):
+        """Intègre les commentaires écrits par d'autres processus (COMMENTAIRES_MODIFIES)."""
+        try:
+            self.gestion_commentaires.synchroniser()
+        except Exception as e:
+            journal.error(f"Erreur lors de la synchronisation des commentaires: {e}", exc_info=True)
+        self.synchronisation = self.after(INTERVALLE_SYNCHRONISATION, self._synchroniser_commentaires)
+
+    def ouvrir_film_similaire(self, film):
+        """Remplace cette fenêtre par celle d'un film similaire."""
+        FenetreDetailsFilm(self.master, film, self.gestion_utilisateurs, self.utilisateur_connecte,
+                           self.gestion_commentaires, self.index_contenu)
+        self.destroy()
+
+    def _fermeture(self, event):
+        """Annule les abonnements quand la fenêtre est détruite."""
+        if event.widget is self:
+            self.abonnements.fermer()
+            self.after_cancel(self.synchronisation)
+
     def on_frame_configure(self, event=None):
         """Mettre à jour le scrollregion quand la taille du frame change."""
         self.canvas_commentaires.configure(scrollregion=self.canvas_commentaires.bbox("all"))
@@ -436,6 +500,7 @@ class FenetreDetailsFilm(tk.Toplevel):
         etoiles_moyenne = "★" * int(note_etoiles) + "☆" * (5 - int(note_etoiles))
         self.label_etoiles_moyenne.configure(text=etoiles_moyenne)
 
+    @mesurer("interface.charger_commentaires")
     def charger_commentaires(self):
         """Charge et affiche les commentaires existants."""
         # Effacer les commentaires existants
@@ -465,9 +530,8 @@ class FenetreDetailsFilm(tk.Toplevel):
                      text=commentaire['utilisateur'],
                      style="CommentaireHeader.TLabel").pack(side=tk.LEFT)
             
-            # Convertir la date ISO en objet datetime
-            date = datetime.fromisoformat(commentaire['date'])
-            date_str = date.strftime("%d/%m/%Y %H:%M")
+            # Date déjà convertie au chargement des commentaires
+            date_str = formater(commentaire['horodatage'], "%d/%m/%Y %H:%M")
             
             ttk.Label(frame_header,
                      text=date_str,
@@ -505,8 +569,7 @@ class FenetreDetailsFilm(tk.Toplevel):
                 commentaire
             )
             
-            # Recharger les commentaires
-            self.charger_commentaires()
+            # Les commentaires sont rechargés par l'événement COMMENTAIRES_MODIFIES
             
             # Effacer le champ de commentaire
             self.text_commentaire.delete("1.0", tk.END)
@@ -536,7 +599,13 @@ class FenetreDetailsFilm(tk.Toplevel):
 class ApplicationPrincipale(tk.Frame):
     """Classe principale de l'interface graphique."""
     
-    def __init__(self, master=None):
+    def __init__(self, master=None, service=None):
+        """
+        Args:
+            master (tk.Tk): Fenêtre racine
+            service (ClientService, optional): Service CinéFlix à utiliser
+                (mode client) au lieu de charger donnees/ dans ce processus
+        """
         super().__init__(master)
         self.master = master
         self.master.title("CinéFlix - Système de Recommandation")
@@ -544,9 +613,20 @@ class ApplicationPrincipale(tk.Frame):
         self.master.configure(bg='#1E1E1E')
         
         # Initialisation des gestionnaires
-        self.catalogue = GestionCatalogue()
-        self.ventes = GestionVentes()
-        self.gestion_utilisateurs = GestionUtilisateurs()
+        if service is not None:
+            self.catalogue = service.catalogue
+            self.ventes = service.ventes
+            self.gestion_utilisateurs = service.utilisateurs
+            self.gestion_commentaires = service.commentaires
+            # Événements du service appliqués au plus vite (simple lecture d'une file)
+            self.intervalle_synchronisation = INTERVALLE_SYNCHRONISATION_CLIENT
+        else:
+            self.catalogue = GestionCatalogue()
+            self.ventes = GestionVentes()
+            self.ventes.set_gestion_catalogue(self.catalogue)
+            self.gestion_utilisateurs = GestionUtilisateurs()
+            self.gestion_commentaires = None
+            self.intervalle_synchronisation = INTERVALLE_SYNCHRONISATION
         self.utilisateur_connecte = None
         
         # Connecter GestionCatalogue à GestionUtilisateurs
@@ -556,12 +636,49 @@ class ApplicationPrincipale(tk.Frame):
         if not self.ventes.ventes:
             self.ventes.generer_ventes_fictives(self.catalogue.films)
         
-        # Synchroniser l'horloge
-        self.derniere_synchro = self.catalogue.mettre_a_jour_horloge()
-        self.derniere_synchro_ventes = self.ventes.mettre_a_jour_horloge()
-        
-        # Timer pour la mise à jour de l'horloge (toutes les minutes)
-        self.master.after(60000, self.synchroniser_horloge)
+        # Classement des meilleures ventes, tenu à jour à chaque vente
+        self.top_ventes = TopVentes(k=5)
+        self.ventes.ajouter_observateur(self.top_ventes)
+        # Modèle appris hors ligne (entrainer_recommandations.py), sinon préférences par genre
+        self.modele_recommandation = ModeleFactorisation.charger()
+        # Index de contenu (films similaires, démarrage à froid), construit à la première demande ;
+        # partagé avec le thread de calcul des recommandations. Le verrou ne protège que la
+        # relève des références : un index publié n'est plus modifié (copie pour un ajout)
+        self._index = None
+        self._generation_catalogue = 0
+        self._verrou_index = threading.RLock()
+        # Sans modèle appris : voisinage des utilisateurs (module C s'il est compilé),
+        # reconstruit après chaque note. Abonné au bus avant le calcul en arrière-plan,
+        # pour que le calcul lancé par une note voie déjà la nouvelle génération
+        self._voisinage = (None, None)
+        self._generation_notes = 0
+        self._desabonner_notes = BUS.abonner(NOTE_UTILISATEUR, self._notes_utilisateurs_modifiees)
+        # Recommandations par utilisateur : lot de nuit (precalculer_recommandations.py)
+        # et listes recalculées en arrière-plan à chaque note, affichées sans attendre.
+        # En mode client, donnees/ est celui du service : rien n'est lu ni écrit sur disque
+        fichiers = {'fichier': None, 'fichier_recentes': None} if service is not None else {}
+        self.recommandations = RecommandationsPrecalculees(self._calculer_recommandations,
+                                                           self.gestion_utilisateurs.obtenir_notes_utilisateur,
+                                                           **fichiers)
+        self._films_par_id = (None, {})
+        self.bind('<Destroy>', self._fermeture)
+        
+        # Mises à jour ciblées des vues à chaque modification des données
+        # (regroupées par image Tk), au lieu d'un rafraîchissement périodique
+        self.stats_a_rafraichir = False
+        self.abonnements = AbonnementsTk(self)
+        self.abonnements.abonner(FILM_AJOUTE, self._films_ajoutes)
+        self.abonnements.abonner(NOTE_FILM_MODIFIEE, self._notes_films_modifiees)
+        self.abonnements.abonner(CATALOGUE_RECHARGE, self._catalogue_recharge)
+        self.abonnements.abonner(RECOMMANDATIONS_CALCULEES, self._recommandations_calculees)
+        self.abonnements.abonner(VENTE_ENREGISTREE, self._ventes_enregistrees)
+        self.abonnements.abonner(VENTE_ANNULEE, self._ventes_annulees)
+        self.abonnements.abonner(VENTES_RECHARGEES, self._ventes_rechargees)
+        self.abonnements.abonner(UTILISATEURS_MODIFIES, self._utilisateurs_modifies)
+        # Modifications faites par d'autres processus (autre instance de
+        # l'application...) : un stat par fichier à chaque vérification,
+        # les gestionnaires publient ensuite les mêmes événements
+        self.after(self.intervalle_synchronisation, self.synchroniser_fichiers)
         
         # Créer l'utilisateur root s'il n'existe pas
         succes, _ = self.gestion_utilisateurs.verifier_connexion("root", "toor")
@@ -615,6 +732,7 @@ class ApplicationPrincipale(tk.Frame):
         # Mettre à jour les listes accessibles à tous les utilisateurs
         self.mettre_a_jour_liste_films()
         self.mettre_a_jour_recommandations()
+        self.mettre_a_jour_top_ventes()
         
         # Mettre à jour les listes réservées à l'admin
         if self.est_admin():
@@ -768,6 +886,7 @@ class ApplicationPrincipale(tk.Frame):
         # Notebook pour les onglets
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(expand=True, fill='both', padx=10, pady=5)
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self._rafraichir_stats_si_visible())
         
         # Création des onglets
         self.tab_accueil = ttk.Frame(self.notebook)
@@ -860,6 +979,26 @@ class ApplicationPrincipale(tk.Frame):
         # Ajouter le binding pour le double-clic
         self.tree_recommandations.bind('<Double-Button-1>', self.afficher_details_film)
         
+        # Meilleures ventes de la semaine
+        frame_top_ventes = ttk.Frame(main_frame)
+        frame_top_ventes.pack(fill=tk.X, pady=(20, 0))
+        
+        titre_top_ventes = tk.Label(frame_top_ventes,
+                                    text="Meilleures ventes de la semaine",
+                                    font=('Segoe UI', 16),
+                                    fg='#4A9EFF',
+                                    bg='#1E1E1E')
+        titre_top_ventes.pack(pady=(0, 10))
+        
+        self.tree_top_ventes = ttk.Treeview(frame_top_ventes,
+                                            columns=('Rang', 'Titre', 'Quantité', 'Revenu'),
+                                            show='headings',
+                                            height=5)
+        for colonne, largeur in (('Rang', 50), ('Titre', 300), ('Quantité', 100), ('Revenu', 100)):
+            self.tree_top_ventes.heading(colonne, text=colonne)
+            self.tree_top_ventes.column(colonne, width=largeur)
+        self.tree_top_ventes.pack(fill=tk.X)
+        
         # Mettre à jour les recommandations
         if self.utilisateur_connecte:
             self.mettre_a_jour_recommandations()
@@ -958,51 +1097,51 @@ class ApplicationPrincipale(tk.Frame):
             ttk.Button(frame_actions, text="✕ Supprimer", 
                       command=self.supprimer_film_selectionne).pack(side=tk.LEFT, padx=5)
     
-    def filtrer_films(self, *args):
-        """Filtre la liste des films selon les critères."""
+    def _film_visible(self, film):
+        """Indique si le film passe les filtres (recherche, genre, note, période) courants."""
         recherche = self.entry_titre.get().lower()
         genre = self.combo_genre.get()
         note = self.combo_note.get()
         periode = self.combo_annee.get()
-        
+
+        if not (recherche in film['titre'].lower() or recherche in film['realisateur'].lower()):
+            return False
+        # Filtre par genre
+        if not (genre == 'Tous' or genre == film['genre']):
+            return False
+        # Filtre par note
+        note_ok = (note == 'Toutes' or
+                 (note == 'Excellents (≥ 9)' and film['note'] >= 9) or
+                 (note == 'Très bons (≥ 7)' and film['note'] >= 7) or
+                 (note == 'Bons (≥ 5)' and film['note'] >= 5) or
+                 (note == 'Moyens (< 5)' and film['note'] < 5))
+        
+        # Filtre par période
+        annee_ok = (periode == 'Toutes' or
+                  (periode == 'Films récents (2010+)' and film['annee'] >= 2010) or
+                  (periode == 'Années 2000' and 2000 <= film['annee'] <= 2009) or
+                  (periode == 'Années 90' and 1990 <= film['annee'] <= 1999) or
+                  (periode == 'Années 80' and 1980 <= film['annee'] <= 1989) or
+                  (periode == 'Films classiques (<1980)' and film['annee'] < 1980))
+        return note_ok and annee_ok
+
+    @mesurer("interface.filtrer_films")
+    def filtrer_films(self, *args):
+        """Filtre la liste des films selon les critères."""
         # Effacer la liste actuelle
         for item in self.tree_films.get_children():
             self.tree_films.delete(item)
         
         # Filtrer les films
         for film in self.catalogue.films:
-            if (recherche in film['titre'].lower() or recherche in film['realisateur'].lower()):
-                # Filtre par genre
-                if genre == 'Tous' or genre == film['genre']:
-                    # Filtre par note
-                    note_ok = (note == 'Toutes' or
-                             (note == 'Excellents (≥ 9)' and film['note'] >= 9) or
-                             (note == 'Très bons (≥ 7)' and film['note'] >= 7) or
-                             (note == 'Bons (≥ 5)' and film['note'] >= 5) or
-                             (note == 'Moyens (< 5)' and film['note'] < 5))
-                    
-                    # Filtre par période
-                    annee_ok = (periode == 'Toutes' or
-                              (periode == 'Films récents (2010+)' and film['annee'] >= 2010) or
-                              (periode == 'Années 2000' and 2000 <= film['annee'] <= 2009) or
-                              (periode == 'Années 90' and 1990 <= film['annee'] <= 1999) or
-                              (periode == 'Années 80' and 1980 <= film['annee'] <= 1989) or
-                              (periode == 'Films classiques (<1980)' and film['annee'] < 1980))
-                    
-                    if note_ok and annee_ok:
-                        self.tree_films.insert('', 'end', values=(
-                            film['titre'],
-                            film['realisateur'],
-                            film['genre'],
-                            film['annee'],
-                            film['note'],
-                            film['date_ajout'].split('T')[0]
-                        ))
+            if self._film_visible(film):
+                self.tree_films.insert('', 'end', iid=str(film['id']), values=self._valeurs_film(film))
         
         # Si un tri est actif, réappliquer le tri
         if self.tri_actuel['colonne']:
             self.trier_films(self.tri_actuel['colonne'])
 
+    @mesurer("interface.trier_films")
     def trier_films(self, colonne):
         """Trie les films selon la colonne sélectionnée."""
         items = [(self.tree_films.set(item, colonne), item) for item in self.tree_films.get_children('')]
@@ -1109,12 +1248,10 @@ class ApplicationPrincipale(tk.Frame):
         self.stats_container = ttk.Frame(self.frame_stats_main)
         self.stats_container.pack(fill=tk.BOTH, expand=True)
 
-        # Afficher les statistiques initiales
+        # Afficher les statistiques initiales (ensuite rafraîchies par les événements, voir _stats_perimees)
         self.rafraichir_stats()
 
-        # Configurer le rafraîchissement automatique (toutes les 5 minutes)
-        self.after(300000, self.rafraichir_stats)
-
+    @mesurer("interface.rafraichir_stats")
     def rafraichir_stats(self):
         """Rafraîchit les statistiques affichées."""
         try:
@@ -1123,189 +1260,14 @@ class ApplicationPrincipale(tk.Frame):
                     widget.destroy()
                 self.afficher_statistiques()
         except Exception as e:
-            print(f"Erreur lors du rafraîchissement des stats : {str(e)}")
+            journal.error(f"Erreur lors du rafraîchissement des stats : {str(e)}", exc_info=True)
             # En cas d'erreur, afficher un message
             error_label = ttk.Label(self.stats_container, 
                                   text=f"Erreur lors du rafraîchissement des statistiques : {str(e)}",
                                   style='Custom.TLabel')
             error_label.pack(pady=20)
     
-    def afficher_statistiques(self):
-        """Affiche les statistiques directement dans la fenêtre principale."""
-        try:
-            # Nettoyer le conteneur existant
-            if hasattr(self, 'stats_container'):
-                for widget in self.stats_container.winfo_children():
-                    widget.destroy()
-            
-            # Frame principal pour les statistiques
-            main_stats_frame = ttk.Frame(self.stats_container, style='Custom.TFrame')
-            main_stats_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-            
-            # Frame pour les statistiques textuelles
-            text_stats_frame = ttk.Frame(main_stats_frame, style='Custom.TFrame')
-            text_stats_frame.pack(fill=tk.X, padx=20, pady=(0, 20))
-            
-            # Calculer les statistiques globales
-            total_films = len(self.catalogue.films)
-            total_ventes = sum(float(vente['quantite']) for vente in self.ventes.ventes)
-            total_users = len(self.gestion_utilisateurs.utilisateurs)  # Correction ici
-            # Notes moyennes globales
-            all_notes = []
-            for film in self.catalogue.films:
-                if film.get('notes'):
-                    notes = [float(note) for note in film['notes'].values() if str(note).replace('.', '').isdigit()]
-                    if notes:
-                        all_notes.extend(notes)
-            note_moyenne_globale = sum(all_notes) / len(all_notes) if all_notes else 0
-            
-            # Obtenir la date actuelle
-            date_actuelle = datetime.now()
-            debut_mois = date_actuelle.replace(day=1)
-            
-            # Statistiques des films
-            films_ce_mois = len(self.catalogue.filtrer_par_periode(debut_mois.isoformat()))
-            
-            # Statistiques des ventes
-            ventes_ce_mois = self.ventes.filtrer_par_periode(debut=debut_mois)
-            total_ventes_mois = sum(float(v['total']) for v in ventes_ce_mois)
-            
-            # Afficher les statistiques textuelles
-            stats_text = [
-                f"Nombre total de films: {total_films}",
-                f"Films ajoutés ce mois: {films_ce_mois}",
-                f"Volume total des ventes: {total_ventes:.0f} €",
-                f"Ventes ce mois: {total_ventes_mois:.0f} €",
-                f"Nombre total d'utilisateurs: {total_users}",
-                f"Note moyenne globale: {note_moyenne_globale:.1f}/10",
-                f"Dernière synchronisation: {self.derniere_synchro.split('T')[0]}"
-            ]
-            
-            for text in stats_text:
-                label = ttk.Label(text_stats_frame, text=text, style='Custom.TLabel')
-                label.pack(side=tk.LEFT, padx=20)
-            
-            # Style personnalisé pour les graphiques
-            plt.style.use('default')
-            
-            # Création d'une figure avec 2 lignes et 2 colonnes
-            fig = Figure(figsize=(12, 8), facecolor='white')
-            
-            # Configuration des sous-graphiques avec plus d'espace
-            gs = fig.add_gridspec(2, 2, hspace=0.4, wspace=0.3)
-            
-            # Configuration des sous-graphiques
-            ax1 = fig.add_subplot(gs[0, 0])  # Graphique des genres
-            ax2 = fig.add_subplot(gs[0, 1])  # Graphique des notes moyennes
-            ax3 = fig.add_subplot(gs[1, :])  # Graphique des tendances
-
-            # 1. Graphique des genres (camembert)
-            genres = {}
-            for film in self.catalogue.films:
-                genre = film['genre']
-                genres[genre] = genres.get(genre, 0) + 1
-            
-            if genres:
-                genres_tries = dict(sorted(genres.items(), key=lambda x: x[1], reverse=True)[:5])
-                colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEEAD']
-                wedges, texts, autotexts = ax1.pie(genres_tries.values(), 
-                                                 labels=genres_tries.keys(),
-                                                 colors=colors,
-                                                 autopct='%1.1f%%',
-                                                 startangle=90)
-                ax1.set_title('Top 5 des Genres les Plus Populaires', pad=20)
-
-            # 2. Graphique des notes moyennes (barres horizontales)
-            notes_moyennes = {}
-            for film in self.catalogue.films:
-                # Récupérer toutes les notes pour ce film de tous les utilisateurs
-                notes = []
-                for username in self.gestion_utilisateurs.utilisateurs:
-                    notes_utilisateur = self.gestion_utilisateurs.obtenir_notes_utilisateur(username)
-                    if film['titre'] in notes_utilisateur:
-                        # Convertir la note de 1-5 en 1-10
-                        note = notes_utilisateur[film['titre']].get('note', 0) * 2
-                        notes.append(note)
-                
-                if notes:  # Si le film a des notes
-                    notes_moyennes[film['titre']] = sum(notes) / len(notes)
-
-            if notes_moyennes:
-                films_tries = dict(sorted(notes_moyennes.items(), key=lambda x: x[1], reverse=True)[:5])
-                
-                y_pos = range(len(films_tries))
-                bars = ax2.barh(y_pos, list(films_tries.values()), color='#45B7D1')
-                
-                # Ajuster les labels et les valeurs
-                ax2.set_yticks(y_pos)
-                ax2.set_yticklabels(list(films_tries.keys()))
-                ax2.set_xlim(0, 10)
-                
-                # Ajouter les valeurs sur les barres
-                for bar in bars:
-                    width = bar.get_width()
-                    ax2.text(width, bar.get_y() + bar.get_height()/2,
-                            f'{width:.1f}',
-                            ha='left', va='center',
-                            fontweight='bold')
-                
-                ax2.set_title('Top 5 des Films les Mieux Notés', pad=20)
-            else:
-                ax2.text(0.5, 0.5, 'Aucune note disponible',
-                        ha='center', va='center',
-                        transform=ax2.transAxes)
-                ax2.set_title('Top 5 des Films les Mieux Notés', pad=20)
-
-            # 3. Graphique des tendances (ligne)
-            dates_ventes = {}
-            for vente in self.ventes.ventes:
-                # Convertir la date en objet datetime
-                date_obj = datetime.strptime(vente['date'].split(' ')[0], '%Y-%m-%d')
-                dates_ventes[date_obj] = dates_ventes.get(date_obj, 0) + float(vente['quantite'])
-            
-            if dates_ventes:
-                dates_triees = dict(sorted(dates_ventes.items()))
-                
-                # Créer le graphique des tendances avec plus d'espace pour les dates
-                fig.subplots_adjust(bottom=0.2)  # Ajuster l'espace en bas
-                
-                # Tracer le graphique avec les objets datetime
-                ax3.plot(list(dates_triees.keys()), 
-                        list(dates_triees.values()),
-                        marker='o',
-                        color='#45B7D1',
-                        linewidth=2)
-                
-                ax3.set_title('Tendance des Ventes', pad=20)
-                
-                # Formater les dates sur l'axe x
-                ax3.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-                
-                # Rotation des dates pour une meilleure lisibilité
-                plt.setp(ax3.get_xticklabels(), rotation=45, ha='right')
-                
-                # Ajouter une grille pour faciliter la lecture
-                ax3.grid(True, linestyle='--', alpha=0.7)
-            
-            # Frame pour contenir le graphique
-            frame_graph = ttk.Frame(main_stats_frame, style='Custom.TFrame')
-            frame_graph.pack(fill=tk.BOTH, expand=True)
-            
-            # Créer le canvas Tkinter
-            canvas = FigureCanvasTkAgg(fig, master=frame_graph)
-            canvas_widget = canvas.get_tk_widget()
-            canvas_widget.pack(fill=tk.BOTH, expand=True)
-            
-            # S'assurer que le graphique est dessiné
-            canvas.draw()
-            
-        except Exception as e:
-            print(f"Erreur lors de l'affichage des statistiques : {str(e)}")
-            error_label = ttk.Label(self.stats_container,
-                                  text=f"Erreur lors de l'affichage des statistiques : {str(e)}",
-                                  style='Custom.TLabel')
-            error_label.pack(pady=20)
-    
+    @mesurer("interface.mettre_a_jour_liste_films")
     def mettre_a_jour_liste_films(self):
         """Met à jour la liste des films dans l'interface."""
         # Vérifier si tree_films existe
@@ -1318,15 +1280,20 @@ class ApplicationPrincipale(tk.Frame):
         
         # Mettre à jour avec les nouveaux films
         for film in self.catalogue.films:
-            self.tree_films.insert('', 'end', values=(
-                film['titre'],
-                film['realisateur'],
-                film['genre'],
-                film['annee'],
-                film['note'],
-                film['date_ajout'].split('T')[0]
-            ))
+            self.tree_films.insert('', 'end', iid=str(film['id']), values=self._valeurs_film(film))
+
+    def _valeurs_film(self, film):
+        """Valeurs d'une ligne de la liste des films."""
+        return (
+            film['titre'],
+            film['realisateur'],
+            film['genre'],
+            film['annee'],
+            film['note'],
+            film['date_ajout'].split('T')[0]
+        )
     
+    @mesurer("interface.mettre_a_jour_liste_ventes")
     def mettre_a_jour_liste_ventes(self):
         """Met à jour la liste des ventes affichée."""
         # Effacer la liste actuelle
@@ -1335,15 +1302,9 @@ class ApplicationPrincipale(tk.Frame):
         
         # Ajouter les ventes à la liste
         for vente in self.ventes.ventes:
-            self.tree_ventes.insert('', 'end', values=(
-                vente['id'],
-                vente['date'],
-                vente['titre_film'],
-                vente['quantite'],
-                f"{float(vente['prix_unitaire']):.2f} €",
-                f"{float(vente['quantite']) * float(vente['prix_unitaire']):.2f} €"
-            ))
+            self.tree_ventes.insert('', 'end', iid=str(vente['id']), values=self._valeurs_vente(vente))
 
+    @mesurer("interface.afficher_statistiques")
     def afficher_statistiques(self):
         """Affiche les statistiques directement dans la fenêtre principale."""
         try:
@@ -1360,9 +1321,12 @@ class ApplicationPrincipale(tk.Frame):
             text_stats_frame = ttk.Frame(main_stats_frame, style='Custom.TFrame')
             text_stats_frame.pack(fill=tk.X, padx=20, pady=(0, 20))
             
+            # Agrégats de ventes tenus à jour par GestionVentes (lecture en O(1))
+            agregats_ventes = self.ventes.snapshot()
+            
             # Calculer les statistiques globales
             total_films = len(self.catalogue.films)
-            total_ventes = sum(float(vente['quantite']) for vente in self.ventes.ventes)
+            total_ventes = agregats_ventes['quantite_totale']
             total_users = len(self.gestion_utilisateurs.utilisateurs)  # Correction ici
             # Notes moyennes globales
             all_notes = []
@@ -1381,8 +1345,8 @@ class ApplicationPrincipale(tk.Frame):
             films_ce_mois = len(self.catalogue.filtrer_par_periode(debut_mois.isoformat()))
             
             # Statistiques des ventes
-            ventes_ce_mois = self.ventes.filtrer_par_periode(debut=debut_mois)
-            total_ventes_mois = sum(float(v['total']) for v in ventes_ce_mois)
+            mois_courant = agregats_ventes['par_mois'].get(date_actuelle.strftime('%Y-%m'), {})
+            total_ventes_mois = mois_courant.get('revenu', 0)
             
             # Afficher les statistiques textuelles
             stats_text = [
@@ -1392,7 +1356,7 @@ class ApplicationPrincipale(tk.Frame):
                 f"Ventes ce mois: {total_ventes_mois:.0f} €",
                 f"Nombre total d'utilisateurs: {total_users}",
                 f"Note moyenne globale: {note_moyenne_globale:.1f}/10",
-                f"Dernière synchronisation: {self.derniere_synchro.split('T')[0]}"
+                f"Dernière mise à jour: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             ]
             
             for text in stats_text:
@@ -1472,10 +1436,10 @@ class ApplicationPrincipale(tk.Frame):
 
             # 3. Graphique des tendances (ligne)
             dates_ventes = {}
-            for vente in self.ventes.ventes:
+            for jour, compteur in agregats_ventes['par_jour'].items():
                 # Convertir la date en objet datetime
-                date_obj = datetime.strptime(vente['date'].split(' ')[0], '%Y-%m-%d')
-                dates_ventes[date_obj] = dates_ventes.get(date_obj, 0) + float(vente['quantite'])
+                date_obj = datetime.strptime(jour, '%Y-%m-%d')
+                dates_ventes[date_obj] = compteur['quantite']
             
             if dates_ventes:
                 dates_triees = dict(sorted(dates_ventes.items()))
@@ -1514,12 +1478,13 @@ class ApplicationPrincipale(tk.Frame):
             canvas.draw()
             
         except Exception as e:
-            print(f"Erreur lors de l'affichage des statistiques : {str(e)}")
+            journal.error(f"Erreur lors de l'affichage des statistiques : {str(e)}", exc_info=True)
             error_label = ttk.Label(self.stats_container,
                                   text=f"Erreur lors de l'affichage des statistiques : {str(e)}",
                                   style='Custom.TLabel')
             error_label.pack(pady=20)
     
+    @mesurer("interface.mettre_a_jour_recommandations")
     def mettre_a_jour_recommandations(self):
         """Met à jour les recommandations basées sur les notes de l'utilisateur."""
         if not self.utilisateur_connecte:
@@ -1529,56 +1494,20 @@ class ApplicationPrincipale(tk.Frame):
         for item in self.tree_recommandations.get_children():
             self.tree_recommandations.delete(item)
             
-        # Récupérer les notes de l'utilisateur
-        notes_utilisateur = {}
-        for film in self.catalogue.films:
-            if film.get('notes') and self.utilisateur_connecte in film['notes']:
-                notes_utilisateur[film['titre']] = film['notes'][self.utilisateur_connecte]
-        
-        # Si l'utilisateur n'a pas encore noté de films, afficher les films les mieux notés
-        if not notes_utilisateur:
-            films_scores = [(film, film.get('note', 0)) for film in self.catalogue.films]
-            films_scores.sort(key=lambda x: x[1], reverse=True)
-            for film, score in films_scores[:10]:
-                self.tree_recommandations.insert('', 'end', values=(
-                    film['titre'],
-                    film['genre'],
-                    film.get('note', 'N/A'),
-                    film.get('annee', 'N/A'),
-                    f"{score:.1f}"
-                ))
+        # Liste gardée, même périmée : la liste à jour remplace celle-ci quand
+        # elle est calculée (RECOMMANDATIONS_CALCULEES)
+        recommandations = self.recommandations.obtenir(self.utilisateur_connecte)
+        if recommandations is None:
+            self.tree_recommandations.insert('', 'end', values=("Calcul en cours…", '', '', '', ''))
             return
-            
-        # Calculer les recommandations basées sur les genres préférés
-        genres_preferes = {}
-        for film in self.catalogue.films:
-            if film['titre'] in notes_utilisateur:
-                note = notes_utilisateur[film['titre']]
-                genre = film['genre']
-                if genre not in genres_preferes:
-                    genres_preferes[genre] = []
-                genres_preferes[genre].append(note)
-        
-        # Calculer la moyenne des notes par genre
-        moyennes_genres = {}
-        for genre, notes in genres_preferes.items():
-            moyennes_genres[genre] = sum(notes) / len(notes)
-        
-        # Calculer un score pour chaque film non vu
-        films_scores = []
-        for film in self.catalogue.films:
-            if film['titre'] not in notes_utilisateur:
-                # Le score est basé sur :
-                # 1. La préférence pour le genre (50%)
-                # 2. La note moyenne du film (50%)
-                score_genre = moyennes_genres.get(film['genre'], 0)
-                note_film = film.get('note', 0)
-                score = (score_genre * 0.5) + (note_film * 0.5)
-                films_scores.append((film, score))
-        
-        # Trier les films par score et afficher les 10 meilleurs
-        films_scores.sort(key=lambda x: x[1], reverse=True)
-        for film, score in films_scores[:10]:
+        version, films = self._films_par_id
+        if version != self.catalogue.version:
+            films = {film['id']: film for film in self.catalogue.films}
+            self._films_par_id = (self.catalogue.version, films)
+        for film_id, score in recommandations:
+            film = films.get(film_id)
+            if film is None:
+                continue
             self.tree_recommandations.insert('', 'end', values=(
                 film['titre'],
                 film['genre'],
@@ -1652,7 +1581,8 @@ class ApplicationPrincipale(tk.Frame):
         # Trouver le film dans le catalogue
         film = next((f for f in self.catalogue.films if f['titre'] == titre), None)
         if film:
-            FenetreDetailsFilm(self, film, self.gestion_utilisateurs, self.utilisateur_connecte)
+            FenetreDetailsFilm(self, film, self.gestion_utilisateurs, self.utilisateur_connecte,
+                               self.gestion_commentaires, self.index_contenu())
     
     def afficher_details_film_vente(self, event):
         """Affiche les détails d'un film à partir de l'onglet ventes."""
@@ -1660,7 +1590,8 @@ class ApplicationPrincipale(tk.Frame):
         film_titre = self.tree_ventes.item(item)['values'][1]  # Le titre est dans la deuxième colonne (index 1)
         film = self.catalogue.obtenir_film_par_titre(film_titre)
         if film:
-            FenetreDetailsFilm(self.master, film, self.gestion_utilisateurs, self.utilisateur_connecte)
+            FenetreDetailsFilm(self.master, film, self.gestion_utilisateurs, self.utilisateur_connecte,
+                               self.gestion_commentaires, self.index_contenu())
     
     def afficher_dialogue_ajout_film(self):
         """Affiche une fenêtre de dialogue pour ajouter un nouveau film."""
@@ -1709,7 +1640,6 @@ class ApplicationPrincipale(tk.Frame):
                     return
                 
                 self.catalogue.ajouter_film(film)
-                self.mettre_a_jour_liste_films()
                 dialogue.destroy()
                 messagebox.showinfo("Succès", "Film ajouté avec succès!")
                 
@@ -1880,9 +1810,7 @@ class ApplicationPrincipale(tk.Frame):
             # Enregistrer la vente via GestionVentes
             vente = self.ventes.enregistrer_vente(film['id'], film['titre'], quantite, prix)
             
-            # Recharger les ventes pour mettre à jour l'affichage
-            self.ventes.charger_ventes()
-            self.mettre_a_jour_liste_ventes()
+            # La liste des ventes et le classement sont mis à jour par l'événement VENTE_ENREGISTREE
             
             # Réinitialiser les champs
             self.combo_films.set('')
@@ -1894,6 +1822,25 @@ class ApplicationPrincipale(tk.Frame):
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de l'enregistrement : {str(e)}")
 
+    @mesurer("interface.mettre_a_jour_top_ventes")
+    def mettre_a_jour_top_ventes(self):
+        """Affiche les films les plus vendus sur la dernière semaine."""
+        if not self._vue_existe('tree_top_ventes'):
+            return
+        for item in self.tree_top_ventes.get_children():
+            self.tree_top_ventes.delete(item)
+        
+        revenus = self.top_ventes.valeurs('revenu', fenetre='semaine')
+        titres = {film['id']: film['titre'] for film in self.catalogue.films}
+        for rang, (film_id, quantite) in enumerate(self.top_ventes.top('quantite', fenetre='semaine'), 1):
+            self.tree_top_ventes.insert('', 'end', values=(
+                rang,
+                titres.get(film_id, f"Film {film_id}"),
+                quantite,
+                f"{revenus.get(film_id, 0):.2f}€"
+            ))
+
+    @mesurer("interface.mettre_a_jour_liste_ventes")
     def mettre_a_jour_liste_ventes(self):
         """Met à jour la liste des ventes affichée."""
         # Effacer la liste actuelle
@@ -1902,14 +1849,7 @@ class ApplicationPrincipale(tk.Frame):
         
         # Ajouter les ventes à la liste
         for vente in self.ventes.ventes:
-            self.tree_ventes.insert('', 'end', values=(
-                vente['id'],
-                vente['date'],
-                vente['titre_film'],
-                vente['quantite'],
-                f"{float(vente['prix_unitaire']):.2f} €",
-                f"{float(vente['quantite']) * float(vente['prix_unitaire']):.2f} €"
-            ))
+            self.tree_ventes.insert('', 'end', iid=str(vente['id']), values=self._valeurs_vente(vente))
 
     def deconnexion(self):
         """Gère la déconnexion de l'utilisateur."""
@@ -1921,20 +1861,186 @@ class ApplicationPrincipale(tk.Frame):
             # Afficher la fenêtre de connexion
             self.afficher_connexion()
 
-    def synchroniser_horloge(self):
-        """Met à jour l'horloge et rafraîchit les données si nécessaire."""
-        nouvelle_synchro = self.catalogue.mettre_a_jour_horloge()
-        nouvelle_synchro_ventes = self.ventes.mettre_a_jour_horloge()
-        
-        if nouvelle_synchro != self.derniere_synchro or nouvelle_synchro_ventes != self.derniere_synchro_ventes:
-            self.derniere_synchro = nouvelle_synchro
-            self.derniere_synchro_ventes = nouvelle_synchro_ventes
+    def _valeurs_vente(self, vente):
+        """Valeurs d'une ligne de la liste des ventes."""
+        return (
+            vente['id'],
+            vente['date'],
+            vente['titre_film'],
+            vente['quantite'],
+            f"{float(vente['prix_unitaire']):.2f} €",
+            f"{float(vente['quantite']) * float(vente['prix_unitaire']):.2f} €"
+        )
+
+    def _vue_existe(self, nom):
+        """Indique si le widget `nom` a été créé et n'est pas détruit."""
+        widget = getattr(self, nom, None)
+        return widget is not None and widget.winfo_exists()
+
+    def _rafraichir_stats_si_visible(self):
+        """Rafraîchit les statistiques périmées si leur onglet est affiché."""
+        if not self.stats_a_rafraichir or not self._vue_existe('stats_container'):
+            return
+        if self.notebook.select() == str(self.tab_stats):
+            self.stats_a_rafraichir = False
             self.rafraichir_stats()
-            self.mettre_a_jour_liste_films()
+
+    def _stats_perimees(self):
+        """Marque les statistiques à recalculer (tout de suite si elles sont affichées)."""
+        self.stats_a_rafraichir = True
+        self._rafraichir_stats_si_visible()
+
+    def _films_ajoutes(self, evenements):
+        """Ajoute les nouveaux films à la liste s'ils passent les filtres courants."""
+        if self._vue_existe('tree_films'):
+            for evenement in evenements:
+                film = evenement.donnees['film']
+                if self._film_visible(film) and not self.tree_films.exists(str(film['id'])):
+                    self.tree_films.insert('', 'end', iid=str(film['id']), values=self._valeurs_film(film))
+        if self._vue_existe('combo_genre'):
+            genres = set(self.combo_genre['values'])
+            nouveaux = {e.donnees['film']['genre'] for e in evenements} - genres
+            if nouveaux:
+                self.combo_genre['values'] = ['Tous'] + sorted((genres - {'Tous'}) | nouveaux)
+        with self._verrou_index:
+            self._generation_catalogue += 1
+            if self._index is not None:
+                # L'index courant peut être lu par le calcul en arrière-plan : on en publie une copie
+                index = self._index.copie()
+                for evenement in evenements:
+                    index.ajouter(evenement.donnees['film'])
+                self._index = index
+        self._recommandations_perimees()
+        self._stats_perimees()
+
+    def _notes_films_modifiees(self, evenements):
+        """Met à jour la ligne des films dont la note globale a changé."""
+        if self._vue_existe('tree_films'):
+            for evenement in evenements:
+                film = evenement.donnees['film']
+                if self.tree_films.exists(str(film['id'])):
+                    self.tree_films.item(str(film['id']), values=self._valeurs_film(film))
+        self._recommandations_perimees()
+        self._stats_perimees()
+
+    def _catalogue_recharge(self, evenements):
+        """Reconstruit la liste des films après un rechargement du catalogue."""
+        with self._verrou_index:
+            self._index = None
+            self._voisinage = (None, None)
+            self._generation_catalogue += 1
+            self._generation_notes += 1
+        if self._vue_existe('tree_films'):
+            self.filtrer_films()
+        self._recommandations_perimees()
+        self._stats_perimees()
+
+    def _recommandations_calculees(self, evenements):
+        """Affiche la liste recalculée de l'utilisateur connecté."""
+        if any(e.donnees['utilisateur'] == self.utilisateur_connecte for e in evenements) \
+                and self._vue_existe('tree_recommandations'):
+            self.mettre_a_jour_recommandations()
+
+    def synchroniser_fichiers(self):
+        """Intègre les modifications des données faites par d'autres processus."""
+        for gestionnaire in (self.catalogue, self.ventes, self.gestion_utilisateurs):
+            try:
+                gestionnaire.synchroniser()
+            except Exception as e:
+                journal.error(f"Erreur lors de la synchronisation de {type(gestionnaire).__name__}: {e}",
+                              exc_info=True)
+        self.after(self.intervalle_synchronisation, self.synchroniser_fichiers)
+
+    def _utilisateurs_modifies(self, evenements):
+        """Met à jour le tableau de modération après la création, suppression ou promotion d'un compte."""
+        if self._vue_existe('table_utilisateurs'):
+            self.charger_utilisateurs()
+
+    def index_contenu(self):
+        """Index de contenu du catalogue, construit hors verrou au premier appel."""
+        with self._verrou_index:
+            index, generation = self._index, self._generation_catalogue
+            if index is not None:
+                return index
+            films = list(self.catalogue.films)
+        index = IndexContenu(films)
+        with self._verrou_index:
+            # Gardé seulement si le catalogue n'a pas changé pendant la construction
+            if self._index is None and self._generation_catalogue == generation:
+                self._index = index
+        return index
+
+    def voisinage(self):
+        """Voisinage des utilisateurs, reconstruit hors verrou au premier appel qui suit une note."""
+        with self._verrou_index:
+            generation, voisinage = self._voisinage
+            if voisinage is not None and generation == self._generation_notes:
+                return voisinage
+            generation = self._generation_notes
+            notes = dict(self.gestion_utilisateurs.notes)
+            films = list(self.catalogue.films)
+        voisinage = VoisinageUtilisateurs({nom: dict(notes_films) for nom, notes_films in notes.items()}, films)
+        with self._verrou_index:
+            if self._generation_notes == generation:
+                self._voisinage = (generation, voisinage)
+        return voisinage
+
+    def _notes_utilisateurs_modifiees(self, evenement):
+        """Périme le voisinage (appelé par le bus, dans le thread qui publie)."""
+        with self._verrou_index:
+            self._generation_notes += 1
+
+    def _calculer_recommandations(self, utilisateur, notes_utilisateur):
+        """Liste (film_id, score) de l'utilisateur (thread de calcul des recommandations).
+
+        Films, modèle, index et voisinage sont relevés sous le verrou, le
+        temps de copier les références ; le calcul se fait hors verrou et ne
+        bloque donc pas l'interface.
+        """
+        with self._verrou_index:
+            films = list(self.catalogue.films)
+            modele = self.modele_recommandation
+        index = self.index_contenu()
+        voisinage = self.voisinage() if modele is None else None
+        return liste_recommandations(films, utilisateur, dict(notes_utilisateur), modele, index,
+                                     voisinage=voisinage)
+
+    def _recommandations_perimees(self):
+        """Fait recalculer en arrière-plan la liste de l'utilisateur connecté."""
+        if self.utilisateur_connecte:
+            self.recommandations.rafraichir(self.utilisateur_connecte)
+
+    def _fermeture(self, event):
+        """Arrête le calcul des recommandations quand l'application est détruite."""
+        if event.widget is self:
+            self._desabonner_notes()
+            self.recommandations.fermer()
+
+    def _ventes_enregistrees(self, evenements):
+        """Ajoute les nouvelles ventes à la fin de la liste."""
+        if self._vue_existe('tree_ventes'):
+            for evenement in evenements:
+                vente = evenement.donnees['vente']
+                self.tree_ventes.insert('', 'end', iid=str(vente['id']), values=self._valeurs_vente(vente))
+        self.mettre_a_jour_top_ventes()
+        self._stats_perimees()
+
+    def _ventes_annulees(self, evenements):
+        """Retire les ventes annulées de la liste."""
+        if self._vue_existe('tree_ventes'):
+            for evenement in evenements:
+                iid = str(evenement.donnees['vente']['id'])
+                if self.tree_ventes.exists(iid):
+                    self.tree_ventes.delete(iid)
+        self.mettre_a_jour_top_ventes()
+        self._stats_perimees()
+
+    def _ventes_rechargees(self, evenements):
+        """Reconstruit les vues des ventes après un rechargement de l'historique."""
+        if self._vue_existe('tree_ventes'):
             self.mettre_a_jour_liste_ventes()
-        
-        # Programmer la prochaine synchronisation
-        self.master.after(60000, self.synchroniser_horloge)
+        self.mettre_a_jour_top_ventes()
+        self._stats_perimees()
 
 if __name__ == "__main__":
     root = tk.Tk()
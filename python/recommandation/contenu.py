@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de recommandation par le contenu des films (TF-IDF).
+
+Chaque film est décrit par ses caractéristiques : son genre, son réalisateur
+et chacun de ses acteurs. Son vecteur a une composante par caractéristique,
+pondérée par l'IDF log((1 + N) / (1 + df)) + 1, puis normalisé : la
+similarité de deux films est le cosinus, produit scalaire de leurs
+vecteurs. Un réalisateur ou un acteur en commun rapproche donc bien plus
+qu'un genre partagé par un film sur dix.
+
+Les vecteurs sont creux (une poignée de composantes parmi des dizaines de
+milliers) ; sans SciPy, chaque vecteur est gardé en deux tableaux NumPy
+(indices et poids) et chaque caractéristique a la liste de ses films (index
+inversé), triée par poids décroissant. Les voisins d'un film sont cherchés
+parmi les films qui partagent une de ses caractéristiques, en ne prenant
+que les LIMITE_CANDIDATS premiers de chaque liste : pour un genre partagé
+par des milliers de films, ce sont ceux qui ont le moins d'autres
+caractéristiques, donc les plus proches. Le cosinus des candidats est
+ensuite calculé exactement.
+
+Ce moteur n'a besoin d'aucune note : il sert les films qui viennent d'être
+ajoutés (ajouter) et les utilisateurs qui ont encore peu noté, à partir des
+voisins des films qu'ils ont aimés (recommander_par_contenu).
+"""
+
+import copy
+import heapq
+import logging
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from ..instrumentation.metriques import mesurer
+
+journal = logging.getLogger(__name__)
+
+# Films retenus par caractéristique pour chercher les voisins d'un film
+LIMITE_CANDIDATS = 64
+# Voisins gardés par film
+NOMBRE_VOISINS = 20
+# Films traités ensemble par calculer_voisins
+TAILLE_LOT = 1024
+# Une note au-dessus rapproche des voisins du film, une note en dessous en éloigne
+NOTE_NEUTRE = 2.5
+
+
+def caracteristiques(film):
+    """Caractéristiques d'un film : genre, réalisateur et chaque acteur.
+
+    Les acteurs sont une liste ("a|b|c" dans films.csv) ; dans les anciennes
+    données, un élément peut encore contenir plusieurs noms séparés par des
+    virgules.
+    """
+    jetons = [f"genre:{film['genre']}", f"realisateur:{film['realisateur']}"]
+    for element in film.get('acteurs') or ():
+        jetons.extend(f"acteur:{acteur.strip()}" for acteur in str(element).split(',') if acteur.strip())
+    return list(dict.fromkeys(jetons))
+
+
+class IndexContenu:
+    """Vecteurs TF-IDF des films et leurs plus proches voisins (cosinus).
+
+    Les voisins d'un film sont calculés à la première demande puis gardés ;
+    calculer_voisins les calcule pour tout le catalogue. Un film ajouté
+    (ajouter) est placé dans les voisins déjà calculés dont il fait partie ;
+    les IDF des films existants ne sont recalculées que par construire.
+
+    Args:
+        films (list): Films du catalogue
+        nombre_voisins (int): Voisins gardés par film
+    """
+
+    def __init__(self, films=(), nombre_voisins=NOMBRE_VOISINS):
+        self.nombre_voisins = nombre_voisins
+        self.construire(films)
+
+    @mesurer("recommandation.index_contenu")
+    def construire(self, films):
+        """(Re)construit l'index à partir des films du catalogue."""
+        self.films = []
+        self.rangs = {}
+        self.vocabulaire = {}
+        self.frequences = []
+        self._voisins = {}
+        lignes = []
+        for film in films:
+            if film['id'] in self.rangs:
+                continue
+            self.rangs[film['id']] = len(self.films)
+            self.films.append(film)
+            lignes.append([self._identifiant(jeton) for jeton in caracteristiques(film)])
+
+        longueurs = np.fromiter(map(len, lignes), dtype=np.int64, count=len(lignes))
+        indices = np.fromiter((j for ligne in lignes for j in ligne), dtype=np.int32, count=int(longueurs.sum()))
+        frequences = np.bincount(indices, minlength=len(self.vocabulaire))
+        self.frequences = frequences.tolist()
+        idf = np.log((1 + len(self.films)) / (1 + frequences)) + 1
+
+        # Poids normalisés, film par film
+        poids = idf[indices]
+        debuts = np.cumsum(longueurs) - longueurs
+        normes = np.sqrt(np.add.reduceat(poids ** 2, debuts)) if len(debuts) else np.zeros(0)
+        poids = (poids / np.repeat(normes, longueurs)).astype(np.float32)
+        self.indices = np.split(indices, debuts[1:]) if len(debuts) else []
+        self.poids = np.split(poids, debuts[1:]) if len(debuts) else []
+
+        # Index inversé : films de chaque caractéristique, par poids décroissant
+        rangs = np.repeat(np.arange(len(self.films), dtype=np.int32), longueurs)
+        ordre = np.lexsort((-poids, indices))
+        coupures = np.cumsum(frequences)[:-1]
+        self.postings = np.split(rangs[ordre], coupures) if len(frequences) else []
+        self.postings_poids = np.split(poids[ordre], coupures) if len(frequences) else []
+        journal.info(f"Index de contenu : {len(self.films)} films, {len(self.vocabulaire)} caractéristiques")
+
+    def _identifiant(self, jeton):
+        identifiant = self.vocabulaire.get(jeton)
+        if identifiant is None:
+            identifiant = self.vocabulaire[jeton] = len(self.vocabulaire)
+            self.frequences.append(0)
+        return identifiant
+
+    def copie(self):
+        """Copie de l'index à laquelle des films peuvent être ajoutés sans modifier l'original.
+
+        L'original peut ainsi rester lu par un autre thread. Seuls les
+        conteneurs sont copiés : ajouter remplace les tableaux NumPy au lieu
+        de les modifier.
+        """
+        index = copy.copy(self)
+        for nom in ('films', 'frequences', 'indices', 'poids', 'postings', 'postings_poids'):
+            setattr(index, nom, list(getattr(self, nom)))
+        for nom in ('rangs', 'vocabulaire', '_voisins'):
+            setattr(index, nom, dict(getattr(self, nom)))
+        return index
+
+    def ajouter(self, film):
+        """Ajoute un film à l'index (FILM_AJOUTE).
+
+        Son vecteur est pondéré par les IDF actuelles ; il prend place dans
+        les voisins déjà calculés des films qui lui ressemblent.
+        """
+        if film['id'] in self.rangs:
+            return
+        identifiants = [self._identifiant(jeton) for jeton in caracteristiques(film)]
+        # Nouvelles caractéristiques : listes de films vides
+        for _ in range(len(self.postings), len(self.vocabulaire)):
+            self.postings.append(np.zeros(0, dtype=np.int32))
+            self.postings_poids.append(np.zeros(0, dtype=np.float32))
+        for j in identifiants:
+            self.frequences[j] += 1
+
+        rang = len(self.films)
+        self.rangs[film['id']] = rang
+        self.films.append(film)
+        idf = np.array([math.log((2 + rang) / (1 + self.frequences[j])) + 1 for j in identifiants])
+        poids = (idf / np.sqrt((idf ** 2).sum())).astype(np.float32)
+        self.indices.append(np.array(identifiants, dtype=np.int32))
+        self.poids.append(poids)
+        for j, p in zip(identifiants, poids.tolist()):
+            position = np.searchsorted(-self.postings_poids[j], -p)
+            self.postings[j] = np.insert(self.postings[j], position, rang)
+            self.postings_poids[j] = np.insert(self.postings_poids[j], position, p)
+
+        # Le cosinus est symétrique : les scores des candidats du nouveau
+        # film sont aussi les leurs
+        candidats, scores = self._scores_candidats(rang)
+        self._voisins[rang] = self._meilleurs(candidats, scores)
+        for candidat, score in zip(candidats.tolist(), scores.tolist()):
+            if candidat in self._voisins:
+                voisins, scores_voisins = self._voisins[candidat]
+                if len(voisins) < self.nombre_voisins or score > scores_voisins[-1]:
+                    self._voisins[candidat] = self._meilleurs(np.append(voisins, rang),
+                                                              np.append(scores_voisins, score))
+
+    def _scores_candidats(self, rang):
+        """Films partageant une caractéristique avec le film `rang` et leur cosinus."""
+        indices = self.indices[rang]
+        candidats = np.unique(np.concatenate([self.postings[j][:LIMITE_CANDIDATS] for j in indices.tolist()]))
+        candidats = candidats[candidats != rang]
+        if not len(candidats):
+            return candidats, np.zeros(0, dtype=np.float32)
+
+        # Produits scalaires exacts : vecteur du film en dense, lignes des candidats mises bout à bout
+        dense = np.zeros(len(self.vocabulaire), dtype=np.float32)
+        dense[indices] = self.poids[rang]
+        lignes = [self.indices[c] for c in candidats.tolist()]
+        longueurs = np.fromiter(map(len, lignes), dtype=np.int64, count=len(lignes))
+        contributions = dense[np.concatenate(lignes)] * np.concatenate([self.poids[c] for c in candidats.tolist()])
+        return candidats, np.add.reduceat(contributions, np.cumsum(longueurs) - longueurs)
+
+    def _meilleurs(self, candidats, scores):
+        """Les nombre_voisins meilleurs candidats, par score décroissant."""
+        if len(candidats) > self.nombre_voisins:
+            garder = np.argpartition(-scores, self.nombre_voisins - 1)[:self.nombre_voisins]
+            candidats, scores = candidats[garder], scores[garder]
+        ordre = np.argsort(-scores, kind='stable')
+        return candidats[ordre].astype(np.int32), scores[ordre].astype(np.float32)
+
+    def _voisins_rang(self, rang):
+        voisins = self._voisins.get(rang)
+        if voisins is None:
+            voisins = self._voisins[rang] = self._meilleurs(*self._scores_candidats(rang))
+        return voisins
+
+    @mesurer("recommandation.voisins_contenu")
+    def calculer_voisins(self, taille_lot=TAILLE_LOT):
+        """Calcule les voisins de tous les films qui ne les ont pas encore.
+
+        Les films sont traités par lots : candidats et produits scalaires de
+        tout un lot sont calculés par quelques opérations sur des tableaux
+        plats (lignes des films et têtes des listes mises bout à bout).
+        """
+        restants = np.array([r for r in range(len(self.films)) if r not in self._voisins], dtype=np.int64)
+        if not len(restants):
+            return
+        longueurs = np.fromiter(map(len, self.indices), dtype=np.int64, count=len(self.films))
+        debuts = np.cumsum(longueurs) - longueurs
+        indices = np.concatenate(self.indices)
+        poids = np.concatenate(self.poids)
+        tetes = [films[:LIMITE_CANDIDATS] for films in self.postings]
+        longueurs_tetes = np.fromiter(map(len, tetes), dtype=np.int64, count=len(tetes))
+        debuts_tetes = np.cumsum(longueurs_tetes) - longueurs_tetes
+        tetes = np.concatenate(tetes).astype(np.int64)
+        nb_films, nb_caracteristiques = len(self.films), len(self.vocabulaire)
+
+        for debut in range(0, len(restants), taille_lot):
+            rangs = restants[debut:debut + taille_lot]
+            # Caractéristiques des films du lot (numérotés 0..n-1 dans le lot)
+            nombres = longueurs[rangs]
+            positions = _plages(debuts[rangs], nombres)
+            films_lot = np.repeat(np.arange(len(rangs)), nombres)
+            caracteristiques_lot, poids_lot = indices[positions], poids[positions]
+
+            # Candidats : têtes des listes de ces caractéristiques, sans doublon ni le film lui-même
+            nombres = longueurs_tetes[caracteristiques_lot]
+            cles = np.sort(np.repeat(films_lot, nombres) * nb_films
+                           + tetes[_plages(debuts_tetes[caracteristiques_lot], nombres)])
+            cles = cles[np.concatenate(([True], cles[1:] != cles[:-1]))]
+            locaux, candidats = cles // nb_films, cles % nb_films
+            garder = candidats != rangs[locaux]
+            locaux, candidats = locaux[garder], candidats[garder]
+
+            # Produits scalaires exacts : chaque caractéristique d'un candidat
+            # est cherchée parmi celles du film du lot
+            cles_lot = films_lot * nb_caracteristiques + caracteristiques_lot
+            ordre = np.argsort(cles_lot)
+            cles_lot, poids_tries = cles_lot[ordre], poids_lot[ordre]
+            nombres = longueurs[candidats]
+            positions = _plages(debuts[candidats], nombres)
+            requetes = np.repeat(locaux, nombres) * nb_caracteristiques + indices[positions]
+            trouves = np.minimum(np.searchsorted(cles_lot, requetes), len(cles_lot) - 1)
+            contributions = np.where(cles_lot[trouves] == requetes, poids_tries[trouves], 0) * poids[positions]
+            scores = np.add.reduceat(contributions, np.cumsum(nombres) - nombres) if len(nombres) else contributions
+
+            # nombre_voisins meilleurs de chaque film du lot (un cosinus est
+            # dans [0, 1] : une seule clé de tri, film du lot puis score)
+            ordre = np.argsort(locaux * 4.0 - scores)
+            locaux, candidats, scores = locaux[ordre], candidats[ordre].astype(np.int32), scores[ordre]
+            premiers = np.searchsorted(locaux, np.arange(len(rangs)))
+            derniers = np.minimum(np.searchsorted(locaux, np.arange(len(rangs)), side='right'),
+                                  premiers + self.nombre_voisins)
+            for rang, premier, dernier in zip(rangs.tolist(), premiers.tolist(), derniers.tolist()):
+                self._voisins[rang] = (candidats[premier:dernier], scores[premier:dernier].astype(np.float32))
+
+    def voisins(self, film_id, nombre=10):
+        """Films les plus proches d'un film.
+
+        Args:
+            film_id (int): ID du film
+            nombre (int): Nombre de voisins (au plus nombre_voisins)
+
+        Returns:
+            list: Tuples (film, similarité) triés par similarité décroissante
+        """
+        rang = self.rangs.get(film_id)
+        if rang is None:
+            return []
+        voisins, scores = self._voisins_rang(rang)
+        return [(self.films[v], s) for v, s in zip(voisins[:nombre].tolist(), scores[:nombre].tolist())]
+
+
+def _plages(debuts, longueurs):
+    """Positions debuts[i] .. debuts[i] + longueurs[i] - 1 mises bout à bout."""
+    total = int(longueurs.sum())
+    decalages = np.repeat(debuts - (np.cumsum(longueurs) - longueurs), longueurs)
+    return decalages + np.arange(total)
+
+
+def recommander_par_contenu(index, notes_utilisateur, nombre=10):
+    """Recommande les voisins des films que l'utilisateur a aimés.
+
+    Le score d'un film est la somme, sur les films notés, de leur similarité
+    avec lui multipliée par (note - NOTE_NEUTRE).
+
+    Args:
+        index (IndexContenu): Index des films
+        notes_utilisateur (dict): Note sur 5 par ID de film
+        nombre (int): Nombre de recommandations
+
+    Returns:
+        list: Tuples (film, score) triés par score décroissant ; vide si
+        aucun film noté n'a de voisin
+    """
+    scores = defaultdict(float)
+    for film_id, note in notes_utilisateur.items():
+        rang = index.rangs.get(film_id)
+        if rang is None:
+            continue
+        voisins, similarites = index._voisins_rang(rang)
+        for voisin, similarite in zip(voisins.tolist(), similarites.tolist()):
+            scores[voisin] += (note - NOTE_NEUTRE) * similarite
+    notes = {index.rangs[film_id] for film_id in notes_utilisateur if film_id in index.rangs}
+    meilleurs = heapq.nlargest(nombre, ((rang, score) for rang, score in scores.items()
+                                        if score > 0 and rang not in notes), key=lambda x: x[1])
+    return [(index.films[rang], score) for rang, score in meilleurs]
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de recommandation par factorisation de la matrice des notes (ALS).
+
+Chaque utilisateur u et chaque film i reçoivent un vecteur de k facteurs
+latents (x_u, y_i) ; l'intérêt prédit de u pour i est le produit scalaire
+x_u · y_i. Les notes servent de retour implicite : avoir noté un film est
+une préférence (1), la note en donne la confiance c = 1 + alpha × note ;
+un film non noté est une préférence 0 de confiance 1. Pour proposer les
+films qu'un utilisateur va regarder (recall@10), cette formulation fait
+bien mieux que prédire la note elle-même, qui met en tête des films
+obscurs notés une seule fois.
+
+Les facteurs sont appris par moindres carrés alternés (ALS, Hu, Koren et
+Volinsky 2008) : à facteurs des films fixés, le vecteur de chaque
+utilisateur est la solution d'un système k x k
+
+    (YᵀY + Yᵤᵀ (Cᵤ - I) Yᵤ + λI) x_u = Yᵤᵀ Cᵤ 1
+
+puis inversement. YᵀY est commun à tous ; les systèmes d'un lot
+d'utilisateurs (ou de films) sont construits par produits matriciels et
+résolus ensemble par NumPy.
+
+Les notes viennent de notes_utilisateurs.json (sur 5) et des commentaires
+(note du commentaire, ramenée sur 5 si elle est sur 10), une note explicite
+l'emportant sur celle d'un commentaire. Le modèle est appris hors ligne
+(entrainer_recommandations.py) et enregistré dans donnees/ ; il est ensuite
+mis à jour de façon incrémentale : repartir des facteurs existants pour
+quelques itérations, ou seulement recalculer les utilisateurs qui viennent
+de noter (mettre_a_jour_utilisateurs), à facteurs des films fixés.
+"""
+
+import logging
+import os
+
+import numpy as np
+
+from ..concurrence.fichiers import ecriture_atomique
+from ..instrumentation.metriques import mesurer
+from .index_approche import IndexIVF
+
+journal = logging.getLogger(__name__)
+
+FICHIER_MODELE = "donnees/modele_factorisation.npz"
+
+# Taille d'un lot de systèmes, en notes (lignes complétées par des zéros jusqu'à
+# la plus longue du lot) : mémoire TAILLE_LOT x k flottants
+TAILLE_LOT = 65536
+# Au-delà, main() construit l'index approché des films (recherche exacte en dessous)
+SEUIL_INDEX = 100_000
+
+
+def extraire_notes(notes_utilisateurs, commentaires=(), films=()):
+    """Triplets (utilisateur, film_id, note sur 5) pour l'apprentissage.
+
+    Args:
+        notes_utilisateurs (dict): GestionUtilisateurs.notes, indexées par ID
+            de film (ou par titre dans les anciennes données)
+        commentaires (list): Commentaires (film_id, utilisateur, note)
+        films (list): Films du catalogue, pour retrouver l'ID d'un titre
+
+    Returns:
+        list: Tuples (utilisateur, film_id, note)
+    """
+    ids_titres = None  # Construit seulement pour les anciennes clés (titres)
+    notes = {}
+    for commentaire in commentaires:
+        note = commentaire.get('note') or 0
+        if note > 0:
+            notes[(commentaire['utilisateur'], int(commentaire['film_id']))] = note / 2 if note > 5 else note
+    for utilisateur, notes_films in notes_utilisateurs.items():
+        for cle, infos in notes_films.items():
+            if str(cle).isdigit():
+                film_id = int(cle)
+            else:
+                if ids_titres is None:
+                    ids_titres = {film['titre']: film['id'] for film in films}
+                film_id = ids_titres.get(cle)
+            if film_id is not None:
+                notes[(utilisateur, film_id)] = infos['note']
+    return [(utilisateur, film_id, float(note)) for (utilisateur, film_id), note in notes.items()]
+
+
+def _csr(lignes, colonnes, valeurs, nb_lignes):
+    """Trie les notes par ligne : (debuts, colonnes, valeurs)."""
+    ordre = np.argsort(lignes, kind='stable')
+    debuts = np.zeros(nb_lignes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(lignes, minlength=nb_lignes), out=debuts[1:])
+    return debuts, colonnes[ordre], valeurs[ordre]
+
+
+def _resoudre(debuts, colonnes, confiances, facteurs, regularisation):
+    """Facteurs optimaux de chaque ligne, facteurs de l'autre côté fixés (ALS implicite).
+
+    Args:
+        debuts (ndarray): Début des notes de chaque ligne (format CSR, n + 1 valeurs)
+        colonnes (ndarray): Indice de l'autre côté (film ou utilisateur) de chaque note
+        confiances (ndarray): Confiance c de chaque note
+        facteurs (ndarray): Facteurs fixés de l'autre côté (m x k)
+        regularisation (float): λ
+
+    Returns:
+        ndarray: Solutions (n x k) ; zéro pour une ligne sans note
+    """
+    n, k = len(debuts) - 1, facteurs.shape[1]
+    solutions = np.zeros((n, k))
+    base = facteurs.T @ facteurs + regularisation * np.eye(k)
+    comptes = np.diff(debuts)
+    # Lignes triées par nombre de notes : peu de zéros ajoutés dans un lot
+    ordre = np.argsort(comptes, kind='stable')
+    ordre = ordre[comptes[ordre] > 0]
+    position = 0
+    while position < len(ordre):
+        fin = min(len(ordre), position + max(1, TAILLE_LOT // comptes[ordre[position]]))
+        lot = ordre[position:position + max(1, TAILLE_LOT // comptes[ordre[fin - 1]])]
+        rang = np.arange(comptes[lot[-1]])
+        valides = rang[None, :] < comptes[lot][:, None]
+        indices = np.where(valides, debuts[lot][:, None] + rang[None, :], 0)
+        c = np.where(valides, confiances[indices], 0.0)
+        f = facteurs[colonnes[indices]] * valides[:, :, None]
+        # Yᵤᵀ (Cᵤ - I) Yᵤ et Yᵤᵀ Cᵤ 1 pour tout le lot
+        matrices = base + np.matmul(f.transpose(0, 2, 1), f * (c - 1)[:, :, None])
+        seconds_membres = np.einsum('blk,bl->bk', f, c)
+        solutions[lot] = np.linalg.solve(matrices, seconds_membres[:, :, None])[:, :, 0]
+        position += len(lot)
+    return solutions
+
+
+class ModeleFactorisation:
+    """Facteurs latents des utilisateurs et des films, appris par ALS implicite.
+
+    Args:
+        dimensions (int): Nombre de facteurs latents k
+        regularisation (float): Poids λ de la régularisation
+        alpha (float): Confiance ajoutée par point de note
+        graine (int): Graine de l'initialisation aléatoire
+    """
+
+    def __init__(self, dimensions=16, regularisation=100.0, alpha=2.0, graine=0):
+        self.dimensions = dimensions
+        self.regularisation = regularisation
+        self.alpha = alpha
+        self.graine = graine
+        self.utilisateurs = []
+        self.films = np.zeros(0, dtype=np.int64)
+        self.facteurs_utilisateurs = np.zeros((0, dimensions))
+        self.facteurs_films = np.zeros((0, dimensions))
+        self.index_utilisateurs = {}
+        self.index_films = {}
+        # Films notés par chaque utilisateur (format CSR), exclus des recommandations ;
+        # ceux des utilisateurs recalculés depuis l'apprentissage sont à part
+        self.debuts_vus = np.zeros(1, dtype=np.int64)
+        self.films_vus = np.zeros(0, dtype=np.int64)
+        self.vus_recalcules = {}
+        # Index approché des facteurs des films (IndexIVF, identifiants = positions)
+        self.index_approche = None
+
+    # --- Apprentissage ---
+
+    @mesurer("recommandation.entrainer")
+    def entrainer(self, triplets, iterations=10):
+        """Apprend les facteurs à partir de toutes les notes.
+
+        Les utilisateurs et films déjà connus repartent de leurs facteurs
+        actuels (apprentissage incrémental : quelques itérations suffisent) ;
+        les nouveaux sont initialisés au hasard. Avec un modèle vide, c'est
+        un apprentissage complet.
+
+        Args:
+            triplets (list): Tuples (utilisateur, film_id, note)
+            iterations (int): Nombre d'itérations ALS (utilisateurs puis films)
+        """
+        u, i, notes = self._indexer(triplets)
+        confiances = 1 + self.alpha * notes
+        par_utilisateur = _csr(u, i, confiances, len(self.utilisateurs))
+        par_film = _csr(i, u, confiances, len(self.films))
+        self.debuts_vus, self.films_vus = par_utilisateur[0], par_utilisateur[1]
+        self.vus_recalcules = {}
+
+        for _ in range(iterations):
+            self.facteurs_utilisateurs = _resoudre(*par_utilisateur, self.facteurs_films, self.regularisation)
+            self.facteurs_films = _resoudre(*par_film, self.facteurs_utilisateurs, self.regularisation)
+        if self.index_approche is not None:
+            # Facteurs des films changés : l'index est reconstruit avec les mêmes réglages
+            self.indexer(self.index_approche.nb_listes_demandees, self.index_approche.sondes_demandees)
+        journal.info(f"Factorisation : {len(self.utilisateurs)} utilisateurs, {len(self.films)} films, "
+                     f"{len(notes)} notes, {iterations} itérations")
+
+    def mettre_a_jour_utilisateurs(self, triplets):
+        """Recalcule les facteurs des utilisateurs des `triplets`, films fixés.
+
+        Coût d'un système k x k par utilisateur : utilisable à chaque note.
+        Les films inconnus du modèle sont ignorés jusqu'au prochain
+        apprentissage.
+
+        Args:
+            triplets (list): Toutes les notes (utilisateur, film_id, note) des
+                utilisateurs à recalculer
+        """
+        triplets = [t for t in triplets if t[1] in self.index_films]
+        if not triplets:
+            return
+        noms = list(dict.fromkeys(t[0] for t in triplets))
+        for nom in noms:
+            if nom not in self.index_utilisateurs:
+                self.index_utilisateurs[nom] = len(self.utilisateurs)
+                self.utilisateurs.append(nom)
+        rangs = {nom: n for n, nom in enumerate(noms)}
+        lignes = np.array([rangs[t[0]] for t in triplets], dtype=np.int64)
+        films = np.array([self.index_films[t[1]] for t in triplets], dtype=np.int64)
+        confiances = 1 + self.alpha * np.array([t[2] for t in triplets])
+        debuts, films, confiances = _csr(lignes, films, confiances, len(noms))
+        solutions = _resoudre(debuts, films, confiances, self.facteurs_films, self.regularisation)
+
+        # Agrandir le tableau pour les nouveaux utilisateurs, puis remplacer les lignes
+        manquants = len(self.utilisateurs) - len(self.facteurs_utilisateurs)
+        if manquants:
+            self.facteurs_utilisateurs = np.vstack([self.facteurs_utilisateurs,
+                                                    np.zeros((manquants, self.dimensions))])
+        indices = np.array([self.index_utilisateurs[nom] for nom in noms])
+        self.facteurs_utilisateurs[indices] = solutions
+        for rang, indice in enumerate(indices.tolist()):
+            self.vus_recalcules[indice] = films[debuts[rang]:debuts[rang + 1]]
+
+    def indexer(self, nb_listes=None, sondes=None):
+        """Construit l'index approché des films, utilisé ensuite par recommander.
+
+        Args:
+            nb_listes (int, optional): Listes de l'index (voir IndexIVF)
+            sondes (int, optional): Listes parcourues par requête
+        """
+        self.index_approche = IndexIVF(nb_listes, sondes, self.graine)
+        self.index_approche.construire(np.arange(len(self.films)), self.facteurs_films)
+
+    def _indexer(self, triplets):
+        """Indices des utilisateurs et des films des notes ; agrandit le modèle au besoin."""
+        rng = np.random.default_rng(self.graine + len(self.utilisateurs) + len(self.films))
+        nouveaux_films = []
+        for nom, film_id, _ in triplets:
+            if nom not in self.index_utilisateurs:
+                self.index_utilisateurs[nom] = len(self.utilisateurs)
+                self.utilisateurs.append(nom)
+            if film_id not in self.index_films:
+                self.index_films[film_id] = len(self.films) + len(nouveaux_films)
+                nouveaux_films.append(film_id)
+        if nouveaux_films:
+            self.films = np.concatenate([self.films, np.array(nouveaux_films, dtype=np.int64)])
+            self.facteurs_films = np.vstack([self.facteurs_films,
+                                             rng.normal(0, 0.1, (len(nouveaux_films), self.dimensions))])
+        manquants = len(self.utilisateurs) - len(self.facteurs_utilisateurs)
+        if manquants:
+            self.facteurs_utilisateurs = np.vstack([self.facteurs_utilisateurs,
+                                                    rng.normal(0, 0.1, (manquants, self.dimensions))])
+        u = np.fromiter((self.index_utilisateurs[t[0]] for t in triplets), dtype=np.int64, count=len(triplets))
+        i = np.fromiter((self.index_films[t[1]] for t in triplets), dtype=np.int64, count=len(triplets))
+        notes = np.fromiter((t[2] for t in triplets), dtype=np.float64, count=len(triplets))
+        return u, i, notes
+
+    # --- Recommandations ---
+
+    def vus(self, indice):
+        """Indices (dans self.films) des films notés par l'utilisateur `indice`."""
+        if indice in self.vus_recalcules:
+            return self.vus_recalcules[indice]
+        if indice + 1 < len(self.debuts_vus):
+            return self.films_vus[self.debuts_vus[indice]:self.debuts_vus[indice + 1]]
+        return np.zeros(0, dtype=np.int64)
+
+    def vecteur(self, utilisateur):
+        """Facteurs de `utilisateur`.
+
+        Un utilisateur inconnu reçoit le vecteur moyen de tous les
+        utilisateurs : les films les plus demandés d'abord.
+        """
+        indice = self.index_utilisateurs.get(utilisateur)
+        if indice is None:
+            if not len(self.facteurs_utilisateurs):
+                return np.zeros(self.dimensions)
+            return self.facteurs_utilisateurs.mean(axis=0)
+        return self.facteurs_utilisateurs[indice]
+
+    def scores(self, utilisateur):
+        """Intérêt prédit de `utilisateur` pour chaque film du modèle (ordre de self.films)."""
+        return self.facteurs_films @ self.vecteur(utilisateur)
+
+    def recommander(self, utilisateur, nombre=10, exclus=()):
+        """Les `nombre` films d'intérêt prédit le plus fort, non encore notés.
+
+        Args:
+            utilisateur (str): Nom de l'utilisateur
+            nombre (int): Nombre de recommandations
+            exclus (iterable): IDs de films à écarter en plus des films notés
+
+        Returns:
+            list: Tuples (film_id, score) triés par score décroissant
+        """
+        indice = self.index_utilisateurs.get(utilisateur)
+        ecartes = self.vus(indice).tolist() if indice is not None else []
+        ecartes.extend(position for position in map(self.index_films.get, exclus) if position is not None)
+
+        if self.index_approche is not None:
+            # Assez de candidats pour qu'il en reste `nombre` une fois les films écartés retirés
+            ecartes = set(ecartes)
+            positions, scores = self.index_approche.rechercher(self.vecteur(utilisateur), nombre + len(ecartes))
+            resultat = [(int(self.films[position]), float(score))
+                        for position, score in zip(positions.tolist(), scores.tolist())
+                        if position not in ecartes][:nombre]
+            if len(resultat) == nombre:
+                return resultat
+            # Listes parcourues trop pauvres : recherche exacte
+
+        scores = self.scores(utilisateur)
+        masque = np.zeros(len(scores), dtype=bool)
+        masque[list(ecartes)] = True
+        scores = np.where(masque, -np.inf, scores)
+
+        nombre = min(nombre, int((~masque).sum()))
+        if nombre <= 0:
+            return []
+        meilleurs = np.argpartition(-scores, nombre - 1)[:nombre]
+        meilleurs = meilleurs[np.argsort(-scores[meilleurs], kind='stable')]
+        return [(int(self.films[n]), float(scores[n])) for n in meilleurs]
+
+    # --- Persistance ---
+
+    def enregistrer(self, chemin=FICHIER_MODELE):
+        """Enregistre le modèle (format .npz de NumPy, remplacement atomique)."""
+        if self.vus_recalcules:
+            vus = [self.vus(n) for n in range(len(self.utilisateurs))]
+            self.debuts_vus = np.zeros(len(vus) + 1, dtype=np.int64)
+            np.cumsum([len(v) for v in vus], out=self.debuts_vus[1:])
+            self.films_vus = np.concatenate(vus).astype(np.int64)
+            self.vus_recalcules = {}
+        with ecriture_atomique(chemin, 'wb') as f:
+            np.savez(f, dimensions=self.dimensions, regularisation=self.regularisation,
+                     alpha=self.alpha, graine=self.graine,
+                     utilisateurs=np.array(self.utilisateurs, dtype=str), films=self.films,
+                     facteurs_utilisateurs=self.facteurs_utilisateurs, facteurs_films=self.facteurs_films,
+                     debuts_vus=self.debuts_vus, films_vus=self.films_vus,
+                     **(self.index_approche.tableaux('index_') if self.index_approche is not None else {}))
+
+    @classmethod
+    def charger(cls, chemin=FICHIER_MODELE):
+        """Charge un modèle enregistré ; None si le fichier n'existe pas."""
+        if not os.path.exists(chemin):
+            return None
+        with np.load(chemin, allow_pickle=False) as donnees:
+            modele = cls(int(donnees['dimensions']), float(donnees['regularisation']),
+                         float(donnees['alpha']), int(donnees['graine']))
+            modele.utilisateurs = donnees['utilisateurs'].tolist()
+            modele.films = donnees['films']
+            modele.facteurs_utilisateurs = donnees['facteurs_utilisateurs']
+            modele.facteurs_films = donnees['facteurs_films']
+            modele.debuts_vus = donnees['debuts_vus']
+            modele.films_vus = donnees['films_vus']
+            modele.index_approche = IndexIVF.depuis_tableaux(donnees, 'index_')
+        modele.index_utilisateurs = {nom: n for n, nom in enumerate(modele.utilisateurs)}
+        modele.index_films = {int(film_id): n for n, film_id in enumerate(modele.films)}
+        return modele
+
+
+def recommander_par_facteurs(modele, films, utilisateur, notes_utilisateur, nombre=10):
+    """Recommandations du modèle au format de recommander_par_genre.
+
+    Les notes actuelles de l'utilisateur sont d'abord intégrées au modèle
+    (mettre_a_jour_utilisateurs) : une note donnée depuis l'apprentissage
+    compte tout de suite.
+
+    Args:
+        modele (ModeleFactorisation): Modèle appris
+        films (list): Les films du catalogue
+        utilisateur (str): Nom de l'utilisateur
+        notes_utilisateur (dict): GestionUtilisateurs.notes[utilisateur]
+        nombre (int): Nombre de recommandations
+
+    Returns:
+        list: Tuples (film, score) triés par score décroissant
+    """
+    triplets = extraire_notes({utilisateur: notes_utilisateur}, films=films)
+    if triplets:
+        modele.mettre_a_jour_utilisateurs(triplets)
+    par_id = {film['id']: film for film in films}
+    notes = {film_id for _, film_id, _ in triplets}
+    recommandations = modele.recommander(utilisateur, nombre, exclus=notes)
+    return [(par_id[film_id], score) for film_id, score in recommandations if film_id in par_id]
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande : apprend le modèle depuis donnees/ et l'enregistre."""
+    import argparse
+    import time
+
+    from ..catalogue.gestion import GestionCatalogue
+    from ..commentaires.gestion_commentaires import GestionCommentaires
+    from ..utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+
+    parser = argparse.ArgumentParser(description="Apprentissage du modèle de recommandation CinéFlix")
+    parser.add_argument('--modele', default=FICHIER_MODELE, help="Fichier du modèle")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Repartir du modèle enregistré (3 itérations par défaut)")
+    parser.add_argument('--iterations', type=int, help="Itérations ALS (défaut : 10)")
+    parser.add_argument('--dimensions', type=int, default=16)
+    parser.add_argument('--regularisation', type=float, default=100.0)
+    parser.add_argument('--alpha', type=float, default=2.0)
+    parser.add_argument('--index', choices=['auto', 'oui', 'non'], default='auto',
+                        help=f"Index approché des films (auto : au-delà de {SEUIL_INDEX} films)")
+    parser.add_argument('--listes', type=int, help="Listes de l'index approché (défaut : 4 √films)")
+    parser.add_argument('--sondes', type=int, help="Listes parcourues par requête (défaut : listes / 16)")
+    args = parser.parse_args(argv)
+
+    modele = ModeleFactorisation.charger(args.modele) if args.incremental else None
+    if modele is None:
+        modele = ModeleFactorisation(args.dimensions, args.regularisation, args.alpha)
+        iterations = args.iterations or 10
+    else:
+        iterations = args.iterations or 3
+
+    catalogue = GestionCatalogue()
+    utilisateurs = GestionUtilisateurs()
+    commentaires = GestionCommentaires()
+    triplets = extraire_notes(utilisateurs.notes, commentaires.commentaires['comments'], catalogue.films)
+    debut = time.perf_counter()
+    modele.index_approche = None
+    modele.entrainer(triplets, iterations)
+    if args.index == 'oui' or (args.index == 'auto' and len(modele.films) >= SEUIL_INDEX):
+        modele.indexer(args.listes, args.sondes)
+    modele.enregistrer(args.modele)
+    print(f"{len(triplets)} notes, {len(modele.utilisateurs)} utilisateurs, {len(modele.films)} films : "
+          f"{iterations} itérations en {time.perf_counter() - debut:.2f} s -> {args.modele}")
+    return 0
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de l'index approché des plus grands produits scalaires (IVF).
+
+Trouver les k films dont le vecteur a le plus grand produit scalaire avec
+celui d'un utilisateur oblige, sans index, à calculer tous les produits :
+avec un million de films, une dizaine de millisecondes par requête.
+L'index IVF (inverted file) partitionne les vecteurs en listes :
+
+- construire : un k-means sur un échantillon donne nb_listes centres,
+  chaque vecteur est rangé dans la liste de son centre le plus proche ;
+- rechercher : seules les `sondes` listes dont le centre a le plus grand
+  produit scalaire avec la requête sont parcourues, exactement.
+
+Plus de sondes donne un meilleur rappel et une requête plus lente ; avec
+sondes = nb_listes, la recherche est exacte. Le compromis est mesuré par
+benchmarks/banc_index_approche.py. Un vecteur ajouté après la construction
+va dans la liste de son centre, sans déplacer les centres : au-delà de
+quelques pourcents d'ajouts, reconstruire rééquilibre les listes.
+"""
+
+import logging
+import math
+import os
+
+import numpy as np
+
+from ..concurrence.fichiers import ecriture_atomique
+from ..instrumentation.metriques import mesurer
+
+journal = logging.getLogger(__name__)
+
+# Points d'apprentissage du k-means par liste
+POINTS_PAR_LISTE = 64
+# Vecteurs comparés aux centres à la fois (mémoire TAILLE_BLOC x nb_listes)
+TAILLE_BLOC = 16384
+
+
+def _plus_proches(vecteurs, centres):
+    """Indice du centre le plus proche (distance euclidienne) de chaque vecteur."""
+    normes = (centres ** 2).sum(axis=1)
+    resultat = np.empty(len(vecteurs), dtype=np.int64)
+    for debut in range(0, len(vecteurs), TAILLE_BLOC):
+        bloc = vecteurs[debut:debut + TAILLE_BLOC]
+        # |v - c|² = |v|² - 2 v·c + |c|², |v|² ne change pas le classement
+        resultat[debut:debut + len(bloc)] = np.argmin(normes - 2 * bloc @ centres.T, axis=1)
+    return resultat
+
+
+def _kmeans(vecteurs, nombre, iterations, rng):
+    """Centres de `nombre` groupes des vecteurs (algorithme de Lloyd)."""
+    centres = vecteurs[rng.choice(len(vecteurs), nombre, replace=False)].copy()
+    for _ in range(iterations):
+        affectation = _plus_proches(vecteurs, centres)
+        comptes = np.bincount(affectation, minlength=nombre)
+        for d in range(vecteurs.shape[1]):
+            centres[:, d] = np.bincount(affectation, weights=vecteurs[:, d], minlength=nombre)
+        pleins = comptes > 0
+        centres[pleins] /= comptes[pleins, None]
+        # Un groupe vide repart d'un point tiré au hasard
+        vides = np.flatnonzero(~pleins)
+        if len(vides):
+            centres[vides] = vecteurs[rng.choice(len(vecteurs), len(vides), replace=False)]
+    return centres
+
+
+class IndexIVF:
+    """Index approché des vecteurs de plus grand produit scalaire avec une requête.
+
+    Args:
+        nb_listes (int, optional): Nombre de listes ; par défaut 4 √n
+        sondes (int, optional): Listes parcourues par requête ; par défaut
+            nb_listes / 16 (rappel@10 de 0,99 sur des facteurs ALS)
+        graine (int): Graine du k-means
+    """
+
+    def __init__(self, nb_listes=None, sondes=None, graine=0):
+        self.nb_listes_demandees = nb_listes
+        self.sondes_demandees = sondes
+        self.graine = graine
+        self.dimensions = 0
+        self.centres = np.zeros((0, 0), dtype=np.float32)
+        self.listes_identifiants = []
+        self.listes_vecteurs = []
+
+    def __len__(self):
+        return sum(len(liste) for liste in self.listes_identifiants)
+
+    @property
+    def nb_listes(self):
+        return len(self.centres)
+
+    @property
+    def sondes(self):
+        return min(self.nb_listes, self.sondes_demandees or max(1, self.nb_listes // 16))
+
+    @mesurer("recommandation.index_approche")
+    def construire(self, identifiants, vecteurs, iterations=10):
+        """(Re)construit l'index.
+
+        Args:
+            identifiants (array): Identifiant entier de chaque vecteur
+            vecteurs (array): Matrice n x d
+            iterations (int): Itérations du k-means
+        """
+        identifiants = np.asarray(identifiants, dtype=np.int64)
+        vecteurs = np.ascontiguousarray(vecteurs, dtype=np.float32)
+        rng = np.random.default_rng(self.graine)
+        self.dimensions = vecteurs.shape[1]
+        nombre = min(len(vecteurs), self.nb_listes_demandees or max(1, int(4 * math.sqrt(len(vecteurs)))))
+        if not nombre:
+            self.centres = np.zeros((0, self.dimensions), dtype=np.float32)
+            self.listes_identifiants, self.listes_vecteurs = [], []
+            return
+        echantillon = vecteurs
+        if len(vecteurs) > POINTS_PAR_LISTE * nombre:
+            echantillon = vecteurs[rng.choice(len(vecteurs), POINTS_PAR_LISTE * nombre, replace=False)]
+        self.centres = _kmeans(echantillon, nombre, iterations, rng)
+
+        affectation = _plus_proches(vecteurs, self.centres)
+        ordre = np.argsort(affectation, kind='stable')
+        coupures = np.cumsum(np.bincount(affectation, minlength=nombre))[:-1]
+        self.listes_identifiants = np.split(identifiants[ordre], coupures)
+        self.listes_vecteurs = np.split(vecteurs[ordre], coupures)
+        journal.info(f"Index approché : {len(vecteurs)} vecteurs en {nombre} listes")
+
+    def ajouter(self, identifiant, vecteur):
+        """Ajoute un vecteur dans la liste de son centre le plus proche."""
+        vecteur = np.asarray(vecteur, dtype=np.float32).reshape(1, -1)
+        if not self.nb_listes:
+            self.construire([identifiant], vecteur)
+            return
+        liste = int(_plus_proches(vecteur, self.centres)[0])
+        self.listes_identifiants[liste] = np.append(self.listes_identifiants[liste], identifiant)
+        self.listes_vecteurs[liste] = np.vstack([self.listes_vecteurs[liste], vecteur])
+
+    def rechercher(self, requete, nombre=10, sondes=None):
+        """Vecteurs de plus grand produit scalaire avec `requete` (approché).
+
+        Args:
+            requete (array): Vecteur de dimension d
+            nombre (int): Nombre de résultats
+            sondes (int, optional): Listes parcourues (self.sondes par défaut)
+
+        Returns:
+            tuple: (identifiants, scores) par score décroissant ; moins de
+            `nombre` résultats si les listes parcourues n'en contiennent pas assez
+        """
+        requete = np.asarray(requete, dtype=np.float32)
+        sondes = min(self.nb_listes, sondes or self.sondes)
+        if not sondes:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        proximites = self.centres @ requete
+        listes = np.argpartition(-proximites, sondes - 1)[:sondes] if sondes < self.nb_listes \
+            else np.arange(self.nb_listes)
+        identifiants = np.concatenate([self.listes_identifiants[n] for n in listes.tolist()])
+        scores = np.concatenate([self.listes_vecteurs[n] for n in listes.tolist()]) @ requete
+        if len(scores) > nombre:
+            meilleurs = np.argpartition(-scores, nombre - 1)[:nombre]
+            identifiants, scores = identifiants[meilleurs], scores[meilleurs]
+        ordre = np.argsort(-scores, kind='stable')
+        return identifiants[ordre], scores[ordre]
+
+    # --- Persistance ---
+
+    def tableaux(self, prefixe=''):
+        """Contenu de l'index en tableaux NumPy (pour np.savez), noms préfixés."""
+        longueurs = np.array([len(liste) for liste in self.listes_identifiants], dtype=np.int64)
+        vides = np.zeros((0, self.dimensions), dtype=np.float32)
+        return {
+            f"{prefixe}centres": self.centres,
+            f"{prefixe}longueurs": longueurs,
+            f"{prefixe}identifiants": np.concatenate(self.listes_identifiants or [np.zeros(0, dtype=np.int64)]),
+            f"{prefixe}vecteurs": np.concatenate(self.listes_vecteurs or [vides]),
+            f"{prefixe}parametres": np.array([self.nb_listes_demandees or 0, self.sondes_demandees or 0,
+                                              self.graine], dtype=np.int64),
+        }
+
+    @classmethod
+    def depuis_tableaux(cls, donnees, prefixe=''):
+        """Index enregistré par tableaux ; None si `donnees` n'en contient pas."""
+        if f"{prefixe}centres" not in donnees:
+            return None
+        nb_listes, sondes, graine = donnees[f"{prefixe}parametres"].tolist()
+        index = cls(nb_listes or None, sondes or None, graine)
+        index.centres = donnees[f"{prefixe}centres"]
+        index.dimensions = index.centres.shape[1]
+        if index.nb_listes:
+            coupures = np.cumsum(donnees[f"{prefixe}longueurs"])[:-1]
+            index.listes_identifiants = np.split(donnees[f"{prefixe}identifiants"], coupures)
+            index.listes_vecteurs = np.split(donnees[f"{prefixe}vecteurs"], coupures)
+        return index
+
+    def enregistrer(self, chemin):
+        """Enregistre l'index (format .npz de NumPy, remplacement atomique)."""
+        with ecriture_atomique(chemin, 'wb') as f:
+            np.savez(f, **self.tableaux())
+
+    @classmethod
+    def charger(cls, chemin):
+        """Charge un index enregistré ; None si le fichier n'existe pas."""
+        if not os.path.exists(chemin):
+            return None
+        with np.load(chemin, allow_pickle=False) as donnees:
+            return cls.depuis_tableaux(donnees)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module des recommandations précalculées par utilisateur.
+
+Calculer les recommandations d'un utilisateur (factorisation, contenu...)
+prend de quelques millisecondes à plus d'une seconde sur un gros
+catalogue ; l'onglet d'accueil ne doit pas l'attendre. Les listes sont donc
+calculées à l'avance et gardées :
+
+- en mémoire, et sur disque dans deux fichiers : le lot de nuit
+  (FICHIER_RECOMMANDATIONS, tous les utilisateurs, format NumPy compact)
+  et les listes recalculées depuis (FICHIER_RECENTES, JSON) ;
+- avec l'empreinte des notes qui les ont produites : une liste dont
+  l'empreinte ne correspond plus est servie telle quelle, puis recalculée.
+
+Chaque note (NOTE_UTILISATEUR) fait recalculer la liste de son auteur dans
+un thread dédié ; RECOMMANDATIONS_CALCULEES est publié quand elle est prête.
+
+Le lot de nuit (precalculer_tous, precalculer_recommandations.py) calcule
+tous les utilisateurs avec un pool de processus. La matrice des notes (CSR)
+et les facteurs du modèle sont écrits une fois en .npy et ouverts en
+lecture seule (mmap) par chaque processus : les pages sont partagées, rien
+n'est copié ni relu en JSON. Les utilisateurs sont découpés en tranches
+contiguës ; pour une tranche, les vecteurs des utilisateurs sont recalculés
+ensemble (mêmes systèmes que mettre_a_jour_utilisateurs) et les scores de
+tous les films obtenus par un produit matriciel, sans index approché. Les
+utilisateurs qui ont trop peu de notes connues du modèle passent par
+recommander_pour_utilisateur (contenu, genres), comme en interactif ; sans
+modèle, le voisinage des utilisateurs est construit une fois par processus
+sur les mêmes notes partagées.
+
+Les fichiers ne sont qu'un cache : une liste perdue (deux processus qui
+réécrivent FICHIER_RECENTES en même temps) est simplement recalculée.
+"""
+
+import json
+import logging
+import os
+import threading
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from ..concurrence.fichiers import ecriture_atomique
+from ..evenements.bus import BUS, NOTE_UTILISATEUR, RECOMMANDATIONS_CALCULEES
+from ..instrumentation.metriques import mesurer
+from .factorisation import _csr, _resoudre, extraire_notes
+from .recommandations import MIN_NOTES_FACTORISATION, recommander_pour_utilisateur
+from .similarite import VoisinageUtilisateurs, tableaux_voisinage
+
+journal = logging.getLogger(__name__)
+
+FICHIER_RECOMMANDATIONS = "donnees/recommandations.npz"
+FICHIER_RECENTES = "donnees/recommandations_recentes.json"
+NOMBRE_RECOMMANDATIONS = 10
+# Scores calculés à la fois par processus du lot (utilisateurs x films)
+TAILLE_SCORES = 1 << 22
+
+
+def empreinte_notes(notes_utilisateur):
+    """Empreinte (entier 32 bits) des notes d'un utilisateur, changée par chaque note."""
+    notes = sorted((str(film), infos['note']) for film, infos in notes_utilisateur.items())
+    return zlib.crc32(json.dumps(notes).encode('utf-8'))
+
+
+def liste_recommandations(films, utilisateur, notes_utilisateur, modele=None, index_contenu=None,
+                          nombre=NOMBRE_RECOMMANDATIONS, voisinage=None):
+    """recommander_pour_utilisateur, en (film_id, score) : la forme gardée par ce module."""
+    return [(film['id'], float(score)) for film, score in recommander_pour_utilisateur(
+        films, utilisateur, notes_utilisateur, nombre, modele, index_contenu, voisinage)]
+
+
+def enregistrer_lot(chemin, lot):
+    """Enregistre les listes de tous les utilisateurs (format .npz, remplacement atomique).
+
+    Args:
+        chemin (str): Fichier du lot
+        lot (dict): Tableaux retournés par precalculer_tous : utilisateurs
+            (triés), empreintes, debuts (listes au format CSR), films, scores
+    """
+    with ecriture_atomique(chemin, 'wb') as f:
+        np.savez(f, **lot)
+
+
+class LotRecommandations:
+    """Listes du lot de nuit, lues dans le fichier .npz sans les convertir en dictionnaire.
+
+    Les utilisateurs sont triés : une liste se retrouve par recherche
+    dichotomique.
+    """
+
+    def __init__(self, chemin=FICHIER_RECOMMANDATIONS):
+        self.chemin = chemin
+        self.utilisateurs = np.zeros(0, dtype=str)
+        if chemin is not None and os.path.exists(chemin):
+            with np.load(chemin, allow_pickle=False) as donnees:
+                self.utilisateurs = donnees['utilisateurs']
+                self.empreintes = donnees['empreintes']
+                self.debuts = donnees['debuts']
+                self.films = donnees['films']
+                self.scores = donnees['scores']
+
+    def __len__(self):
+        return len(self.utilisateurs)
+
+    def obtenir(self, utilisateur):
+        """(empreinte, [(film_id, score), ...]) de l'utilisateur ; None s'il n'est pas dans le lot."""
+        position = int(np.searchsorted(self.utilisateurs, utilisateur))
+        if position == len(self.utilisateurs) or self.utilisateurs[position] != utilisateur:
+            return None
+        debut, fin = self.debuts[position], self.debuts[position + 1]
+        return int(self.empreintes[position]), list(zip(self.films[debut:fin].tolist(),
+                                                        self.scores[debut:fin].tolist()))
+
+
+class RecommandationsPrecalculees:
+    """Listes de recommandations par utilisateur, servies sans attendre et recalculées en arrière-plan.
+
+    Args:
+        calculer (callable): calculer(utilisateur, notes_utilisateur) ->
+            [(film_id, score), ...], appelé dans le thread de calcul
+        notes (callable): notes(utilisateur) -> GestionUtilisateurs.notes[utilisateur]
+        fichier (str): Fichier du lot de nuit (None : pas de lot)
+        fichier_recentes (str): Fichier des listes recalculées depuis le lot
+            (None : gardées en mémoire seulement)
+        bus (BusEvenements, optional): Bus des notes et des listes calculées
+    """
+
+    def __init__(self, calculer, notes, fichier=FICHIER_RECOMMANDATIONS, fichier_recentes=FICHIER_RECENTES,
+                 bus=None):
+        self.calculer = calculer
+        self.notes = notes
+        self.fichier_recentes = fichier_recentes
+        self.bus = bus or BUS
+        self.lot = LotRecommandations(fichier)
+        self._recentes = {}
+        if fichier_recentes is not None and os.path.exists(fichier_recentes):
+            try:
+                with open(fichier_recentes, encoding='utf-8') as f:
+                    self._recentes = {nom: (entree['empreinte'], [tuple(paire) for paire in entree['films']])
+                                      for nom, entree in json.load(f).items()}
+            except (OSError, ValueError, KeyError) as e:
+                journal.warning(f"Recommandations récentes illisibles, ignorées : {e}")
+        self._verrou = threading.Lock()
+        self._en_cours = set()
+        self._executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommandations")
+        self._desabonner = self.bus.abonner(NOTE_UTILISATEUR, self._note_utilisateur)
+
+    def obtenir(self, utilisateur):
+        """Liste gardée de l'utilisateur, tout de suite.
+
+        Une liste absente, ou calculée avec d'autres notes que les notes
+        actuelles, est (re)calculée en arrière-plan ; la liste périmée est
+        servie en attendant.
+
+        Returns:
+            list: Tuples (film_id, score), ou None si aucune liste n'est encore calculée
+        """
+        with self._verrou:
+            entree = self._recentes.get(utilisateur)
+        if entree is None:
+            entree = self.lot.obtenir(utilisateur)
+        if entree is None or entree[0] != empreinte_notes(self.notes(utilisateur)):
+            self.rafraichir(utilisateur)
+        return entree[1] if entree is not None else None
+
+    def rafraichir(self, utilisateur):
+        """Recalcule la liste de l'utilisateur en arrière-plan (une seule fois s'il y a déjà un calcul en attente)."""
+        with self._verrou:
+            if utilisateur in self._en_cours:
+                return
+            self._en_cours.add(utilisateur)
+        self._executeur.submit(self._recalculer, utilisateur)
+
+    def _note_utilisateur(self, evenement):
+        self.rafraichir(evenement.donnees['utilisateur'])
+
+    @mesurer("recommandation.precalcul")
+    def _recalculer(self, utilisateur):
+        with self._verrou:
+            self._en_cours.discard(utilisateur)
+        try:
+            notes = self.notes(utilisateur)
+            entree = (empreinte_notes(notes), list(self.calculer(utilisateur, notes)))
+        except Exception as e:
+            journal.error(f"Échec du calcul des recommandations de {utilisateur}: {e}", exc_info=True)
+            return
+        with self._verrou:
+            self._recentes[utilisateur] = entree
+            recentes = {nom: {'empreinte': empreinte, 'films': films}
+                        for nom, (empreinte, films) in self._recentes.items()}
+        if self.fichier_recentes is not None:
+            try:
+                with ecriture_atomique(self.fichier_recentes, 'w', encoding='utf-8') as f:
+                    json.dump(recentes, f, ensure_ascii=False)
+            except OSError as e:
+                journal.warning(f"Recommandations récentes non enregistrées : {e}")
+        self.bus.publier(RECOMMANDATIONS_CALCULEES, utilisateur=utilisateur)
+
+    def fermer(self):
+        """Annule l'abonnement aux notes et attend la fin des calculs en cours."""
+        self._desabonner()
+        self._executeur.shutdown(wait=True)
+
+
+# --- Lot de nuit ---
+
+# Tableaux partagés (mmap, lecture seule) et paramètres d'un processus du lot
+_partage = {}
+# Catalogue et index de contenu d'un processus, chargés au premier utilisateur qui en a besoin
+_contenu = None
+# Voisinage des utilisateurs d'un processus (lot sans modèle), sur les tableaux partagés
+_voisinage = None
+
+
+def _ouvrir_partage(dossier, parametres):
+    """Initialisation d'un processus du lot : ouvre les tableaux de `dossier` sans les copier."""
+    global _partage
+    _partage = {nom[:-len('.npy')]: np.load(os.path.join(dossier, nom), mmap_mode='r')
+                for nom in os.listdir(dossier) if nom.endswith('.npy')}
+    _partage.update(parametres)
+
+
+def _catalogue_contenu():
+    """Films passés au lot (fichier JSON du dossier partagé) et leur index de contenu."""
+    global _contenu
+    if _contenu is None:
+        from .contenu import IndexContenu
+
+        with open(_partage['fichier_films'], encoding='utf-8') as f:
+            films = json.load(f)
+        _contenu = (films, IndexContenu(films))
+    return _contenu
+
+
+def _voisinage_partage():
+    """Voisinage de tous les utilisateurs du lot, sur les tableaux partagés (sans copie)."""
+    global _voisinage
+    if _voisinage is None:
+        p = _partage
+        _voisinage = VoisinageUtilisateurs.depuis_tableaux(
+            p['utilisateurs'].tolist(),
+            {'debuts': p['debuts'], 'colonnes': p['voisinage_colonnes'], 'notes': p['voisinage_notes'],
+             'films': p['voisinage_films']})
+    return _voisinage
+
+
+def _par_facteurs(debut, debuts, films, notes, resultat_films, resultat_scores):
+    """Remplit les listes des utilisateurs servis par le modèle ; retourne leur masque.
+
+    Reproduit recommander_par_facteurs : vecteur recalculé à partir des
+    notes actuelles (ou, sans note, vecteur appris / vecteur moyen), films
+    notés écartés.
+    """
+    p = _partage
+    taille, nombre = len(debuts) - 1, resultat_films.shape[1]
+    comptes = np.diff(debuts)
+    lignes = np.repeat(np.arange(taille), comptes)
+    # Position de chaque film noté dans le modèle (-1 : inconnu du modèle)
+    ids_tries = p['films_modele_tries']
+    rangs = np.minimum(np.searchsorted(ids_tries, films), len(ids_tries) - 1)
+    positions = np.where(ids_tries[rangs] == films, p['ordre_films_modele'][rangs], -1)
+    connues = positions >= 0
+    comptes_connus = np.bincount(lignes[connues], minlength=taille)
+    servis = (comptes == 0) | (comptes_connus >= MIN_NOTES_FACTORISATION)
+    if not servis.any():
+        return servis
+
+    facteurs_films = p['facteurs_films']
+    vecteurs = np.empty((taille, facteurs_films.shape[1]))
+    resolus = servis & (comptes_connus > 0)
+    gardees = connues & resolus[lignes]
+    debuts_resolus = np.zeros(int(resolus.sum()) + 1, dtype=np.int64)
+    np.cumsum(comptes_connus[resolus], out=debuts_resolus[1:])
+    vecteurs[resolus] = _resoudre(debuts_resolus, positions[gardees], 1 + p['alpha'] * notes[gardees],
+                                  facteurs_films, p['regularisation'])
+    lignes_ecartees, colonnes_ecartees = [lignes[gardees]], [positions[gardees]]
+    indices = np.asarray(p['indices_modele'][debut:debut + taille])
+    for rang in np.flatnonzero(servis & (comptes == 0)).tolist():
+        if indices[rang] < 0:
+            vecteurs[rang] = p['moyenne']
+            continue
+        vecteurs[rang] = p['facteurs_utilisateurs'][indices[rang]]
+        vus = p['films_vus'][p['debuts_vus'][indices[rang]]:p['debuts_vus'][indices[rang] + 1]]
+        lignes_ecartees.append(np.full(len(vus), rang))
+        colonnes_ecartees.append(np.asarray(vus))
+    lignes_ecartees = np.concatenate(lignes_ecartees)
+    colonnes_ecartees = np.concatenate(colonnes_ecartees)
+
+    ids_modele = p['films_modele']
+    m = len(ids_modele)
+    premiers = min(nombre, m)
+    servis_rangs = np.flatnonzero(servis)
+    dans_bloc = np.full(taille, -1)
+    bloc = max(1, TAILLE_SCORES // m)
+    for position in range(0, len(servis_rangs), bloc):
+        rangs_bloc = servis_rangs[position:position + bloc]
+        scores = vecteurs[rangs_bloc] @ facteurs_films.T
+        dans_bloc[rangs_bloc] = np.arange(len(rangs_bloc))
+        choisis = dans_bloc[lignes_ecartees] >= 0
+        scores[dans_bloc[lignes_ecartees[choisis]], colonnes_ecartees[choisis]] = -np.inf
+        dans_bloc[rangs_bloc] = -1
+        if premiers < m:
+            meilleurs = np.argpartition(-scores, premiers - 1, axis=1)[:, :premiers]
+        else:
+            meilleurs = np.broadcast_to(np.arange(m), scores.shape)
+        valeurs = np.take_along_axis(scores, meilleurs, axis=1)
+        ordre = np.argsort(-valeurs, axis=1, kind='stable')
+        meilleurs = np.take_along_axis(meilleurs, ordre, axis=1)
+        valeurs = np.take_along_axis(valeurs, ordre, axis=1)
+        # Un film écarté (score -inf) ne remplit pas une liste trop courte
+        resultat_films[rangs_bloc, :premiers] = np.where(np.isfinite(valeurs), ids_modele[meilleurs], -1)
+        resultat_scores[rangs_bloc, :premiers] = valeurs
+    return servis
+
+
+def _calculer_tranche(bornes):
+    """Listes des utilisateurs [debut, fin) de la matrice partagée (dans un processus du lot).
+
+    Returns:
+        tuple: (longueur de chaque liste, films, scores), les listes à la suite
+    """
+    debut, fin = bornes
+    p = _partage
+    debuts = np.asarray(p['debuts'][debut:fin + 1])
+    films = np.asarray(p['films'][debuts[0]:debuts[-1]])
+    notes = np.asarray(p['notes'][debuts[0]:debuts[-1]])
+    debuts = debuts - debuts[0]
+    resultat_films = np.full((fin - debut, p['nombre']), -1, dtype=np.int64)
+    resultat_scores = np.zeros((fin - debut, p['nombre']), dtype=np.float32)
+
+    servis = np.zeros(fin - debut, dtype=bool)
+    if 'facteurs_films' in p:
+        servis = _par_facteurs(debut, debuts, films, notes, resultat_films, resultat_scores)
+    # Trop peu de notes connues du modèle : contenu, puis genres ; sans modèle, voisinage d'abord
+    for rang in np.flatnonzero(~servis).tolist():
+        films_catalogue, index = _catalogue_contenu()
+        voisinage = _voisinage_partage() if 'voisinage_films' in p else None
+        a, b = debuts[rang], debuts[rang + 1]
+        notes_utilisateur = {str(film_id): {'note': note}
+                             for film_id, note in zip(films[a:b].tolist(), notes[a:b].tolist())}
+        liste = liste_recommandations(films_catalogue, str(p['utilisateurs'][debut + rang]), notes_utilisateur,
+                                      None, index, p['nombre'], voisinage=voisinage)
+        for colonne, (film_id, score) in enumerate(liste):
+            resultat_films[rang, colonne] = film_id
+            resultat_scores[rang, colonne] = score
+
+    valides = resultat_films >= 0
+    return valides.sum(axis=1), resultat_films[valides], resultat_scores[valides]
+
+
+@mesurer("recommandation.precalcul_lot")
+def precalculer_tous(films, notes_utilisateurs, utilisateurs, modele=None, processus=None, taille_tranche=None,
+                     nombre=NOMBRE_RECOMMANDATIONS):
+    """Listes de recommandations de tous les `utilisateurs`, par tranches réparties sur un pool de processus.
+
+    Les films sont écrits une fois (JSON) dans le dossier partagé ; seuls
+    les processus qui ont des utilisateurs à servir par le contenu les
+    relisent.
+
+    Args:
+        films (list): Les films du catalogue
+        notes_utilisateurs (dict): GestionUtilisateurs.notes
+        utilisateurs (iterable): Noms des utilisateurs
+        modele (ModeleFactorisation, optional): Modèle appris
+        processus (int, optional): Taille du pool (nombre de cœurs par défaut)
+        taille_tranche (int, optional): Utilisateurs par tâche (par défaut
+            huit tranches par processus)
+        nombre (int): Recommandations par utilisateur
+
+    Returns:
+        dict: Tableaux du lot, pour enregistrer_lot
+    """
+    utilisateurs = sorted(utilisateurs)
+    rangs = {nom: n for n, nom in enumerate(utilisateurs)}
+    triplets = [t for t in extraire_notes(notes_utilisateurs, films=films) if t[0] in rangs]
+    debuts, ids, notes = _csr(np.fromiter((rangs[t[0]] for t in triplets), dtype=np.int64, count=len(triplets)),
+                              np.fromiter((t[1] for t in triplets), dtype=np.int64, count=len(triplets)),
+                              np.fromiter((t[2] for t in triplets), dtype=np.float32, count=len(triplets)),
+                              len(utilisateurs))
+    del triplets
+    tableaux = {'utilisateurs': np.array(utilisateurs, dtype=str), 'debuts': debuts, 'films': ids, 'notes': notes}
+    parametres = {'nombre': nombre}
+    if modele is not None and len(modele.films):
+        ordre = np.argsort(modele.films, kind='stable')
+        facteurs_utilisateurs = modele.facteurs_utilisateurs
+        tableaux.update(
+            films_modele=modele.films, films_modele_tries=modele.films[ordre], ordre_films_modele=ordre,
+            facteurs_films=modele.facteurs_films, facteurs_utilisateurs=facteurs_utilisateurs,
+            debuts_vus=modele.debuts_vus, films_vus=modele.films_vus,
+            indices_modele=np.array([modele.index_utilisateurs.get(nom, -1) for nom in utilisateurs], dtype=np.int64),
+            moyenne=facteurs_utilisateurs.mean(axis=0) if len(facteurs_utilisateurs) else np.zeros(modele.dimensions))
+        parametres.update(regularisation=modele.regularisation, alpha=modele.alpha)
+    else:
+        # Matrice du voisinage (films croissants par utilisateur), partagée comme les autres tableaux
+        voisinage = tableaux_voisinage(np.repeat(np.arange(len(utilisateurs)), np.diff(debuts)), ids, notes,
+                                       len(utilisateurs))
+        tableaux.update(voisinage_colonnes=voisinage['colonnes'], voisinage_notes=voisinage['notes'],
+                        voisinage_films=voisinage['films'])
+
+    processus = processus or os.cpu_count() or 1
+    taille_tranche = taille_tranche or max(64, -(-len(utilisateurs) // (8 * processus)))
+    bornes = [(debut, min(len(utilisateurs), debut + taille_tranche))
+              for debut in range(0, len(utilisateurs), taille_tranche)]
+    with tempfile.TemporaryDirectory(prefix="recommandations_") as dossier:
+        for nom, tableau in tableaux.items():
+            np.save(os.path.join(dossier, f"{nom}.npy"), tableau)
+        parametres['fichier_films'] = os.path.join(dossier, "films.json")
+        with open(parametres['fichier_films'], 'w', encoding='utf-8') as f:
+            json.dump(list(films), f, ensure_ascii=False)
+        with ProcessPoolExecutor(processus, initializer=_ouvrir_partage, initargs=(dossier, parametres)) as pool:
+            resultats = list(pool.map(_calculer_tranche, bornes))
+
+    longueurs = np.concatenate([r[0] for r in resultats] or [np.zeros(0, dtype=np.int64)])
+    debuts_listes = np.zeros(len(utilisateurs) + 1, dtype=np.int64)
+    np.cumsum(longueurs, out=debuts_listes[1:])
+    return {
+        'utilisateurs': tableaux['utilisateurs'],
+        'empreintes': np.fromiter((empreinte_notes(notes_utilisateurs.get(nom, {})) for nom in utilisateurs),
+                                  dtype=np.uint32, count=len(utilisateurs)),
+        'debuts': debuts_listes,
+        'films': np.concatenate([r[1] for r in resultats] or [np.zeros(0, dtype=np.int64)]),
+        'scores': np.concatenate([r[2] for r in resultats] or [np.zeros(0, dtype=np.float32)]),
+    }
+
+
+def main(argv=None):
+    """Point d'entrée du lot de nuit : recalcule les listes de tous les comptes de utilisateurs.json."""
+    import argparse
+    import time
+
+    from ..catalogue.gestion import GestionCatalogue
+    from ..utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+    from .factorisation import ModeleFactorisation
+
+    parser = argparse.ArgumentParser(description="Précalcul des recommandations de tous les utilisateurs")
+    parser.add_argument('--processus', type=int, default=os.cpu_count(), help="Processus du pool")
+    parser.add_argument('--taille-tranche', type=int, help="Utilisateurs par tâche (défaut : 8 tranches par processus)")
+    parser.add_argument('--sortie', default=FICHIER_RECOMMANDATIONS, help="Fichier du lot")
+    args = parser.parse_args(argv)
+
+    catalogue = GestionCatalogue()
+    gestion = GestionUtilisateurs()
+    modele = ModeleFactorisation.charger()
+    debut = time.perf_counter()
+    lot = precalculer_tous(catalogue.films, gestion.notes, gestion.utilisateurs.keys() | gestion.notes.keys(),
+                           modele, args.processus, args.taille_tranche)
+    enregistrer_lot(args.sortie, lot)
+    # Les listes récentes sont toutes dans le nouveau lot
+    if args.sortie == FICHIER_RECOMMANDATIONS and os.path.exists(FICHIER_RECENTES):
+        os.remove(FICHIER_RECENTES)
+    duree = time.perf_counter() - debut
+    nombre = len(lot['utilisateurs'])
+    print(f"{nombre} utilisateurs en {duree:.2f} s ({nombre / duree:.0f}/s) avec {args.processus} processus "
+          f"-> {args.sortie}")
+    return 0
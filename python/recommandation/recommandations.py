@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de calcul des recommandations de films.
+"""
+
+import heapq
+
+from .contenu import recommander_par_contenu
+from .factorisation import extraire_notes, recommander_par_facteurs
+
+# En dessous, un utilisateur est servi par le contenu des films qu'il a notés
+MIN_NOTES_FACTORISATION = 5
+
+
+def recommander_par_genre(films, notes_utilisateur, nombre=10):
+    """Recommande des films d'après les genres préférés de l'utilisateur.
+
+    Le score d'un film non vu est la moyenne de :
+    1. la note moyenne donnée par l'utilisateur aux films du même genre ;
+    2. la note du film.
+    Sans aucune note, les films les mieux notés sont proposés.
+
+    Args:
+        films (list): Les films du catalogue
+        notes_utilisateur (dict): Note de l'utilisateur par titre de film
+        nombre (int): Nombre de recommandations
+
+    Returns:
+        list: Tuples (film, score) triés par score décroissant
+    """
+    if not notes_utilisateur:
+        return heapq.nlargest(nombre, ((film, film.get('note', 0)) for film in films),
+                              key=lambda x: x[1])
+
+    # Notes de l'utilisateur regroupées par genre
+    genres_preferes = {}
+    for film in films:
+        if film['titre'] in notes_utilisateur:
+            genres_preferes.setdefault(film['genre'], []).append(notes_utilisateur[film['titre']])
+    moyennes_genres = {genre: sum(notes) / len(notes) for genre, notes in genres_preferes.items()}
+
+    films_scores = (
+        (film, moyennes_genres.get(film['genre'], 0) * 0.5 + film.get('note', 0) * 0.5)
+        for film in films
+        if film['titre'] not in notes_utilisateur
+    )
+    return heapq.nlargest(nombre, films_scores, key=lambda x: x[1])
+
+
+def recommander_pour_utilisateur(films, utilisateur, notes_utilisateur, nombre=10, modele=None,
+                                 index_contenu=None, voisinage=None):
+    """Recommande des films avec le moteur adapté à ce que l'on sait de l'utilisateur.
+
+    - factorisation si l'utilisateur a au moins MIN_NOTES_FACTORISATION
+      notes sur des films connus du modèle, ou aucune note (vecteur moyen) ;
+    - sinon voisins par le contenu des films qu'il a notés : démarrage à
+      froid d'un nouvel utilisateur, films ajoutés depuis l'apprentissage ;
+      précédé, sans modèle appris, des films aimés par les utilisateurs
+      aux notes proches (voisinage) ;
+    - sinon, ou pour compléter la liste, genres préférés ou films les
+      mieux notés.
+
+    Les scores de ces sources ne sont pas sur la même échelle (produit
+    scalaire des facteurs, similarité x note, similarité de contenu, note
+    sur 10) : les listes ne sont pas fusionnées par score mais mises bout à
+    bout, dans l'ordre ci-dessus, chacune triée par son propre score.
+
+    Args:
+        films (list): Les films du catalogue
+        utilisateur (str): Nom de l'utilisateur
+        notes_utilisateur (dict): GestionUtilisateurs.notes[utilisateur]
+        nombre (int): Nombre de recommandations
+        modele (ModeleFactorisation, optional): Modèle appris
+        index_contenu (IndexContenu, optional): Index de contenu du catalogue
+        voisinage (VoisinageUtilisateurs, optional): Notes de tous les utilisateurs
+
+    Returns:
+        list: Tuples (film, score), par source puis par score décroissant
+            dans chaque source
+    """
+    triplets = extraire_notes({utilisateur: notes_utilisateur}, films=films)
+    if modele is not None:
+        connues = sum(film_id in modele.index_films for _, film_id, _ in triplets)
+        if not triplets or connues >= MIN_NOTES_FACTORISATION:
+            return recommander_par_facteurs(modele, films, utilisateur, notes_utilisateur, nombre)
+    recommandations = []
+    if modele is None and voisinage is not None and triplets:
+        par_id = {film['id']: film for film in films}
+        vus = {film_id for _, film_id, _ in triplets}
+        recommandations = [(par_id[film_id], score) for film_id, score in voisinage.recommander(utilisateur, nombre)
+                           if film_id in par_id and film_id not in vus]
+        if len(recommandations) == nombre:
+            return recommandations
+    if index_contenu is not None and triplets:
+        deja = {film['id'] for film, _ in recommandations}
+        contenu = recommander_par_contenu(index_contenu, {film_id: note for _, film_id, note in triplets},
+                                          nombre + len(deja))
+        recommandations += [(film, score) for film, score in contenu
+                            if film['id'] not in deja][:nombre - len(recommandations)]
+        if len(recommandations) == nombre:
+            return recommandations
+    # Notes indexées par titre, comme attendu par recommander_par_genre
+    titres = {film['id']: film['titre'] for film in films}
+    deja = {film['id'] for film, _ in recommandations}
+    complements = recommander_par_genre(films, {titres[film_id]: note for _, film_id, note in triplets
+                                                if film_id in titres}, nombre + len(deja))
+    return recommandations + [(film, score) for film, score in complements
+                              if film['id'] not in deja][:nombre - len(recommandations)]
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module de similarité entre utilisateurs et de recommandation par voisinage.
+
+Les calculs sont faits par le module C (c/recommandation/similarite.c)
+quand son extension est compilée (construire_similarite.py), sinon en
+NumPy. Les deux versions donnent les mêmes résultats au bit près : mêmes
+sommes en double précision, dans le même ordre (np.bincount additionne
+dans l'ordre des notes, comme les boucles C), mêmes arrondis en float32.
+
+Avec l'extension :
+- les tableaux NumPy des notes sont passés au C sans copie (ffi.from_buffer),
+  ainsi que les tampons de sortie ;
+- le GIL est relâché pendant chaque appel C (mode API de CFFI) : un calcul
+  lancé dans un thread ne bloque pas l'interface.
+"""
+
+import logging
+
+import numpy as np
+
+from .factorisation import extraire_notes
+
+journal = logging.getLogger(__name__)
+
+try:
+    from ._similarite_c import ffi, lib
+except ImportError:
+    ffi = lib = None
+
+NATIF = lib is not None
+
+MESURES = {'jaccard': 0, 'cosinus': 1, 'pearson': 2}
+NOMBRE_VOISINS = 50
+
+
+def _meilleurs(valeurs, nombre):
+    """Indices des `nombre` plus grandes valeurs > 0, par valeur décroissante puis indice croissant (comme le C)."""
+    positifs = np.flatnonzero(valeurs > 0)
+    ordre = np.lexsort((positifs, -valeurs[positifs].astype(np.float64)))
+    return positifs[ordre[:max(nombre, 0)]]
+
+
+class MatriceNotes:
+    """Notes de tous les utilisateurs (CSR), pour les similarités et le voisinage.
+
+    Les tableaux déjà au bon type (int64, int32, float32 contigus) sont
+    gardés tels quels : ni copiés ici, ni par l'extension C.
+
+    Args:
+        debuts (array): Début des notes de chaque utilisateur (n + 1 valeurs)
+        films (array): Indice de film de chaque note, croissants par utilisateur
+        notes (array, optional): Note de chaque note ; None : films vus (1)
+        nb_films (int, optional): Nombre de films (par défaut max + 1)
+        natif (bool, optional): Forcer (True) ou écarter (False) le module C ;
+            par défaut, utilisé s'il est compilé
+
+    Raises:
+        ValueError: Tableaux incohérents, ou module C demandé mais non compilé
+    """
+
+    def __init__(self, debuts, films, notes=None, nb_films=None, natif=None):
+        self.debuts = np.ascontiguousarray(debuts, dtype=np.int64)
+        self.films = np.ascontiguousarray(films, dtype=np.int32)
+        self.notes = None if notes is None else np.ascontiguousarray(notes, dtype=np.float32)
+        self.nb_utilisateurs = len(self.debuts) - 1
+        self.nb_films = int(nb_films if nb_films is not None else (self.films.max() + 1 if len(self.films) else 0))
+        if natif and not NATIF:
+            raise ValueError("Module C de similarité non compilé (python construire_similarite.py)")
+        self.natif = NATIF if natif is None else natif
+        if self.notes is not None and len(self.notes) != len(self.films):
+            raise ValueError("films et notes de longueurs différentes")
+        if not len(self.debuts) or self.debuts[-1] != len(self.films):
+            raise ValueError("debuts ne correspond pas au nombre de notes")
+        if self.natif:
+            self._matrice = ffi.gc(lib.matrice_creer(self.nb_utilisateurs, self.nb_films,
+                                                     ffi.from_buffer("int64_t[]", self.debuts),
+                                                     ffi.from_buffer("int32_t[]", self.films),
+                                                     ffi.NULL if self.notes is None
+                                                     else ffi.from_buffer("float[]", self.notes)),
+                                   lib.matrice_liberer)
+            if self._matrice == ffi.NULL:
+                raise ValueError("Matrice de notes invalide (débuts ou films non croissants, film hors limites)")
+        else:
+            comptes = np.diff(self.debuts)
+            invalide = self.debuts[0] != 0 or (comptes < 0).any()
+            if not invalide:
+                self._lignes = np.repeat(np.arange(self.nb_utilisateurs), comptes)
+                meme_ligne = self._lignes[1:] == self._lignes[:-1]
+                invalide = len(self.films) and (self.films.min() < 0 or self.films.max() >= self.nb_films
+                                                or (np.diff(self.films)[meme_ligne] <= 0).any())
+            if invalide:
+                raise ValueError("Matrice de notes invalide (débuts ou films non croissants, film hors limites)")
+            # Valeurs des notes en double, comme dans les sommes du C
+            self._valeurs = np.ones(len(self.films)) if self.notes is None else self.notes.astype(np.float64)
+
+    def _mesure(self, mesure):
+        if mesure not in MESURES:
+            raise ValueError(f"Mesure inconnue : {mesure} (choix : {', '.join(MESURES)})")
+        return MESURES[mesure]
+
+    def similarites(self, utilisateur, mesure='cosinus', sortie=None):
+        """Similarité de l'utilisateur (indice de ligne) avec tous les utilisateurs.
+
+        Args:
+            utilisateur (int): Indice de l'utilisateur
+            mesure (str): 'jaccard', 'cosinus' ou 'pearson'
+            sortie (ndarray, optional): Tampon float32 de nb_utilisateurs valeurs
+
+        Returns:
+            ndarray: Similarités (float32), l'utilisateur lui-même compris
+        """
+        code = self._mesure(mesure)
+        if not 0 <= utilisateur < self.nb_utilisateurs:
+            raise IndexError(f"Utilisateur hors limites : {utilisateur}")
+        if sortie is None:
+            sortie = np.empty(self.nb_utilisateurs, dtype=np.float32)
+        if self.natif:
+            if lib.similarites_utilisateur(self._matrice, utilisateur, code,
+                                           ffi.from_buffer("float[]", sortie, require_writable=True)) != 0:
+                raise MemoryError("Mémoire insuffisante pour le calcul des similarités")
+            return sortie
+        sortie[:] = self._similarites_numpy(utilisateur, mesure)
+        return sortie
+
+    def _similarites_numpy(self, utilisateur, mesure):
+        debut, fin = self.debuts[utilisateur], self.debuts[utilisateur + 1]
+        taille = self.nb_utilisateurs
+        vus = np.zeros(self.nb_films, dtype=bool)
+        vus[self.films[debut:fin]] = True
+        communs = vus[self.films]
+        comptes = np.diff(self.debuts)
+        if mesure == 'jaccard':
+            intersections = np.bincount(self._lignes[communs], minlength=taille)
+            unions = (fin - debut) + comptes - intersections
+            resultat = np.zeros(taille, dtype=np.float32)
+            non_vides = unions > 0
+            resultat[non_vides] = (intersections[non_vides].astype(np.float32)
+                                   / unions[non_vides].astype(np.float32))
+            return resultat
+
+        requete = np.zeros(self.nb_films, dtype=np.float32)
+        requete[self.films[debut:fin]] = self.notes[debut:fin] if self.notes is not None else 1.0
+        x = requete[self.films].astype(np.float64)
+        y = self._valeurs
+        if mesure == 'cosinus':
+            produits = np.bincount(self._lignes, weights=x * y, minlength=taille)
+            normes = np.sqrt(np.bincount(self._lignes, weights=y * y, minlength=taille))
+            norme_requete = normes[utilisateur]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                resultat = (produits / (norme_requete * normes)).astype(np.float32)
+            resultat[(normes == 0.0) | (norme_requete == 0.0)] = 0.0
+            return resultat
+
+        # Pearson sur les films notés par les deux
+        lignes, x, y = self._lignes[communs], x[communs], y[communs]
+        n = np.bincount(lignes, minlength=taille).astype(np.float64)
+        sx = np.bincount(lignes, weights=x, minlength=taille)
+        sy = np.bincount(lignes, weights=y, minlength=taille)
+        sxx = np.bincount(lignes, weights=x * x, minlength=taille)
+        syy = np.bincount(lignes, weights=y * y, minlength=taille)
+        sxy = np.bincount(lignes, weights=x * y, minlength=taille)
+        variances = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        valides = (n >= 2) & (variances > 0.0)
+        resultat = np.zeros(taille, dtype=np.float32)
+        resultat[valides] = ((n * sxy - sx * sy)[valides] / np.sqrt(variances[valides])).astype(np.float32)
+        return resultat
+
+    def recommander(self, utilisateur, nombre=10, nb_voisins=NOMBRE_VOISINS, mesure='cosinus'):
+        """Films non vus notés par les utilisateurs les plus similaires (similarité x note).
+
+        Returns:
+            tuple: (indices des films (int32), scores (float32)) par score décroissant
+        """
+        code = self._mesure(mesure)
+        if not 0 <= utilisateur < self.nb_utilisateurs:
+            raise IndexError(f"Utilisateur hors limites : {utilisateur}")
+        films = np.empty(max(nombre, 0), dtype=np.int32)
+        scores = np.empty(max(nombre, 0), dtype=np.float32)
+        if self.natif:
+            ecrits = lib.recommander_films(self._matrice, utilisateur, code, nb_voisins, nombre,
+                                           ffi.from_buffer("int32_t[]", films, require_writable=True),
+                                           ffi.from_buffer("float[]", scores, require_writable=True))
+            if ecrits < 0:
+                raise MemoryError("Mémoire insuffisante pour le calcul des recommandations")
+            return films[:ecrits], scores[:ecrits]
+
+        similarites = self._similarites_numpy(utilisateur, mesure)
+        similarites[utilisateur] = 0.0
+        voisins = _meilleurs(similarites, nb_voisins)
+        # Notes des voisins dans l'ordre des voisins : mêmes sommes que la boucle C
+        debuts, fins = self.debuts[voisins], self.debuts[voisins + 1]
+        positions = np.concatenate([np.arange(d, f) for d, f in zip(debuts.tolist(), fins.tolist())]
+                                   or [np.zeros(0, dtype=np.int64)])
+        poids = np.repeat(similarites[voisins].astype(np.float64), fins - debuts) * self._valeurs[positions]
+        vus = np.zeros(self.nb_films, dtype=bool)
+        vus[self.films[self.debuts[utilisateur]:self.debuts[utilisateur + 1]]] = True
+        nouveaux = ~vus[self.films[positions]]
+        totaux = np.bincount(self.films[positions][nouveaux], weights=poids[nouveaux], minlength=self.nb_films)
+        meilleurs = _meilleurs(totaux, nombre)
+        films[:len(meilleurs)] = meilleurs
+        scores[:len(meilleurs)] = totaux[meilleurs]
+        return films[:len(meilleurs)], scores[:len(meilleurs)]
+
+
+def tableaux_voisinage(lignes, ids, notes, nb_utilisateurs):
+    """Met des notes (rang d'utilisateur, ID de film, note) au format de VoisinageUtilisateurs.depuis_tableaux.
+
+    Returns:
+        dict: debuts (int64), colonnes (int32, croissantes pour chaque
+            utilisateur), notes (float32) et films (ID de film de chaque colonne)
+    """
+    films, colonnes = np.unique(np.asarray(ids, dtype=np.int64), return_inverse=True)
+    lignes = np.asarray(lignes, dtype=np.int64)
+    # Tri par utilisateur puis par film : listes croissantes attendues par le C
+    ordre = np.lexsort((colonnes, lignes))
+    debuts = np.zeros(nb_utilisateurs + 1, dtype=np.int64)
+    np.cumsum(np.bincount(lignes, minlength=nb_utilisateurs), out=debuts[1:])
+    return {'debuts': debuts, 'colonnes': colonnes[ordre].astype(np.int32),
+            'notes': np.asarray(notes, dtype=np.float32)[ordre], 'films': films}
+
+
+class VoisinageUtilisateurs:
+    """Recommandations par utilisateurs aux notes proches, à partir de GestionUtilisateurs.notes.
+
+    Args:
+        notes_utilisateurs (dict): GestionUtilisateurs.notes
+        films (list): Films du catalogue (IDs des notes indexées par titre)
+        mesure (str): 'jaccard', 'cosinus' ou 'pearson'
+        nb_voisins (int): Voisins pris en compte
+        natif (bool, optional): Voir MatriceNotes
+    """
+
+    def __init__(self, notes_utilisateurs, films=(), mesure='cosinus', nb_voisins=NOMBRE_VOISINS, natif=None):
+        triplets = extraire_notes(notes_utilisateurs, films=films)
+        utilisateurs = sorted({t[0] for t in triplets})
+        rangs = {nom: n for n, nom in enumerate(utilisateurs)}
+        tableaux = tableaux_voisinage(
+            np.fromiter((rangs[t[0]] for t in triplets), dtype=np.int64, count=len(triplets)),
+            np.fromiter((t[1] for t in triplets), dtype=np.int64, count=len(triplets)),
+            np.fromiter((t[2] for t in triplets), dtype=np.float32, count=len(triplets)),
+            len(utilisateurs))
+        self._initialiser(utilisateurs, tableaux, mesure, nb_voisins, natif)
+
+    @classmethod
+    def depuis_tableaux(cls, utilisateurs, tableaux, mesure='cosinus', nb_voisins=NOMBRE_VOISINS, natif=None):
+        """Voisinage sur des tableaux déjà au format (tableaux_voisinage), ni copiés ni retriés.
+
+        Les tableaux peuvent être ouverts en mmap : plusieurs processus
+        partagent alors les mêmes pages.
+
+        Args:
+            utilisateurs (list): Nom de l'utilisateur de chaque ligne
+            tableaux (dict): debuts, colonnes, notes et films
+        """
+        voisinage = cls.__new__(cls)
+        voisinage._initialiser(list(utilisateurs), tableaux, mesure, nb_voisins, natif)
+        return voisinage
+
+    def _initialiser(self, utilisateurs, tableaux, mesure, nb_voisins, natif):
+        self.mesure = mesure
+        self.nb_voisins = nb_voisins
+        self.utilisateurs = utilisateurs
+        self.rangs = {nom: n for n, nom in enumerate(utilisateurs)}
+        self.films = tableaux['films']
+        self.matrice = MatriceNotes(tableaux['debuts'], tableaux['colonnes'], tableaux['notes'], len(self.films), natif)
+        journal.debug(f"Voisinage : {len(self.utilisateurs)} utilisateurs, {len(self.films)} films "
+                      f"({'C' if self.matrice.natif else 'NumPy'})")
+
+    def recommander(self, utilisateur, nombre=10):
+        """Films recommandés à `utilisateur` par ses voisins.
+
+        Returns:
+            list: Tuples (film_id, score) ; vide si l'utilisateur n'a pas de note
+        """
+        rang = self.rangs.get(utilisateur)
+        if rang is None:
+            return []
+        indices, scores = self.matrice.recommander(rang, nombre, self.nb_voisins, self.mesure)
+        return list(zip(self.films[indices].tolist(), scores.tolist()))
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module du client léger du service CinéFlix (main.py --client URL).
+
+ClientService expose, au-dessus des points d'accès JSON de
+service/serveur.py, des objets qui imitent les gestionnaires utilisés par
+l'interface (CatalogueDistant, VentesDistantes, UtilisateursDistants,
+CommentairesDistants) : l'interface fonctionne sans rien charger depuis
+donnees/.
+
+Les données affichées (films, ventes, utilisateurs, notes) sont chargées au
+premier accès puis tenues à jour par les événements du serveur : un thread
+les attend sur /evenements et les met en file ; synchroniser(), appelée
+périodiquement par l'interface comme pour les fichiers locaux, les applique
+dans le thread appelant et les republie sur le bus local.
+"""
+
+import http.client
+import json
+import logging
+import queue
+import threading
+from datetime import date
+from urllib.parse import quote, urlencode, urlsplit
+
+from ..evenements.bus import (BUS, CATALOGUE_RECHARGE, FILM_AJOUTE, NOTE_FILM_MODIFIEE, NOTE_UTILISATEUR,
+                              UTILISATEURS_MODIFIES, VENTE_ANNULEE, VENTE_ENREGISTREE, VENTES_RECHARGEES)
+from ..ventes.agregats import AgregatsVentes
+
+journal = logging.getLogger(__name__)
+
+ATTENTE_EVENEMENTS = 25  # secondes d'attente longue par requête /evenements
+DELAI_REQUETE = 30
+# Méthodes renvoyées sans risque après une coupure : les rejouer ne change pas le résultat
+METHODES_IDEMPOTENTES = {'GET', 'HEAD', 'PUT', 'DELETE'}
+
+
+class ErreurService(Exception):
+    """Réponse d'erreur du service (autre qu'une requête invalide)."""
+
+    def __init__(self, statut, message):
+        super().__init__(f"{statut} : {message}")
+        self.statut = statut
+
+
+def _parametre(valeur):
+    """Date ou valeur simple en paramètre d'URL."""
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    return str(valeur)
+
+
+class ClientService:
+    """Connexion à un service CinéFlix et gestionnaires distants associés.
+
+    Args:
+        url (str): Adresse du service, ex. "http://127.0.0.1:8765"
+        bus (BusEvenements, optional): Bus local où republier les événements
+            du serveur (bus partagé par défaut)
+    """
+
+    def __init__(self, url, bus=None):
+        adresse = urlsplit(url if '//' in url else f"http://{url}")
+        self.hote = adresse.hostname or "127.0.0.1"
+        self.port = adresse.port or 80
+        self.bus = bus or BUS
+        self._connexions = threading.local()
+        self._evenements = queue.SimpleQueue()
+        self._arret = threading.Event()
+        # Jeton de la dernière connexion réussie (actions réservées aux admins)
+        self.jeton = None
+
+        # Numéro du dernier événement avant tout chargement : rien n'est manqué
+        self.sequence = self.requete('GET', '/sante')['evenements']
+
+        self.catalogue = CatalogueDistant(self)
+        self.ventes = VentesDistantes(self)
+        self.utilisateurs = UtilisateursDistants(self)
+        self.utilisateurs.set_gestion_catalogue(self.catalogue)
+        self.commentaires = CommentairesDistants(self)
+        self._thread = threading.Thread(target=self._attendre_evenements, name="client-evenements", daemon=True)
+        self._thread.start()
+
+    def _connexion(self, delai):
+        connexion = getattr(self._connexions, 'connexion', None)
+        if connexion is None:
+            connexion = self._connexions.connexion = http.client.HTTPConnection(self.hote, self.port, timeout=delai)
+        return connexion
+
+    def requete(self, methode, chemin, donnees=None, parametres=None, delai=DELAI_REQUETE):
+        """Envoie une requête et retourne la réponse JSON décodée.
+
+        Après une coupure de la connexion persistante, la requête est
+        renvoyée une fois sur une nouvelle connexion si elle n'a pas pu
+        partir, ou si sa méthode est idempotente. Une requête POST déjà
+        envoyée ne l'est pas : le service a pu la traiter (une vente serait
+        enregistrée deux fois).
+
+        Raises:
+            ValueError: Requête refusée par le service (données invalides)
+            ErreurService: Autre réponse d'erreur
+            OSError: Service injoignable
+        """
+        if parametres:
+            chemin += '?' + urlencode({cle: _parametre(valeur) for cle, valeur in parametres.items()
+                                       if valeur is not None})
+        corps = json.dumps(donnees).encode('utf-8') if donnees is not None else None
+        entetes = {'Content-Type': 'application/json'} if corps is not None else {}
+        if self.jeton is not None:
+            entetes['Authorization'] = f"Bearer {self.jeton}"
+        for tentative in range(2):
+            connexion = self._connexion(delai)
+            envoyee = False
+            try:
+                connexion.request(methode, chemin, body=corps, headers=entetes)
+                envoyee = True
+                reponse = connexion.getresponse()
+                contenu = reponse.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Connexion persistante fermée par le serveur : une nouvelle tentative
+                # (requête incomplète : le service, qui attend tout le corps, ne l'a pas traitée)
+                connexion.close()
+                self._connexions.connexion = None
+                if tentative or (envoyee and methode not in METHODES_IDEMPOTENTES):
+                    raise
+        resultat = json.loads(contenu) if contenu else None
+        if reponse.status == 400:
+            raise ValueError(resultat.get('erreur', "Requête invalide"))
+        if reponse.status >= 400:
+            raise ErreurService(reponse.status, (resultat or {}).get('erreur', reponse.reason))
+        return resultat
+
+    def _attendre_evenements(self):
+        """Boucle du thread d'attente des événements du serveur."""
+        sequence = self.sequence
+        while not self._arret.is_set():
+            try:
+                reponse = self.requete('GET', '/evenements', parametres={'depuis': sequence,
+                                                                         'attente': ATTENTE_EVENEMENTS},
+                                       delai=ATTENTE_EVENEMENTS + DELAI_REQUETE)
+            except (OSError, ValueError, ErreurService, http.client.HTTPException) as e:
+                journal.warning(f"Événements du service indisponibles: {e}")
+                self._arret.wait(2)
+                continue
+            if reponse['perdus']:
+                self._evenements.put(None)
+            for evenement in reponse['evenements']:
+                self._evenements.put(evenement)
+            sequence = reponse['sequence']
+
+    def synchroniser(self):
+        """Applique les événements reçus du serveur et les republie sur le bus local.
+
+        Returns:
+            bool: True si des événements ont été appliqués
+        """
+        appliques = False
+        while True:
+            try:
+                evenement = self._evenements.get_nowait()
+            except queue.Empty:
+                return appliques
+            appliques = True
+            if evenement is None:
+                # Des événements ont été perdus : tout recharger
+                journal.warning("Événements du service perdus : rechargement des données")
+                for distant in (self.catalogue, self.ventes, self.utilisateurs):
+                    distant.recharger()
+                self.bus.publier(CATALOGUE_RECHARGE)
+                self.bus.publier(VENTES_RECHARGEES)
+                continue
+            type_evenement, donnees = evenement['type'], evenement['donnees']
+            for distant in (self.catalogue, self.ventes, self.utilisateurs):
+                donnees = distant.appliquer(type_evenement, donnees)
+            self.bus.publier(type_evenement, **donnees)
+
+    def fermer(self):
+        """Arrête l'attente des événements."""
+        self._arret.set()
+
+
+class CatalogueDistant:
+    """Catalogue du service, avec l'interface de GestionCatalogue utilisée par l'interface."""
+
+    def __init__(self, service):
+        self.service = service
+        self.version = 0
+        self._films = None
+        self._par_id = {}
+
+    @property
+    def films(self):
+        """Films du catalogue, chargés au premier accès."""
+        if self._films is None:
+            self._films = self.service.requete('GET', '/films')
+            self._par_id = {film['id']: film for film in self._films}
+        return self._films
+
+    def recharger(self):
+        """Oublie la copie locale : elle sera rechargée au prochain accès."""
+        self._films = None
+        self.version += 1
+
+    def appliquer(self, type_evenement, donnees):
+        """Met à jour la copie locale ; retourne les données à republier."""
+        if type_evenement == CATALOGUE_RECHARGE:
+            self.recharger()
+        elif type_evenement in (FILM_AJOUTE, NOTE_FILM_MODIFIEE):
+            self.version += 1
+            film = donnees['film']
+            if self._films is not None:
+                local = self._par_id.get(film['id'])
+                if local is None:
+                    self._films.append(film)
+                    self._par_id[film['id']] = film
+                else:
+                    # Même objet que celui affiché : les vues retrouvent le film à jour
+                    local.update(film)
+                    donnees = {**donnees, 'film': local}
+        return donnees
+
+    def synchroniser(self):
+        return self.service.synchroniser()
+
+    def ajouter_film(self, film_data):
+        return self.service.requete('POST', '/films', film_data)
+
+    def mettre_a_jour_note_film(self, film_id, nouvelle_note):
+        return self.service.requete('PUT', f'/films/{film_id}/note', {'note': nouvelle_note})['succes']
+
+    def rechercher_films(self, terme_recherche):
+        return self.service.requete('GET', '/films', parametres={'terme': terme_recherche})
+
+    def filtrer_par_periode(self, debut, fin=None):
+        return self.service.requete('GET', '/films', parametres={'debut': debut, 'fin': fin})
+
+    def obtenir_statistiques(self):
+        return self.service.requete('GET', '/catalogue/statistiques')
+
+    def obtenir_film_par_titre(self, titre):
+        for film in self.films:
+            if film['titre'].lower() == titre.lower():
+                return film
+        return None
+
+
+class VentesDistantes:
+    """Ventes du service, avec l'interface de GestionVentes utilisée par l'interface."""
+
+    def __init__(self, service):
+        self.service = service
+        self._ventes = None
+        self._ids = set()
+        self._agregats = None
+        self._observateurs = []
+
+    @property
+    def ventes(self):
+        """Historique des ventes, chargé au premier accès."""
+        if self._ventes is None:
+            self._ventes = self.service.requete('GET', '/ventes')
+            self._ids = {vente['id'] for vente in self._ventes}
+        return self._ventes
+
+    @property
+    def agregats(self):
+        if self._agregats is None:
+            self._agregats = AgregatsVentes.depuis(self.ventes)
+        return self._agregats
+
+    def snapshot(self):
+        return self.agregats.snapshot()
+
+    def calculer_revenu_total(self):
+        return self.agregats.revenu_total
+
+    def ajouter_observateur(self, observateur):
+        observateur.reconstruire(iter(self.ventes))
+        self._observateurs.append(observateur)
+
+    def retirer_observateur(self, observateur):
+        if observateur in self._observateurs:
+            self._observateurs.remove(observateur)
+
+    def recharger(self):
+        """Oublie la copie locale et reconstruit les observateurs depuis le service."""
+        self._ventes = None
+        self._agregats = None
+        for observateur in self._observateurs:
+            observateur.reconstruire(iter(self.ventes))
+
+    def appliquer(self, type_evenement, donnees):
+        """Met à jour la copie locale ; retourne les données à republier."""
+        if type_evenement == VENTES_RECHARGEES:
+            self.recharger()
+        elif type_evenement == VENTE_ENREGISTREE and self._ventes is not None:
+            vente = donnees['vente']
+            if vente['id'] not in self._ids:
+                self._ventes.append(vente)
+                self._ids.add(vente['id'])
+                if self._agregats is not None:
+                    self._agregats.ajouter(vente)
+                for observateur in self._observateurs:
+                    observateur.ajouter(vente)
+        elif type_evenement == VENTE_ANNULEE and self._ventes is not None:
+            vente = donnees['vente']
+            if vente['id'] in self._ids:
+                self._ventes[:] = [v for v in self._ventes if v['id'] != vente['id']]
+                self._ids.discard(vente['id'])
+                if self._agregats is not None:
+                    self._agregats.retirer(vente)
+                for observateur in self._observateurs:
+                    observateur.retirer(vente)
+        return donnees
+
+    def synchroniser(self):
+        return self.service.synchroniser()
+
+    def enregistrer_vente(self, film_id, titre_film, quantite, prix_unitaire):
+        return self.service.requete('POST', '/ventes', {'film_id': film_id, 'titre_film': titre_film,
+                                                        'quantite': quantite, 'prix_unitaire': prix_unitaire})
+
+    def annuler_vente(self, vente_id):
+        return self.service.requete('DELETE', f'/ventes/{vente_id}')['succes']
+
+    def generer_ventes_fictives(self, films):
+        """Demande au service de générer l'historique fictif (avec ses propres films)."""
+        self.service.requete('POST', '/ventes/fictives')
+
+    def obtenir_rapport_ventes(self, date_debut=None, date_fin=None):
+        return self.service.requete('GET', '/ventes/rapport', parametres={'debut': date_debut or None,
+                                                                         'fin': date_fin or None})
+
+    def filtrer_par_periode(self, debut=None, fin=None):
+        return self.service.requete('GET', '/ventes', parametres={'debut': debut or None, 'fin': fin})
+
+
+class UtilisateursDistants:
+    """Utilisateurs et notes du service, avec l'interface de GestionUtilisateurs utilisée par l'interface."""
+
+    def __init__(self, service):
+        self.service = service
+        self.gestion_catalogue = None
+        self._utilisateurs = None
+        self._notes = None
+
+    def set_gestion_catalogue(self, gestion_catalogue):
+        self.gestion_catalogue = gestion_catalogue
+
+    @property
+    def utilisateurs(self):
+        """Comptes (sans mot de passe), chargés au premier accès."""
+        if self._utilisateurs is None:
+            self._utilisateurs = self.service.requete('GET', '/utilisateurs')
+        return self._utilisateurs
+
+    @property
+    def notes(self):
+        """Notes de tous les utilisateurs, chargées au premier accès."""
+        if self._notes is None:
+            self._notes = self.service.requete('GET', '/notes')
+        return self._notes
+
+    def recharger(self):
+        """Oublie les copies locales : elles seront rechargées au prochain accès."""
+        self._utilisateurs = None
+        self._notes = None
+
+    def appliquer(self, type_evenement, donnees):
+        """Met à jour la copie locale ; retourne les données à republier."""
+        if type_evenement == UTILISATEURS_MODIFIES:
+            self.recharger()
+        elif type_evenement == NOTE_UTILISATEUR and self._notes is not None:
+            notes = self._notes.setdefault(donnees['utilisateur'], {})
+            notes[str(donnees['film_id'])] = {'note': donnees['note']}
+        return donnees
+
+    def synchroniser(self):
+        return self.service.synchroniser()
+
+    def obtenir_notes_utilisateur(self, username):
+        return self.notes.get(username, {})
+
+    def creer_utilisateur(self, username, password, email, role="user"):
+        """Crée un compte (le rôle est décidé par le service : admin pour root seulement)."""
+        resultat = self.service.requete('POST', '/utilisateurs', {'nom': username, 'mot_de_passe': password,
+                                                                  'email': email})
+        return resultat['succes'], resultat['message']
+
+    def supprimer_utilisateur(self, username):
+        return self._action_admin('DELETE', f'/utilisateurs/{quote(username, safe="")}')
+
+    def promouvoir_utilisateur(self, username):
+        return self._action_admin('POST', f'/utilisateurs/{quote(username, safe="")}/promotion')
+
+    def _action_admin(self, methode, chemin):
+        """Action réservée aux admins, faite au nom du compte connecté (refus : succès False)."""
+        try:
+            resultat = self.service.requete(methode, chemin)
+        except ErreurService as e:
+            if e.statut not in (401, 403):
+                raise
+            return False, str(e)
+        return resultat['succes'], resultat['message']
+
+    def verifier_connexion(self, username, password):
+        resultat = self.service.requete('POST', '/connexion', {'nom': username, 'mot_de_passe': password})
+        # Les actions suivantes se font au nom du dernier compte connecté
+        self.service.jeton = resultat.get('jeton')
+        return resultat['succes'], resultat['resultat']
+
+    def noter_film(self, username, film_id, note):
+        resultat = self.service.requete('POST', '/notes', {'utilisateur': username, 'film_id': film_id, 'note': note})
+        return resultat['succes'], resultat['message']
+
+
+class CommentairesDistants:
+    """Commentaires du service, avec l'interface de GestionCommentaires utilisée par l'interface."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def synchroniser(self):
+        return self.service.synchroniser()
+
+    def obtenir_commentaires_film(self, film_id):
+        return self.service.requete('GET', f'/films/{film_id}/commentaires')
+
+    def ajouter_commentaire(self, film_id, utilisateur, note, commentaire):
+        resultat = self.service.requete('POST', f'/films/{film_id}/commentaires', {
+            'utilisateur': utilisateur, 'note': note, 'commentaire': commentaire})
+        return resultat['succes'], resultat['message']
+
+    def calculer_moyenne_notes(self, film_id):
+        commentaires = self.obtenir_commentaires_film(film_id)
+        if not commentaires:
+            return 0
+        return sum(c["note"] for c in commentaires) / len(commentaires)
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module du service HTTP/JSON local (main.py --serve).
+
+Un seul processus charge les données une fois et les garde en mémoire ; des
+clients légers (l'interface en mode client, des scripts...) l'interrogent en
+JSON au lieu de relire chacun tous les fichiers :
+
+    GET    /sante
+    GET    /films                      ?terme=... (recherche), ?debut=&fin= (période d'ajout)
+    GET    /films/<id>
+    POST   /films                      {titre, realisateur, annee, genre, note, acteurs}
+    PUT    /films/<id>/note            {note}
+    GET    /catalogue/statistiques
+    GET    /films/<id>/commentaires
+    POST   /films/<id>/commentaires    {utilisateur, note, commentaire}
+    GET    /utilisateurs               (sans les mots de passe)
+    POST   /utilisateurs               {nom, mot_de_passe, email}
+    DELETE /utilisateurs/<nom>         (admin)
+    POST   /utilisateurs/<nom>/promotion (admin)
+    POST   /connexion                  {nom, mot_de_passe} -> {succes, resultat, jeton}
+    GET    /notes                      notes de tous les utilisateurs
+    POST   /notes                      {utilisateur, film_id, note}
+    GET    /ventes                     ?debut=&fin=
+    POST   /ventes                     {film_id, titre_film, quantite, prix_unitaire}
+    DELETE /ventes/<id>
+    POST   /ventes/fictives
+    GET    /ventes/rapport             ?debut=&fin=
+    GET    /ventes/agregats
+    GET    /ventes/cube                ?mesure=revenu&granularite=jour&debut=&fin=&par=
+    GET    /recommandations/<nom>      ?nombre=10
+    GET    /evenements                 ?depuis=<n>&attente=<s> (attente longue)
+
+Les opérations d'une collection (catalogue, ventes, utilisateurs,
+commentaires) passent par une FileCollection (concurrence/asynchrone.py) :
+elles s'exécutent une à une dans un thread dédié à la collection, par lots.
+Les requêtes arrivées pendant le même tour de boucle forment un lot ; les
+ventes d'un lot sont ajoutées au fichier en une seule écriture, les autres
+modifications enregistrées une seule fois et les lectures identiques en
+cours (même recherche, même rapport) ne sont calculées qu'une fois.
+
+Les événements du bus (film ajouté, vente enregistrée...) sont numérotés et
+servis par /evenements : un client y attend les modifications suivantes
+pour tenir ses vues à jour.
+
+Les points d'accès marqués (admin) demandent l'en-tête
+"Authorization: Bearer <jeton>", avec le jeton rendu par /connexion à un
+compte dont le rôle est toujours admin (401 sans jeton valide, 403 pour un
+autre rôle). Une page web d'un autre site ne peut pas envoyer cet en-tête
+sans l'accord du service.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import re
+import secrets
+import threading
+from collections import deque
+from collections.abc import Mapping, Sequence
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from ..catalogue.gestion import GestionCatalogue
+from ..commentaires.gestion_commentaires import GestionCommentaires
+from ..concurrence.asynchrone import FileCollection
+from ..evenements.bus import BUS, CATALOGUE_RECHARGE, FILM_AJOUTE, NOTE_UTILISATEUR, TYPES_EVENEMENTS
+from ..instrumentation.metriques import mesurer
+from ..recommandation.contenu import IndexContenu
+from ..recommandation.factorisation import ModeleFactorisation
+from ..recommandation.recommandations import recommander_pour_utilisateur
+from ..recommandation.similarite import VoisinageUtilisateurs
+from ..utilisateurs.gestion_utilisateurs import GestionUtilisateurs
+from ..ventes.gestion_ventes import GestionVentes, valider_vente
+
+journal = logging.getLogger(__name__)
+
+TAILLE_JOURNAL_EVENEMENTS = 10_000
+ATTENTE_MAX_EVENEMENTS = 30      # secondes
+TAILLE_MAX_CORPS = 1024 * 1024   # octets
+
+RAISONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _convertir(valeur):
+    """Conversion JSON des vues en lecture seule (agrégats) et de la liste des films adossée à l'instantané."""
+    if isinstance(valeur, Mapping):
+        return dict(valeur)
+    if isinstance(valeur, Sequence):
+        return list(valeur)
+    raise TypeError(f"{type(valeur).__name__} n'est pas convertible en JSON")
+
+
+def en_json(valeur):
+    """Encode une valeur en JSON (UTF-8)."""
+    return json.dumps(valeur, ensure_ascii=False, default=_convertir).encode('utf-8')
+
+
+def encoder(fonction):
+    """Enveloppe `fonction` pour que son résultat soit encodé dans le thread de la collection.
+
+    Les structures vivantes des gestionnaires (liste des films, notes...) ne
+    sont ainsi jamais parcourues pendant qu'une écriture les modifie.
+    """
+    @functools.wraps(fonction)
+    def enveloppe(*args):
+        return _Brut(en_json(fonction(*args)))
+    return enveloppe
+
+
+def admin(gestionnaire):
+    """Réserve un point d'accès aux comptes admin connectés (voir ServiceCineflix.traiter)."""
+    gestionnaire.admin = True
+    return gestionnaire
+
+
+class ErreurRequete(Exception):
+    """Requête invalide ou ressource absente (statut HTTP et message)."""
+
+    def __init__(self, statut, message):
+        super().__init__(message)
+        self.statut = statut
+
+
+class JournalEvenements:
+    """Derniers événements du bus, numérotés, pour les clients en attente longue.
+
+    Args:
+        boucle (asyncio.AbstractEventLoop): Boucle du serveur
+        bus (BusEvenements, optional): Bus écouté (bus partagé par défaut)
+        taille (int): Nombre d'événements conservés
+    """
+
+    def __init__(self, boucle, bus=None, taille=TAILLE_JOURNAL_EVENEMENTS):
+        self.boucle = boucle
+        self.sequence = 0
+        self._evenements = deque(maxlen=taille)
+        self._verrou = threading.Lock()
+        self._nouveau = asyncio.Event()
+        bus = bus or BUS
+        self._desabonnements = [bus.abonner(type_evenement, self._recevoir) for type_evenement in TYPES_EVENEMENTS]
+
+    def _recevoir(self, evenement):
+        # Appelé depuis le thread de la collection qui a publié
+        with self._verrou:
+            self.sequence += 1
+            texte = en_json({'sequence': self.sequence, 'type': evenement.type, 'donnees': evenement.donnees})
+            self._evenements.append((self.sequence, texte))
+        self.boucle.call_soon_threadsafe(self._signaler)
+
+    def _signaler(self):
+        self._nouveau.set()
+        self._nouveau = asyncio.Event()
+
+    def depuis(self, sequence):
+        """Événements postérieurs à `sequence`.
+
+        Returns:
+            tuple: (événements encodés, dernière séquence, perdus) ; perdus
+                indique que des événements ne sont plus disponibles (client
+                trop en retard ou serveur redémarré)
+        """
+        with self._verrou:
+            perdus = sequence > self.sequence or bool(self._evenements) and self._evenements[0][0] > sequence + 1
+            return [texte for numero, texte in self._evenements if numero > sequence], self.sequence, perdus
+
+    async def attendre(self, sequence, delai):
+        """Comme depuis, en attendant au plus `delai` secondes un nouvel événement."""
+        evenements, derniere, perdus = self.depuis(sequence)
+        if evenements or perdus:
+            return evenements, derniere, perdus
+        nouveau = self._nouveau
+        try:
+            await asyncio.wait_for(nouveau.wait(), delai)
+        except asyncio.TimeoutError:
+            pass
+        return self.depuis(sequence)
+
+    def fermer(self):
+        for desabonner in self._desabonnements:
+            desabonner()
+
+
+class ServiceCineflix:
+    """Gestionnaires partagés par toutes les requêtes et routage des points d'accès.
+
+    Les gestionnaires sont créés dans le dossier courant (donnees/), comme
+    pour l'interface graphique.
+    """
+
+    def __init__(self):
+        self.catalogue = GestionCatalogue()
+        self.ventes = GestionVentes()
+        self.utilisateurs = GestionUtilisateurs()
+        self.utilisateurs.set_gestion_catalogue(self.catalogue)
+        self.ventes.set_gestion_catalogue(self.catalogue)
+        self.commentaires = GestionCommentaires()
+        self.modele_recommandation = ModeleFactorisation.charger()
+        # Index de contenu construit à la première recommandation ; les
+        # événements du catalogue sont publiés dans le thread du catalogue,
+        # le seul qui s'en sert
+        self.index_contenu = None
+        # Sans modèle appris : voisinage des utilisateurs, construit dans le thread des
+        # utilisateurs et reconstruit à la première recommandation qui suit une note
+        self._voisinage = (None, None)
+        self._generation_notes = 0
+        # Jetons rendus par /connexion : {jeton: nom du compte}
+        self._sessions = {}
+        self._desabonnements = [
+            self.catalogue.bus.abonner(FILM_AJOUTE, self._film_ajoute),
+            self.catalogue.bus.abonner(CATALOGUE_RECHARGE, self._catalogue_recharge),
+            self.utilisateurs.bus.abonner(NOTE_UTILISATEUR, self._note_utilisateur),
+        ]
+        self.files = {
+            'catalogue': FileCollection('catalogue', self.catalogue),
+            'ventes': FileCollection('ventes', self.ventes),
+            'utilisateurs': FileCollection('utilisateurs', self.utilisateurs),
+            'commentaires': FileCollection('commentaires', self.commentaires),
+        }
+        self.journal_evenements = None
+        self.routes = [
+            ('GET', r'/sante', self.sante),
+            ('GET', r'/films', self.films),
+            ('POST', r'/films', self.ajouter_film),
+            ('GET', r'/films/(\d+)', self.film),
+            ('PUT', r'/films/(\d+)/note', self.noter_film_catalogue),
+            ('GET', r'/films/(\d+)/commentaires', self.commentaires_film),
+            ('POST', r'/films/(\d+)/commentaires', self.ajouter_commentaire),
+            ('GET', r'/catalogue/statistiques', self.statistiques_catalogue),
+            ('GET', r'/utilisateurs', self.liste_utilisateurs),
+            ('POST', r'/utilisateurs', self.creer_utilisateur),
+            ('DELETE', r'/utilisateurs/([^/]+)', self.supprimer_utilisateur),
+            ('POST', r'/utilisateurs/([^/]+)/promotion', self.promouvoir_utilisateur),
+            ('POST', r'/connexion', self.connexion),
+            ('GET', r'/notes', self.notes),
+            ('POST', r'/notes', self.noter_film),
+            ('GET', r'/ventes', self.liste_ventes),
+            ('POST', r'/ventes', self.enregistrer_vente),
+            ('DELETE', r'/ventes/(\d+)', self.annuler_vente),
+            ('POST', r'/ventes/fictives', self.generer_ventes_fictives),
+            ('GET', r'/ventes/rapport', self.rapport_ventes),
+            ('GET', r'/ventes/agregats', self.agregats_ventes),
+            ('GET', r'/ventes/cube', self.cube_ventes),
+            ('GET', r'/recommandations/([^/]+)', self.recommandations),
+            ('GET', r'/evenements', self.evenements),
+        ]
+        self.routes = [(methode, re.compile(motif + '$'), gestionnaire) for methode, motif, gestionnaire in self.routes]
+
+    # --- Catalogue ---
+
+    async def sante(self, parametres, corps):
+        return {'etat': 'ok', 'films': len(self.catalogue.films), 'evenements': self.journal_evenements.sequence}
+
+    async def films(self, parametres, corps):
+        file = self.files['catalogue']
+        if 'terme' in parametres:
+            terme = parametres['terme']
+            return await file.lire(('recherche', terme), encoder(self.catalogue.rechercher_films), terme)
+        if 'debut' in parametres:
+            debut, fin = parametres['debut'], parametres.get('fin')
+            return await file.lire(('periode', debut, fin), encoder(self.catalogue.filtrer_par_periode), debut, fin)
+        return await file.lire(('films',), encoder(lambda: list(self.catalogue.films)))
+
+    async def film(self, parametres, corps, film_id):
+        film_id = int(film_id)
+        film = await self.files['catalogue'].executer(
+            lambda: next((dict(f) for f in self.catalogue.films if f['id'] == film_id), None))
+        if film is None:
+            raise ErreurRequete(404, f"Film {film_id} introuvable")
+        return film
+
+    async def ajouter_film(self, parametres, corps):
+        return 201, await self.files['catalogue'].executer(encoder(self.catalogue.ajouter_film), corps)
+
+    async def noter_film_catalogue(self, parametres, corps, film_id):
+        note = float(_champ(corps, 'note'))
+        return {'succes': await self.files['catalogue'].executer(self.catalogue.mettre_a_jour_note_film,
+                                                                  int(film_id), note)}
+
+    async def statistiques_catalogue(self, parametres, corps):
+        return await self.files['catalogue'].lire(('statistiques',), self.catalogue.obtenir_statistiques)
+
+    # --- Commentaires ---
+
+    async def commentaires_film(self, parametres, corps, film_id):
+        return await self.files['commentaires'].lire(('commentaires', int(film_id)),
+                                                     encoder(self.commentaires.obtenir_commentaires_film), int(film_id))
+
+    async def ajouter_commentaire(self, parametres, corps, film_id):
+        succes, message = await self.files['commentaires'].executer(
+            self.commentaires.ajouter_commentaire, int(film_id), _champ(corps, 'utilisateur'),
+            int(_champ(corps, 'note')), _champ(corps, 'commentaire'))
+        return 201, {'succes': succes, 'message': message}
+
+    # --- Utilisateurs et notes ---
+
+    async def liste_utilisateurs(self, parametres, corps):
+        return await self.files['utilisateurs'].lire(('utilisateurs',), encoder(lambda: {
+            nom: {cle: valeur for cle, valeur in infos.items() if cle != 'password'}
+            for nom, infos in self.utilisateurs.utilisateurs.items()}))
+
+    async def creer_utilisateur(self, parametres, corps):
+        succes, message = await self.files['utilisateurs'].executer(
+            self.utilisateurs.creer_utilisateur, _champ(corps, 'nom'), _champ(corps, 'mot_de_passe'),
+            _champ(corps, 'email'))
+        return {'succes': succes, 'message': message}
+
+    @admin
+    async def supprimer_utilisateur(self, parametres, corps, nom):
+        succes, message = await self.files['utilisateurs'].executer(self.utilisateurs.supprimer_utilisateur, nom)
+        return {'succes': succes, 'message': message}
+
+    @admin
+    async def promouvoir_utilisateur(self, parametres, corps, nom):
+        succes, message = await self.files['utilisateurs'].executer(self.utilisateurs.promouvoir_utilisateur, nom)
+        return {'succes': succes, 'message': message}
+
+    async def connexion(self, parametres, corps):
+        nom = _champ(corps, 'nom')
+        succes, resultat = await self.files['utilisateurs'].executer(
+            self.utilisateurs.verifier_connexion, nom, _champ(corps, 'mot_de_passe'))
+        jeton = None
+        if succes:
+            jeton = secrets.token_urlsafe(32)
+            self._sessions[jeton] = nom
+        return {'succes': succes, 'resultat': resultat, 'jeton': jeton}
+
+    async def _verifier_admin(self, entetes):
+        """Vérifie que la requête porte le jeton d'un compte qui est (toujours) admin."""
+        schema, _, jeton = entetes.get('authorization', '').partition(' ')
+        nom = self._sessions.get(jeton) if schema.lower() == 'bearer' else None
+        if nom is None:
+            raise ErreurRequete(401, "Connexion requise (en-tête Authorization: Bearer <jeton>)")
+        # Rôle relu à chaque requête : un compte supprimé ou rétrogradé perd ses droits
+        role = await self.files['utilisateurs'].executer(
+            lambda: self.utilisateurs.utilisateurs.get(nom, {}).get('role'))
+        if role != 'admin':
+            raise ErreurRequete(403, "Action réservée aux administrateurs")
+
+    async def notes(self, parametres, corps):
+        return await self.files['utilisateurs'].lire(('notes',), encoder(lambda: self.utilisateurs.notes))
+
+    async def noter_film(self, parametres, corps):
+        succes, message = await self.files['utilisateurs'].executer(
+            self.utilisateurs.noter_film, _champ(corps, 'utilisateur'), _champ(corps, 'film_id'),
+            _champ(corps, 'note'))
+        return {'succes': succes, 'message': message}
+
+    async def recommandations(self, parametres, corps, nom):
+        nombre = int(parametres.get('nombre', 10))
+        notes = await self.files['utilisateurs'].executer(
+            lambda: {film_id: infos['note'] for film_id, infos in self.utilisateurs.notes.get(nom, {}).items()})
+        voisinage = await self._voisinage_utilisateurs() if self.modele_recommandation is None else None
+        # Avec le voisinage, la liste dépend aussi des notes des autres utilisateurs
+        cle = ('recommandations', nom, nombre, self.catalogue.version, tuple(sorted(notes.items())),
+               self._voisinage[0] if voisinage is not None else None)
+
+        def calculer():
+            # Modèle et index partagés : mis à jour et lus dans le seul thread du catalogue
+            if self.index_contenu is None:
+                self.index_contenu = IndexContenu(self.catalogue.films)
+            recommandations = recommander_pour_utilisateur(
+                self.catalogue.films, nom, {film_id: {'note': note} for film_id, note in notes.items()},
+                nombre, self.modele_recommandation, self.index_contenu, voisinage)
+            return [{'film': film, 'score': score} for film, score in recommandations]
+        return await self.files['catalogue'].lire(cle, encoder(calculer))
+
+    async def _voisinage_utilisateurs(self):
+        """Voisinage des utilisateurs, reconstruit une fois après chaque série de notes."""
+        generation, voisinage = self._voisinage
+        if voisinage is None or generation != self._generation_notes:
+            films = await self.files['catalogue'].executer(list, self.catalogue.films)
+            self._voisinage = await self.files['utilisateurs'].lire(('voisinage',), self._construire_voisinage, films)
+            voisinage = self._voisinage[1]
+        return voisinage
+
+    def _construire_voisinage(self, films):
+        # Dans le thread des utilisateurs : la génération correspond aux notes lues
+        return self._generation_notes, VoisinageUtilisateurs(self.utilisateurs.notes, films)
+
+    # --- Ventes ---
+
+    async def liste_ventes(self, parametres, corps):
+        debut, fin = parametres.get('debut'), parametres.get('fin')
+        return await self.files['ventes'].lire(('ventes', debut, fin),
+                                               encoder(lambda: list(self.ventes.iter_ventes(debut, fin))))
+
+    async def enregistrer_vente(self, parametres, corps):
+        ligne = {champ: _champ(corps, champ) for champ in ('film_id', 'titre_film', 'quantite', 'prix_unitaire')}
+        # Vérifiée avant d'entrer dans le lot ; les ventes arrivées ensemble
+        # sont ajoutées au fichier en une écriture
+        return 201, await self.files['ventes'].grouper(self.ventes.enregistrer_ventes, ligne, valider_vente)
+
+    async def annuler_vente(self, parametres, corps, vente_id):
+        return {'succes': await self.files['ventes'].executer(self.ventes.annuler_vente, int(vente_id))}
+
+    async def generer_ventes_fictives(self, parametres, corps):
+        films = await self.files['catalogue'].executer(list, self.catalogue.films)
+
+        def generer():
+            # Seulement si l'historique est vide (plusieurs clients peuvent le demander au démarrage)
+            if not self.ventes.ventes:
+                self.ventes.generer_ventes_fictives(films)
+            return len(self.ventes.ventes)
+        return {'nombre_ventes': await self.files['ventes'].executer(generer)}
+
+    async def rapport_ventes(self, parametres, corps):
+        debut, fin = parametres.get('debut'), parametres.get('fin')
+        return await self.files['ventes'].lire(('rapport', debut, fin),
+                                               encoder(self.ventes.obtenir_rapport_ventes), debut, fin)
+
+    async def agregats_ventes(self, parametres, corps):
+        return await self.files['ventes'].lire(('agregats',), encoder(self.ventes.snapshot))
+
+    async def cube_ventes(self, parametres, corps):
+        arguments = (parametres.get('mesure', 'revenu'), parametres.get('granularite', 'jour'),
+                     parametres.get('debut'), parametres.get('fin'), parametres.get('par'))
+        return await self.files['ventes'].lire(('cube',) + arguments,
+                                               encoder(lambda: self.ventes.cube.requete(*arguments)))
+
+    # --- Événements ---
+
+    async def evenements(self, parametres, corps):
+        depuis = int(parametres.get('depuis', 0))
+        attente = min(float(parametres.get('attente', 0)), ATTENTE_MAX_EVENEMENTS)
+        evenements, sequence, perdus = await self.journal_evenements.attendre(depuis, attente)
+        # Événements déjà encodés : assemblés sans être décodés
+        return _Brut(b'{"sequence": %d, "perdus": %s, "evenements": [%s]}'
+                     % (sequence, b'true' if perdus else b'false', b', '.join(evenements)))
+
+    # --- Routage ---
+
+    async def traiter(self, methode, cible, corps, entetes=None):
+        """Traite une requête.
+
+        Args:
+            methode (str): Méthode HTTP
+            cible (str): Chemin et paramètres de la requête
+            corps: Corps JSON décodé
+            entetes (dict, optional): En-têtes, noms en minuscules
+
+        Returns:
+            tuple: (statut HTTP, corps JSON encodé)
+        """
+        url = urlsplit(cible)
+        chemin = url.path.rstrip('/') or '/'
+        parametres = dict(parse_qsl(url.query))
+        methodes = []
+        for methode_route, motif, gestionnaire in self.routes:
+            correspondance = motif.match(chemin)
+            if correspondance is None:
+                continue
+            if methode_route != methode:
+                methodes.append(methode_route)
+                continue
+            arguments = [unquote(groupe) for groupe in correspondance.groups()]
+            with mesurer(f"service.{gestionnaire.__name__}"):
+                try:
+                    if getattr(gestionnaire, 'admin', False):
+                        await self._verifier_admin(entetes or {})
+                    resultat = await gestionnaire(parametres, corps, *arguments)
+                except ErreurRequete as e:
+                    return e.statut, en_json({'erreur': str(e)})
+                except ValueError as e:
+                    return 400, en_json({'erreur': str(e)})
+            statut = 200
+            if isinstance(resultat, tuple) and len(resultat) == 2 and isinstance(resultat[0], int):
+                statut, resultat = resultat
+            return statut, resultat.octets if isinstance(resultat, _Brut) else en_json(resultat)
+        if methodes:
+            return 405, en_json({'erreur': f"Méthode {methode} non autorisée (possibles : {', '.join(methodes)})"})
+        return 404, en_json({'erreur': f"Aucun point d'accès {chemin}"})
+
+    async def connexion_client(self, lecteur, ecrivain):
+        """Sert les requêtes d'une connexion (HTTP/1.1, connexion persistante)."""
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                try:
+                    methode, cible, version = ligne.decode('latin-1').split()
+                except ValueError:
+                    break
+                entetes = {}
+                while True:
+                    ligne = await lecteur.readline()
+                    if ligne in (b'\r\n', b'\n', b''):
+                        break
+                    nom, _, valeur = ligne.decode('latin-1').partition(':')
+                    entetes[nom.strip().lower()] = valeur.strip()
+                longueur = int(entetes.get('content-length', 0) or 0)
+                if longueur > TAILLE_MAX_CORPS:
+                    statut, reponse = 413, en_json({'erreur': "Corps de requête trop volumineux"})
+                    garder = False
+                else:
+                    donnees = await lecteur.readexactly(longueur) if longueur else b''
+                    garder = (entetes.get('connection', '').lower() != 'close'
+                              and version.upper() == 'HTTP/1.1')
+                    try:
+                        corps = json.loads(donnees) if donnees else {}
+                        statut, reponse = await self.traiter(methode.upper(), cible, corps, entetes)
+                    except json.JSONDecodeError as e:
+                        statut, reponse = 400, en_json({'erreur': f"JSON invalide : {e}"})
+                    except Exception as e:
+                        journal.error(f"Erreur lors du traitement de {methode} {cible}: {e}", exc_info=True)
+                        statut, reponse = 500, en_json({'erreur': "Erreur interne"})
+                ecrivain.write(
+                    f"HTTP/1.1 {statut} {RAISONS.get(statut, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(reponse)}\r\n"
+                    f"Connection: {'keep-alive' if garder else 'close'}\r\n\r\n".encode('latin-1') + reponse)
+                await ecrivain.drain()
+                if not garder:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            ecrivain.close()
+
+    def _film_ajoute(self, evenement):
+        if self.index_contenu is not None:
+            self.index_contenu.ajouter(evenement.donnees['film'])
+
+    def _catalogue_recharge(self, evenement):
+        self.index_contenu = None
+        self._generation_notes += 1
+
+    def _note_utilisateur(self, evenement):
+        self._generation_notes += 1
+
+    def fermer(self):
+        """Termine les opérations en cours."""
+        for desabonner in self._desabonnements:
+            desabonner()
+        if self.journal_evenements is not None:
+            self.journal_evenements.fermer()
+        for file in self.files.values():
+            file.fermer()
+
+
+class _Brut:
+    """Corps de réponse déjà encodé en JSON."""
+
+    __slots__ = ('octets',)
+
+    def __init__(self, octets):
+        self.octets = octets
+
+
+def _champ(corps, nom):
+    """Champ obligatoire du corps JSON d'une requête."""
+    if not isinstance(corps, dict) or corps.get(nom) in (None, ''):
+        raise ValueError(f"Le champ '{nom}' est requis")
+    return corps[nom]
+
+
+async def servir(hote="127.0.0.1", port=8765, pret=None):
+    """Charge les données puis sert les requêtes jusqu'à l'annulation de la tâche.
+
+    Args:
+        hote (str): Adresse d'écoute
+        port (int): Port d'écoute (0 : port libre choisi par le système)
+        pret (callable, optional): Appelé avec le port effectif une fois le
+            serveur à l'écoute
+    """
+    boucle = asyncio.get_running_loop()
+    service = await boucle.run_in_executor(None, ServiceCineflix)
+    service.journal_evenements = JournalEvenements(boucle)
+    serveur = await asyncio.start_server(service.connexion_client, hote, port)
+    port = serveur.sockets[0].getsockname()[1]
+    journal.info(f"Service CinéFlix à l'écoute sur http://{hote}:{port}")
+    if pret is not None:
+        pret(port)
+    try:
+        async with serveur:
+            await serveur.serve_forever()
+    finally:
+        await boucle.run_in_executor(None, service.fermer)
@@ -4,17 +4,56 @@ from pathlib import Path
 import re
 import logging
 
+from ..cache.cache_resultats import CacheResultats
+from ..concurrence.fichiers import differable, ecriture_atomique, modification, signature_fichier, verrou_fichier
+from ..evenements.bus import BUS, NOTE_UTILISATEUR, UTILISATEURS_MODIFIES
+from ..instrumentation.metriques import compter_octets, mesurer
+
+journal = logging.getLogger(__name__)
+
+def valider_note(note):
+    """Vérifie qu'une note est comprise entre 1 et 5 étoiles.
+
+    Returns:
+        int: La note (convertie en entier si elle est fournie en texte)
+
+    Raises:
+        ValueError: Si la note est hors de l'intervalle
+    """
+    if isinstance(note, str):
+        note = int(note)
+    if not 1 <= note <= 5:
+        raise ValueError("La note doit être comprise entre 1 et 5 étoiles")
+    return note
+
+
 class GestionUtilisateurs:
-    def __init__(self):
+    def __init__(self, bus=None):
         self.base_path = Path("donnees")
+        self.bus = bus or BUS  # Bus où publier les nouvelles notes
+        # utilisateurs.json et notes_utilisateurs.json sont protégés par un
+        # même verrou ; commentaires.json a le sien (partagé avec GestionCommentaires)
+        self.fichier_verrou = self.base_path / "utilisateurs.json"
+        self.fichier_commentaires = self.base_path / "commentaires.json"
+        self._signatures = None
         self.utilisateurs = {}
         self.notes = {}
         self.commentaires = {}
         self.gestion_catalogue = None  # Sera initialisé plus tard
+        # Moyennes des notes par film, invalidées par noter_film
+        self.cache = CacheResultats("utilisateurs")
         self._charger_donnees()
 
+    @mesurer("utilisateurs.charger")
     def _charger_donnees(self):
         """Charge les données des utilisateurs depuis les fichiers JSON."""
+        with verrou_fichier(self.fichier_verrou, exclusif=False), \
+                verrou_fichier(self.fichier_commentaires, exclusif=False):
+            self._signatures = self._signatures_fichiers()
+            self._lire_donnees()
+
+    def _lire_donnees(self):
+        """Lit les trois fichiers JSON (appelée sous verrou par _charger_donnees)."""
         try:
             # Charger les utilisateurs
             with open(self.base_path / "utilisateurs.json", 'r', encoding='utf-8') as f:
@@ -41,30 +80,83 @@ class GestionUtilisateurs:
                             }
             
             # Charger les commentaires
-            with open(self.base_path / "commentaires.json", 'r', encoding='utf-8') as f:
+            with open(self.fichier_commentaires, 'r', encoding='utf-8') as f:
                 self.commentaires = json.load(f)
         except FileNotFoundError as e:
-            logging.error(f"Erreur lors du chargement des données: {e}")
+            journal.error(f"Erreur lors du chargement des données: {e}")
             self.utilisateurs = {}
             self.notes = {}
             self.commentaires = {}
 
-    def _sauvegarder_donnees(self):
-        """Sauvegarde les données des utilisateurs dans les fichiers JSON."""
+    def _signatures_fichiers(self):
+        """Signatures de utilisateurs.json, notes_utilisateurs.json et commentaires.json."""
+        return (signature_fichier(self.base_path / "utilisateurs.json"),
+                signature_fichier(self.base_path / "notes_utilisateurs.json"),
+                signature_fichier(self.fichier_commentaires))
+
+    def synchroniser(self):
+        """Recharge les données si un autre processus a modifié l'un des fichiers JSON.
+
+        Les fichiers sont petits : ils sont relus entièrement, puis une
+        NOTE_UTILISATEUR est publiée pour chaque note ajoutée ou modifiée.
+
+        Returns:
+            bool: True si un fichier avait changé
+        """
+        if self._signatures_fichiers() == self._signatures:
+            return False
+        anciennes = {utilisateur: dict(notes) for utilisateur, notes in self.notes.items()}
+        anciens_utilisateurs = self.utilisateurs
+        self._charger_donnees()
+        self.cache.vider()
+        journal.info("Données des utilisateurs modifiées par un autre processus : rechargement")
+        for utilisateur in anciens_utilisateurs.keys() | self.utilisateurs.keys():
+            ancien = anciens_utilisateurs.get(utilisateur)
+            nouveau = self.utilisateurs.get(utilisateur)
+            # La date de dernière connexion change à chaque connexion : pas un changement de compte
+            if ancien is None or nouveau is None or ancien.get('role') != nouveau.get('role'):
+                self.bus.publier(UTILISATEURS_MODIFIES, utilisateur=utilisateur)
+        for utilisateur, notes in self.notes.items():
+            for film_id, note in notes.items():
+                if anciennes.get(utilisateur, {}).get(film_id) != note:
+                    self.bus.publier(NOTE_UTILISATEUR, utilisateur=utilisateur,
+                                     film_id=int(film_id), note=note['note'])
+        return True
+
+    @differable
+    @mesurer("utilisateurs.sauvegarder")
+    def _sauvegarder_donnees(self, commentaires=False):
+        """Sauvegarde les données des utilisateurs dans les fichiers JSON.
+
+        Args:
+            commentaires (bool): Réécrire aussi commentaires.json (seulement
+                après commenter_film : le fichier appartient d'abord à
+                GestionCommentaires, dont les ajouts seraient sinon écrasés)
+        """
         try:
             # Sauvegarder les utilisateurs
-            with open(self.base_path / "utilisateurs.json", 'w', encoding='utf-8') as f:
+            with ecriture_atomique(self.base_path / "utilisateurs.json", 'w', encoding='utf-8') as f:
                 json.dump(self.utilisateurs, f, indent=4, ensure_ascii=False)
+                octets = f.tell()
             
             # Sauvegarder les notes
-            with open(self.base_path / "notes_utilisateurs.json", 'w', encoding='utf-8') as f:
+            with ecriture_atomique(self.base_path / "notes_utilisateurs.json", 'w', encoding='utf-8') as f:
                 json.dump(self.notes, f, indent=4, ensure_ascii=False)
+                octets += f.tell()
             
             # Sauvegarder les commentaires
-            with open(self.base_path / "commentaires.json", 'w', encoding='utf-8') as f:
-                json.dump(self.commentaires, f, indent=4, ensure_ascii=False)
+            if commentaires:
+                with ecriture_atomique(self.fichier_commentaires, 'w', encoding='utf-8') as f:
+                    json.dump(self.commentaires, f, indent=4, ensure_ascii=False)
+                    octets += f.tell()
+            # commentaires.json non réécrit : ses changements restent à intégrer
+            signatures = self._signatures_fichiers()
+            if not commentaires:
+                signatures = signatures[:2] + self._signatures[2:]
+            self._signatures = signatures
+            compter_octets("utilisateurs.sauvegarder", octets)
         except Exception as e:
-            logging.error(f"Erreur lors de la sauvegarde des données: {e}")
+            journal.error(f"Erreur lors de la sauvegarde des données: {e}")
 
     def verifier_force_mdp(self, password):
         """Vérifie la force du mot de passe."""
@@ -102,8 +194,13 @@ class GestionUtilisateurs:
         """Définit l'instance de GestionCatalogue à utiliser."""
         self.gestion_catalogue = gestion_catalogue
 
+    @mesurer("utilisateurs.moyenne_notes_film")
     def calculer_moyenne_notes_film(self, film_id):
         """Calcule la moyenne des notes pour un film donné.
+
+        La moyenne est gardée en cache jusqu'à une nouvelle note sur ce film ;
+        la date de modification de commentaires.json fait partie de la clé,
+        les changements de commentaires sont donc aussi pris en compte.
         
         Args:
             film_id (int): L'ID du film
@@ -111,6 +208,20 @@ class GestionUtilisateurs:
         Returns:
             float: La moyenne des notes sur 5 étoiles
         """
+        try:
+            version_commentaires = (self.base_path / "commentaires.json").stat().st_mtime_ns
+        except OSError:
+            version_commentaires = None
+        return self.cache.obtenir(('moyenne', str(film_id), film_id, version_commentaires),
+                                  lambda: self._calculer_moyenne_notes_film(film_id))
+
+    def _invalider_moyennes(self, films_ids):
+        """Retire du cache les moyennes des films donnés (identifiants en texte)."""
+        films_ids = set(films_ids)
+        self.cache.invalider_si(lambda cle: cle[0] == 'moyenne' and cle[1] in films_ids)
+
+    def _calculer_moyenne_notes_film(self, film_id):
+        """Moyenne des notes des utilisateurs et des commentaires pour un film."""
         notes = []
         film_id_str = str(film_id)
         
@@ -131,7 +242,7 @@ class GestionUtilisateurs:
                             note = round(note / 2)
                         notes.append(note)
         except Exception as e:
-            logging.error(f"Erreur lors de la lecture des commentaires: {e}")
+            journal.error(f"Erreur lors de la lecture des commentaires: {e}")
         
         # Calculer la moyenne unique (sans doublons par utilisateur)
         if not notes:
@@ -141,6 +252,7 @@ class GestionUtilisateurs:
         moyenne = sum(notes) / len(notes)
         return moyenne
 
+    @modification
     def creer_utilisateur(self, username, password, email, role="user"):
         """Crée un nouvel utilisateur avec vérification du mot de passe."""
         if username in self.utilisateurs:
@@ -170,26 +282,33 @@ class GestionUtilisateurs:
         }
         self.notes[username] = {}
         self._sauvegarder_donnees()
+        self.bus.publier(UTILISATEURS_MODIFIES, utilisateur=username)
         return True, "Compte créé avec succès"
 
+    @modification
     def supprimer_utilisateur(self, username):
         """Supprime un utilisateur."""
         if username in self.utilisateurs:
             del self.utilisateurs[username]
             if username in self.notes:
+                self._invalider_moyennes(self.notes[username])
                 del self.notes[username]
             self._sauvegarder_donnees()
+            self.bus.publier(UTILISATEURS_MODIFIES, utilisateur=username)
             return True, "Utilisateur supprimé"
         return False, "Utilisateur non trouvé"
 
+    @modification
     def promouvoir_utilisateur(self, username):
         """Promouvoir un utilisateur en admin."""
         if username in self.utilisateurs and self.utilisateurs[username]['role'] == "user":
             self.utilisateurs[username]['role'] = "admin"
             self._sauvegarder_donnees()
+            self.bus.publier(UTILISATEURS_MODIFIES, utilisateur=username)
             return True, "Utilisateur promu en admin"
         return False, "Promotion échouée"
 
+    @modification
     def verifier_connexion(self, username, password):
         """Vérifie les identifiants de connexion."""
         if username in self.utilisateurs and self.utilisateurs[username]['password'] == password:
@@ -198,6 +317,8 @@ class GestionUtilisateurs:
             return True, self.utilisateurs[username]['role']
         return False, "Nom d'utilisateur ou mot de passe incorrect"
 
+    @mesurer("utilisateurs.noter_film")
+    @modification
     def noter_film(self, username, film_id, note):
         """Enregistre la note d'un utilisateur pour un film.
         
@@ -209,8 +330,10 @@ class GestionUtilisateurs:
         if username not in self.notes:
             self.notes[username] = {}
         
-        if not 1 <= note <= 5:
-            return False, "La note doit être comprise entre 1 et 5 étoiles"
+        try:
+            note = valider_note(note)
+        except ValueError as e:
+            return False, str(e)
         
         # Convertir film_id en string pour le stockage
         film_id_str = str(film_id)
@@ -220,6 +343,7 @@ class GestionUtilisateurs:
             'note': note,
             'date': datetime.now().isoformat()
         }
+        self._invalider_moyennes([film_id_str])
         
         # Mettre à jour la note globale du film si possible
         if self.gestion_catalogue:
@@ -229,26 +353,31 @@ class GestionUtilisateurs:
             self.gestion_catalogue.mettre_a_jour_note_film(film_id, note_sur_dix)
         
         self._sauvegarder_donnees()
+        self.bus.publier(NOTE_UTILISATEUR, utilisateur=username, film_id=film_id, note=note)
         return True, "Note enregistrée"
 
     def obtenir_notes_utilisateur(self, username):
         """Récupère toutes les notes d'un utilisateur."""
         return self.notes.get(username, {})
 
+    @modification
     def commenter_film(self, utilisateur, titre_film, commentaire):
         """Ajoute ou met à jour un commentaire pour un film."""
-        if not titre_film in self.commentaires:
-            self.commentaires[titre_film] = {}
-            
-        # Récupérer la note de l'utilisateur pour ce film
-        note = self.notes.get(utilisateur, {}).get(titre_film, {}).get('note', 0)
-            
-        self.commentaires[titre_film][utilisateur] = {
-            "texte": commentaire,
-            "date": datetime.now().isoformat(),
-            "note": note
-        }
-        self._sauvegarder_donnees()
+        with verrou_fichier(self.fichier_commentaires):
+            # commentaires.json a pu changer depuis la synchronisation (son verrou n'était pas tenu)
+            self.synchroniser()
+            if not titre_film in self.commentaires:
+                self.commentaires[titre_film] = {}
+                
+            # Récupérer la note de l'utilisateur pour ce film
+            note = self.notes.get(utilisateur, {}).get(titre_film, {}).get('note', 0)
+                
+            self.commentaires[titre_film][utilisateur] = {
+                "texte": commentaire,
+                "date": datetime.now().isoformat(),
+                "note": note
+            }
+            self._sauvegarder_donnees(commentaires=True)
         
     def obtenir_commentaires_film(self, titre_film):
         """Récupère tous les commentaires pour un film."""
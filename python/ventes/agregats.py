@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module des agrégats de ventes tenus à jour en continu.
+
+Les totaux (revenu, quantité, nombre de ventes) et leurs découpages par film,
+par jour et par mois sont mis à jour à chaque vente enregistrée ou annulée,
+ce qui évite de re-sommer tout l'historique pour chaque affichage.
+"""
+
+from types import MappingProxyType
+
+
+def _nouveau_compteur():
+    return {'nombre_ventes': 0, 'quantite': 0, 'revenu': 0.0}
+
+
+class AgregatsVentes:
+    """Totaux de ventes globaux, par film, par jour et par mois."""
+
+    def __init__(self):
+        self.nombre_ventes = 0
+        self.quantite_totale = 0
+        self.revenu_total = 0.0
+        self.par_film = {}
+        self.par_jour = {}
+        self.par_mois = {}
+
+    @classmethod
+    def depuis(cls, ventes):
+        """Construit les agrégats à partir d'un itérable de ventes."""
+        agregats = cls()
+        for vente in ventes:
+            agregats.ajouter(vente)
+        return agregats
+
+    @staticmethod
+    def _cles(vente):
+        """Retourne les clés (film, jour, mois) d'une vente."""
+        date = vente['date']
+        return vente['film_id'], date[:10], date[:7]
+
+    def ajouter(self, vente):
+        """Prend en compte une nouvelle vente."""
+        quantite = vente['quantite']
+        total = vente['total']
+        self.nombre_ventes += 1
+        self.quantite_totale += quantite
+        self.revenu_total += total
+
+        film_id, jour, mois = self._cles(vente)
+        for buckets, cle in ((self.par_film, film_id), (self.par_jour, jour), (self.par_mois, mois)):
+            compteur = buckets.get(cle)
+            if compteur is None:
+                compteur = buckets[cle] = _nouveau_compteur()
+            compteur['nombre_ventes'] += 1
+            compteur['quantite'] += quantite
+            compteur['revenu'] += total
+
+    def retirer(self, vente):
+        """Retire une vente annulée des agrégats."""
+        quantite = vente['quantite']
+        total = vente['total']
+        self.nombre_ventes -= 1
+        self.quantite_totale -= quantite
+        self.revenu_total -= total
+        if self.nombre_ventes == 0:
+            # Éviter de garder un résidu d'arrondi quand il n'y a plus de vente
+            self.quantite_totale = 0
+            self.revenu_total = 0.0
+
+        film_id, jour, mois = self._cles(vente)
+        for buckets, cle in ((self.par_film, film_id), (self.par_jour, jour), (self.par_mois, mois)):
+            compteur = buckets.get(cle)
+            if compteur is None:
+                continue
+            compteur['nombre_ventes'] -= 1
+            compteur['quantite'] -= quantite
+            compteur['revenu'] -= total
+            if compteur['nombre_ventes'] <= 0:
+                del buckets[cle]
+
+    def snapshot(self):
+        """Retourne l'état courant des agrégats en temps constant.
+
+        Les découpages sont des vues en lecture seule sur les compteurs
+        internes : elles suivent les mises à jour suivantes.
+
+        Returns:
+            dict: nombre_ventes, quantite_totale, revenu_total, par_film
+                (clé : film_id), par_jour ('AAAA-MM-JJ') et par_mois ('AAAA-MM')
+        """
+        return {
+            'nombre_ventes': self.nombre_ventes,
+            'quantite_totale': self.quantite_totale,
+            'revenu_total': self.revenu_total,
+            'par_film': MappingProxyType(self.par_film),
+            'par_jour': MappingProxyType(self.par_jour),
+            'par_mois': MappingProxyType(self.par_mois)
+        }
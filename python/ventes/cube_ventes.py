@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module du cube de ventes pré-agrégé (film × période).
+
+Le cube tient à jour, pour chaque granularité (heure, jour, semaine, mois),
+les quantités, revenus et nombres de ventes par période et par film, ainsi
+que par genre (jointure avec GestionCatalogue faite à l'écriture). Les
+requêtes du type « revenu par genre et par semaine sur le premier
+trimestre » sont ainsi répondues à partir des cumuls, sans relire les ventes.
+
+Le cube de GestionVentes (propriété cube) est construit à la première
+demande puis suivi à chaque vente enregistrée ou annulée ; les rapports
+dont les bornes tombent sur des heures entières en sont tirés (resume).
+
+Utilisation :
+    ventes.set_gestion_catalogue(catalogue)
+    ventes.cube.requete('revenu', 'semaine', debut, fin, par='genre')
+"""
+
+import calendar
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+
+GRANULARITES = ('heure', 'jour', 'semaine', 'mois')
+MESURES = {'quantite': 0, 'revenu': 1, 'nombre_ventes': 2}
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+
+def plus_grosse(vente, autre):
+    """Indique si `vente` passe avant `autre` pour la plus grosse vente (total, puis plus petit ID)."""
+    return vente['total'] > autre['total'] or (vente['total'] == autre['total'] and vente['id'] < autre['id'])
+
+
+def _jour_suivant(jour, pas=1):
+    return (date.fromisoformat(jour) + timedelta(days=pas)).isoformat()
+
+
+def _dernier_jour(mois):
+    return f"{mois}-{calendar.monthrange(int(mois[:4]), int(mois[5:7]))[1]:02d}"
+
+
+def _mois_suivant(mois, pas=1):
+    annee, numero = divmod(int(mois[:4]) * 12 + int(mois[5:7]) - 1 + pas, 12)
+    return f"{annee:04d}-{numero + 1:02d}"
+
+
+def decouper_plage(premiere, derniere):
+    """Découpe une plage d'heures entières en mois, jours et heures entiers.
+
+    Args:
+        premiere (str): Première heure 'AAAA-MM-JJ HH' (incluse)
+        derniere (str): Dernière heure 'AAAA-MM-JJ HH' (incluse)
+
+    Returns:
+        list: Tuples (granularite, première période, dernière période),
+            les plus grosses périodes possibles
+    """
+    if premiere > derniere:
+        return []
+    jour_debut, jour_fin = premiere[:10], derniere[:10]
+    if jour_debut == jour_fin and (premiere[11:] != '00' or derniere[11:] != '23'):
+        return [('heure', premiere, derniere)]
+    morceaux = []
+    if premiere[11:] != '00':
+        morceaux.append(('heure', premiere, f"{jour_debut} 23"))
+        jour_debut = _jour_suivant(jour_debut)
+    if derniere[11:] != '23':
+        morceaux.append(('heure', f"{jour_fin} 00", derniere))
+        jour_fin = _jour_suivant(jour_fin, -1)
+    if jour_debut > jour_fin:
+        return morceaux
+    mois_debut, mois_fin = jour_debut[:7], jour_fin[:7]
+    if jour_debut[8:] != '01':
+        if mois_debut == mois_fin and jour_fin != _dernier_jour(mois_fin):
+            return morceaux + [('jour', jour_debut, jour_fin)]
+        morceaux.append(('jour', jour_debut, _dernier_jour(mois_debut)))
+        mois_debut = _mois_suivant(mois_debut)
+    if mois_debut <= mois_fin and jour_fin != _dernier_jour(mois_fin):
+        morceaux.append(('jour', f"{mois_fin}-01", jour_fin))
+        mois_fin = _mois_suivant(mois_fin, -1)
+    if mois_debut <= mois_fin:
+        morceaux.append(('mois', mois_debut, mois_fin))
+    return morceaux
+
+
+class CubeVentes:
+    """Cumuls de ventes par période et par film, par genre et au total."""
+
+    def __init__(self, catalogue=None):
+        """Initialise un cube vide.
+
+        Args:
+            catalogue (GestionCatalogue, optional): Catalogue utilisé pour
+                joindre les métadonnées des films (genre, réalisateur...)
+        """
+        self.catalogue = catalogue
+        self._films = None
+        self._semaines = {}
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Vide tous les cumuls."""
+        # granularite -> periode -> film_id -> [quantite, revenu, nombre]
+        self.par_film = {g: {} for g in GRANULARITES}
+        # granularite -> periode -> genre -> [quantite, revenu, nombre]
+        self.par_genre = {g: {} for g in GRANULARITES}
+        # granularite -> periode -> [quantite, revenu, nombre]
+        self.totaux = {g: {} for g in GRANULARITES}
+        # granularite -> liste triée des périodes connues
+        self.periodes = {g: [] for g in GRANULARITES}
+        # heure -> plus grosse vente de l'heure (None : à recalculer après une annulation)
+        self.plus_grosses = {}
+        # film_id -> titre de sa dernière vente (rapports par titre)
+        self.titres = {}
+
+    def reconstruire(self, ventes):
+        """Reconstruit le cube à partir de l'historique des ventes."""
+        self.reinitialiser()
+        self._films = None
+        for vente in ventes:
+            self.ajouter(vente)
+
+    def _index_films(self):
+        """Associe chaque ID de film à son film dans le catalogue."""
+        if self._films is None:
+            films = self.catalogue.films if self.catalogue is not None else []
+            self._films = {film['id']: film for film in films}
+        return self._films
+
+    def rafraichir_films(self):
+        """À appeler quand le catalogue change (nouveau film, genre modifié)."""
+        self._films = None
+        self._index_films()
+
+    def _film(self, film_id):
+        film = self._index_films().get(film_id)
+        if film is None and self.catalogue is not None and len(self._films) != len(self.catalogue.films):
+            # Film ajouté au catalogue depuis la construction de l'index
+            self.rafraichir_films()
+            film = self._films.get(film_id)
+        return film
+
+    def _semaine(self, jour):
+        """Retourne la semaine ISO ('AAAA-Sww') d'un jour 'AAAA-MM-JJ' (mémorisée)."""
+        semaine = self._semaines.get(jour)
+        if semaine is None:
+            annee, numero, _ = date(int(jour[:4]), int(jour[5:7]), int(jour[8:10])).isocalendar()
+            semaine = self._semaines[jour] = f"{annee}-S{numero:02d}"
+        return semaine
+
+    def periode(self, date_vente, granularite):
+        """Retourne la clé de période d'une date "%Y-%m-%d %H:%M:%S"."""
+        if granularite == 'heure':
+            return date_vente[:13]
+        if granularite == 'jour':
+            return date_vente[:10]
+        if granularite == 'semaine':
+            return self._semaine(date_vente[:10])
+        if granularite == 'mois':
+            return date_vente[:7]
+        raise ValueError(f"Granularité inconnue : {granularite}")
+
+    def _cumuler(self, vente, signe):
+        quantite = signe * vente['quantite']
+        revenu = signe * vente['total']
+        film = self._film(vente['film_id'])
+        genre = film['genre'] if film is not None else None
+
+        for granularite in GRANULARITES:
+            periode = self.periode(vente['date'], granularite)
+            totaux = self.totaux[granularite]
+            if periode not in totaux:
+                if signe < 0:
+                    continue
+                totaux[periode] = [0, 0.0, 0]
+                self.par_film[granularite][periode] = {}
+                self.par_genre[granularite][periode] = {}
+                insort(self.periodes[granularite], periode)
+
+            cellules = (totaux[periode],
+                        self.par_film[granularite][periode].setdefault(vente['film_id'], [0, 0.0, 0]),
+                        self.par_genre[granularite][periode].setdefault(genre, [0, 0.0, 0]))
+            for cellule in cellules:
+                cellule[0] += quantite
+                cellule[1] += revenu
+                cellule[2] += signe
+
+            if totaux[periode][2] <= 0:
+                # Plus aucune vente sur la période : on la retire
+                del totaux[periode]
+                del self.par_film[granularite][periode]
+                del self.par_genre[granularite][periode]
+                periodes = self.periodes[granularite]
+                del periodes[bisect_left(periodes, periode)]
+            else:
+                for groupe, cle in ((self.par_film, vente['film_id']), (self.par_genre, genre)):
+                    if groupe[granularite][periode][cle][2] <= 0:
+                        del groupe[granularite][periode][cle]
+
+        heure = vente['date'][:13]
+        if signe > 0:
+            self.titres[vente['film_id']] = vente['titre_film']
+            if heure not in self.plus_grosses:
+                self.plus_grosses[heure] = vente
+            elif self.plus_grosses[heure] is not None and plus_grosse(vente, self.plus_grosses[heure]):
+                self.plus_grosses[heure] = vente
+        elif heure not in self.totaux['heure']:
+            self.plus_grosses.pop(heure, None)
+        elif self.plus_grosses.get(heure) is not None and self.plus_grosses[heure]['id'] == vente['id']:
+            self.plus_grosses[heure] = None
+
+    def ajouter(self, vente):
+        """Ajoute une vente aux cumuls."""
+        self._cumuler(vente, 1)
+
+    def retirer(self, vente):
+        """Retire une vente annulée des cumuls."""
+        self._cumuler(vente, -1)
+
+    def fixer_plus_grosse(self, heure, vente):
+        """Enregistre la plus grosse vente d'une heure recalculée par l'appelant."""
+        if heure in self.plus_grosses:
+            self.plus_grosses[heure] = vente
+
+    def _entre(self, granularite, premiere, derniere):
+        """Périodes non vides entre deux clés de période (incluses)."""
+        periodes = self.periodes[granularite]
+        return periodes[bisect_left(periodes, premiere):bisect_right(periodes, derniere)]
+
+    def resume(self, premiere=None, derniere=None):
+        """Cumuls d'une plage d'heures entières, lus dans les plus grosses périodes qui la couvrent.
+
+        Args:
+            premiere (str, optional): Première heure 'AAAA-MM-JJ HH' (incluse)
+            derniere (str, optional): Dernière heure 'AAAA-MM-JJ HH' (incluse)
+
+        Returns:
+            dict: totaux [quantite, revenu, nombre], par_film {film_id: [...]},
+                par_jour {jour: [...]}, plus_grosses {heure: vente ou None}
+        """
+        heures = self.periodes['heure']
+        totaux, par_film, par_jour = [0, 0.0, 0], {}, {}
+        resume = {'totaux': totaux, 'par_film': par_film, 'par_jour': par_jour, 'plus_grosses': {}}
+        if not heures:
+            return resume
+        premiere = max(premiere or heures[0], heures[0])
+        derniere = min(derniere or heures[-1], heures[-1])
+
+        for granularite, debut, fin in decouper_plage(premiere, derniere):
+            for periode in self._entre(granularite, debut, fin):
+                cellule = self.totaux[granularite][periode]
+                for k in range(3):
+                    totaux[k] += cellule[k]
+                for film_id, cellule_film in self.par_film[granularite][periode].items():
+                    cumul = par_film.setdefault(film_id, [0, 0.0, 0])
+                    for k in range(3):
+                        cumul[k] += cellule_film[k]
+                if granularite == 'heure':
+                    cumul = par_jour.setdefault(periode[:10], [0, 0.0, 0])
+                    for k in range(3):
+                        cumul[k] += cellule[k]
+            if granularite != 'heure':
+                # Découpage par jour des jours et mois entiers
+                premier_jour = debut if granularite == 'jour' else f"{debut}-01"
+                dernier_jour = fin if granularite == 'jour' else _dernier_jour(fin)
+                for jour in self._entre('jour', premier_jour, dernier_jour):
+                    par_jour[jour] = list(self.totaux['jour'][jour])
+        resume['plus_grosses'] = {heure: self.plus_grosses[heure]
+                                  for heure in self._entre('heure', premiere, derniere)}
+        return resume
+
+    def _borne(self, borne, granularite):
+        if borne is None:
+            return None
+        if not isinstance(borne, str):
+            borne = borne.strftime(FORMAT_DATE)
+        return self.periode(borne, granularite)
+
+    def periodes_entre(self, granularite, debut=None, fin=None):
+        """Liste les périodes non vides comprises entre deux dates (incluses)."""
+        periodes = self.periodes[granularite]
+        debut = self._borne(debut, granularite)
+        fin = self._borne(fin, granularite)
+        i = 0 if debut is None else bisect_left(periodes, debut)
+        j = len(periodes) if fin is None else bisect_right(periodes, fin)
+        return periodes[i:j]
+
+    def requete(self, mesure='revenu', granularite='jour', debut=None, fin=None, par=None):
+        """Interroge le cube.
+
+        Args:
+            mesure (str): 'quantite', 'revenu' ou 'nombre_ventes'
+            granularite (str): 'heure', 'jour', 'semaine' ou 'mois'
+            debut (datetime ou str, optional): Début de la plage (inclus)
+            fin (datetime ou str, optional): Fin de la plage (incluse)
+            par (str, optional): None (total de la période), 'film' (clé :
+                film_id), 'genre', ou tout autre champ d'un film du catalogue
+                ('realisateur', 'annee'...)
+
+        Returns:
+            dict: {periode: valeur} si par est None, sinon
+                {periode: {groupe: valeur}}
+        """
+        if mesure not in MESURES:
+            raise ValueError(f"Mesure inconnue : {mesure}")
+        if granularite not in GRANULARITES:
+            raise ValueError(f"Granularité inconnue : {granularite}")
+        k = MESURES[mesure]
+        periodes = self.periodes_entre(granularite, debut, fin)
+
+        if par is None:
+            totaux = self.totaux[granularite]
+            return {p: totaux[p][k] for p in periodes}
+        if par in ('film', 'genre'):
+            cumuls = (self.par_film if par == 'film' else self.par_genre)[granularite]
+            return {p: {cle: cellule[k] for cle, cellule in cumuls[p].items()} for p in periodes}
+
+        # Autre attribut : jointure avec le catalogue à partir des cumuls par film
+        resultat = {}
+        cumuls = self.par_film[granularite]
+        for p in periodes:
+            groupes = resultat[p] = {}
+            for film_id, cellule in cumuls[p].items():
+                film = self._film(film_id)
+                cle = film.get(par) if film is not None else None
+                groupes[cle] = groupes.get(cle, 0) + cellule[k]
+        return resultat
@@ -5,107 +5,418 @@
 Module de gestion des ventes de films.
 """
 
-import csv
+import heapq
+import logging
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 import random
 
+from ..cache.cache_resultats import CacheResultats
+from ..configuration.journalisation import tracer_lignes
+from ..concurrence.asynchrone import par_lot
+from ..concurrence.fichiers import differable, modification, signature_fichier, verrou_fichier
+from ..configuration.parametres import obtenir_parametre
+from ..dates.horodatage import formater, horodatage
+from ..evenements.bus import BUS, VENTE_ANNULEE, VENTE_ENREGISTREE, VENTES_RECHARGEES
+from ..instrumentation.metriques import compter_octets, mesurer, taille_fichier
+from .agregats import AgregatsVentes
+from .cube_ventes import CubeVentes, plus_grosse
+from .stockage_ventes import StockageVentesCSV, creer_stockage
+
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+journal = logging.getLogger(__name__)
+
+
+def valider_vente(donnees):
+    """Vérifie et normalise les données d'une vente.
+
+    Args:
+        donnees (dict): Dictionnaire contenant film_id, titre_film,
+            quantite, prix_unitaire et éventuellement date
+
+    Returns:
+        dict: La vente normalisée (sans 'id'), total recalculé
+
+    Raises:
+        ValueError: Si un champ requis est absent ou invalide
+    """
+    for champ in ['film_id', 'titre_film', 'quantite', 'prix_unitaire']:
+        if donnees.get(champ) in (None, ''):
+            raise ValueError(f"Le champ '{champ}' est requis")
+
+    quantite = int(donnees['quantite'])
+    if quantite <= 0:
+        raise ValueError("La quantité doit être positive.")
+    prix_unitaire = float(donnees['prix_unitaire'])
+    if prix_unitaire <= 0:
+        raise ValueError("Le prix doit être positif.")
+
+    date = donnees.get('date') or datetime.now().strftime(FORMAT_DATE)
+    # Vérifier la date sans la modifier (format fixe du fichier)
+    if len(date) != len("AAAA-MM-JJ HH:MM:SS") or date[10] != ' ':
+        raise ValueError(f"Date invalide : {date!r} (format attendu : AAAA-MM-JJ HH:MM:SS)")
+    horodatage(date)
+
+    return {
+        'date': date,
+        'film_id': int(donnees['film_id']),
+        'titre_film': donnees['titre_film'],
+        'quantite': quantite,
+        'prix_unitaire': prix_unitaire,
+        'total': quantite * prix_unitaire
+    }
+
+
+def _heures_entieres(debut, fin):
+    """Heures 'AAAA-MM-JJ HH' (locales) bornant la période si elle couvre des heures entières.
+
+    Returns:
+        tuple: (première, dernière), None pour une borne absente ; None si
+            une borne coupe une heure
+    """
+    premiere = derniere = None
+    if debut is not None:
+        date = formater(debut)
+        if not date.endswith(":00:00"):
+            return None
+        premiere = date[:13]
+    if fin is not None:
+        date = formater(fin)
+        if not date.endswith(":59:59"):
+            return None
+        derniere = date[:13]
+    return premiere, derniere
+
+
 class GestionVentes:
     """Classe gérant les opérations de vente."""
     
-    def __init__(self, fichier_ventes="donnees/ventes.csv"):
-        """Initialisation avec le chemin du fichier des ventes."""
+    def __init__(self, fichier_ventes="donnees/ventes.csv", format_ventes=None, bus=None):
+        """Initialisation avec le chemin du fichier des ventes.
+
+        Args:
+            fichier_ventes (str): Chemin du fichier CSV des ventes
+            format_ventes (str, optional): "csv" ou "blocs" ; par défaut la
+                valeur "format_ventes" de config/config.json
+            bus (BusEvenements, optional): Bus où publier les modifications
+                (bus partagé par défaut)
+        """
         self.fichier_ventes = fichier_ventes
-        self.ventes = []
+        self.bus = bus or BUS
+        # Liste complète des ventes, matérialisée seulement à la première
+        # utilisation de self.ventes (voir la propriété ci-dessous)
+        self._ventes = None
+        # Agrégats (totaux, par film/jour/mois) construits au premier besoin
+        # puis tenus à jour par enregistrer_vente et annuler_vente
+        self._agregats = None
+        # Structures dérivées (cube, top des ventes...) prévenues de chaque écriture
+        self._observateurs = []
+        # Cube film x période, construit à la première demande (rapports, requêtes)
+        self._cube = None
+        self.gestion_catalogue = None
+        # Rapports par période, invalidés par les ventes de la période
+        self.cache = CacheResultats("ventes")
         self.derniere_synchro = None
+        # Signature du fichier reflétée par l'état en mémoire (voir synchroniser)
+        self._signature = None
         
         # Créer le répertoire si nécessaire
         os.makedirs(os.path.dirname(fichier_ventes), exist_ok=True)
+
+        if format_ventes is None:
+            format_ventes = obtenir_parametre("format_ventes", "csv")
+        self.stockage = creer_stockage(fichier_ventes, format_ventes)
+        self.fichier_verrou = self.stockage.chemin
         
-        # Créer le fichier s'il n'existe pas
-        if not os.path.exists(fichier_ventes):
-            self._sauvegarder_ventes()
-        
-        self.charger_ventes()
+        # Créer le fichier s'il n'existe pas (un autre processus a pu le faire entre-temps)
+        with verrou_fichier(self.fichier_verrou):
+            if not self.stockage.existe():
+                self._ventes = []
+                self._sauvegarder_ventes()
+            self._signature = signature_fichier(self.stockage.chemin)
+
+    @property
+    def ventes(self):
+        """Liste complète des ventes, chargée depuis le fichier au premier accès."""
+        if self._ventes is None:
+            self._materialiser()
+        return self._ventes
+
+    @ventes.setter
+    def ventes(self, ventes):
+        self._ventes = ventes
+        self._agregats = None
+        self.cache.vider()
+
+    @property
+    def agregats(self):
+        """Agrégats des ventes, calculés en une passe au premier accès."""
+        if self._agregats is None:
+            with verrou_fichier(self.fichier_verrou, exclusif=False):
+                self.synchroniser()
+                self._agregats = AgregatsVentes.depuis(self.iter_ventes())
+        return self._agregats
+
+    def snapshot(self):
+        """Retourne les agrégats courants (totaux, par film, par jour, par mois) en O(1)."""
+        return self.agregats.snapshot()
+
+    def set_gestion_catalogue(self, gestion_catalogue):
+        """Définit l'instance de GestionCatalogue dont le cube joint les films (genre...)."""
+        self.gestion_catalogue = gestion_catalogue
+        if self._cube is not None:
+            self._cube.catalogue = gestion_catalogue
+            self._cube.reconstruire(self.iter_ventes())
+
+    @property
+    def cube(self):
+        """Cube de ventes (CubeVentes), construit depuis l'historique au premier accès puis tenu à jour."""
+        if self._cube is None:
+            cube = CubeVentes(self.gestion_catalogue)
+            self.ajouter_observateur(cube)
+            self._cube = cube
+        return self._cube
+
+    def ajouter_observateur(self, observateur):
+        """Abonne une structure dérivée aux ventes enregistrées et annulées.
+
+        L'observateur doit fournir ajouter(vente), retirer(vente) et
+        reconstruire(ventes) ; il est reconstruit immédiatement depuis
+        l'historique puis mis à jour à chaque écriture.
+        """
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            self.synchroniser()
+            observateur.reconstruire(self.iter_ventes())
+            self._observateurs.append(observateur)
+
+    def retirer_observateur(self, observateur):
+        """Désabonne une structure dérivée."""
+        if observateur in self._observateurs:
+            self._observateurs.remove(observateur)
+
+    def _reconstruire_observateurs(self):
+        """Reconstruit les structures dérivées après un rechargement complet."""
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            for observateur in self._observateurs:
+                observateur.reconstruire(self.iter_ventes())
+
+    def synchroniser(self):
+        """Intègre les ventes écrites par d'autres processus depuis le dernier chargement.
 
+        Un simple stat suffit quand rien n'a changé. Au format CSV, les ventes
+        ajoutées en fin de fichier sont lues à partir de l'ancienne taille et
+        intégrées une à une (VENTE_ENREGISTREE) ; toute autre modification
+        (annulation, réécriture) provoque un rechargement complet
+        (VENTES_RECHARGEES).
+
+        Returns:
+            bool: True si le fichier avait changé
+        """
+        if signature_fichier(self.stockage.chemin) == self._signature:
+            return False
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            signature = signature_fichier(self.stockage.chemin)
+            ancienne, self._signature = self._signature, signature
+            if signature == ancienne:
+                return False
+            if (isinstance(self.stockage, StockageVentesCSV) and ancienne is not None and signature is not None
+                    and signature.inode == ancienne.inode and signature.taille > ancienne.taille):
+                ventes, _ = self.stockage.lire_depuis(ancienne.taille)
+                journal.info(f"{len(ventes)} vente(s) ajoutée(s) par un autre processus")
+                for vente in ventes:
+                    self._integrer(vente)
+                    self.bus.publier(VENTE_ENREGISTREE, vente=vente)
+            else:
+                journal.info(f"{self.fichier_ventes} modifié par un autre processus : rechargement")
+                self.cache.vider()
+                self._agregats = None
+                if self._ventes is not None:
+                    self._ventes = None
+                    self._materialiser()
+                self._reconstruire_observateurs()
+                self.bus.publier(VENTES_RECHARGEES)
+        return True
+
+    def _integrer(self, vente):
+        """Ajoute une vente à l'état en mémoire (liste, agrégats, observateurs, cache)."""
+        if self._ventes is not None:
+            self._ventes.append(vente)
+        self._invalider_vente(vente)
+        if self._agregats is not None:
+            self._agregats.ajouter(vente)
+        for observateur in self._observateurs:
+            observateur.ajouter(vente)
+
+    @par_lot('enregistrer_ventes', valider_vente)
+    @mesurer("ventes.enregistrer")
     def enregistrer_vente(self, film_id, titre_film, quantite, prix_unitaire):
         """Enregistre une nouvelle vente."""
-        # Générer un nouvel ID
-        nouveau_id = max([vente['id'] for vente in self.ventes], default=0) + 1
-        
-        # Utiliser une date basée sur la dernière vente + quelques minutes
-        if self.ventes:
-            derniere_date = datetime.strptime(self.ventes[-1]['date'], "%Y-%m-%d %H:%M:%S")
-            nouvelle_date = derniere_date + timedelta(minutes=random.randint(15, 60))
-        else:
-            nouvelle_date = datetime(2025, 1, 1, 9, 0)  # Commencer au 1er janvier 2025 à 9h
+        return self.enregistrer_ventes([{'film_id': film_id, 'titre_film': titre_film,
+                                         'quantite': quantite, 'prix_unitaire': prix_unitaire}])[0]
+
+    @mesurer("ventes.enregistrer_lot")
+    @modification
+    def enregistrer_ventes(self, lignes):
+        """Enregistre plusieurs ventes en un seul ajout au fichier.
+
+        Args:
+            lignes (list): Dictionnaires film_id, titre_film, quantite, prix_unitaire
+
+        Returns:
+            list: Les ventes enregistrées, dans l'ordre de `lignes`
+
+        Raises:
+            ValueError: Si une ligne est invalide (rien n'est alors enregistré)
+        """
+        # Toutes les lignes sont vérifiées avant la première modification
+        lignes = [valider_vente(ligne) for ligne in lignes]
+        # Générer les nouveaux ID
+        dernier_id = max([vente['id'] for vente in self.ventes], default=0)
         
-        vente = {
-            'id': nouveau_id,
-            'date': nouvelle_date.strftime("%Y-%m-%d %H:%M:%S"),
-            'film_id': film_id,
-            'titre_film': titre_film,
-            'quantite': quantite,
-            'prix_unitaire': prix_unitaire,
-            'total': quantite * prix_unitaire
-        }
-        self.ventes.append(vente)
-        self._sauvegarder_ventes()
-        return vente
+        nouvelles = []
+        for ligne in lignes:
+            # Utiliser une date basée sur la dernière vente + quelques minutes
+            if self.ventes:
+                instant = self.ventes[-1]['horodatage'] + 60 * random.randint(15, 60)
+            else:
+                instant = horodatage(datetime(2025, 1, 1, 9, 0))  # Commencer au 1er janvier 2025 à 9h
+            
+            dernier_id += 1
+            quantite, prix_unitaire = ligne['quantite'], ligne['prix_unitaire']
+            vente = {
+                'id': dernier_id,
+                'date': formater(instant),
+                'horodatage': instant,
+                'film_id': ligne['film_id'],
+                'titre_film': ligne['titre_film'],
+                'quantite': quantite,
+                'prix_unitaire': prix_unitaire,
+                'total': quantite * prix_unitaire
+            }
+            self._integrer(vente)
+            nouvelles.append(vente)
+        # Ajouter les ventes à la fin du fichier plutôt que tout réécrire
+        taille_avant = taille_fichier(self.stockage.chemin)
+        self.stockage.ajouter(nouvelles)
+        self._signature = signature_fichier(self.stockage.chemin)
+        compter_octets("ventes.enregistrer", max(0, self._signature.taille - taille_avant))
+        for vente in nouvelles:
+            self.bus.publier(VENTE_ENREGISTREE, vente=vente)
+        return nouvelles
 
     def charger_ventes(self):
-        """Charge l'historique des ventes depuis le fichier CSV."""
+        """Recharge l'historique complet des ventes depuis le fichier."""
+        self._ventes = None
+        self.cache.vider()
+        self._materialiser()
+        self._reconstruire_observateurs()
+        self.bus.publier(VENTES_RECHARGEES)
+
+    @mesurer("ventes.charger")
+    def _materialiser(self):
+        """Charge l'historique complet des ventes en mémoire."""
+        # Verrou partagé : pas d'écriture d'un autre processus pendant la lecture
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            self.synchroniser()
+            self._ventes = []
+            self._agregats = None
+            try:
+                self._ventes.extend(self._lire_stockage())
+            except FileNotFoundError:
+                journal.warning(f"Le fichier {self.fichier_ventes} n'existe pas encore.")
+            except Exception as e:
+                journal.error(f"Erreur lors du chargement des ventes: {str(e)}", exc_info=True)
+
+    def _lire_stockage(self, debut=None, fin=None, film_id=None):
+        """Lit les ventes du stockage, ligne par ligne dans le journal si DEBUG est actif."""
+        ventes = self.stockage.lire(debut, fin, film_id)
+        # Niveau testé une fois par lecture : aucun coût par ligne hors DEBUG
+        if journal.isEnabledFor(logging.DEBUG):
+            ventes = tracer_lignes(journal, ventes, "Vente lue")
+        return ventes
+
+    def iter_ventes(self, debut=None, fin=None, film_id=None):
+        """Parcourt les ventes d'une période sans matérialiser tout l'historique.
+
+        Si la liste complète est déjà en mémoire elle est utilisée, sinon le
+        fichier est lu en flux et seules les ventes de la période sont converties
+        (au format "blocs", les blocs hors période sont même ignorés).
+
+        Args:
+            debut (datetime, str ou int, optional): Date de début (incluse)
+            fin (datetime, str ou int, optional): Date de fin (incluse)
+            film_id (int, optional): Ne garder que les ventes de ce film
+
+        Yields:
+            dict: Les ventes typées (id, date, horodatage, film_id, titre_film,
+                quantite, prix_unitaire, total)
+        """
+        # Bornes converties une fois en horodatages : la comparaison se fait sur des entiers
+        debut = horodatage(debut, arrondi_superieur=True)
+        fin = horodatage(fin)
+        if self._ventes is not None:
+            for vente in self._ventes:
+                instant = vente['horodatage']
+                if (debut is None or instant >= debut) and (fin is None or instant <= fin) \
+                        and (film_id is None or vente['film_id'] == film_id):
+                    yield vente
+            return
         try:
-            with open(self.fichier_ventes, 'r', encoding='utf-8', newline='') as f:
-                reader = csv.DictReader(f)
-                self.ventes = []
-                for row in reader:
-                    vente = {
-                        'id': int(row['id']),
-                        'date': row['date'],
-                        'film_id': int(row['film_id']),
-                        'titre_film': row['titre_film'],
-                        'quantite': int(row['quantite']),
-                        'prix_unitaire': float(row['prix_unitaire']),
-                        'total': float(row['total'])
-                    }
-                    self.ventes.append(vente)
-                    print(f"Chargement de la vente: {vente}")
+            yield from self._lire_stockage(debut, fin, film_id)
         except FileNotFoundError:
-            print(f"Le fichier {self.fichier_ventes} n'existe pas encore.")
-        except Exception as e:
-            print(f"Erreur lors du chargement des ventes: {str(e)}")    
+            return
 
+    @differable
+    @mesurer("ventes.sauvegarder")
     def _sauvegarder_ventes(self):
-        """Sauvegarde les ventes dans le fichier CSV."""
-        with open(self.fichier_ventes, 'w', encoding='utf-8', newline='') as f:
-            fieldnames = ['id', 'date', 'film_id', 'titre_film', 'quantite', 
-                         'prix_unitaire', 'total']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for vente in self.ventes:
-                writer.writerow(vente)
+        """Sauvegarde toutes les ventes dans le fichier."""
+        self.stockage.ecrire(self.ventes)
+        self._signature = signature_fichier(self.stockage.chemin)
+        compter_octets("ventes.sauvegarder", self._signature.taille)
+
+    def exporter_csv(self, chemin):
+        """Exporte l'historique des ventes au format CSV (quel que soit le stockage)."""
+        StockageVentesCSV(chemin).ecrire(self.iter_ventes())
 
     def calculer_revenu_total(self):
-        """Calcule le revenu total de toutes les ventes."""
-        return sum(vente['total'] for vente in self.ventes)
+        """Retourne le revenu total de toutes les ventes (tenu à jour en continu)."""
+        return self.agregats.revenu_total
 
+    @mesurer("ventes.rapport")
     def obtenir_rapport_ventes(self, date_debut=None, date_fin=None):
-        """Génère un rapport des ventes pour une période donnée."""
-        ventes_filtrees = self.ventes
-        
-        if date_debut:
-            ventes_filtrees = [v for v in ventes_filtrees 
-                             if datetime.strptime(v['date'], "%Y-%m-%d %H:%M:%S") >= date_debut]
-        if date_fin:
-            ventes_filtrees = [v for v in ventes_filtrees 
-                             if datetime.strptime(v['date'], "%Y-%m-%d %H:%M:%S") <= date_fin]
+        """Génère un rapport des ventes pour une période donnée.
+
+        Pour des bornes sur des heures entières, le rapport est tiré des
+        cumuls du cube ; sinon il est calculé en une seule passe sur
+        iter_ventes, sans liste intermédiaire. Il est gardé en cache par période jusqu'à l'enregistrement ou
+        l'annulation d'une vente de cette période.
+        """
+        debut = horodatage(date_debut or None, arrondi_superieur=True)
+        fin = horodatage(date_fin or None)
+        return self.cache.obtenir(('rapport', debut, fin), lambda: self._calculer_rapport(debut, fin))
+
+    def _invalider_vente(self, vente):
+        """Retire du cache les rapports dont la période contient `vente`."""
+        instant = vente['horodatage']
+        self.cache.invalider_si(lambda cle: cle[0] == 'rapport'
+                                and (cle[1] is None or cle[1] <= instant)
+                                and (cle[2] is None or instant <= cle[2]))
 
+    def _calculer_rapport(self, debut, fin):
+        """Calcule le rapport des ventes entre deux horodatages (bornes incluses).
+
+        Des bornes sur des heures entières (ou absentes) sont lues dans le
+        cube ; les autres demandent une passe sur les ventes de la période.
+        """
+        heures = _heures_entieres(debut, fin)
+        if heures is not None:
+            return self._rapport_cube(*heures)
         rapport = {
-            'nombre_ventes': len(ventes_filtrees),
-            'revenu_total': sum(v['total'] for v in ventes_filtrees),
+            'nombre_ventes': 0,
+            'revenu_total': 0,
             'ventes_par_film': {},
-            'quantite_totale': sum(v['quantite'] for v in ventes_filtrees),
+            'quantite_totale': 0,
             'ventes_par_jour': {},
             'moyenne_vente': 0,
             'plus_grosse_vente': None,
@@ -113,7 +424,11 @@ class GestionVentes:
         }
 
         # Calcul des ventes par film et autres statistiques
-        for vente in ventes_filtrees:
+        for vente in self.iter_ventes(debut, fin):
+            rapport['nombre_ventes'] += 1
+            rapport['revenu_total'] += vente['total']
+            rapport['quantite_totale'] += vente['quantite']
+
             # Ventes par film
             if vente['titre_film'] not in rapport['ventes_par_film']:
                 rapport['ventes_par_film'][vente['titre_film']] = {
@@ -134,43 +449,93 @@ class GestionVentes:
             rapport['ventes_par_jour'][date_jour]['revenu'] += vente['total']
             
             # Plus grosse vente
-            if (not rapport['plus_grosse_vente'] or 
-                vente['total'] > rapport['plus_grosse_vente']['total']):
+            if rapport['plus_grosse_vente'] is None or plus_grosse(vente, rapport['plus_grosse_vente']):
                 rapport['plus_grosse_vente'] = vente
 
         # Calcul de la moyenne des ventes
         if rapport['nombre_ventes'] > 0:
             rapport['moyenne_vente'] = rapport['revenu_total'] / rapport['nombre_ventes']
 
-        # Films les plus vendus (top 3)
-        films_tries = sorted(rapport['ventes_par_film'].items(), 
-                           key=lambda x: x[1]['quantite'], 
-                           reverse=True)
-        rapport['films_plus_vendus'] = films_tries[:3]
+        # Films les plus vendus (top 3) : sélection par tas, sans trier tous les films
+        rapport['films_plus_vendus'] = heapq.nlargest(3, rapport['ventes_par_film'].items(),
+                                                      key=lambda x: x[1]['quantite'])
 
         return rapport
 
+    def _rapport_cube(self, premiere, derniere):
+        """Rapport des ventes d'une plage d'heures entières, tiré des cumuls du cube."""
+        with verrou_fichier(self.fichier_verrou, exclusif=False):
+            self.synchroniser()
+            cube = self.cube
+            resume = cube.resume(premiere, derniere)
+            # Heures dont la plus grosse vente a été annulée : relues une fois
+            for heure, vente in resume['plus_grosses'].items():
+                if vente is None:
+                    debut = horodatage(f"{heure}:00:00")
+                    # Deux heures, pour l'heure répétée d'un changement d'heure
+                    for candidate in self.iter_ventes(debut, debut + 7199):
+                        if candidate['date'][:13] == heure and (vente is None or plus_grosse(candidate, vente)):
+                            vente = candidate
+                    cube.fixer_plus_grosse(heure, vente)
+                    resume['plus_grosses'][heure] = vente
+        quantite, revenu, nombre = resume['totaux']
+        ventes_par_film = {}
+        for film_id, (quantite_film, revenu_film, _) in resume['par_film'].items():
+            cumul = ventes_par_film.setdefault(cube.titres[film_id], {'quantite': 0, 'revenu': 0})
+            cumul['quantite'] += quantite_film
+            cumul['revenu'] += revenu_film
+        plus_grosse_vente = None
+        for vente in resume['plus_grosses'].values():
+            if vente is not None and (plus_grosse_vente is None or plus_grosse(vente, plus_grosse_vente)):
+                plus_grosse_vente = vente
+        return {
+            'nombre_ventes': nombre,
+            'revenu_total': revenu if nombre else 0,
+            'ventes_par_film': ventes_par_film,
+            'quantite_totale': quantite,
+            'ventes_par_jour': {jour: {'nombre_ventes': n, 'revenu': r}
+                                for jour, (_, r, n) in sorted(resume['par_jour'].items())},
+            'moyenne_vente': revenu / nombre if nombre else 0,
+            'plus_grosse_vente': plus_grosse_vente,
+            'films_plus_vendus': heapq.nlargest(3, ventes_par_film.items(), key=lambda x: x[1]['quantite'])
+        }
+
+    @modification
     def annuler_vente(self, vente_id):
         """Annule une vente spécifique."""
         for i, vente in enumerate(self.ventes):
             if vente['id'] == vente_id:
                 del self.ventes[i]
+                self._invalider_vente(vente)
+                if self._agregats is not None:
+                    self._agregats.retirer(vente)
+                for observateur in self._observateurs:
+                    observateur.retirer(vente)
                 self._sauvegarder_ventes()
+                self.bus.publier(VENTE_ANNULEE, vente=vente)
                 return True
         return False
 
+    @modification
     def reinitialiser_dates_ventes(self):
         """Réinitialise toutes les dates de vente à la date actuelle."""
-        date_actuelle = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        instant = horodatage(datetime.now())
+        date_actuelle = formater(instant)
         for vente in self.ventes:
             vente['date'] = date_actuelle
+            vente['horodatage'] = instant
+        self._agregats = None
+        self.cache.vider()
         self._sauvegarder_ventes()
+        self._reconstruire_observateurs()
+        self.bus.publier(VENTES_RECHARGEES)
 
     def mettre_a_jour_horloge(self):
         """Met à jour l'horloge interne avec l'heure système actuelle."""
         self.derniere_synchro = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         return self.derniere_synchro
 
+    @mesurer("ventes.filtrer_par_periode")
     def filtrer_par_periode(self, debut=None, fin=None):
         """Filtre les ventes par période.
         
@@ -181,22 +546,13 @@ class GestionVentes:
         if fin is None:
             fin = datetime.now()
         
-        ventes_filtrees = self.ventes
-        if debut:
-            ventes_filtrees = [v for v in ventes_filtrees 
-                             if datetime.strptime(v['date'], "%Y-%m-%d %H:%M:%S") >= debut]
-        if fin:
-            ventes_filtrees = [v for v in ventes_filtrees 
-                             if datetime.strptime(v['date'], "%Y-%m-%d %H:%M:%S") <= fin]
-        
-        return ventes_filtrees
+        return list(self.iter_ventes(debut or None, fin))
 
     def trier_par_date(self, descendant=True):
         """Trie les ventes par date."""
-        return sorted(self.ventes, 
-                     key=lambda x: datetime.strptime(x['date'], "%Y-%m-%d %H:%M:%S"), 
-                     reverse=descendant)
+        return sorted(self.ventes, key=lambda x: x['horodatage'], reverse=descendant)
 
+    @modification
     def generer_ventes_fictives(self, films):
         """Génère des ventes fictives à partir du 1er janvier 2025."""
         from datetime import datetime, timedelta
@@ -222,6 +578,7 @@ class GestionVentes:
                 heure = random.randint(9, 21)  # Entre 9h et 21h
                 minute = random.randint(0, 59)
                 date_vente = current_date.replace(hour=heure, minute=minute)
+                instant = horodatage(date_vente)
                 
                 # Générer une quantité et un prix aléatoires
                 quantite = random.randint(1, 5)  # Augmenter la quantité max possible
@@ -230,7 +587,8 @@ class GestionVentes:
                 # Créer la vente
                 vente = {
                     'id': len(self.ventes) + 1,
-                    'date': date_vente.strftime("%Y-%m-%d %H:%M:%S"),
+                    'date': formater(instant),
+                    'horodatage': instant,
                     'film_id': film['id'],
                     'titre_film': film['titre'],
                     'quantite': quantite,
@@ -242,7 +600,9 @@ class GestionVentes:
             current_date += timedelta(days=1)
         
         # Trier les ventes par date
-        self.ventes.sort(key=lambda x: x['date'])
+        self.ventes.sort(key=lambda x: x['horodatage'])
         
         # Sauvegarder les ventes générées
         self._sauvegarder_ventes()
+        self._reconstruire_observateurs()
+        self.bus.publier(VENTES_RECHARGEES)
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module des formats de stockage de l'historique des ventes.
+
+Deux formats sont disponibles (clé "format_ventes" de config/config.json) :
+
+- "csv" : le fichier ventes.csv historique, lu en flux ligne par ligne ;
+- "blocs" : un fichier binaire découpé en blocs de lignes. Chaque bloc stocke
+  ses colonnes à la suite (IDs, dates, films, quantités, prix, totaux, titres)
+  et un pied de fichier liste, pour chaque bloc, son emplacement ainsi que les
+  dates et IDs de film minimum et maximum. Une requête sur une période ou un
+  film ignore ainsi les blocs qui ne peuvent pas contenir de résultat, et le
+  fichier est lu par projection mémoire (mmap) sans tout charger.
+
+Chaque vente lue reçoit, en plus des champs du fichier, son 'horodatage'
+(secondes UTC, voir dates.horodatage) : les filtres par période comparent
+des entiers.
+
+Disposition du fichier "blocs" :
+
+    en-tête   : MAGIC (4 octets) + version (uint16) + réservé (uint16)
+    bloc i    : ids int64[n] | dates 19 octets[n] | film_id int32[n]
+                | quantite int32[n] | prix_unitaire float64[n] | total float64[n]
+                | décalages des titres uint32[n + 1] | titres UTF-8
+    pied      : une entrée FORMAT_ENTREE par bloc
+    fin       : nombre de blocs (uint32) + position du pied (uint64) + MAGIC
+
+Un ajout ne réécrit que la fin du fichier, en place : le dernier bloc s'il
+est incomplet (complété), les nouveaux blocs puis le pied. Son coût ne
+dépend pas de la taille de l'historique, et le fichier ne fait que grandir.
+L'ancienne fin est d'abord copiée dans un journal "<fichier>.journal"
+(écrit sur disque avant toute modification, supprimé une fois l'ajout sur
+disque) : après un arrêt brutal pendant l'ajout, le journal restant est
+recopié à sa place au prochain accès et le fichier revient à l'ancienne
+version. Les lecteurs d'autres processus sont tenus à l'écart par le
+verrou du fichier (voir concurrence.fichiers). Une réécriture complète
+(ecrire) remplace le fichier d'un coup.
+"""
+
+import contextlib
+import csv
+import io
+import itertools
+import mmap
+import os
+import struct
+from array import array
+
+from ..concurrence.fichiers import ecriture_atomique
+from ..dates.horodatage import horodatage_fixe
+
+CHAMPS_VENTE = ['id', 'date', 'film_id', 'titre_film', 'quantite', 'prix_unitaire', 'total']
+
+MAGIC = b'CFVB'
+VERSION = 1
+FORMAT_EN_TETE = struct.Struct('<4sHH')
+# position, longueur, nombre de lignes, date min, date max, film min, film max
+FORMAT_ENTREE = struct.Struct('<QQI19s19sii')
+FORMAT_FIN = struct.Struct('<IQ4s')
+# MAGIC, position de l'ancienne fin, ancienne taille du fichier
+FORMAT_JOURNAL = struct.Struct('<4sQQ')
+LARGEUR_DATE = 19
+
+# Nombre de lignes par bloc
+TAILLE_BLOC = 8192
+
+
+class StockageVentesCSV:
+    """Stockage des ventes dans un fichier CSV."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+
+    def existe(self):
+        """Indique si le fichier existe."""
+        return os.path.exists(self.chemin)
+
+    def lire(self, debut=None, fin=None, film_id=None):
+        """Lit les ventes en flux en ne convertissant que celles qui correspondent.
+
+        Args:
+            debut (int, optional): Horodatage minimal (inclus)
+            fin (int, optional): Horodatage maximal (inclus)
+            film_id (int, optional): Ne garder que les ventes de ce film
+
+        Yields:
+            dict: Les ventes typées
+        """
+        with open(self.chemin, 'r', encoding='utf-8', newline='') as f:
+            yield from _convertir_lignes(csv.DictReader(f), debut, fin, film_id)
+
+    def lire_depuis(self, position):
+        """Lit les ventes ajoutées après la position `position` (en octets) du fichier.
+
+        Sert à intégrer les ventes ajoutées par un autre processus sans tout relire.
+
+        Returns:
+            tuple: (liste des ventes, nouvelle position)
+        """
+        with open(self.chemin, 'rb') as brut:
+            brut.seek(position)
+            f = io.TextIOWrapper(brut, encoding='utf-8', newline='')
+            ventes = list(_convertir_lignes(csv.DictReader(f, fieldnames=CHAMPS_VENTE)))
+            f.detach()
+            return ventes, brut.tell()
+
+    def ecrire(self, ventes):
+        """Réécrit tout le fichier (remplacé d'un coup : les lecteurs ne voient jamais un fichier partiel)."""
+        with ecriture_atomique(self.chemin, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CHAMPS_VENTE, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(ventes)
+
+    def ajouter(self, ventes):
+        """Ajoute des ventes à la fin du fichier sans le réécrire."""
+        if not self.existe() or os.path.getsize(self.chemin) == 0:
+            self.ecrire(ventes)
+            return
+        # S'assurer que la dernière ligne se termine bien par un retour à la ligne
+        with open(self.chemin, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            fin_ligne = f.read(1) in (b'\n', b'\r')
+        with open(self.chemin, 'a', encoding='utf-8', newline='') as f:
+            if not fin_ligne:
+                f.write('\r\n')
+            writer = csv.DictWriter(f, fieldnames=CHAMPS_VENTE, extrasaction='ignore')
+            writer.writerows(ventes)
+
+
+def _convertir_lignes(lecteur, debut=None, fin=None, film_id=None):
+    """Convertit les lignes d'un csv.DictReader de ventes qui passent les filtres."""
+    film_id = None if film_id is None else str(film_id)
+    for row in lecteur:
+        if film_id is not None and row['film_id'] != film_id:
+            continue
+        date = row['date']
+        instant = horodatage_fixe(date)
+        if (debut is not None and instant < debut) or (fin is not None and instant > fin):
+            continue
+        yield {
+            'id': int(row['id']),
+            'date': date,
+            'horodatage': instant,
+            'film_id': int(row['film_id']),
+            'titre_film': row['titre_film'],
+            'quantite': int(row['quantite']),
+            'prix_unitaire': float(row['prix_unitaire']),
+            'total': float(row['total'])
+        }
+
+
+def _encoder_bloc(ventes):
+    """Encode une liste de ventes en un bloc binaire.
+
+    Returns:
+        tuple: (octets du bloc, entrée du pied sans la position)
+    """
+    ids = array('q', (v['id'] for v in ventes))
+    dates = b''.join(v['date'].encode('ascii') for v in ventes)
+    films = array('i', (v['film_id'] for v in ventes))
+    quantites = array('i', (v['quantite'] for v in ventes))
+    prix = array('d', (v['prix_unitaire'] for v in ventes))
+    totaux = array('d', (v['total'] for v in ventes))
+
+    titres = [v['titre_film'].encode('utf-8') for v in ventes]
+    decalages = array('I', [0])
+    position = 0
+    for titre in titres:
+        position += len(titre)
+        decalages.append(position)
+
+    if len(dates) != LARGEUR_DATE * len(ventes):
+        raise ValueError("Date de vente au format invalide")
+
+    donnees = b''.join([
+        ids.tobytes(), dates, films.tobytes(), quantites.tobytes(),
+        prix.tobytes(), totaux.tobytes(), decalages.tobytes(), b''.join(titres)
+    ])
+    date_min = min(v['date'] for v in ventes)
+    date_max = max(v['date'] for v in ventes)
+    return donnees, (len(donnees), len(ventes), date_min.encode('ascii'),
+                     date_max.encode('ascii'), min(films), max(films))
+
+
+def _decoder_bloc(tampon, n):
+    """Décode les colonnes d'un bloc à partir d'un tampon (mmap ou bytes)."""
+    position = 0
+
+    def colonne(code, taille):
+        nonlocal position
+        valeurs = array(code)
+        valeurs.frombytes(tampon[position:position + taille * n])
+        position += taille * n
+        return valeurs
+
+    ids = colonne('q', 8)
+    dates = bytes(tampon[position:position + LARGEUR_DATE * n]).decode('ascii')
+    position += LARGEUR_DATE * n
+    films = colonne('i', 4)
+    quantites = colonne('i', 4)
+    prix = colonne('d', 8)
+    totaux = colonne('d', 8)
+    decalages = array('I')
+    decalages.frombytes(tampon[position:position + 4 * (n + 1)])
+    position += 4 * (n + 1)
+    titres = bytes(tampon[position:position + decalages[-1]])
+    return ids, dates, films, quantites, prix, totaux, decalages, titres
+
+
+class StockageVentesBlocs:
+    """Stockage des ventes dans un fichier binaire découpé en blocs."""
+
+    def __init__(self, chemin, taille_bloc=TAILLE_BLOC):
+        self.chemin = chemin
+        self.taille_bloc = taille_bloc
+        # Ancienne fin du fichier pendant un ajout (voir ajouter)
+        self.chemin_journal = f"{chemin}.journal"
+
+    def existe(self):
+        """Indique si le fichier existe."""
+        return os.path.exists(self.chemin)
+
+    def _journaliser(self, position, fin):
+        """Sauve sur disque l'ancienne fin du fichier (octets à partir de `position`)."""
+        with ecriture_atomique(self.chemin_journal, 'wb') as j:
+            j.write(FORMAT_JOURNAL.pack(MAGIC, position, position + len(fin)))
+            j.write(fin)
+            j.flush()
+            os.fsync(j.fileno())
+
+    def _restaurer(self):
+        """Annule un ajout interrompu en recopiant l'ancienne fin sauvée dans le journal.
+
+        Sans journal, ne fait rien. La restauration peut être refaite sans
+        dommage si elle est elle-même interrompue.
+        """
+        try:
+            with open(self.chemin_journal, 'rb') as j:
+                magic, position, taille = FORMAT_JOURNAL.unpack(j.read(FORMAT_JOURNAL.size))
+                fin = j.read()
+        except FileNotFoundError:
+            return
+        except struct.error:
+            raise ValueError(f"Journal {self.chemin_journal} invalide") from None
+        if magic != MAGIC or len(fin) != taille - position:
+            raise ValueError(f"Journal {self.chemin_journal} invalide")
+        with open(self.chemin, 'r+b') as f:
+            f.seek(position)
+            f.write(fin)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.remove(self.chemin_journal)
+        except FileNotFoundError:
+            pass
+
+    def _lire_pied(self, f):
+        """Lit la liste des blocs depuis le pied du fichier.
+
+        Returns:
+            list: Tuples (position, longueur, n, date_min, date_max, film_min, film_max)
+
+        Raises:
+            ValueError: Fichier tronqué ou dont l'en-tête, le pied ou les blocs sont incohérents
+        """
+        f.seek(0, os.SEEK_END)
+        taille = f.tell()
+        if taille < FORMAT_EN_TETE.size + FORMAT_FIN.size:
+            raise ValueError(f"Fichier de ventes {self.chemin} tronqué")
+        f.seek(0)
+        magic, version, _ = FORMAT_EN_TETE.unpack(f.read(FORMAT_EN_TETE.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Fichier de ventes {self.chemin} invalide")
+        f.seek(taille - FORMAT_FIN.size)
+        nb_blocs, position_pied, magic = FORMAT_FIN.unpack(f.read(FORMAT_FIN.size))
+        if magic != MAGIC or position_pied + nb_blocs * FORMAT_ENTREE.size != taille - FORMAT_FIN.size:
+            raise ValueError(f"Fichier de ventes {self.chemin} tronqué ou invalide")
+        f.seek(position_pied)
+        brut = f.read(nb_blocs * FORMAT_ENTREE.size)
+        entrees = [
+            (pos, longueur, n, dmin.decode('ascii'), dmax.decode('ascii'), fmin, fmax)
+            for pos, longueur, n, dmin, dmax, fmin, fmax in FORMAT_ENTREE.iter_unpack(brut)
+        ]
+        if any(pos < FORMAT_EN_TETE.size or pos + longueur > position_pied for pos, longueur, *_ in entrees):
+            raise ValueError(f"Fichier de ventes {self.chemin} invalide (bloc hors du fichier)")
+        return entrees
+
+    def blocs(self):
+        """Retourne la description des blocs du fichier (pour inspection)."""
+        self._restaurer()
+        with open(self.chemin, 'rb') as f:
+            return self._lire_pied(f)
+
+    def lire(self, debut=None, fin=None, film_id=None):
+        """Lit les ventes en sautant les blocs hors de la période ou du film demandé.
+
+        Args:
+            debut (int, optional): Horodatage minimal (inclus)
+            fin (int, optional): Horodatage maximal (inclus)
+            film_id (int, optional): Ne garder que les ventes de ce film
+
+        Yields:
+            dict: Les ventes typées
+        """
+        self._restaurer()
+        with open(self.chemin, 'rb') as f:
+            entrees = self._lire_pied(f)
+            if not entrees:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for pos, longueur, n, date_min, date_max, film_min, film_max in entrees:
+                    if debut is not None and horodatage_fixe(date_max) < debut:
+                        continue
+                    if fin is not None and horodatage_fixe(date_min) > fin:
+                        continue
+                    if film_id is not None and not film_min <= film_id <= film_max:
+                        continue
+                    yield from self._lignes_bloc(mm[pos:pos + longueur], n, debut, fin, film_id)
+
+    def _lignes_bloc(self, tampon, n, debut, fin, film_id):
+        """Convertit les lignes d'un bloc qui passent les filtres."""
+        ids, dates, films, quantites, prix, totaux, decalages, titres = _decoder_bloc(tampon, n)
+        for i in range(n):
+            if film_id is not None and films[i] != film_id:
+                continue
+            date = dates[i * LARGEUR_DATE:(i + 1) * LARGEUR_DATE]
+            instant = horodatage_fixe(date)
+            if (debut is not None and instant < debut) or (fin is not None and instant > fin):
+                continue
+            yield {
+                'id': ids[i],
+                'date': date,
+                'horodatage': instant,
+                'film_id': films[i],
+                'titre_film': titres[decalages[i]:decalages[i + 1]].decode('utf-8'),
+                'quantite': quantites[i],
+                'prix_unitaire': prix[i],
+                'total': totaux[i]
+            }
+
+    def _ecrire_blocs(self, f, ventes, entrees):
+        """Écrit les ventes par blocs à la position courante puis le pied."""
+        lot = []
+        for vente in ventes:
+            lot.append(vente)
+            if len(lot) == self.taille_bloc:
+                self._ecrire_bloc(f, lot, entrees)
+                lot = []
+        if lot:
+            self._ecrire_bloc(f, lot, entrees)
+
+        position_pied = f.tell()
+        for entree in entrees:
+            f.write(FORMAT_ENTREE.pack(*entree))
+        f.write(FORMAT_FIN.pack(len(entrees), position_pied, MAGIC))
+        f.truncate()
+
+    def _ecrire_bloc(self, f, lot, entrees):
+        donnees, (longueur, n, dmin, dmax, fmin, fmax) = _encoder_bloc(lot)
+        entrees.append((f.tell(), longueur, n, dmin, dmax, fmin, fmax))
+        f.write(donnees)
+
+    def ecrire(self, ventes):
+        """Réécrit tout le fichier à partir d'un itérable de ventes."""
+        # Un journal restant ne doit pas s'appliquer au nouveau fichier
+        self._restaurer()
+        with ecriture_atomique(self.chemin, 'wb') as f:
+            f.write(FORMAT_EN_TETE.pack(MAGIC, VERSION, 0))
+            self._ecrire_blocs(f, ventes, [])
+
+    def ajouter(self, ventes):
+        """Ajoute des ventes (itérable parcouru une seule fois) en réécrivant seulement la fin du fichier.
+
+        Les blocs complets ne sont ni relus ni recopiés ; seul le dernier
+        bloc, s'il est incomplet, est relu pour être complété. Si l'ajout
+        échoue, le fichier est remis dans son état d'origine.
+        """
+        if not self.existe():
+            self.ecrire(ventes)
+            return
+        self._restaurer()
+        with open(self.chemin, 'r+b') as f:
+            entrees = [(pos, longueur, n, dmin.encode('ascii'), dmax.encode('ascii'), fmin, fmax)
+                       for pos, longueur, n, dmin, dmax, fmin, fmax in self._lire_pied(f)]
+            a_ecrire = ventes
+            if entrees and entrees[-1][2] < self.taille_bloc:
+                pos, longueur, n = entrees.pop()[:3]
+                f.seek(pos)
+                a_ecrire = itertools.chain(list(self._lignes_bloc(f.read(longueur), n, None, None, None)),
+                                           ventes)
+            fin_blocs = entrees[-1][0] + entrees[-1][1] if entrees else FORMAT_EN_TETE.size
+            f.seek(fin_blocs)
+            self._journaliser(fin_blocs, f.read())
+            try:
+                f.seek(fin_blocs)
+                self._ecrire_blocs(f, a_ecrire, entrees)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                # Fermer d'abord : rien ne doit être vidé sur disque après la restauration
+                with contextlib.suppress(OSError):
+                    f.close()
+                self._restaurer()
+                raise
+        os.remove(self.chemin_journal)
+
+    def exporter_csv(self, chemin_csv):
+        """Exporte tout l'historique au format CSV."""
+        StockageVentesCSV(chemin_csv).ecrire(self.lire())
+
+
+def creer_stockage(fichier_ventes, format_ventes="csv"):
+    """Crée le stockage correspondant au format configuré.
+
+    Pour le format "blocs", le fichier binaire porte le même nom que le CSV
+    avec l'extension .blocs ; il est créé à partir du CSV existant au premier
+    usage.
+
+    Args:
+        fichier_ventes (str): Chemin du fichier CSV des ventes
+        format_ventes (str): "csv" ou "blocs"
+    """
+    if format_ventes == "csv":
+        return StockageVentesCSV(fichier_ventes)
+    if format_ventes != "blocs":
+        raise ValueError(f"Format de ventes inconnu : {format_ventes}")
+
+    stockage = StockageVentesBlocs(os.path.splitext(fichier_ventes)[0] + ".blocs")
+    if not stockage.existe() and os.path.exists(fichier_ventes):
+        stockage.ecrire(StockageVentesCSV(fichier_ventes).lire())
+    return stockage
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module du classement des films les plus vendus, tenu à jour en continu.
+
+Deux modes sont proposés :
+
+- "exact" : un compteur par film (depuis le début et pour chaque fenêtre
+  glissante), le classement est extrait avec un tas ;
+- "approx" : mémoire bornée grâce à l'algorithme Space-Saving, qui ne garde
+  que `capacite` compteurs et garantit de retrouver tout film dont la part des
+  ventes dépasse 1 / capacite (l'erreur de chaque compteur est connue).
+
+Les fenêtres glissantes (dernière heure, dernier jour, dernière semaine)
+sont découpées en tranches de même durée. Les tranches sorties de la
+fenêtre ne sont oubliées qu'à l'ajout d'une vente, par rapport à la date de
+la vente la plus récente (l'horloge d'insertion). Les requêtes ne modifient
+rien : elles retiennent les tranches qui recouvrent [maintenant - durée,
+maintenant], où maintenant est l'instant passé à top() ou, par défaut,
+l'horloge d'insertion.
+"""
+
+import heapq
+from collections import deque
+
+from ..dates.horodatage import horodatage, maintenant as instant_present
+
+FENETRES = {'heure': 3600, 'jour': 86400, 'semaine': 7 * 86400}
+MESURES = ('quantite', 'revenu')
+
+
+def _horodatage(vente):
+    """Retourne l'horodatage d'une vente (calculé au chargement par GestionVentes)."""
+    instant = vente.get('horodatage')
+    return instant if instant is not None else horodatage(vente['date'])
+
+
+class SpaceSaving:
+    """Résumé Space-Saving pondéré : au plus `capacite` compteurs.
+
+    Quand un film inconnu arrive et que le résumé est plein, il remplace le
+    compteur le plus faible et hérite de sa valeur (qui devient son erreur
+    maximale). Les valeurs sont donc surestimées d'au plus cette erreur.
+    """
+
+    def __init__(self, capacite=256):
+        self.capacite = capacite
+        self.compteurs = {}  # cle -> [valeur, erreur]
+        self._tas = []       # (valeur, cle), entrées périmées ignorées
+
+    def ajouter(self, cle, poids):
+        """Ajoute `poids` au compteur de `cle`."""
+        compteur = self.compteurs.get(cle)
+        if compteur is None:
+            if len(self.compteurs) < self.capacite:
+                compteur = self.compteurs[cle] = [0, 0]
+            else:
+                minimum, victime = self._minimum()
+                del self.compteurs[victime]
+                compteur = self.compteurs[cle] = [minimum, minimum]
+        compteur[0] += poids
+        heapq.heappush(self._tas, (compteur[0], cle))
+        if len(self._tas) > 4 * self.capacite:
+            self._tas = [(v, c) for c, (v, _) in self.compteurs.items()]
+            heapq.heapify(self._tas)
+
+    def _minimum(self):
+        """Retourne (valeur, clé) du plus petit compteur."""
+        while True:
+            valeur, cle = self._tas[0]
+            compteur = self.compteurs.get(cle)
+            if compteur is not None and compteur[0] == valeur:
+                return valeur, cle
+            heapq.heappop(self._tas)
+
+    def retirer(self, cle, poids):
+        """Retire `poids` d'un compteur suivi (vente annulée)."""
+        compteur = self.compteurs.get(cle)
+        if compteur is not None:
+            compteur[0] -= poids
+            if compteur[0] <= 0:
+                del self.compteurs[cle]
+            else:
+                heapq.heappush(self._tas, (compteur[0], cle))
+
+    def valeurs(self):
+        """Retourne {cle: valeur estimée}."""
+        return {cle: compteur[0] for cle, compteur in self.compteurs.items()}
+
+
+class _Compteurs:
+    """Compteurs quantité/revenu d'une tranche ou d'un total, exacts ou approchés."""
+
+    def __init__(self, mode, capacite):
+        self.mode = mode
+        if mode == 'exact':
+            self.mesures = {mesure: {} for mesure in MESURES}
+        else:
+            self.mesures = {mesure: SpaceSaving(capacite) for mesure in MESURES}
+
+    def ajouter(self, film_id, quantite, revenu, signe=1):
+        for mesure, poids in (('quantite', quantite), ('revenu', revenu)):
+            compteurs = self.mesures[mesure]
+            if self.mode == 'exact':
+                valeur = compteurs.get(film_id, 0) + signe * poids
+                if valeur > 0:
+                    compteurs[film_id] = valeur
+                else:
+                    compteurs.pop(film_id, None)
+            elif signe > 0:
+                compteurs.ajouter(film_id, poids)
+            else:
+                compteurs.retirer(film_id, poids)
+
+    def valeurs(self, mesure):
+        compteurs = self.mesures[mesure]
+        return compteurs if self.mode == 'exact' else compteurs.valeurs()
+
+
+class _Fenetre:
+    """Fenêtre glissante découpée en tranches de durée fixe."""
+
+    def __init__(self, duree, nb_tranches, mode, capacite):
+        self.duree = duree
+        self.largeur_tranche = max(1, duree // nb_tranches)
+        self.mode = mode
+        self.capacite = capacite
+        self.tranches = deque()  # [debut_tranche, _Compteurs]
+        # En mode exact, le total de la fenêtre est tenu à jour (ajout/expiration)
+        self.total = _Compteurs('exact', None) if mode == 'exact' else None
+
+    def _dans_fenetre(self, debut, maintenant):
+        """Indique si la tranche commençant à `debut` recouvre [maintenant - duree, maintenant]."""
+        return maintenant - self.duree < debut + self.largeur_tranche and debut <= maintenant
+
+    def _expirer(self, maintenant):
+        """Oublie les tranches entièrement antérieures à la fenêtre (appelé à l'insertion)."""
+        limite = maintenant - self.duree
+        while self.tranches and self.tranches[0][0] + self.largeur_tranche <= limite:
+            _, compteurs = self.tranches.popleft()
+            if self.total is not None:
+                for film_id, quantite in list(compteurs.valeurs('quantite').items()):
+                    revenu = compteurs.valeurs('revenu').get(film_id, 0)
+                    self.total.ajouter(film_id, quantite, revenu, signe=-1)
+
+    def ajouter(self, instant, film_id, quantite, revenu, maintenant):
+        """Ajoute une vente ; `maintenant` est l'horloge d'insertion (vente la plus récente)."""
+        debut = instant - instant % self.largeur_tranche
+        if debut + self.largeur_tranche <= maintenant - self.duree:
+            return  # Vente déjà hors de la fenêtre
+        tranche = None
+        for candidate in reversed(self.tranches):
+            if candidate[0] == debut:
+                tranche = candidate
+                break
+            if candidate[0] < debut:
+                break
+        if tranche is None:
+            tranche = [debut, _Compteurs(self.mode, self.capacite)]
+            self.tranches.append(tranche)
+            if len(self.tranches) > 1 and self.tranches[-2][0] > debut:
+                # Vente arrivée en retard : garder les tranches triées
+                self.tranches = deque(sorted(self.tranches, key=lambda t: t[0]))
+        tranche[1].ajouter(film_id, quantite, revenu)
+        if self.total is not None:
+            self.total.ajouter(film_id, quantite, revenu)
+        self._expirer(maintenant)
+
+    def retirer(self, instant, film_id, quantite, revenu):
+        debut = instant - instant % self.largeur_tranche
+        for tranche in self.tranches:
+            if tranche[0] == debut:
+                tranche[1].ajouter(film_id, quantite, revenu, signe=-1)
+                if self.total is not None:
+                    self.total.ajouter(film_id, quantite, revenu, signe=-1)
+                return
+
+    def valeurs(self, mesure, maintenant):
+        """Cumuls des tranches qui recouvrent [maintenant - duree, maintenant], sans rien modifier."""
+        if not self.tranches:
+            return {}
+        if (self.total is not None and self._dans_fenetre(self.tranches[0][0], maintenant)
+                and self._dans_fenetre(self.tranches[-1][0], maintenant)):
+            # Toutes les tranches gardées sont dans la fenêtre : total tenu à jour
+            return dict(self.total.valeurs(mesure))
+        fusion = {}
+        for debut, compteurs in self.tranches:
+            if self._dans_fenetre(debut, maintenant):
+                for film_id, valeur in compteurs.valeurs(mesure).items():
+                    fusion[film_id] = fusion.get(film_id, 0) + valeur
+        return fusion
+
+
+class TopVentes:
+    """Classement des films les plus vendus, alimenté par enregistrer_vente.
+
+    S'abonne à GestionVentes comme observateur :
+        top = TopVentes(k=10)
+        ventes.ajouter_observateur(top)
+        top.top('quantite', fenetre='jour')
+    """
+
+    def __init__(self, k=10, mode='exact', fenetres=('heure', 'jour', 'semaine'),
+                 nb_tranches=24, capacite=256):
+        """Initialise le classement.
+
+        Args:
+            k (int): Nombre de films retournés par défaut
+            mode (str): 'exact' ou 'approx' (mémoire bornée par `capacite`)
+            fenetres (tuple): Fenêtres glissantes suivies (clés de FENETRES)
+            nb_tranches (int): Nombre de tranches par fenêtre
+            capacite (int): Nombre de compteurs par résumé en mode approché
+        """
+        if mode not in ('exact', 'approx'):
+            raise ValueError(f"Mode inconnu : {mode}")
+        self.k = k
+        self.mode = mode
+        self.noms_fenetres = tuple(fenetres)
+        self.nb_tranches = nb_tranches
+        self.capacite = capacite
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Vide le classement."""
+        self.total = _Compteurs(self.mode, self.capacite)
+        self.fenetres = {
+            nom: _Fenetre(FENETRES[nom], self.nb_tranches, self.mode, self.capacite)
+            for nom in self.noms_fenetres
+        }
+        self.dernier_horodatage = None
+
+    def reconstruire(self, ventes):
+        """Reconstruit le classement depuis l'historique."""
+        self.reinitialiser()
+        for vente in ventes:
+            self.ajouter(vente)
+
+    def ajouter(self, vente):
+        """Prend en compte une nouvelle vente."""
+        instant = _horodatage(vente)
+        if self.dernier_horodatage is None or instant > self.dernier_horodatage:
+            self.dernier_horodatage = instant
+        film_id = vente['film_id']
+        self.total.ajouter(film_id, vente['quantite'], vente['total'])
+        for fenetre in self.fenetres.values():
+            fenetre.ajouter(instant, film_id, vente['quantite'], vente['total'],
+                            self.dernier_horodatage)
+
+    def retirer(self, vente):
+        """Retire une vente annulée."""
+        instant = _horodatage(vente)
+        film_id = vente['film_id']
+        self.total.ajouter(film_id, vente['quantite'], vente['total'], signe=-1)
+        for fenetre in self.fenetres.values():
+            fenetre.retirer(instant, film_id, vente['quantite'], vente['total'])
+
+    def valeurs(self, mesure='quantite', fenetre=None, maintenant=None):
+        """Retourne les compteurs {film_id: valeur} d'une mesure.
+
+        Args:
+            mesure (str): 'quantite' ou 'revenu'
+            fenetre (str, optional): 'heure', 'jour', 'semaine' ou None (depuis le début)
+            maintenant (datetime, optional): Fin de la fenêtre ; par défaut la
+                date de la vente la plus récente. Les tranches déjà oubliées
+                à l'insertion ne sont plus comptées.
+        """
+        if mesure not in MESURES:
+            raise ValueError(f"Mesure inconnue : {mesure}")
+        if fenetre is None:
+            return self.total.valeurs(mesure)
+        if fenetre not in self.fenetres:
+            raise ValueError(f"Fenêtre non suivie : {fenetre}")
+        if maintenant is not None:
+            maintenant = horodatage(maintenant)
+        else:
+            maintenant = self.dernier_horodatage or instant_present()
+        return self.fenetres[fenetre].valeurs(mesure, maintenant)
+
+    def top(self, mesure='quantite', fenetre=None, k=None, maintenant=None):
+        """Retourne les films les plus vendus.
+
+        Args:
+            mesure (str): 'quantite' ou 'revenu'
+            fenetre (str, optional): 'heure', 'jour', 'semaine' ou None (depuis le début)
+            k (int, optional): Nombre de films (self.k par défaut)
+            maintenant (datetime, optional): Fin de la fenêtre ; par défaut la
+                date de la vente la plus récente
+
+        Returns:
+            list: Tuples (film_id, valeur) triés par valeur décroissante
+        """
+        valeurs = self.valeurs(mesure, fenetre, maintenant)
+        return heapq.nlargest(k or self.k, valeurs.items(), key=lambda item: item[1])
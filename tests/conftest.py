@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Configuration commune des tests : racine du dépôt dans sys.path, et un
+dossier de travail temporaire où les gestionnaires trouvent donnees/ et
+config/ (ils utilisent des chemins relatifs).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+RACINE = Path(__file__).resolve().parent.parent
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+
+@pytest.fixture
+def dossier_travail(tmp_path, monkeypatch):
+    """Dossier courant temporaire contenant donnees/ (vide)."""
+    (tmp_path / 'donnees').mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du relais des événements vers Tk (nécessitent un affichage)."""
+
+import threading
+import time
+
+import pytest
+
+tk = pytest.importorskip('tkinter')
+
+from python.evenements.bus import BusEvenements  # noqa: E402
+from python.interface.abonnements import INTERVALLE_RELEVE, AbonnementsTk  # noqa: E402
+
+
+@pytest.fixture
+def racine():
+    try:
+        racine = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"Pas d'affichage : {e}")
+    racine.withdraw()
+    yield racine
+    racine.destroy()
+
+
+def pomper(racine, duree):
+    fin = time.monotonic() + duree
+    while time.monotonic() < fin:
+        racine.update()
+        time.sleep(0.005)
+
+
+def test_evenements_d_autres_threads_distribues_dans_le_thread_tk(racine):
+    bus = BusEvenements()
+    abonnements = AbonnementsTk(racine, bus)
+    recus = []
+    abonnements.abonner('vente', lambda evenements: recus.append((threading.get_ident(), len(evenements))))
+
+    threads = [threading.Thread(target=lambda: [bus.publier('vente', n=n) for n in range(10)]) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert recus == []  # Rien n'est appelé depuis les threads qui publient
+
+    pomper(racine, 3 * INTERVALLE_RELEVE / 1000)
+    assert {ident for ident, _ in recus} == {threading.get_ident()}
+    assert sum(nombre for _, nombre in recus) == 30
+    abonnements.fermer()
+
+
+def test_evenements_du_thread_tk_regroupes(racine):
+    bus = BusEvenements()
+    abonnements = AbonnementsTk(racine, bus)
+    recus = []
+    abonnements.abonner('vente', lambda evenements: recus.append(len(evenements)))
+    for n in range(10):
+        bus.publier('vente', n=n)
+    racine.update_idletasks()
+    assert recus == [10]
+
+    abonnements.fermer()
+    bus.publier('vente', n=11)
+    pomper(racine, 3 * INTERVALLE_RELEVE / 1000)
+    assert recus == [10]
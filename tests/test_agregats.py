@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests des agrégats de ventes tenus à jour, comparés à une somme de tout l'historique."""
+
+import random
+
+from python.evenements.bus import BusEvenements
+from python.ventes.agregats import AgregatsVentes
+from python.ventes.gestion_ventes import GestionVentes
+
+
+def ventes_aleatoires(nombre, graine=11):
+    generateur = random.Random(graine)
+    ventes = []
+    for i in range(1, nombre + 1):
+        quantite, prix = generateur.randint(1, 4), generateur.choice([4.5, 6.0, 9.5])
+        ventes.append({'id': i, 'date': f"2025-{generateur.randint(1, 3):02d}-{generateur.randint(1, 28):02d} 12:00:00",
+                       'film_id': generateur.randint(1, 8), 'quantite': quantite, 'total': quantite * prix})
+    return ventes
+
+
+def agregats_bruts(ventes):
+    """Même contenu que AgregatsVentes.snapshot(), recalculé sur toutes les ventes."""
+    decoupages = {'par_film': {}, 'par_jour': {}, 'par_mois': {}}
+    for vente in ventes:
+        for nom, cle in (('par_film', vente['film_id']), ('par_jour', vente['date'][:10]),
+                         ('par_mois', vente['date'][:7])):
+            compteur = decoupages[nom].setdefault(cle, {'nombre_ventes': 0, 'quantite': 0, 'revenu': 0.0})
+            compteur['nombre_ventes'] += 1
+            compteur['quantite'] += vente['quantite']
+            compteur['revenu'] += vente['total']
+    return {'nombre_ventes': len(ventes), 'quantite_totale': sum(v['quantite'] for v in ventes),
+            'revenu_total': sum(v['total'] for v in ventes), **decoupages}
+
+
+def en_dicts(snapshot):
+    return {cle: dict(valeur) if cle.startswith('par_') else valeur for cle, valeur in snapshot.items()}
+
+
+def test_ajouts_et_retraits_identiques_au_recalcul():
+    ventes = ventes_aleatoires(500)
+    agregats = AgregatsVentes.depuis(ventes)
+    assert en_dicts(agregats.snapshot()) == agregats_bruts(ventes)
+
+    generateur = random.Random(5)
+    retirees = generateur.sample(ventes, 200)
+    for vente in retirees:
+        agregats.retirer(vente)
+    restantes = [v for v in ventes if v not in retirees]
+    assert en_dicts(agregats.snapshot()) == agregats_bruts(restantes)
+
+    for vente in restantes:
+        agregats.retirer(vente)
+    assert en_dicts(agregats.snapshot()) == agregats_bruts([])
+
+
+def test_snapshot_en_lecture_seule_et_a_jour():
+    agregats = AgregatsVentes.depuis(ventes_aleatoires(10))
+    snapshot = agregats.snapshot()
+    try:
+        snapshot['par_film'][99] = {}
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("Le snapshot ne doit pas être modifiable")
+    agregats.ajouter({'id': 11, 'date': "2025-06-01 10:00:00", 'film_id': 99, 'quantite': 2, 'total': 10.0})
+    assert snapshot['par_film'][99]['quantite'] == 2
+
+
+def test_agregats_du_gestionnaire_suivent_les_ecritures(dossier_travail):
+    gestion = GestionVentes('donnees/ventes.csv', bus=BusEvenements())
+    for film_id in (1, 2, 1, 3):
+        gestion.enregistrer_vente(film_id, f"Film {film_id}", film_id, 4.5)
+    assert gestion.annuler_vente(2)
+    attendu = agregats_bruts(list(gestion.iter_ventes()))
+    assert en_dicts(gestion.snapshot()) == attendu
+    assert gestion.calculer_revenu_total() == attendu['revenu_total']
+    # Un autre gestionnaire relit le fichier : mêmes agrégats
+    assert en_dicts(GestionVentes('donnees/ventes.csv', bus=BusEvenements()).snapshot()) == attendu
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'API asynchrone : regroupement des ventes, rejet d'un seul élément, ordre d'arrivée."""
+
+import asyncio
+
+import pytest
+
+from python.concurrence.asynchrone import FileCollection, GestionnaireAsynchrone
+from python.evenements.bus import BusEvenements
+from python.ventes.gestion_ventes import GestionVentes
+
+
+@pytest.fixture
+def ventes(dossier_travail):
+    gestion = GestionVentes('donnees/ventes.csv', format_ventes='csv', bus=BusEvenements())
+    ajouts = []
+    ajouter = gestion.stockage.ajouter
+    gestion.stockage.ajouter = lambda nouvelles: ajouts.append(len(nouvelles)) or ajouter(nouvelles)
+    asynchrone = GestionnaireAsynchrone(gestion, 'ventes')
+    yield asynchrone, ajouts
+    asynchrone.fermer()
+
+
+def test_ventes_simultanees_ajoutees_en_une_ecriture(ventes):
+    asynchrone, ajouts = ventes
+
+    async def scenario():
+        return await asyncio.gather(*(asynchrone.enregistrer_vente(n, f"Film {n}", n, 5.0) for n in range(1, 6)))
+
+    enregistrees = asyncio.run(scenario())
+    assert [(v['film_id'], v['quantite']) for v in enregistrees] == [(n, n) for n in range(1, 6)]
+    assert [v['id'] for v in enregistrees] == [1, 2, 3, 4, 5]
+    assert ajouts == [5]
+
+
+def test_une_vente_invalide_n_echoue_que_seule(ventes):
+    asynchrone, ajouts = ventes
+
+    async def scenario():
+        return await asyncio.gather(asynchrone.enregistrer_vente(1, "A", 1, 9.5),
+                                    asynchrone.enregistrer_vente(2, "B", -1, 9.5),
+                                    asynchrone.enregistrer_vente(3, "C", 2, 9.5),
+                                    return_exceptions=True)
+
+    premiere, invalide, derniere = asyncio.run(scenario())
+    assert isinstance(invalide, ValueError)
+    assert (premiere['film_id'], derniere['film_id']) == (1, 3)
+    assert ajouts == [2]
+    assert [v['film_id'] for v in asynchrone.gestionnaire.iter_ventes()] == [1, 3]
+
+
+def test_lot_en_echec_repris_element_par_element():
+    def enregistrer(elements):
+        if len(elements) > 1 or elements[0] == 'mauvais':
+            raise ValueError(f"refusé : {elements}")
+        return [element.upper() for element in elements]
+
+    async def scenario():
+        file = FileCollection('test')
+        try:
+            return await asyncio.gather(*(file.grouper(enregistrer, e) for e in ("a", "mauvais", "b")),
+                                        return_exceptions=True)
+        finally:
+            file.fermer()
+
+    a, mauvais, b = asyncio.run(scenario())
+    assert (a, b) == ("A", "B")
+    assert isinstance(mauvais, ValueError)
+
+
+def test_operations_executees_dans_l_ordre_d_arrivee(ventes):
+    asynchrone, ajouts = ventes
+
+    async def scenario():
+        # Annulation soumise après la vente du même lot : elle la trouve
+        vente = asynchrone.enregistrer_vente(1, "A", 1, 5.0)
+        annulation = asynchrone.annuler_vente(1)
+        nouvelle = asynchrone.enregistrer_vente(2, "B", 1, 5.0)
+        return await asyncio.gather(vente, annulation, nouvelle)
+
+    vente, annule, nouvelle = asyncio.run(scenario())
+    assert vente['id'] == 1 and annule is True and nouvelle['id'] == 1
+    assert ajouts == [1, 1]
+    assert [v['film_id'] for v in asynchrone.gestionnaire.iter_ventes()] == [2]
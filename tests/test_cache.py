@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du cache des résultats et de son invalidation par les écritures des gestionnaires."""
+
+import threading
+
+import pytest
+
+from python.cache import cache_resultats
+from python.cache.cache_resultats import CacheResultats
+from python.catalogue.gestion import GestionCatalogue
+from python.evenements.bus import BusEvenements
+from python.ventes.gestion_ventes import GestionVentes
+from python.ventes.stockage_ventes import StockageVentesCSV
+
+
+class Compteur:
+    """Calcul qui compte ses appels."""
+
+    def __init__(self, valeur):
+        self.valeur = valeur
+        self.appels = 0
+
+    def __call__(self):
+        self.appels += 1
+        return self.valeur
+
+
+def test_succes_expiration_et_eviction(monkeypatch):
+    horloge = [100.0]
+    monkeypatch.setattr(cache_resultats.time, 'monotonic', lambda: horloge[0])
+    cache = CacheResultats("test", delai=10, taille_max=2)
+    calcul = Compteur('a')
+
+    assert cache.obtenir('a', calcul) == 'a'
+    assert cache.obtenir('a', calcul) == 'a'
+    assert calcul.appels == 1
+    horloge[0] += 11
+    cache.obtenir('a', calcul)
+    assert calcul.appels == 2 and cache.expirations == 1
+
+    # 'a' vient d'être utilisée : c'est 'b' qui est évincée
+    cache.obtenir('b', Compteur('b'))
+    cache.obtenir('a', calcul)
+    cache.obtenir('c', Compteur('c'))
+    assert cache.evictions == 1
+    recalcul = Compteur('b')
+    cache.obtenir('b', recalcul)
+    assert recalcul.appels == 1
+    assert cache.statistiques()['succes'] == 2
+
+
+def test_invalidation_et_cache_desactive():
+    cache = CacheResultats("test", delai=60)
+    for cle in (('rapport', 1), ('rapport', 2), ('autre',)):
+        cache.obtenir(cle, Compteur(cle))
+    cache.invalider_si(lambda cle: cle[0] == 'rapport' and cle[1] == 2)
+    cache.invalider(('autre',))
+    assert len(cache) == 1 and cache.invalidations == 2
+    cache.vider()
+    assert len(cache) == 0
+
+    desactive = CacheResultats("test", delai=0)
+    calcul = Compteur(1)
+    desactive.obtenir('x', calcul)
+    desactive.obtenir('x', calcul)
+    assert calcul.appels == 2
+
+
+def test_invalidation_pendant_le_calcul_non_perdue():
+    cache = CacheResultats("test", delai=3600)
+    demarre, invalide = threading.Event(), threading.Event()
+
+    def calcul_lent():
+        demarre.set()
+        invalide.wait(5)
+        return "ancienne valeur"
+
+    calcul = threading.Thread(target=cache.obtenir, args=('cle', calcul_lent))
+    calcul.start()
+    demarre.wait(5)
+    # Écriture pendant le calcul : le résultat en cours ne doit pas être gardé
+    cache.invalider('cle')
+    invalide.set()
+    calcul.join(5)
+    assert len(cache) == 0
+    assert cache.obtenir('cle', Compteur("nouvelle valeur")) == "nouvelle valeur"
+
+
+def test_rapport_invalide_seulement_par_les_ventes_de_sa_periode(dossier_travail, monkeypatch):
+    StockageVentesCSV('donnees/ventes.csv').ecrire([
+        {'id': 1, 'date': "2025-01-10 10:00:00", 'film_id': 1, 'titre_film': "A",
+         'quantite': 1, 'prix_unitaire': 5.0, 'total': 5.0},
+        {'id': 2, 'date': "2025-03-10 10:00:00", 'film_id': 2, 'titre_film': "B",
+         'quantite': 2, 'prix_unitaire': 5.0, 'total': 10.0},
+    ])
+    gestion = GestionVentes('donnees/ventes.csv', bus=BusEvenements())
+    calculs = []
+    calculer = gestion._calculer_rapport
+    monkeypatch.setattr(gestion, '_calculer_rapport', lambda debut, fin: calculs.append(debut) or calculer(debut, fin))
+
+    janvier = ("2025-01-01 00:00:00", "2025-01-31 23:59:59")
+    assert gestion.obtenir_rapport_ventes(*janvier)['nombre_ventes'] == 1
+    assert gestion.obtenir_rapport_ventes(*janvier)['nombre_ventes'] == 1
+    assert len(calculs) == 1
+    # Vente enregistrée après la dernière (mars) : le rapport de janvier reste valable
+    gestion.enregistrer_vente(3, "C", 1, 5.0)
+    assert gestion.obtenir_rapport_ventes(*janvier)['nombre_ventes'] == 1
+    assert len(calculs) == 1
+    # Annulation d'une vente de janvier : le rapport est recalculé
+    assert gestion.annuler_vente(1)
+    assert gestion.obtenir_rapport_ventes(*janvier)['nombre_ventes'] == 0
+    assert len(calculs) == 2
+    assert gestion.obtenir_rapport_ventes()['nombre_ventes'] == 2
+
+
+def test_recherche_invalidee_par_un_film_correspondant(dossier_travail):
+    catalogue = GestionCatalogue('donnees/films.csv', utiliser_instantane=False, bus=BusEvenements())
+    for titre, realisateur in (("Alien", "Ridley Scott"), ("Gladiator", "Ridley Scott"), ("Heat", "Michael Mann")):
+        catalogue.ajouter_film({'titre': titre, 'realisateur': realisateur, 'annee': 2000,
+                                'genre': "Action", 'note': 7, 'acteurs': ["X"]})
+    assert [f['titre'] for f in catalogue.rechercher_films("ridley")] == ["Alien", "Gladiator"]
+    assert [f['titre'] for f in catalogue.rechercher_films("mann")] == ["Heat"]
+    invalidations = catalogue.cache.invalidations
+
+    catalogue.ajouter_film({'titre': "Prometheus", 'realisateur': "Ridley Scott", 'annee': 2012,
+                            'genre': "Science-fiction", 'note': 6, 'acteurs': ["Y"]})
+    # Seule la recherche "ridley" est invalidée
+    assert catalogue.cache.invalidations == invalidations + 1
+    assert [f['titre'] for f in catalogue.rechercher_films("ridley")] == ["Alien", "Gladiator", "Prometheus"]
+    succes = catalogue.cache.succes
+    assert [f['titre'] for f in catalogue.rechercher_films("MANN")] == ["Heat"]
+    assert catalogue.cache.succes == succes + 1
+    # Modifier la liste reçue ne touche pas au cache
+    catalogue.rechercher_films("mann").clear()
+    assert [f['titre'] for f in catalogue.rechercher_films("mann")] == ["Heat"]
+
+
+@pytest.mark.parametrize('terme', ["ridley", "inconnu"])
+def test_recherche_sans_resultat_ou_vide(dossier_travail, terme):
+    catalogue = GestionCatalogue('donnees/films.csv', utiliser_instantane=False, bus=BusEvenements())
+    assert catalogue.rechercher_films(terme) == []
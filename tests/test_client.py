@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du client du service : nouvelle tentative seulement quand la rejouer est sans risque."""
+
+import http.client
+import socket
+import threading
+
+import pytest
+
+from python.service.client import ClientService
+
+
+@pytest.fixture
+def serveur_qui_coupe():
+    """Serveur qui lit chaque requête entière puis ferme la connexion sans répondre."""
+    ecoute = socket.create_server(('127.0.0.1', 0))
+    recues = []
+
+    def servir():
+        while True:
+            try:
+                connexion, _ = ecoute.accept()
+            except OSError:
+                return
+            with connexion:
+                donnees = b''
+                while b'\r\n\r\n' not in donnees:
+                    morceau = connexion.recv(65536)
+                    if not morceau:
+                        break
+                    donnees += morceau
+                if donnees:
+                    recues.append(donnees.split(b' ', 1)[0].decode())
+
+    thread = threading.Thread(target=servir, daemon=True)
+    thread.start()
+    yield ecoute.getsockname()[1], recues
+    ecoute.close()
+
+
+def client(port):
+    # Sans __init__ : pas de requête /sante ni de thread d'événements
+    service = ClientService.__new__(ClientService)
+    service.hote, service.port, service.jeton = '127.0.0.1', port, None
+    service._connexions = threading.local()
+    return service
+
+
+@pytest.mark.parametrize('methode, envois', [('GET', 2), ('DELETE', 2), ('POST', 1)])
+def test_requete_envoyee_rejouee_seulement_si_idempotente(serveur_qui_coupe, methode, envois):
+    port, recues = serveur_qui_coupe
+    with pytest.raises((http.client.HTTPException, ConnectionError)):
+        client(port).requete(methode, '/ventes', {'film_id': 1} if methode == 'POST' else None, delai=5)
+    assert recues == [methode] * envois
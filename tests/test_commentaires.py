@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du chargement des commentaires."""
+
+import json
+
+from python.commentaires.gestion_commentaires import GestionCommentaires
+from python.evenements.bus import BusEvenements
+
+
+def test_date_illisible_n_empeche_pas_le_chargement(dossier_travail):
+    fichier = dossier_travail / 'donnees' / 'commentaires.json'
+    commentaires = [
+        {'id': 1, 'film_id': 1, 'utilisateur': "alice", 'note': 4, 'commentaire': "Bien", 'date': "2025-01-02T10:00:00"},
+        {'id': 2, 'film_id': 1, 'utilisateur': "bruno", 'note': 1, 'commentaire': "?", 'date': "hier"},
+        {'id': 3, 'film_id': 2, 'utilisateur': "chloe", 'note': 5, 'commentaire': "Super", 'date': "2025-01-03"},
+    ]
+    fichier.write_text(json.dumps({'comments': commentaires}), encoding='utf-8')
+
+    gestion = GestionCommentaires(bus=BusEvenements())
+    assert [c['id'] for c in gestion.commentaires['comments']] == [1, 3]
+    assert gestion.calculer_moyenne_notes(1) == 4
+
+    # Le commentaire écarté reste dans le fichier, et son ID n'est pas réutilisé
+    gestion.ajouter_commentaire(2, "alice", 3, "Pas mal")
+    enregistres = json.loads(fichier.read_text(encoding='utf-8'))['comments']
+    assert sorted(c['id'] for c in enregistres) == [1, 2, 3, 4]
+    assert next(c for c in enregistres if c['id'] == 2)['date'] == "hier"
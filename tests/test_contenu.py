@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'index de contenu : ajout d'un film à une copie de l'index."""
+
+from python.recommandation.contenu import IndexContenu
+
+
+def film(film_id, realisateur, acteurs, genre="Drame"):
+    return {'id': film_id, 'titre': f"Film {film_id}", 'genre': genre, 'realisateur': realisateur,
+            'acteurs': acteurs}
+
+
+FILMS = [film(1, "R1", ["A", "B"]), film(2, "R1", ["B", "C"]), film(3, "R2", ["C"]),
+         film(4, "R3", ["D"], "Comédie"), film(5, "R2", ["A", "D"], "Comédie")]
+
+
+def test_ajout_a_une_copie_sans_toucher_l_original():
+    index = IndexContenu(FILMS)
+    avant = {film_id: index.voisins(film_id) for film_id in range(1, 6)}
+    nouveau = film(6, "R1", ["A", "C"])
+
+    copie = index.copie()
+    copie.ajouter(nouveau)
+    # L'original n'a pas bougé
+    assert len(index.films) == 5 and 6 not in index.rangs
+    assert {film_id: index.voisins(film_id) for film_id in range(1, 6)} == avant
+    # La copie est identique à un index auquel le film est ajouté directement
+    direct = IndexContenu(FILMS)
+    for film_id in range(1, 6):
+        direct.voisins(film_id)
+    direct.ajouter(nouveau)
+    assert {film_id: copie.voisins(film_id) for film_id in range(1, 7)} == {
+        film_id: direct.voisins(film_id) for film_id in range(1, 7)}
+    assert 6 in [voisin['id'] for voisin, _ in copie.voisins(1)]
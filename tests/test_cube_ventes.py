@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du cube de ventes, comparé à des agrégations faites vente par vente."""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from python.evenements.bus import BusEvenements
+from python.ventes.cube_ventes import CubeVentes, decouper_plage
+from python.ventes.gestion_ventes import GestionVentes
+from python.ventes.stockage_ventes import StockageVentesCSV
+
+GENRES = {1: "Drame", 2: "Comédie", 3: "Drame", 4: "Action", 5: "Animation"}
+CATALOGUE = SimpleNamespace(films=[{'id': film_id, 'genre': genre} for film_id, genre in GENRES.items()])
+
+
+def ventes_aleatoires(nombre, graine=7):
+    """Ventes triées par date sur le premier trimestre 2025, totaux souvent égaux.
+
+    Les prix sont des multiples de 0,5 : les sommes sont exactes quel que
+    soit l'ordre des additions et se comparent avec ==.
+    """
+    generateur = random.Random(graine)
+    instants = sorted(datetime(2025, 1, 1) + timedelta(minutes=generateur.randrange(90 * 24 * 60))
+                      for _ in range(nombre))
+    ventes = []
+    for i, instant in enumerate(instants, 1):
+        film_id = generateur.randint(1, 5)
+        quantite, prix = generateur.randint(1, 3), generateur.choice([5.0, 7.5, 10.0])
+        ventes.append({'id': i, 'date': instant.strftime("%Y-%m-%d %H:%M:%S"), 'film_id': film_id,
+                       'titre_film': f"Film {film_id}", 'quantite': quantite,
+                       'prix_unitaire': prix, 'total': quantite * prix})
+    return ventes
+
+
+def periode(vente, granularite):
+    date = vente['date']
+    if granularite == 'heure':
+        return date[:13]
+    if granularite == 'jour':
+        return date[:10]
+    if granularite == 'mois':
+        return date[:7]
+    annee, numero, _ = datetime.strptime(date[:10], "%Y-%m-%d").isocalendar()
+    return f"{annee}-S{numero:02d}"
+
+
+def requete_brute(ventes, mesure, granularite, debut=None, fin=None, par=None):
+    """Même résultat que CubeVentes.requete, vente par vente."""
+    resultat = {}
+    for vente in ventes:
+        cle = periode(vente, granularite)
+        if (debut and cle < periode({'date': debut}, granularite)) or (fin and cle > periode({'date': fin}, granularite)):
+            continue
+        valeur = {'quantite': vente['quantite'], 'revenu': vente['total'], 'nombre_ventes': 1}[mesure]
+        if par is None:
+            resultat[cle] = resultat.get(cle, 0) + valeur
+        else:
+            groupe = vente['film_id'] if par == 'film' else GENRES[vente['film_id']]
+            groupes = resultat.setdefault(cle, {})
+            groupes[groupe] = groupes.get(groupe, 0) + valeur
+    return resultat
+
+
+def rapport_brut(ventes, debut=None, fin=None):
+    """Rapport des ventes entre deux dates 'AAAA-MM-JJ HH:MM:SS' (incluses), vente par vente."""
+    retenues = [v for v in ventes if (debut is None or v['date'] >= debut) and (fin is None or v['date'] <= fin)]
+    par_film, par_jour = {}, {}
+    for vente in retenues:
+        cumul = par_film.setdefault(vente['titre_film'], {'quantite': 0, 'revenu': 0})
+        cumul['quantite'] += vente['quantite']
+        cumul['revenu'] += vente['total']
+        jour = par_jour.setdefault(vente['date'][:10], {'nombre_ventes': 0, 'revenu': 0})
+        jour['nombre_ventes'] += 1
+        jour['revenu'] += vente['total']
+    revenu = sum(v['total'] for v in retenues)
+    return {
+        'nombre_ventes': len(retenues),
+        'revenu_total': revenu,
+        'quantite_totale': sum(v['quantite'] for v in retenues),
+        'ventes_par_film': par_film,
+        'ventes_par_jour': par_jour,
+        'moyenne_vente': revenu / len(retenues) if retenues else 0,
+        'plus_grosse_vente': min(retenues, key=lambda v: (-v['total'], v['id']), default=None),
+    }
+
+
+def comparer_rapports(rapport, attendu):
+    for cle in ('nombre_ventes', 'quantite_totale'):
+        assert rapport[cle] == attendu[cle]
+    assert rapport['revenu_total'] == attendu['revenu_total']
+    assert rapport['moyenne_vente'] == pytest.approx(attendu['moyenne_vente'])
+    assert rapport['ventes_par_film'] == attendu['ventes_par_film']
+    assert rapport['ventes_par_jour'] == attendu['ventes_par_jour']
+    plus_grosse = rapport['plus_grosse_vente']
+    assert (plus_grosse and plus_grosse['id']) == (attendu['plus_grosse_vente'] and attendu['plus_grosse_vente']['id'])
+    quantites = sorted((cumul['quantite'] for cumul in attendu['ventes_par_film'].values()), reverse=True)[:3]
+    assert [cumul['quantite'] for _, cumul in rapport['films_plus_vendus']] == quantites
+
+
+@pytest.fixture
+def ventes():
+    return ventes_aleatoires(600)
+
+
+@pytest.fixture
+def gestion(dossier_travail, ventes):
+    StockageVentesCSV('donnees/ventes.csv').ecrire(ventes)
+    gestion = GestionVentes('donnees/ventes.csv', bus=BusEvenements())
+    gestion.set_gestion_catalogue(CATALOGUE)
+    return gestion
+
+
+PLAGES = [
+    (None, None),
+    ("2025-01-01 00:00:00", "2025-03-31 23:59:59"),
+    ("2025-01-15 00:00:00", "2025-02-20 23:59:59"),
+    ("2025-01-15 07:00:00", "2025-03-02 16:59:59"),
+    ("2025-02-03 10:00:00", "2025-02-03 12:59:59"),
+    ("2025-01-31 22:00:00", "2025-02-01 01:59:59"),
+    ("2025-02-10 00:00:00", None),
+]
+
+
+@pytest.mark.parametrize('granularite', ['heure', 'jour', 'semaine', 'mois'])
+@pytest.mark.parametrize('par', [None, 'film', 'genre'])
+def test_requete_identique_a_l_agregation_brute(ventes, granularite, par):
+    cube = CubeVentes(CATALOGUE)
+    cube.reconstruire(ventes)
+    for mesure in ('quantite', 'revenu', 'nombre_ventes'):
+        for debut, fin in PLAGES:
+            assert cube.requete(mesure, granularite, debut, fin, par) == requete_brute(
+                ventes, mesure, granularite, debut, fin, par)
+
+
+def heures_entre(debut, fin, granularite):
+    """Toutes les heures 'AAAA-MM-JJ HH' d'une plage de périodes."""
+    format_cle = {'heure': "%Y-%m-%d %H", 'jour': "%Y-%m-%d", 'mois': "%Y-%m"}[granularite]
+    instant = datetime.strptime(debut, format_cle)
+    heures = []
+    while instant.strftime(format_cle) <= fin:
+        heures.append(instant.strftime("%Y-%m-%d %H"))
+        instant += timedelta(hours=1)
+    return heures
+
+
+def test_decouper_plage_couvre_chaque_heure_une_fois():
+    heure = datetime(2024, 12, 30, 5)
+    heures = [(heure + timedelta(hours=13 * i)).strftime("%Y-%m-%d %H") for i in range(200)]
+    for premiere in heures[::17]:
+        for derniere in heures[::23]:
+            couvertes = []
+            for granularite, debut, fin in decouper_plage(premiere, derniere):
+                couvertes += heures_entre(debut, fin, granularite)
+            assert sorted(couvertes) == heures_entre(premiere, derniere, 'heure')
+
+
+@pytest.mark.parametrize('debut, fin', PLAGES)
+def test_rapport_du_cube_identique_au_rapport_brut(gestion, ventes, debut, fin):
+    rapport = gestion.obtenir_rapport_ventes(debut, fin)
+    assert gestion._cube is not None
+    comparer_rapports(rapport, rapport_brut(ventes, debut, fin))
+
+
+def test_rapport_hors_heures_entieres_identique(gestion, ventes):
+    debut, fin = "2025-01-15 07:30:00", "2025-02-02 16:59:58"
+    comparer_rapports(gestion.obtenir_rapport_ventes(debut, fin), rapport_brut(ventes, debut, fin))
+
+
+def test_annulations_repercutees_dans_le_cube(gestion, ventes):
+    rapport = gestion.obtenir_rapport_ventes()
+    plus_grosse = rapport['plus_grosse_vente']
+    # Annuler la plus grosse vente, puis toutes les ventes d'une journée
+    annulees = {plus_grosse['id']} | {v['id'] for v in ventes if v['date'].startswith("2025-02-03")}
+    for vente_id in annulees:
+        assert gestion.annuler_vente(vente_id)
+    restantes = [v for v in ventes if v['id'] not in annulees]
+
+    for debut, fin in PLAGES:
+        comparer_rapports(gestion.obtenir_rapport_ventes(debut, fin), rapport_brut(restantes, debut, fin))
+    assert gestion.cube.requete('revenu', 'mois', par='genre') == requete_brute(restantes, 'revenu', 'mois',
+                                                                                par='genre')
+    assert "2025-02-03" not in gestion.cube.periodes['jour']
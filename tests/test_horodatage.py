@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de la conversion des dates en horodatages : chaînes et datetime donnent le même résultat."""
+
+from datetime import datetime
+
+import pytest
+
+from python.dates.horodatage import horodatage
+
+
+@pytest.mark.parametrize('chaine', [
+    "2025-03-01T10:00:00.500",
+    "2025-03-01 10:00:00.000001",
+    "2025-03-01T10:00:00.000",
+    "2025-03-01T10:00:00",
+    "2025-03-01T10:00:00.250+01:00",
+    "2025-03-01",
+])
+@pytest.mark.parametrize('arrondi_superieur', [False, True])
+def test_chaine_et_datetime_identiques(chaine, arrondi_superieur):
+    assert horodatage(chaine, arrondi_superieur) == horodatage(datetime.fromisoformat(chaine), arrondi_superieur)
+
+
+def test_arrondi_superieur_seulement_pour_une_fraction():
+    assert horodatage("2025-03-01T10:00:00.500", arrondi_superieur=True) == horodatage("2025-03-01T10:00:01")
+    assert horodatage("2025-03-01T10:00:00.000", arrondi_superieur=True) == horodatage("2025-03-01T10:00:00")
+
+
+def test_date_invalide():
+    with pytest.raises(ValueError):
+        horodatage("2025-13-01T10:00:00")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'instantané binaire du catalogue."""
+
+import csv
+import json
+
+from python.catalogue.gestion import CHAMPS_FILM, GestionCatalogue
+from python.catalogue.instantane import ListeFilmsInstantane
+from python.evenements.bus import BusEvenements
+
+
+def ecrire_films(chemin, nombre):
+    with open(chemin, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CHAMPS_FILM)
+        writer.writeheader()
+        for i in range(1, nombre + 1):
+            writer.writerow({'id': i, 'titre': f"Film n°{i}", 'realisateur': "Réal", 'annee': 1990 + i,
+                             'genre': "Drame", 'note': 3.5, 'acteurs': "Acteur A|Acteur B",
+                             'date_ajout': f"2024-01-{i:02d}T10:00:00"})
+
+
+def catalogue(chemin, instantane=True):
+    return GestionCatalogue(fichier_catalogue=str(chemin), utiliser_instantane=instantane, bus=BusEvenements())
+
+
+def test_films_de_l_instantane_identiques_au_csv(dossier_travail):
+    chemin = dossier_travail / 'donnees' / 'films.csv'
+    ecrire_films(chemin, 5)
+    depuis_csv = catalogue(chemin, instantane=False).films
+    catalogue(chemin)  # Écrit l'instantané
+    depuis_instantane = catalogue(chemin).films
+
+    assert isinstance(depuis_instantane, ListeFilmsInstantane)
+    assert all(type(film) is dict for film in depuis_instantane)
+    assert list(depuis_instantane) == depuis_csv
+    assert json.loads(json.dumps(list(depuis_instantane))) == json.loads(json.dumps(depuis_csv))
+    assert json.dumps(depuis_instantane[0])
+
+
+def test_enregistrer_un_catalogue_charge_depuis_l_instantane(dossier_travail):
+    chemin = dossier_travail / 'donnees' / 'films.csv'
+    ecrire_films(chemin, 3)
+    catalogue(chemin)
+    gestion = catalogue(chemin)
+    assert isinstance(gestion.films, ListeFilmsInstantane)
+    gestion.films[1]['note'] = 4.5
+
+    gestion.ajouter_film({'titre': "Nouveau", 'realisateur': "R", 'annee': 2024, 'genre': "Comédie",
+                          'note': 4, 'acteurs': ["X"]})
+
+    relu = catalogue(chemin, instantane=False).films
+    assert [film['titre'] for film in relu] == ["Film n°1", "Film n°2", "Film n°3", "Nouveau"]
+    assert relu[1]['note'] == 4.5
+    assert relu[0]['acteurs'] == ["Acteur A", "Acteur B"]
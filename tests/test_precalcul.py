@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du lot de nuit : mêmes listes que le calcul interactif."""
+
+import random
+
+import pytest
+
+from python.recommandation.contenu import IndexContenu
+from python.recommandation.precalcul import (LotRecommandations, empreinte_notes, enregistrer_lot,
+                                             liste_recommandations, precalculer_tous)
+from python.recommandation.similarite import VoisinageUtilisateurs
+
+
+def catalogue_et_notes(nb_films=40, nb_utilisateurs=30, graine=4):
+    generateur = random.Random(graine)
+    films = [{'id': i, 'titre': f"Film {i}", 'genre': generateur.choice(["Drame", "Comédie", "Action"]),
+              'realisateur': f"R{i % 7}", 'acteurs': [f"A{generateur.randrange(15)}" for _ in range(2)],
+              'note': generateur.randint(1, 10), 'annee': 2000}
+             for i in range(1, nb_films + 1)]
+    notes = {f"u{n:02d}": {str(film_id): {'note': generateur.randint(1, 5)}
+                           for film_id in generateur.sample(range(1, nb_films + 1), generateur.randint(1, 6))}
+             for n in range(nb_utilisateurs)}
+    return films, notes
+
+
+def test_lot_identique_au_calcul_interactif(dossier_travail):
+    # Aucun donnees/films.csv : le lot doit utiliser les films qui lui sont passés
+    films, notes = catalogue_et_notes()
+    utilisateurs = list(notes) + ["sans_note"]
+    lot = precalculer_tous(films, notes, utilisateurs, processus=2, taille_tranche=8)
+    enregistrer_lot('donnees/lot.npz', lot)
+    relu = LotRecommandations('donnees/lot.npz')
+
+    # Sans modèle : voisinage, puis contenu, puis genres, comme en interactif
+    index, voisinage = IndexContenu(films), VoisinageUtilisateurs(notes, films)
+    for utilisateur in utilisateurs:
+        attendu = liste_recommandations(films, utilisateur, notes.get(utilisateur, {}), None, index,
+                                        voisinage=voisinage)
+        empreinte, liste = relu.obtenir(utilisateur)
+        assert empreinte == empreinte_notes(notes.get(utilisateur, {}))
+        assert [film_id for film_id, _ in liste] == [film_id for film_id, _ in attendu]
+        # Scores gardés en float32
+        assert [score for _, score in liste] == pytest.approx([score for _, score in attendu], rel=1e-6)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'assemblage des recommandations de plusieurs sources."""
+
+from python.recommandation.recommandations import recommander_par_genre, recommander_pour_utilisateur
+from python.recommandation.similarite import VoisinageUtilisateurs
+
+FILMS = [{'id': i, 'titre': f"Film {i}", 'genre': "Drame" if i % 2 else "Comédie", 'note': i}
+         for i in range(1, 11)]
+
+
+def test_sources_mises_bout_a_bout_dans_leur_ordre():
+    notes = {
+        'alice': {1: {'note': 5}, 3: {'note': 4}},
+        'bruno': {1: {'note': 5}, 3: {'note': 4}, 2: {'note': 2}},
+    }
+    voisinage = VoisinageUtilisateurs(notes, natif=False)
+    recommandations = recommander_pour_utilisateur(FILMS, 'alice', notes['alice'], 4, voisinage=voisinage)
+
+    # Voisinage d'abord (film 2, score sur l'échelle des notes sur 5), puis
+    # genres préférés (scores plus élevés, sur l'échelle des notes sur 10)
+    assert [(film['id'], score) for film, score in recommandations[:1]] == [
+        (film_id, score) for film_id, score in voisinage.recommander('alice')]
+    genres = recommander_par_genre(FILMS, {"Film 1": 5.0, "Film 3": 4.0}, 4)
+    assert [film['id'] for film, _ in recommandations[1:]] == [film['id'] for film, _ in genres
+                                                               if film['id'] != 2][:3]
+    assert recommandations[1][1] > recommandations[0][1]
+    for debut, fin in ((0, 1), (1, 4)):
+        scores = [score for _, score in recommandations[debut:fin]]
+        assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du service HTTP/JSON : actions réservées aux admins, validation des ventes."""
+
+import asyncio
+import json
+
+import pytest
+
+from python.service.serveur import ServiceCineflix
+
+
+@pytest.fixture
+def service(dossier_travail):
+    service = ServiceCineflix()
+    yield service
+    service.fermer()
+
+
+def appeler(service, methode, cible, corps=None, jeton=None):
+    entetes = {'authorization': f"Bearer {jeton}"} if jeton else {}
+    statut, reponse = asyncio.run(service.traiter(methode, cible, corps or {}, entetes))
+    return statut, json.loads(reponse)
+
+
+def connecter(service, nom, mot_de_passe):
+    statut, reponse = appeler(service, 'POST', '/connexion', {'nom': nom, 'mot_de_passe': mot_de_passe})
+    assert statut == 200 and reponse['succes']
+    return reponse['jeton']
+
+
+def test_actions_admin_reservees_aux_admins_connectes(service):
+    for nom in ("root", "bruno", "chloe"):
+        appeler(service, 'POST', '/utilisateurs', {'nom': nom, 'mot_de_passe': "Secret!2025a",
+                                                   'email': f"{nom}@exemple.fr"})
+    bruno = connecter(service, "bruno", "Secret!2025a")
+
+    assert appeler(service, 'POST', '/utilisateurs/bruno/promotion')[0] == 401
+    assert appeler(service, 'POST', '/utilisateurs/bruno/promotion', jeton="inconnu")[0] == 401
+    assert appeler(service, 'POST', '/utilisateurs/bruno/promotion', jeton=bruno)[0] == 403
+    assert appeler(service, 'DELETE', '/utilisateurs/chloe', jeton=bruno)[0] == 403
+    assert service.utilisateurs.utilisateurs['bruno']['role'] == "user"
+    assert "chloe" in service.utilisateurs.utilisateurs
+
+    root = connecter(service, "root", "Secret!2025a")
+    statut, reponse = appeler(service, 'POST', '/utilisateurs/bruno/promotion', jeton=root)
+    assert statut == 200 and reponse['succes']
+    # Promu : le jeton de bruno donne maintenant les droits admin
+    assert appeler(service, 'DELETE', '/utilisateurs/chloe', jeton=bruno) == (
+        200, {'succes': True, 'message': "Utilisateur supprimé"})
+    # Compte supprimé : son jeton ne vaut plus rien
+    appeler(service, 'DELETE', '/utilisateurs/bruno', jeton=root)
+    assert appeler(service, 'DELETE', '/utilisateurs/root', jeton=bruno)[0] == 403
+
+
+@pytest.mark.parametrize('corps', [
+    {'film_id': 1, 'titre_film': "A", 'quantite': 0, 'prix_unitaire': 9.5},
+    {'film_id': 1, 'titre_film': "A", 'quantite': 1, 'prix_unitaire': -2},
+    {'film_id': 1, 'titre_film': "A", 'quantite': "deux", 'prix_unitaire': 9.5},
+    {'film_id': 1, 'quantite': 1, 'prix_unitaire': 9.5},
+])
+def test_vente_invalide_refusee(service, corps):
+    statut, reponse = appeler(service, 'POST', '/ventes', corps)
+    assert statut == 400 and reponse['erreur']
+    assert list(service.ventes.iter_ventes()) == []
+
+
+def test_vente_enregistree(service):
+    statut, vente = appeler(service, 'POST', '/ventes', {'film_id': 1, 'titre_film': "A",
+                                                         'quantite': 2, 'prix_unitaire': 9.5})
+    assert statut == 201 and vente['total'] == 19.0
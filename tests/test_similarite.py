@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du voisinage des utilisateurs : module C et NumPy identiques au bit près."""
+
+import numpy as np
+import pytest
+
+from python.recommandation.similarite import MESURES, NATIF, MatriceNotes, VoisinageUtilisateurs
+
+natif = pytest.mark.skipif(not NATIF, reason="Extension C non compilée (python construire_similarite.py)")
+
+
+def notes_aleatoires(nb_utilisateurs, nb_films, graine=1):
+    """Notes au format CSR, films croissants et distincts par utilisateur (certains utilisateurs sans note)."""
+    generateur = np.random.default_rng(graine)
+    debuts, films = [0], []
+    for _ in range(nb_utilisateurs):
+        vus = np.sort(generateur.choice(nb_films, generateur.integers(0, 12), replace=False))
+        films.extend(vus.tolist())
+        debuts.append(len(films))
+    notes = generateur.integers(1, 6, len(films)).astype(np.float32)
+    return np.array(debuts), np.array(films), notes
+
+
+@natif
+@pytest.mark.parametrize('mesure', list(MESURES))
+@pytest.mark.parametrize('avec_notes', [True, False])
+def test_c_et_numpy_identiques(mesure, avec_notes):
+    debuts, films, notes = notes_aleatoires(300, 40)
+    notes = notes if avec_notes else None
+    c = MatriceNotes(debuts, films, notes, 40, natif=True)
+    numpy = MatriceNotes(debuts, films, notes, 40, natif=False)
+    for utilisateur in range(0, 300, 7):
+        assert c.similarites(utilisateur, mesure).tobytes() == numpy.similarites(utilisateur, mesure).tobytes()
+        for nombre, nb_voisins in ((10, 50), (3, 5), (0, 50)):
+            films_c, scores_c = c.recommander(utilisateur, nombre, nb_voisins, mesure)
+            films_numpy, scores_numpy = numpy.recommander(utilisateur, nombre, nb_voisins, mesure)
+            assert films_c.tolist() == films_numpy.tolist()
+            assert scores_c.tobytes() == scores_numpy.tobytes()
+
+
+@pytest.mark.parametrize('version', [pytest.param(True, marks=natif), False])
+def test_matrices_invalides(version):
+    with pytest.raises(ValueError):
+        MatriceNotes([0, 2], [3, 1], None, 5, natif=version)  # Films non croissants
+    with pytest.raises(ValueError):
+        MatriceNotes([0, 2], [1, 5], None, 5, natif=version)  # Film hors limites
+    with pytest.raises(ValueError):
+        MatriceNotes([0, 3], [1, 2], None, 5, natif=version)  # Débuts incohérents
+    matrice = MatriceNotes([0, 1], [1], None, 5, natif=version)
+    with pytest.raises(IndexError):
+        matrice.similarites(1)
+    with pytest.raises(ValueError):
+        matrice.similarites(0, 'euclide')
+
+
+def test_similarites_numpy_attendues():
+    # Utilisateur 0 : films 0, 1 ; 1 : films 1, 2 ; 2 : film 3
+    matrice = MatriceNotes([0, 2, 4, 5], [0, 1, 1, 2, 3], None, 4, natif=False)
+    assert matrice.similarites(0, 'jaccard').tolist() == pytest.approx([1.0, 1 / 3, 0.0])
+    assert matrice.similarites(0, 'cosinus').tolist() == pytest.approx([1.0, 0.5, 0.0])
+    films, scores = matrice.recommander(0, 5)
+    assert films.tolist() == [2] and scores.tolist() == pytest.approx([0.5])
+
+
+@pytest.mark.parametrize('version', [pytest.param(True, marks=natif), False])
+def test_voisinage_depuis_les_notes(version):
+    notes = {
+        'alice': {1: {'note': 5}, 2: {'note': 4}},
+        'bruno': {1: {'note': 5}, 2: {'note': 4}, 3: {'note': 5}},
+        'chloe': {4: {'note': 2}},
+    }
+    voisinage = VoisinageUtilisateurs(notes, natif=version)
+    assert [film_id for film_id, _ in voisinage.recommander('alice')] == [3]
+    assert voisinage.recommander('chloe') == []
+    assert voisinage.recommander('inconnu') == []
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests des formats de stockage des ventes (CSV et blocs binaires)."""
+
+import json
+import os
+
+import pytest
+
+from python.dates.horodatage import horodatage
+from python.import_export.gestion_import import exporter, importer_ventes
+from python.ventes.stockage_ventes import StockageVentesBlocs, StockageVentesCSV, creer_stockage
+
+
+def ventes_exemple(nombre, premier_id=1):
+    """Une vente par jour à partir du 1er janvier 2025, films 1 à 5."""
+    return [{
+        'id': premier_id + i,
+        'date': f"2025-01-{1 + i % 28:02d} {9 + i // 28:02d}:00:00",
+        'film_id': 1 + i % 5,
+        'titre_film': f"Film é{1 + i % 5}",
+        'quantite': 1 + i % 3,
+        'prix_unitaire': 9.5,
+        'total': (1 + i % 3) * 9.5,
+    } for i in range(nombre)]
+
+
+def sans_horodatage(ventes):
+    return [{cle: valeur for cle, valeur in vente.items() if cle != 'horodatage'} for vente in ventes]
+
+
+@pytest.fixture
+def blocs(tmp_path):
+    return StockageVentesBlocs(str(tmp_path / 'ventes.blocs'), taille_bloc=4)
+
+
+def test_aller_retour(blocs):
+    ventes = ventes_exemple(10)
+    blocs.ecrire(ventes)
+    lues = list(blocs.lire())
+    assert sans_horodatage(lues) == ventes
+    assert all(v['horodatage'] == horodatage(v['date']) for v in lues)
+    assert [n for _, _, n, *_ in blocs.blocs()] == [4, 4, 2]
+
+
+def test_blocs_hors_periode_ignores(blocs, monkeypatch):
+    ventes = ventes_exemple(12)
+    blocs.ecrire(ventes)
+    decodes = []
+    lignes_bloc = StockageVentesBlocs._lignes_bloc
+
+    def compter(self, tampon, n, *args):
+        decodes.append(n)
+        return lignes_bloc(self, tampon, n, *args)
+
+    monkeypatch.setattr(StockageVentesBlocs, '_lignes_bloc', compter)
+    debut, fin = horodatage("2025-01-05 00:00:00"), horodatage("2025-01-07 23:59:59")
+    lues = list(blocs.lire(debut, fin))
+    # Dates du 5 au 7 : seul le deuxième bloc (ventes 5 à 8) est décodé
+    assert len(decodes) == 1
+    assert [v['id'] for v in lues] == [5, 6, 7]
+    assert [v['id'] for v in blocs.lire(film_id=2)] == [2, 7, 12]
+
+
+def test_ajouts_puis_relecture(blocs):
+    ventes = ventes_exemple(11)
+    blocs.ajouter(ventes[:3])
+    blocs.ajouter(ventes[3:6])
+    blocs.ajouter(iter(ventes[6:]))
+    assert sans_horodatage(blocs.lire()) == ventes
+    # Le dernier bloc incomplet est complété, pas suivi d'un nouveau bloc
+    assert [n for _, _, n, *_ in blocs.blocs()] == [4, 4, 3]
+    assert sans_horodatage(StockageVentesBlocs(blocs.chemin, taille_bloc=4).lire()) == ventes
+
+
+def test_ajout_interrompu_laisse_le_fichier_intact(blocs, monkeypatch):
+    ventes = ventes_exemple(6)
+    blocs.ecrire(ventes)
+    avant = open(blocs.chemin, 'rb').read()
+
+    def ventes_puis_erreur():
+        yield from ventes_exemple(5, premier_id=7)
+        raise RuntimeError("arrêt pendant l'ajout")
+
+    with pytest.raises(RuntimeError):
+        blocs.ajouter(ventes_puis_erreur())
+    assert open(blocs.chemin, 'rb').read() == avant
+    assert sans_horodatage(blocs.lire()) == ventes
+
+
+def test_ajout_en_place_sans_recopier_les_blocs_complets(blocs):
+    ventes = ventes_exemple(10)
+    blocs.ecrire(ventes[:9])
+    debut = open(blocs.chemin, 'rb').read()[:blocs.blocs()[-1][0]]
+    inode = os.stat(blocs.chemin).st_ino
+    blocs.ajouter(ventes[9:])
+    # Même fichier, blocs complets intacts ; pas de journal restant
+    assert os.stat(blocs.chemin).st_ino == inode
+    assert open(blocs.chemin, 'rb').read().startswith(debut)
+    assert not os.path.exists(blocs.chemin_journal)
+    assert sans_horodatage(blocs.lire()) == ventes
+
+
+def test_ajout_coupe_par_un_arret_brutal_annule_au_prochain_acces(blocs, monkeypatch):
+    ventes = ventes_exemple(6)
+    blocs.ecrire(ventes)
+    avant = open(blocs.chemin, 'rb').read()
+
+    def ventes_puis_arret():
+        yield from ventes_exemple(5, premier_id=7)
+        raise KeyboardInterrupt
+
+    # Arrêt brutal : le processus ne restaure rien, le journal reste
+    restaurer = StockageVentesBlocs._restaurer
+    monkeypatch.setattr(StockageVentesBlocs, '_restaurer', lambda self: None)
+    with pytest.raises(KeyboardInterrupt):
+        blocs.ajouter(ventes_puis_arret())
+    assert os.path.exists(blocs.chemin_journal)
+    monkeypatch.setattr(StockageVentesBlocs, '_restaurer', restaurer)
+
+    relu = StockageVentesBlocs(blocs.chemin, taille_bloc=4)
+    assert sans_horodatage(relu.lire()) == ventes
+    assert open(blocs.chemin, 'rb').read() == avant
+    assert not os.path.exists(blocs.chemin_journal)
+
+
+@pytest.mark.parametrize('coupe', [1, 10, 100])
+def test_fichier_tronque(blocs, coupe):
+    blocs.ecrire(ventes_exemple(10))
+    with open(blocs.chemin, 'r+b') as f:
+        f.seek(-coupe, 2)
+        f.truncate()
+    with pytest.raises(ValueError):
+        list(blocs.lire())
+    with pytest.raises(ValueError):
+        blocs.ajouter(ventes_exemple(1, premier_id=11))
+
+
+def test_csv_aller_retour_et_ajout(tmp_path):
+    stockage = StockageVentesCSV(str(tmp_path / 'ventes.csv'))
+    ventes = ventes_exemple(7)
+    stockage.ajouter(ventes[:4])
+    stockage.ajouter(ventes[4:])
+    assert sans_horodatage(stockage.lire()) == ventes
+
+
+@pytest.mark.parametrize('format_ventes', ['csv', 'blocs'])
+def test_import_dans_le_stockage_configure(dossier_travail, format_ventes):
+    csv = str(dossier_travail / 'donnees' / 'ventes.csv')
+    creer_stockage(csv, format_ventes).ecrire(ventes_exemple(3))
+    source = dossier_travail / 'import.jsonl'
+    source.write_text("\n".join(json.dumps({'film_id': 4, 'titre_film': "Importé", 'quantite': q,
+                                            'prix_unitaire': 5, 'date': "2025-02-01 10:00:00"})
+                                for q in (1, 2, 0)), encoding='utf-8')
+
+    rapport = importer_ventes(str(source), 'donnees', format_ventes=format_ventes)
+
+    assert (rapport.lignes_ecrites, rapport.nombre_erreurs) == (2, 1)
+    ventes = list(creer_stockage(csv, format_ventes).lire())
+    assert [v['id'] for v in ventes] == [1, 2, 3, 4, 5]
+    assert [v['total'] for v in ventes[3:]] == [5.0, 10.0]
+    export = dossier_travail / 'export.jsonl'
+    exporter('ventes', str(export), 'donnees', format_ventes=format_ventes)
+    assert [json.loads(ligne)['id'] for ligne in export.read_text(encoding='utf-8').splitlines()] == [1, 2, 3, 4, 5]
+
+
+def test_import_ignore_les_id_existants_non_numeriques(dossier_travail):
+    csv = dossier_travail / 'donnees' / 'ventes.csv'
+    StockageVentesCSV(str(csv)).ecrire(ventes_exemple(3))
+    lignes = csv.read_text(encoding='utf-8').splitlines()
+    lignes[2] = lignes[2].replace('2,', 'abc,', 1)
+    csv.write_text("\n".join(lignes) + "\n", encoding='utf-8')
+    source = dossier_travail / 'import.jsonl'
+    source.write_text(json.dumps({'film_id': 4, 'titre_film': "Importé", 'quantite': 1,
+                                  'prix_unitaire': 5, 'date': "2025-02-01 10:00:00"}), encoding='utf-8')
+
+    rapport = importer_ventes(str(source), 'donnees', format_ventes='csv')
+
+    assert (rapport.lignes_ecrites, rapport.nombre_erreurs) == (1, 1)
+    assert rapport.erreurs[0][0] == 3 and "'abc'" in rapport.erreurs[0][1]
+    assert csv.read_text(encoding='utf-8').splitlines()[-1].startswith('4,')
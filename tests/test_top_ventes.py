@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du classement des ventes : fenêtres glissantes, ventes en retard, requêtes sans effet."""
+
+import copy
+import random
+
+import pytest
+
+from python.ventes.top_ventes import FENETRES, TopVentes
+
+DEBUT = 1_735_725_600  # 2025-01-01 10:00 UTC
+
+
+def ventes_desordonnees(nombre, graine=3):
+    """Ventes sur trois jours, dont un quart arrive avec jusqu'à deux heures de retard."""
+    generateur = random.Random(graine)
+    instant, ventes = DEBUT, []
+    for i in range(1, nombre + 1):
+        instant += generateur.randrange(0, 900)
+        retard = generateur.randrange(7200) if generateur.random() < 0.25 else 0
+        quantite = generateur.randint(1, 4)
+        ventes.append({'id': i, 'horodatage': instant - retard, 'film_id': generateur.randint(1, 12),
+                       'quantite': quantite, 'total': quantite * 8.0})
+    return ventes
+
+
+def valeurs_brutes(ventes, fenetre, nb_tranches, mesure, maintenant, horloge=None):
+    """Cumuls attendus : tranches recouvrant [maintenant - durée, maintenant], moins celles oubliées à l'insertion."""
+    duree = FENETRES[fenetre]
+    largeur = duree // nb_tranches
+    if horloge is None:
+        horloge = max(v['horodatage'] for v in ventes)
+    valeurs = {}
+    for vente in ventes:
+        debut = vente['horodatage'] - vente['horodatage'] % largeur
+        if debut + largeur > max(maintenant, horloge) - duree and debut <= maintenant:
+            valeurs[vente['film_id']] = valeurs.get(vente['film_id'], 0) + vente[
+                'quantite' if mesure == 'quantite' else 'total']
+    return valeurs
+
+
+@pytest.mark.parametrize('fenetre', ['heure', 'jour'])
+def test_fenetres_avec_ventes_en_retard(fenetre):
+    ventes = ventes_desordonnees(400)
+    top = TopVentes(nb_tranches=12)
+    for vente in ventes:
+        top.ajouter(vente)
+    horloge = top.dernier_horodatage
+    for decalage in (-5400, -600, 0, 1800, 4000):
+        maintenant = horloge + decalage
+        for mesure in ('quantite', 'revenu'):
+            assert top.valeurs(mesure, fenetre, maintenant) == valeurs_brutes(ventes, fenetre, 12, mesure, maintenant)
+
+
+def test_requete_sans_effet_sur_l_etat():
+    ventes = ventes_desordonnees(200)
+    top = TopVentes(nb_tranches=12)
+    for vente in ventes:
+        top.ajouter(vente)
+    avant = top.valeurs('quantite', 'heure')
+    tranches = copy.deepcopy([(debut, c.mesures) for debut, c in top.fenetres['heure'].tranches])
+
+    # Une requête loin dans le futur ne vide pas la fenêtre
+    assert top.valeurs('quantite', 'heure', top.dernier_horodatage + 10 * 3600) == {}
+    assert top.valeurs('quantite', 'heure') == avant
+    assert [(debut, c.mesures) for debut, c in top.fenetres['heure'].tranches] == tranches
+    # Le résultat retourné est une copie
+    top.valeurs('quantite', 'heure').clear()
+    assert top.valeurs('quantite', 'heure') == avant
+
+
+def test_annulation_et_mode_approche():
+    ventes = ventes_desordonnees(300)
+    exact, approche = TopVentes(k=3), TopVentes(k=3, mode='approx', capacite=64)
+    for vente in ventes:
+        exact.ajouter(vente)
+        approche.ajouter(vente)
+    for vente in ventes[-40:]:
+        exact.retirer(vente)
+        approche.retirer(vente)
+    horloge = exact.dernier_horodatage
+    for fenetre in ('heure', 'jour', 'semaine'):
+        attendu = valeurs_brutes(ventes[:-40], fenetre, 24, 'quantite', horloge, horloge)
+        assert exact.valeurs('quantite', fenetre) == attendu
+        # Capacité supérieure au nombre de films : le mode approché est exact
+        assert approche.valeurs('quantite', fenetre) == attendu
+    assert exact.top('quantite') == approche.top('quantite')
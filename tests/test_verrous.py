@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du partage de donnees/ entre processus : verrous, écriture atomique, écritures concurrentes."""
+
+import multiprocessing
+import os
+
+import pytest
+
+from python.concurrence.fichiers import ecriture_atomique, verrou_fichier
+from python.evenements.bus import BusEvenements
+from python.ventes.gestion_ventes import GestionVentes
+
+fcntl = pytest.importorskip('fcntl')
+
+
+def verrou_libre(chemin, exclusif=True):
+    """Tente de poser le verrou depuis une autre description de fichier, sans attendre."""
+    descripteur = os.open(f"{chemin}.verrou", os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(descripteur, (fcntl.LOCK_EX if exclusif else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    else:
+        fcntl.flock(descripteur, fcntl.LOCK_UN)
+        return True
+    finally:
+        os.close(descripteur)
+
+
+def test_verrou_exclusif_partage_et_reentrant(tmp_path):
+    chemin = tmp_path / 'donnees.json'
+    with verrou_fichier(chemin, exclusif=False):
+        assert verrou_libre(chemin, exclusif=False)
+        assert not verrou_libre(chemin)
+        with verrou_fichier(chemin, exclusif=False):
+            assert not verrou_libre(chemin)
+        # Pas de promotion en exclusif : flock la ferait en deux temps
+        with pytest.raises(RuntimeError):
+            with verrou_fichier(chemin):
+                pass
+        assert not verrou_libre(chemin)
+        assert verrou_libre(chemin, exclusif=False)
+    with verrou_fichier(chemin):
+        with verrou_fichier(chemin, exclusif=False):
+            assert not verrou_libre(chemin, exclusif=False)
+        with verrou_fichier(chemin):
+            assert not verrou_libre(chemin, exclusif=False)
+        assert not verrou_libre(chemin, exclusif=False)
+    assert verrou_libre(chemin)
+
+
+def test_verrou_relache_apres_une_exception(tmp_path):
+    chemin = tmp_path / 'donnees.json'
+    with pytest.raises(RuntimeError):
+        with verrou_fichier(chemin):
+            raise RuntimeError("erreur dans le bloc")
+    assert verrou_libre(chemin)
+
+
+def test_ecriture_atomique(tmp_path):
+    chemin = tmp_path / 'donnees.json'
+    chemin.write_text("ancien", encoding='utf-8')
+    with pytest.raises(RuntimeError):
+        with ecriture_atomique(chemin, encoding='utf-8') as f:
+            f.write("nouveau")
+            raise RuntimeError("interrompu")
+    assert chemin.read_text(encoding='utf-8') == "ancien"
+    with ecriture_atomique(chemin, encoding='utf-8') as f:
+        f.write("nouveau")
+    assert chemin.read_text(encoding='utf-8') == "nouveau"
+    assert [p.name for p in tmp_path.iterdir()] == ['donnees.json']
+
+
+def enregistrer_ventes(film_id, nombre):
+    gestion = GestionVentes('donnees/ventes.csv', bus=BusEvenements())
+    for _ in range(nombre):
+        gestion.enregistrer_vente(film_id, f"Film {film_id}", 1, 5.0)
+
+
+def test_ecritures_concurrentes_de_plusieurs_processus(dossier_travail):
+    contexte = multiprocessing.get_context('fork')
+    processus = [contexte.Process(target=enregistrer_ventes, args=(film_id, 15)) for film_id in range(1, 5)]
+    for p in processus:
+        p.start()
+    for p in processus:
+        p.join(60)
+        assert p.exitcode == 0
+
+    ventes = list(GestionVentes('donnees/ventes.csv', bus=BusEvenements()).iter_ventes())
+    # Aucune vente perdue, aucun ID en double
+    assert len(ventes) == 60
+    assert sorted(v['id'] for v in ventes) == list(range(1, 61))
+    assert {film_id: sum(v['film_id'] == film_id for v in ventes) for film_id in range(1, 5)} == dict.fromkeys(
+        range(1, 5), 15)